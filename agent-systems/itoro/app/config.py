@@ -32,6 +32,8 @@ LOG_DIRECTORY = os.path.join(os.path.dirname(__file__), "logs")  # Absolute path
 LOG_FILENAME = "trading_system.log"  # Name of the log file
 LOG_MAX_SIZE_MB = 10  # Maximum size of log file before rotation (in MB)
 LOG_BACKUP_COUNT = 5  # Number of backup log files to keep
+LOG_RATE_LIMIT_PER_SITE = 20  # Max messages from one logging call site per window (excess is counted, not shown)
+LOG_RATE_LIMIT_WINDOW_SEC = 1.0  # Rate limit window in seconds
 
 # =============================================================================
 # 🤖 AI MODEL CONFIGURATION
@@ -15,7 +15,7 @@ import json
 from datetime import datetime, timedelta
 from typing import Dict
 import traceback
-import concurrent.futures
+import functools
 
 # Fix Windows console encoding for Unicode characters
 if sys.platform == 'win32':
@@ -224,13 +224,20 @@ funding_module = importlib.util.module_from_spec(funding_spec)
 funding_spec.loader.exec_module(funding_module)
 FundingAgent = funding_module.FundingAgent
 
+from scripts.shared_services.agent_scheduler import AgentScheduler
+from scripts.shared_services.logger import set_agent_context
+
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
+# Worker threads shared by all agents (a slow cycle no longer holds up the others)
+AGENT_POOL_WORKERS = 3
+
 class MultiAgentScheduler:
     """
-    Robust multi-agent scheduler with sequential execution.
-    Agents run in order: OI -> Funding -> Chart Analysis, ensuring organized execution.
+    Robust multi-agent scheduler with deadline-ordered, concurrent execution.
+    Due agents run concurrently on a shared worker pool, earliest deadline
+    first; an agent listed in another's 'depends_on' always runs before it.
     """
     
     def __init__(self, silent_init=False):
@@ -240,6 +247,7 @@ class MultiAgentScheduler:
         self.agent_status = {}
         self.shutdown_event = threading.Event()
         self.silent_init = silent_init
+        self.scheduler = None
         
         # Initialize Redis client for UI updates
         self.redis_client = None
@@ -282,7 +290,7 @@ class MultiAgentScheduler:
     def _initialize_agents(self):
         """Initialize all agents with their execution methods and intervals"""
         try:
-            # Define agent execution order: Chart Analysis -> Funding -> OI
+            # Define agent display order: Chart Analysis -> Funding -> OI (runs are ordered by deadline)
             self.agent_execution_order = ['chartanalysis', 'funding', 'oi']
             
             # Chart Analysis Agent - runs every hour (FIRST)
@@ -303,6 +311,7 @@ class MultiAgentScheduler:
                     'status': 'idle',
                     'error_count': 0,
                     'max_retries': 3,
+                    'depends_on': [],  # Agents that must run first when both are due
                     'max_runtime_minutes': 5,  # 5 minutes timeout
                     'order': 1
                 }
@@ -329,6 +338,7 @@ class MultiAgentScheduler:
                 'status': 'idle',
                 'error_count': 0,
                 'max_retries': 3,
+                'depends_on': [],
                 'max_runtime_minutes': 10,  # 10 minutes timeout
                 'order': 2
             }
@@ -344,6 +354,7 @@ class MultiAgentScheduler:
                 'status': 'idle',
                 'error_count': 0,
                 'max_retries': 3,
+                'depends_on': [],
                 'max_runtime_minutes': 10,  # 10 minutes timeout
                 'order': 3
             }
@@ -602,149 +613,63 @@ class MultiAgentScheduler:
             })
             return False
     
-    def _should_run_agent(self, agent_name: str, agent_info: Dict) -> bool:
-        """Check if an agent should run based on its schedule"""
-        now = datetime.now()
-        
-        # Check if it's time to run
-        if now >= agent_info['next_run']:
-            # Check if agent is not currently running
-            if agent_info['status'] == 'idle':
-                return True
-            # If agent is running but has been running too long, force timeout
-            elif agent_info['status'] == 'running':
-                if 'start_time' in agent_info:
-                    running_time = (now - agent_info['start_time']).total_seconds()
-                    max_runtime = agent_info.get('max_runtime_minutes', 15) * 60  # Default 15 minutes
-                    if running_time > max_runtime:
-                        logger.warning(f"⚠️ {agent_name} has been running for {running_time/60:.1f} minutes, forcing timeout")
-                        agent_info['status'] = 'idle'
-                        agent_info['error_count'] = agent_info.get('error_count', 0) + 1
-                        return True
-                else:
-                    # If no start_time recorded, assume it's been running too long
-                    logger.warning(f"⚠️ {agent_name} has been running without start_time, forcing timeout")
-                    agent_info['status'] = 'idle'
-                    agent_info['error_count'] = agent_info.get('error_count', 0) + 1
-                    return True
-        
-        return False
+    def _build_scheduler(self) -> AgentScheduler:
+        """Register every agent with the deadline-ordered scheduler"""
+        scheduler = AgentScheduler(
+            max_workers=AGENT_POOL_WORKERS,
+            on_start=self._on_agent_start,
+            on_finish=self._on_agent_finish
+        )
+        for agent_name in self.agent_execution_order:
+            agent_info = self.agents[agent_name]
+            scheduler.add_agent(
+                agent_name,
+                functools.partial(agent_info['execution_method'], agent_info),
+                interval=agent_info['interval_minutes'] * 60,
+                first_run_at=agent_info['next_run'].timestamp(),
+                depends_on=agent_info.get('depends_on', []),
+                max_runtime=agent_info.get('max_runtime_minutes', 15) * 60,
+                max_retries=agent_info['max_retries']
+            )
+        return scheduler
     
-    def _update_agent_schedule(self, agent_name: str, agent_info: Dict, success: bool):
-        """Update agent schedule and status after execution"""
-        now = datetime.now()
+    def _on_agent_start(self, agent_name: str):
+        """Mark an agent as running when the scheduler dispatches it"""
+        # Pool threads are shared, so tag this run's log output with its agent
+        set_agent_context(agent_name)
+        agent_info = self.agents[agent_name]
+        agent_info['status'] = 'running'
+        agent_info['start_time'] = datetime.now()
+        logger.info(f"🚀 Starting {agent_name} execution...")
         
-        # Update last run time
-        agent_info['last_run'] = now
-        
-        # Calculate next run time
-        interval_minutes = agent_info['interval_minutes']
-        agent_info['next_run'] = now + timedelta(minutes=interval_minutes)
-        
-        # Update status and clear start time
-        agent_info['status'] = 'idle'
-        if 'start_time' in agent_info:
-            del agent_info['start_time']
+        # Publish 'running' status to UI
+        channel_map = {
+            'chartanalysis': 'chart:updates',
+            'funding': 'funding:updates',
+            'oi': 'oi:updates'
+        }
+        if agent_name in channel_map:
+            self._publish_ui_update(channel_map[agent_name], {
+                'status': 'running'
+            })
+    
+    def _on_agent_finish(self, agent_name: str, success: bool, next_due: float):
+        """Mirror the scheduler's outcome into the agent status table"""
+        agent_info = self.agents[agent_name]
+        scheduled = self.scheduler.agents[agent_name]
         
-        # Update error count
-        if success:
-            agent_info['error_count'] = 0
-        else:
-            agent_info['error_count'] += 1
-            
-            # If too many errors, delay next run
-            if agent_info['error_count'] >= agent_info['max_retries']:
-                delay_minutes = min(interval_minutes * 2, 60)  # Max 1 hour delay
-                agent_info['next_run'] = now + timedelta(minutes=delay_minutes)
-                logger.warning(f"⚠️ {agent_name} has failed {agent_info['error_count']} times. "
-                             f"Delaying next run by {delay_minutes} minutes")
+        agent_info['last_run'] = datetime.now()
+        agent_info['next_run'] = datetime.fromtimestamp(next_due)
+        agent_info['error_count'] = scheduled.error_count
+        # A timed-out run keeps its worker thread until the agent returns
+        if not scheduled.running:
+            agent_info['status'] = 'idle'
+            agent_info.pop('start_time', None)
         
         logger.debug(f"📅 {agent_name} next run scheduled for {agent_info['next_run'].strftime('%H:%M:%S')}")
-    
-    def _execute_agent_safely(self, agent_name: str, agent_info: Dict):
-        """Execute an agent sequentially with proper error handling and timeout"""
-        # Check if agent is already running
-        if agent_info['status'] == 'running':
-            logger.warning(f"⚠️ {agent_name} is already running, skipping this execution")
-            return
         
-        try:
-            # Update status and track start time
-            agent_info['status'] = 'running'
-            agent_info['start_time'] = datetime.now()
-            logger.info(f"🚀 Starting {agent_name} execution...")
-            
-            # Publish 'running' status to UI
-            channel_map = {
-                'chartanalysis': 'chart:updates',
-                'funding': 'funding:updates',
-                'oi': 'oi:updates'
-            }
-            if agent_name in channel_map:
-                self._publish_ui_update(channel_map[agent_name], {
-                    'status': 'running'
-                })
-            
-            # Execute the agent with timeout protection
-            max_runtime = agent_info.get('max_runtime_minutes', 15) * 60  # Convert to seconds
-            
-            def execute_with_timeout():
-                return agent_info['execution_method'](agent_info)
-            
-            # Use threading with timeout to prevent infinite loops
-            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(execute_with_timeout)
-                try:
-                    success = future.result(timeout=max_runtime)
-                except concurrent.futures.TimeoutError:
-                    logger.error(f"⏰ {agent_name} execution timed out after {max_runtime/60:.1f} minutes")
-                    success = False
-                except Exception as e:
-                    logger.error(f"❌ {agent_name} execution failed: {str(e)}")
-                    success = False
-            
-            # Update schedule
-            self._update_agent_schedule(agent_name, agent_info, success)
-            
-            # Print status after agent completes
-            self._print_status()
-            
-        except Exception as e:
-            logger.error(f"❌ Unexpected error in {agent_name} execution: {str(e)}")
-            logger.error(traceback.format_exc())
-            self._update_agent_schedule(agent_name, agent_info, False)
-            
-            # Print status even on error
-            self._print_status()
-    
-
-    
-    def _monitor_agents(self):
-        """Monitor and schedule agent executions sequentially"""
-        while not self.shutdown_event.is_set():
-            try:
-                # Check agents in order: chartanalysis -> sentiment -> whale
-                for agent_name in self.agent_execution_order:
-                    if self.shutdown_event.is_set():
-                        break
-                        
-                    agent_info = self.agents[agent_name]
-                    
-                    logger.debug(f"🔍 Checking {agent_name}: status={agent_info['status']}, next_run={agent_info['next_run']}")
-                    
-                    if self._should_run_agent(agent_name, agent_info):
-                        logger.info(f"🔄 Starting sequential execution: {agent_name}")
-                        self._execute_agent_safely(agent_name, agent_info)
-                        
-                        # Wait a moment between agents for clean separation
-                        time.sleep(2)
-                
-                # Sleep for a short interval to prevent excessive CPU usage
-                time.sleep(10)  # Check every 10 seconds
-                
-            except Exception as e:
-                logger.error(f"❌ Error in agent monitoring: {str(e)}")
-                time.sleep(30)  # Wait longer on error
+        # Print status after agent completes
+        self._print_status()
     
     def _print_status(self):
         """Print current agent status with hacker theme"""
@@ -844,13 +769,8 @@ class MultiAgentScheduler:
         try:
             self.running = True
             
-            # Start monitoring thread
-            monitor_thread = threading.Thread(
-                target=self._monitor_agents,
-                name="AgentMonitor",
-                daemon=True
-            )
-            monitor_thread.start()
+            # Start the deadline-ordered agent scheduler
+            self.scheduler = self._build_scheduler().start()
             
             # Start status monitor thread
             status_thread = threading.Thread(
@@ -923,20 +843,12 @@ class MultiAgentScheduler:
             logger.info("⏳ Waiting for running agents to complete...")
             
             # Wait up to 30 seconds for agents to finish
-            shutdown_timeout = 30
-            start_time = time.time()
-            
-            while time.time() - start_time < shutdown_timeout:
-                running_agents = [
-                    name for name, info in self.agents.items() 
-                    if info['status'] == 'running'
-                ]
-                
-                if not running_agents:
-                    break
-                
-                logger.info(f"⏳ Waiting for agents to complete: {', '.join(running_agents)}")
-                time.sleep(2)
+            if self.scheduler:
+                running_agents = self.scheduler.running_agents()
+                if running_agents:
+                    logger.info(f"⏳ Waiting for agents to complete: {', '.join(running_agents)}")
+                if not self.scheduler.stop(timeout=30):
+                    logger.warning(f"⚠️ Agents still running at shutdown: {', '.join(self.scheduler.running_agents())}")
             
             logger.info("✅ Multi-Agent Scheduler shutdown complete")
             
@@ -944,7 +856,8 @@ class MultiAgentScheduler:
             logger.error(f"❌ Error during shutdown: {str(e)}")
     
     def get_agent_status(self) -> Dict:
-        """Get current status of all agents"""
+        """Get current status of all agents, with run duration/lateness/overlap metrics"""
+        metrics = self.scheduler.get_metrics()['agents'] if self.scheduler else {}
         status = {}
         for agent_name, agent_info in self.agents.items():
             status[agent_name] = {
@@ -952,9 +865,14 @@ class MultiAgentScheduler:
                 'last_run': agent_info['last_run'],
                 'next_run': agent_info['next_run'],
                 'error_count': agent_info['error_count'],
-                'interval_minutes': agent_info['interval_minutes']
+                'interval_minutes': agent_info['interval_minutes'],
+                'metrics': metrics.get(agent_name, {})
             }
         return status
+    
+    def get_scheduler_metrics(self) -> Dict:
+        """Per-agent run duration, lateness and overlap metrics plus worker pool usage"""
+        return self.scheduler.get_metrics() if self.scheduler else {}
 
 def main():
     """Main entry point with hacker theme"""
@@ -1,15 +1,29 @@
 """
 Logging utilities for Anarcho Capital's Trading Desktop App
 Provides consistent logging with UI integration
+
+The calling thread only builds a log record and puts it on a queue; a
+background listener thread does the file writes and colored console output.
+Agent identity (console color, DeFi context) comes from a context variable set
+once per agent thread with set_agent_context()/agent_context(); callers that
+never set it fall back to call-stack detection, which is memoized per call
+stack. Repeated messages from one call site are rate limited per message
+template (numbers masked); errors and above are never dropped.
 """
 
 import os
 import logging
+import logging.handlers
+import atexit
+import contextvars
+import queue
+from contextlib import contextmanager
 from datetime import datetime
+import time
 import traceback
 import sys
-import inspect
 import re
+import threading
 from pathlib import Path
 from colorama import init, Fore, Back, Style
 from termcolor import colored
@@ -48,6 +62,12 @@ except ImportError:
     SHOW_DEBUG_IN_CONSOLE = False  # Disabled debug console output to prevent terminal spam
     SHOW_TIMESTAMPS_IN_CONSOLE = True
 
+try:
+    from config import LOG_RATE_LIMIT_PER_SITE, LOG_RATE_LIMIT_WINDOW_SEC
+except ImportError:
+    LOG_RATE_LIMIT_PER_SITE = 20  # Messages per call site and template per window before suppression
+    LOG_RATE_LIMIT_WINDOW_SEC = 1.0
+
 # Create logger
 logger = logging.getLogger("anarcho_capital")
 
@@ -60,7 +80,10 @@ level_map = {
     "CRITICAL": logging.CRITICAL
 }
 
-logger.setLevel(level_map.get(LOG_LEVEL, logging.INFO))
+_FILE_LEVEL = level_map.get(LOG_LEVEL, logging.INFO)
+# Console output travels through the logger too, so the logger must pass
+# whatever the console shows even when the file level is stricter
+logger.setLevel(min(_FILE_LEVEL, logging.DEBUG if SHOW_DEBUG_IN_CONSOLE else logging.INFO))
 
 # Agent color mapping using termcolor
 AGENT_COLORS = {
@@ -78,67 +101,139 @@ AGENT_COLORS = {
     'master_agent': 'blue',             # Blue for Master Agent (supreme orchestrator)
 }
 
+# (color, defi_context) for the agent running in the current thread/task
+_agent_context = contextvars.ContextVar("anarcho_log_agent", default=None)
+
+def set_agent_context(agent: str, defi: bool = None) -> contextvars.Token:
+    """
+    Declare which agent the current thread (or asyncio task) is logging for.
+    Call once at the start of the agent's thread; returns a token for reset_agent_context().
+
+    Args:
+        agent: Agent name, with or without the '_agent' suffix (e.g. 'copybot')
+        defi: Force DeFi console colors (default: inferred from the name)
+    """
+    key = agent if agent in AGENT_COLORS else f"{agent}_agent"
+    color = AGENT_COLORS.get(key, 'white')
+    if defi is None:
+        defi = 'defi' in agent.lower()
+    return _agent_context.set((color, defi))
+
+def reset_agent_context(token: contextvars.Token):
+    """Restore the agent context that was active before set_agent_context()"""
+    _agent_context.reset(token)
+
+@contextmanager
+def agent_context(agent: str, defi: bool = None):
+    """Log as `agent` for the duration of the block"""
+    token = set_agent_context(agent, defi)
+    try:
+        yield
+    finally:
+        reset_agent_context(token)
+
+def _color_for_filename(filename):
+    """Agent color for a source file, or None if it isn't an agent file"""
+    if 'staking_agent' in filename:
+        return AGENT_COLORS['staking_agent']
+    elif 'copybot_agent' in filename:
+        return AGENT_COLORS['copybot_agent']
+    elif 'harvesting_agent' in filename:
+        return AGENT_COLORS['harvesting_agent']
+    elif 'risk_agent' in filename:
+        return AGENT_COLORS['risk_agent']
+    elif 'sentiment_agent' in filename:
+        return AGENT_COLORS['sentiment_agent']
+    elif 'whale_agent' in filename:
+        return AGENT_COLORS['whale_agent']
+    elif 'chartanalysis_agent' in filename:
+        return AGENT_COLORS['chartanalysis_agent']
+    elif 'defi_agent' in filename or 'defi' in filename.lower():
+        return AGENT_COLORS['defi_agent']
+    elif 'onchain_agent' in filename:
+        return AGENT_COLORS['onchain_agent']
+    elif 'oi_agent' in filename:
+        return AGENT_COLORS['oi_agent']
+    elif 'funding_agent' in filename:
+        return AGENT_COLORS['funding_agent']
+    elif 'master_agent' in filename:
+        return AGENT_COLORS['master_agent']
+    return None
+
+# Call-stack detection results keyed by the code objects of the 5 calling frames
+_stack_context_cache = {}
+
+def _detect_context(frame):
+    """(color, defi_context) from the caller's stack when no agent context is set"""
+    codes = []
+    for _ in range(5):  # Check up to 5 levels up
+        if frame is None:
+            break
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    key = tuple(codes)
+    cached = _stack_context_cache.get(key)
+    if cached is None:
+        filenames = [code.co_filename for code in codes]
+        color = next((c for c in map(_color_for_filename, filenames) if c), 'white')
+        defi = any('defi' in name.lower() for name in filenames)
+        cached = _stack_context_cache[key] = (color, defi)
+    return cached
+
 def get_calling_agent_color():
     """
     Detect which agent is calling the logger and return appropriate color
     """
-    try:
-        # Get the call stack
-        frame = inspect.currentframe()
-        # Go up the stack to find the calling module
-        for _ in range(5):  # Check up to 5 levels up
-            frame = frame.f_back
-            if frame is None:
-                break
-            filename = frame.f_code.co_filename
-            if 'staking_agent' in filename:
-                return AGENT_COLORS['staking_agent']
-            elif 'copybot_agent' in filename:
-                return AGENT_COLORS['copybot_agent']
-            elif 'harvesting_agent' in filename:
-                return AGENT_COLORS['harvesting_agent']
-            elif 'risk_agent' in filename:
-                return AGENT_COLORS['risk_agent']
-            elif 'sentiment_agent' in filename:
-                return AGENT_COLORS['sentiment_agent']
-            elif 'whale_agent' in filename:
-                return AGENT_COLORS['whale_agent']
-            elif 'chartanalysis_agent' in filename:
-                return AGENT_COLORS['chartanalysis_agent']
-            elif 'defi_agent' in filename or 'defi' in filename.lower():
-                return AGENT_COLORS['defi_agent']
-            elif 'onchain_agent' in filename:
-                return AGENT_COLORS['onchain_agent']
-            elif 'oi_agent' in filename:
-                return AGENT_COLORS['oi_agent']
-            elif 'funding_agent' in filename:
-                return AGENT_COLORS['funding_agent']
-            elif 'master_agent' in filename:
-                return AGENT_COLORS['master_agent']
-    except:
-        pass
-    return 'white'  # Default to white if we can't detect the agent
+    context = _agent_context.get()
+    if context is not None:
+        return context[0]
+    return _detect_context(sys._getframe(1))[0]
+
+_ANSI_RE = re.compile(r'\033\[[0-9;]*m')
+
+# YELLOW messages - First set of initialization messages (DeFi specific)
+_DEFI_INIT_YELLOW_RE = re.compile(
+    r"DeFi Protocol Manager initialized|DeFi Risk Manager initialized|Yield Optimizer initialized|"
+    r"Telegram Bot initialized|Initialized.*event triggers|DeFi Event Manager initialized",
+    re.DOTALL
+)
+# CYAN messages - Second set (protocols and DeFi infrastructure) - ONLY in defi context
+_DEFI_INIT_CYAN_RE = re.compile("|".join(re.escape(text) for text in (
+    "Initialized solend protocol", "Initialized mango protocol", "Initialized tulip protocol",
+    "DeFi Safety Validator initialized", "Leverage Loop Engine initialized",
+    "Staking-DeFi Coordinator initialized", "AI DeFi Advisor initialized",
+    "SharedDataCoordinator initialized", "Portfolio Tracker initialized",
+    "Position Manager initialized", "Hybrid RPC Manager initialized", "QuickNode URL:",
+    "Helius URL:", "Alternative mainnet RPCs:", "DeFi Integration Layer initialized",
+    "DeFi agent registered with coordinator", "Telegram bot started successfully",
+    "Telegram bot started for DeFi agent", "DeFi Event Manager started successfully",
+    "DeFi event manager started", "DeFi Agent initialized successfully",
+)))
+
+_console_encoding_set = False
 
 # Unicode-safe console output function
 def safe_console_print(msg, prefix="", color=None):
     """
     Safely print message to console with Unicode handling for Windows
     """
+    global _console_encoding_set
     try:
-        # Try to set console encoding to UTF-8 if on Windows
-        if sys.platform == "win32":
+        # Try to set console encoding to UTF-8 if on Windows (once per process)
+        if sys.platform == "win32" and not _console_encoding_set:
+            _console_encoding_set = True
             try:
                 # Try to set console code page to UTF-8
                 os.system("chcp 65001 > nul 2>&1")
             except:
                 pass
-        
+
         # Apply color if specified
         if color:
             colored_msg = colored(f"{prefix}{msg}", color)
         else:
             colored_msg = f"{prefix}{msg}"
-        
+
         # Try direct print first
         print(colored_msg)
     except UnicodeEncodeError:
@@ -168,16 +263,68 @@ def safe_console_print(msg, prefix="", color=None):
                 colored_msg = f"{prefix}{safe_msg}"
             print(colored_msg)
 
+class ConsoleHandler(logging.Handler):
+    """Writes records tagged for the console (via `extra`) with their agent color"""
+
+    def emit(self, record):
+        label = getattr(record, 'console', None)
+        if label is None:
+            return
+        try:
+            prefix = ""
+            if SHOW_TIMESTAMPS_IN_CONSOLE:
+                prefix = f"[{time.strftime('%H:%M:%S', time.localtime(record.created))}] "
+            safe_console_print(f"{label}{record.console_msg}", prefix, record.color)
+        except Exception:
+            self.handleError(record)
+
+class FastQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records as-is; only records with args or exception info get the copying prepare()"""
+
+    def prepare(self, record):
+        if record.args or record.exc_info or record.stack_info:
+            return super().prepare(record)
+        return record
+
+_log_listener = None
+_log_listener_running = False
+_log_listener_lock = threading.Lock()
+
+def _start_log_listener():
+    global _log_listener_running
+    with _log_listener_lock:
+        if _log_listener is not None and not _log_listener_running:
+            _log_listener.start()
+            _log_listener_running = True
+
+def _stop_log_listener():
+    global _log_listener_running
+    with _log_listener_lock:
+        if _log_listener is not None and _log_listener_running:
+            _log_listener.stop()
+            _log_listener_running = False
+
+def flush_logs():
+    """Block until every queued record has been written (restarts the writer thread)"""
+    with _log_listener_lock:
+        if _log_listener is not None and _log_listener_running:
+            _log_listener.stop()
+            _log_listener.start()
+
+atexit.register(_stop_log_listener)
+
 # Check if logger already has handlers to avoid duplicate handlers
 # Also check if we're on Windows and disable file logging if there are conflicts
 if not logger.handlers:
+    output_handlers = [ConsoleHandler()]
+
     # Create file handler if enabled
     if LOG_TO_FILE:
         try:
             # Create log directory if it doesn't exist
             log_dir = Path(LOG_DIRECTORY)
             log_dir.mkdir(exist_ok=True)
-            
+
             # Setup simple file handler (no rotation to prevent Windows locking issues)
             log_path = log_dir / LOG_FILENAME
             file_handler = logging.FileHandler(
@@ -185,261 +332,239 @@ if not logger.handlers:
                 encoding='utf-8',  # Ensure UTF-8 encoding for file logs
                 mode='a'  # Append mode
             )
-            
+
             # Always use detailed formatting for file logs
             file_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
             file_handler.setFormatter(file_formatter)
-            file_handler.setLevel(level_map.get(LOG_LEVEL, logging.INFO))
-            
-            logger.addHandler(file_handler)
+            file_handler.setLevel(_FILE_LEVEL)  # Console-only records stop here
+
+            output_handlers.append(file_handler)
 
         except Exception as e:
             # If file logging fails (e.g., permission issues), disable it
             print(f"Warning: Could not initialize file logging: {e}")
             print("Continuing with console-only logging...")
 
+    # Callers only enqueue; the listener thread does all file and console I/O
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(FastQueueHandler(log_queue))
+    _log_listener = logging.handlers.QueueListener(log_queue, *output_handlers, respect_handler_level=True)
+    _start_log_listener()
+
+# Per-call-site rate limiting: (code, line, template) -> [window_start, emitted, suppressed]
+_site_windows = {}
+_log_stats = {'suppressed': 0}
+_MAX_SITE_WINDOWS = 4096  # Expired windows are swept once this many are tracked
+_NUMBER_RE = re.compile(r'\d+(?:\.\d+)?')
+
+def _message_template(msg):
+    """Message with numbers masked, so a loop logging changing counts or prices shares one limit"""
+    return _NUMBER_RE.sub('#', msg) if isinstance(msg, str) else type(msg)
+
+def _allow(site, now):
+    """Rate limit one call site; returns -1 to drop, else the count suppressed since the last emit"""
+    window = _site_windows.get(site)
+    if window is None and len(_site_windows) >= _MAX_SITE_WINDOWS:
+        for key in [key for key, w in _site_windows.items() if now - w[0] >= LOG_RATE_LIMIT_WINDOW_SEC]:
+            del _site_windows[key]
+    if window is None or now - window[0] >= LOG_RATE_LIMIT_WINDOW_SEC:
+        _site_windows[site] = [now, 1, 0]
+        return window[2] if window else 0
+    if window[1] < LOG_RATE_LIMIT_PER_SITE:
+        window[1] += 1
+        suppressed, window[2] = window[2], 0
+        return suppressed
+    window[2] += 1
+    _log_stats['suppressed'] += 1
+    return -1
+
+def get_log_stats():
+    """Logger counters (messages dropped by the per-call-site rate limit)"""
+    return dict(_log_stats)
+
+def _emit(level, label, msg, file_only, console, frame, color=None, rate_limit=True):
+    """
+    Shared fast path: rate limit by call site and message template (below ERROR only),
+    resolve the agent color, enqueue one record.
+    `frame` is the frame that called the public logging function.
+    """
+    if rate_limit and level < logging.ERROR:
+        suppressed = _allow((frame.f_code, frame.f_lineno, _message_template(msg)), time.monotonic())
+        if suppressed < 0:
+            return
+        if suppressed:
+            msg = f"{msg} (+{suppressed} similar messages suppressed)"
+
+    console = console and not file_only
+    if not console and level < _FILE_LEVEL:
+        return
+
+    if console:
+        if color is None:
+            context = _agent_context.get()
+            color, defi_context = context if context is not None else _detect_context(frame)
+            color = _override_color(level, msg, color, defi_context)
+        text = msg if isinstance(msg, str) else str(msg)
+        extra = {'console': label, 'console_msg': _ANSI_RE.sub('', text), 'color': color}
+    else:
+        extra = {'console': None}
+    if logger.isEnabledFor(level):
+        # The caller's frame is already at hand, so skip logging's own stack walk (findCaller)
+        code = frame.f_code
+        logger.handle(logger.makeRecord(logger.name, level, code.co_filename, frame.f_lineno, msg, None, None,
+                                        code.co_name, extra))
+
+def _override_color(level, msg, agent_color, defi_context):
+    """Message-specific console colors used by the DeFi terminal"""
+    # If we're in a DeFi context, use cyan for all messages (unless overridden below)
+    if defi_context:
+        agent_color = 'cyan'
+    if not isinstance(msg, str):
+        return agent_color
+
+    if level == logging.INFO:
+        if _DEFI_INIT_YELLOW_RE.search(msg):
+            agent_color = 'yellow'
+        elif defi_context and _DEFI_INIT_CYAN_RE.search(msg):
+            agent_color = 'cyan'
+        # CYAN messages - Shared services used by DeFi (always cyan, no defi_context required)
+        elif "Rate Monitoring Service initialized" in msg:
+            agent_color = 'cyan'
+    elif level == logging.WARNING:
+        # Override for specific DeFi warnings to match initialization colors
+        if "DeepSeek API key" in msg or "API key not configured" in msg:
+            agent_color = 'cyan'
+    return agent_color
+
 # Logging functions that respect the file_only parameter
 def debug(msg, file_only=False):
     """
     Log debug message, optionally only to file
-    
+
     Args:
         msg: The message to log
         file_only: If True, only log to file, not to console
     """
-    logger.debug(msg)
-    
+    # Print to console if debug messages are enabled for console
     # SUPPRESS OUTPUT WHEN DASHBOARD IS RUNNING
-    if _DASHBOARD_MODE and not file_only:
-        return  # Suppress console output when dashboard is running
-    
-    # Print to console if not file_only and debug messages are enabled for console
-    if not file_only and SHOW_DEBUG_IN_CONSOLE:
-        timestamp = datetime.now().strftime("%H:%M:%S") if SHOW_TIMESTAMPS_IN_CONSOLE else ""
-        prefix = f"[{timestamp}] " if timestamp else ""
-        # Use cyan for debug messages
-        safe_console_print(f"DEBUG: {msg}", prefix, 'cyan')
+    console = SHOW_DEBUG_IN_CONSOLE and not _DASHBOARD_MODE
+    if not console and _FILE_LEVEL > logging.DEBUG:
+        return
+    # Use cyan for debug messages
+    _emit(logging.DEBUG, "DEBUG: ", msg, file_only, console, sys._getframe(1), color='cyan')
 
 def info(msg, file_only=False):
     """Log info message, optionally only to file
-    
+
     Args:
         msg: The message to log
         file_only: If True, only log to file, not to console
     """
-    timestamp = datetime.now().strftime("%H:%M:%S") if SHOW_TIMESTAMPS_IN_CONSOLE else ""
-    prefix = f"[{timestamp}] " if timestamp else ""
-    
-    # Log to file (should work fine with UTF-8)
-    logger.info(msg)
-    
     # SUPPRESS OUTPUT WHEN DASHBOARD IS RUNNING
-    if _DASHBOARD_MODE and not file_only:
-        return  # Suppress console output when dashboard is running
-    
-    # Print to console if not file_only
-    if not file_only:
-        # Get agent-specific color
-        agent_color = get_calling_agent_color()
-        
-        # Override colors for specific messages (DeFi terminal custom colors)
-        # Check if calling from defi context
-        defi_context = False
-        try:
-            # Check call stack for defi-related files
-            frame = inspect.currentframe()
-            for _ in range(5):
-                if frame is None:
-                    break
-                filename = frame.f_code.co_filename
-                if 'defi' in filename.lower():
-                    defi_context = True
-                    break
-                frame = frame.f_back
-        except:
-            pass
-        
-        # If we're in a DeFi context, use cyan for all messages (unless overridden below)
-        if defi_context:
-            agent_color = 'cyan'
-        
-        # YELLOW messages - First set of initialization messages (DeFi specific)
-        if ("DeFi Protocol Manager initialized" in msg or 
-            "DeFi Risk Manager initialized" in msg or 
-            "Yield Optimizer initialized" in msg or 
-            "Telegram Bot initialized" in msg or 
-            ("Initialized" in msg and "event triggers" in msg) or
-            "DeFi Event Manager initialized" in msg):
-            agent_color = 'yellow'
-        
-        # CYAN messages - Second set (protocols and DeFi infrastructure) - ONLY in defi context
-        elif defi_context and ("Initialized solend protocol" in msg or
-              "Initialized mango protocol" in msg or
-              "Initialized tulip protocol" in msg or
-              "DeFi Safety Validator initialized" in msg or
-              "Leverage Loop Engine initialized" in msg or
-              "Staking-DeFi Coordinator initialized" in msg or
-              "AI DeFi Advisor initialized" in msg or
-              "SharedDataCoordinator initialized" in msg or
-              "Portfolio Tracker initialized" in msg or
-              "Position Manager initialized" in msg or
-              "Hybrid RPC Manager initialized" in msg or
-              "QuickNode URL:" in msg or
-              "Helius URL:" in msg or
-              "Alternative mainnet RPCs:" in msg or
-              "DeFi Integration Layer initialized" in msg or
-              "DeFi agent registered with coordinator" in msg or
-              "Telegram bot started successfully" in msg or
-              "Telegram bot started for DeFi agent" in msg or
-              "DeFi Event Manager started successfully" in msg or
-              "DeFi event manager started" in msg or
-              "DeFi Agent initialized successfully" in msg):
-            agent_color = 'cyan'
-        
-        # CYAN messages - Shared services used by DeFi (always cyan, no defi_context required)
-        elif "Rate Monitoring Service initialized" in msg:
-            agent_color = 'cyan'
-        
-        # Remove embedded ANSI color codes from message before printing
-        # This prevents conflicts with termcolor
-        msg_clean = re.sub(r'\033\[[0-9;]*m', '', msg)
-        
-        # Safe console output with agent color
-        safe_console_print(f"INFO: {msg_clean}", prefix, agent_color)
+    _emit(logging.INFO, "INFO: ", msg, file_only, not _DASHBOARD_MODE, sys._getframe(1))
 
 def warning(msg, file_only=False):
     """Log warning message, optionally only to file
-    
+
     Args:
         msg: The message to log
         file_only: If True, only log to file, not to console
     """
-    timestamp = datetime.now().strftime("%H:%M:%S") if SHOW_TIMESTAMPS_IN_CONSOLE else ""
-    prefix = f"[{timestamp}] " if timestamp else ""
-    
-    # Log to file (should work fine with UTF-8)
-    logger.warning(msg)
-    
-    # Print to console if not file_only
-    if not file_only:
-        # Get agent-specific color
-        agent_color = get_calling_agent_color()
-        
-        # Check if calling from defi context
-        defi_context = False
-        try:
-            frame = inspect.currentframe()
-            for _ in range(5):
-                if frame is None:
-                    break
-                filename = frame.f_code.co_filename
-                if 'defi' in filename.lower():
-                    defi_context = True
-                    break
-                frame = frame.f_back
-        except:
-            pass
-        
-        # If we're in a DeFi context, use cyan for warnings
-        if defi_context:
-            agent_color = 'cyan'
-        
-        # Override for specific DeFi warnings to match initialization colors
-        if "DeepSeek API key" in msg or "API key not configured" in msg:
-            agent_color = 'cyan'
-        
-        # Remove embedded ANSI color codes from message before printing
-        msg_clean = re.sub(r'\033\[[0-9;]*m', '', msg)
-        
-        # Safe console output with agent color
-        safe_console_print(f"WARNING: {msg_clean}", prefix, agent_color)
+    _emit(logging.WARNING, "WARNING: ", msg, file_only, True, sys._getframe(1))
 
 def error(msg, file_only=False):
     """Log error message, optionally only to file
-    
+
     Args:
         msg: The message to log
         file_only: If True, only log to file, not to console
     """
-    timestamp = datetime.now().strftime("%H:%M:%S") if SHOW_TIMESTAMPS_IN_CONSOLE else ""
-    prefix = f"[{timestamp}] " if timestamp else ""
-    
-    # Log to file (should work fine with UTF-8)
-    logger.error(msg)
-    
-    # Print to console if not file_only
-    if not file_only:
-        # Get agent-specific color
-        agent_color = get_calling_agent_color()
-        
-        # Check if calling from defi context
-        defi_context = False
-        try:
-            frame = inspect.currentframe()
-            for _ in range(5):
-                if frame is None:
-                    break
-                filename = frame.f_code.co_filename
-                if 'defi' in filename.lower():
-                    defi_context = True
-                    break
-                frame = frame.f_back
-        except:
-            pass
-        
-        # If we're in a DeFi context, use cyan for errors
-        if defi_context:
-            agent_color = 'cyan'
-        
-        # Remove embedded ANSI color codes from message before printing
-        msg_clean = re.sub(r'\033\[[0-9;]*m', '', msg)
-        
-        # Safe console output with agent color
-        safe_console_print(f"ERROR: {msg_clean}", prefix, agent_color)
+    _emit(logging.ERROR, "ERROR: ", msg, file_only, True, sys._getframe(1))
 
 def critical(msg):
     """Log critical message"""
-    timestamp = datetime.now().strftime("%H:%M:%S") if SHOW_TIMESTAMPS_IN_CONSOLE else ""
-    prefix = f"[{timestamp}] " if timestamp else ""
-    
-    # Log to file (should work fine with UTF-8)
-    logger.critical(msg)
-    
-    # Get agent-specific color
-    agent_color = get_calling_agent_color()
-    
-    # Safe console output with agent color
-    safe_console_print(f"CRITICAL: {msg}", prefix, agent_color)
+    frame = sys._getframe(1)
+    context = _agent_context.get()
+    agent_color = context[0] if context is not None else _detect_context(frame)[0]
+    _emit(logging.CRITICAL, "CRITICAL: ", msg, False, True, frame, color=agent_color, rate_limit=False)
 
 def system(msg):
     """Log system message (always visible)"""
-    logger.info(f"[SYSTEM] {msg}")
-    timestamp = datetime.now().strftime("%H:%M:%S") if SHOW_TIMESTAMPS_IN_CONSOLE else ""
-    prefix = f"[{timestamp}] " if timestamp else ""
     # System messages in cyan
-    safe_console_print(f"[SYSTEM] {msg}", prefix, 'cyan')
+    _emit(logging.INFO, "", f"[SYSTEM] {msg}", False, True, sys._getframe(1), color='cyan', rate_limit=False)
 
 def log_print(msg):
     """Simple print-style logging without prefix"""
-    logger.info(msg)
-    # Get agent-specific color for log_print
-    agent_color = get_calling_agent_color()
-    safe_console_print(msg, color=agent_color)
+    frame = sys._getframe(1)
+    context = _agent_context.get()
+    agent_color = context[0] if context is not None else _detect_context(frame)[0]
+    _emit(logging.INFO, "", msg, False, True, frame, color=agent_color, rate_limit=False)
 
 def log_exception(e):
     """Log an exception with traceback"""
     tb = traceback.format_exc()
-    logger.error(f"Exception: {str(e)}\n{tb}")
-    timestamp = datetime.now().strftime("%H:%M:%S") if SHOW_TIMESTAMPS_IN_CONSOLE else ""
-    prefix = f"[{timestamp}] " if timestamp else ""
-    # Exceptions in bright red
-    safe_console_print(f"ERROR: Exception: {str(e)}", prefix, 'red')
+    logger.error(f"Exception: {str(e)}\n{tb}", extra={
+        'console': "ERROR: ", 'console_msg': f"Exception: {str(e)}",
+        # Exceptions in bright red
+        'color': 'red'
+    })
+
+def _benchmark(calls=20000):
+    """Per-call cost of the logging functions as seen by the calling thread"""
+    global LOG_RATE_LIMIT_PER_SITE
+    limit = LOG_RATE_LIMIT_PER_SITE
+
+    def timed(log_call, per_site_limit=calls * 10):
+        global LOG_RATE_LIMIT_PER_SITE
+        LOG_RATE_LIMIT_PER_SITE = per_site_limit
+        _site_windows.clear()
+        start = time.perf_counter()
+        for i in range(calls):
+            log_call(i)
+        return (time.perf_counter() - start) / calls * 1e6
+
+    devnull = open(os.devnull, 'w', encoding='utf-8')
+    original_stdout, sys.stdout = sys.stdout, devnull
+    results = {}
+    # Pause the writer so only the caller's cost is timed; it drains the backlog afterwards
+    paused = _log_listener_running
+    if paused:
+        _stop_log_listener()
+    try:
+        results["info (console + file)"] = timed(lambda i: info(f"Checking price for token {i}"))
+        with agent_context('copybot'):
+            results["info inside agent_context"] = timed(lambda i: info(f"Checking price for token {i}"))
+        results["info file_only"] = timed(lambda i: info(f"Checking price for token {i}", file_only=True))
+        results["debug"] = timed(lambda i: debug(f"Price check {i}"))
+        results[f"info rate limited ({limit}/site/{LOG_RATE_LIMIT_WINDOW_SEC:g}s)"] = timed(
+            lambda i: info(f"Checking price for token {i}"), per_site_limit=limit)
+
+        backlog = _log_listener.queue.qsize() if _log_listener is not None else 0
+        start = time.perf_counter()
+        if paused:
+            _start_log_listener()
+        flush_logs()
+        drain_seconds = time.perf_counter() - start
+    finally:
+        sys.stdout = original_stdout
+        LOG_RATE_LIMIT_PER_SITE = limit
+        devnull.close()
+
+    print(f"🌙 Logger benchmark ({calls} calls each)")
+    for name, micros in results.items():
+        print(f"[BENCHMARK] {name:<40} {micros:7.2f} µs/call")
+    print(f"[BENCHMARK] writer thread drain of the backlog: {drain_seconds:.2f}s "
+          f"({backlog} records, off the caller's thread)")
 
 # If this file is run directly, show log file location
 if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        _benchmark()
+        sys.exit(0)
+
     if LOG_TO_FILE:
         print(f"Log file location: {os.path.abspath(os.path.join(LOG_DIRECTORY, LOG_FILENAME))}")
-    
+
     # Test logging
     debug("This is a debug message")
     info("This is an info message")
@@ -448,55 +573,60 @@ if __name__ == "__main__":
     critical("This is a critical message")
     system("This is a system message")
     log_print("This is a simple print message")
-    
+
     try:
         1/0
     except Exception as e:
         log_exception(e)
+    flush_logs()
 
 def setup_file_logging(log_file_path: str):
     """
     Redirect stdout/stderr to log file for agent isolation
     Used by anomaly launcher to send agent output to individual log files
-    
+
     Args:
         log_file_path: Path to log file (e.g., 'logs/oi_agent.log')
-    
+
     Returns:
         Tuple of (original_stdout, original_stderr, log_file)
     """
     from pathlib import Path
-    
+
     # Create logs directory
     log_path = Path(log_file_path)
     log_path.parent.mkdir(parents=True, exist_ok=True)
-    
+
+    # Console records still queued belong to the old stdout
+    flush_logs()
+
     # Save original streams
     original_stdout = sys.stdout
     original_stderr = sys.stderr
-    
+
     # Open log file in append mode with line buffering
     log_file = open(log_file_path, 'a', buffering=1, encoding='utf-8')
-    
+
     # Redirect stdout and stderr
     sys.stdout = log_file
     sys.stderr = log_file
-    
+
     return original_stdout, original_stderr, log_file
 
 
 def restore_logging(original_stdout, original_stderr, log_file):
     """
     Restore original stdout/stderr and close log file
-    
+
     Args:
         original_stdout: Original stdout stream
-        original_stderr: Original stderr stream  
+        original_stderr: Original stderr stream
         log_file: Log file to close
     """
+    flush_logs()
     sys.stdout = original_stdout
     sys.stderr = original_stderr
-    
+
     if log_file and not log_file.closed:
         log_file.close()
 
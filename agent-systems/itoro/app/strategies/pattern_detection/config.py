@@ -50,6 +50,10 @@ class SolPatternConfig:
         self.scan_interval = int(os.getenv('SCAN_INTERVAL', '300'))  # seconds
         self.data_timeframe = os.getenv('DATA_TIMEFRAME', '1d')
 
+        # Scan Pipeline Settings
+        self.fetch_concurrency = int(os.getenv('FETCH_CONCURRENCY', '8'))  # concurrent OHLCV requests
+        self.detection_workers = int(os.getenv('DETECTION_WORKERS', '2'))  # 0 = detect in-process
+
         # System Settings
         self.db_path = os.getenv('DB_PATH', 'data/patterns.db')
         self.log_level = os.getenv('LOG_LEVEL', 'INFO')
@@ -142,6 +146,13 @@ class SolPatternConfig:
             'data_timeframe': self.data_timeframe
         }
 
+    def get_scan_config(self) -> Dict:
+        """Get scan pipeline configuration."""
+        return {
+            'fetch_concurrency': self.fetch_concurrency,
+            'detection_workers': self.detection_workers
+        }
+
     def get_system_config(self) -> Dict:
         """Get system-related configuration."""
         return {
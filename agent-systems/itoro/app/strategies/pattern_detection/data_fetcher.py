@@ -6,9 +6,93 @@ Fetches data from Binance (primary) with automatic fallbacks
 import requests
 import pandas as pd
 import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 import numpy as np
+from requests.adapters import HTTPAdapter
+
+
+# Public API request-weight budgets per exchange: (weight, window in seconds)
+EXCHANGE_WEIGHT_LIMITS = {
+    'binance': (6000, 60),  # REQUEST_WEIGHT per IP per minute
+    'coinbase': (10, 1),    # public endpoints, requests per second
+    'kraken': (1, 1),       # public OHLC, roughly one call per second
+    'kucoin': (2000, 30),   # public pool per IP
+}
+
+# Weight charged per klines/candles call
+REQUEST_WEIGHTS = {
+    'binance': 2,
+    'coinbase': 1,
+    'kraken': 1,
+    'kucoin': 3,
+}
+
+
+class ExchangeWeightLimiter:
+    """
+    Sliding-window request-weight budget per exchange, shared by all fetch threads.
+    
+    acquire() blocks until the call fits in the exchange's budget. Server-reported
+    usage (Binance X-MBX-USED-WEIGHT-1M) and 429/418 Retry-After are folded in.
+    """
+    
+    def __init__(self, limits: Optional[Dict[str, Tuple[int, float]]] = None):
+        self.limits = dict(limits or EXCHANGE_WEIGHT_LIMITS)
+        self._spent = {exchange: deque() for exchange in self.limits}  # (time, weight)
+        self._used = {exchange: 0 for exchange in self.limits}
+        self._blocked_until = {exchange: 0.0 for exchange in self.limits}
+        self._lock = threading.Lock()
+    
+    def _expire(self, exchange: str, now: float):
+        window = self.limits[exchange][1]
+        spent = self._spent[exchange]
+        while spent and spent[0][0] <= now - window:
+            self._used[exchange] -= spent.popleft()[1]
+    
+    def acquire(self, exchange: str, weight: int = 1):
+        """Block until `weight` fits in the exchange's current window"""
+        if exchange not in self.limits:
+            return
+        budget, window = self.limits[exchange]
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._expire(exchange, now)
+                wait = self._blocked_until[exchange] - now
+                if wait <= 0:
+                    if self._used[exchange] + weight <= budget or not self._spent[exchange]:
+                        self._spent[exchange].append((now, weight))
+                        self._used[exchange] += weight
+                        return
+                    wait = self._spent[exchange][0][0] + window - now
+            time.sleep(max(wait, 0.001))
+    
+    def report_used_weight(self, exchange: str, used_weight: int):
+        """Account for weight the server says we used but this process did not record"""
+        if exchange not in self.limits:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._expire(exchange, now)
+            missing = used_weight - self._used[exchange]
+            if missing > 0:
+                self._spent[exchange].append((now, missing))
+                self._used[exchange] += missing
+    
+    def block(self, exchange: str, seconds: float):
+        """Stop all calls to an exchange for a while (rate-limit response)"""
+        with self._lock:
+            self._blocked_until[exchange] = max(self._blocked_until.get(exchange, 0.0),
+                                                time.monotonic() + seconds)
+    
+    def used_weight(self, exchange: str) -> int:
+        with self._lock:
+            self._expire(exchange, time.monotonic())
+            return self._used.get(exchange, 0)
 
 
 class BinanceDataFetcher:
@@ -18,16 +102,30 @@ class BinanceDataFetcher:
     Fallbacks: Coinbase, Kraken, KuCoin
     """
     
-    def __init__(self, retry_attempts=3, retry_delay=2):
+    def __init__(self, retry_attempts=3, retry_delay=2, max_workers=8, rate_limiter=None):
         """
         Initialize data fetcher with retry configuration.
         
         Args:
             retry_attempts: Number of retry attempts per source (default: 3)
             retry_delay: Delay between retries in seconds (default: 2)
+            max_workers: Concurrent requests in fetch_multiple_symbols (default: 8)
+            rate_limiter: Shared ExchangeWeightLimiter (default: a new one)
         """
         self.retry_attempts = retry_attempts
         self.retry_delay = retry_delay
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter or ExchangeWeightLimiter()
+        
+        # Pooled keep-alive connections, sized for the concurrent fetch stage
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(max_workers, 10))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # Last frame per (symbol, interval) for incremental fetches: (source, DataFrame)
+        self._candle_cache: Dict[Tuple[str, str], Tuple[str, pd.DataFrame]] = {}
+        self._candle_cache_lock = threading.Lock()
         
         # API endpoints
         self.binance_base_url = "https://api.binance.com/api/v3"
@@ -59,6 +157,10 @@ class BinanceDataFetcher:
         Returns:
             DataFrame with columns [Open, High, Low, Close, Volume] or None if failed
         """
+        return self._fetch_with_fallback(symbol, interval, limit)[1]
+    
+    def _fetch_with_fallback(self, symbol: str, interval: str, limit: int) -> Tuple[Optional[str], Optional[pd.DataFrame]]:
+        """Try each source in order, returning (source name, DataFrame)"""
         # Try sources in order: Binance -> Coinbase -> Kraken -> KuCoin
         sources = [
             ('Binance', self._fetch_binance),
@@ -74,7 +176,7 @@ class BinanceDataFetcher:
                 
                 if df is not None and self.validate_data(df):
                     print(f"[DATA FETCHER] Success from {source_name}: {len(df)} candles")
-                    return df
+                    return source_name, df
                 else:
                     print(f"[DATA FETCHER] {source_name} data validation failed")
                     
@@ -83,9 +185,68 @@ class BinanceDataFetcher:
                 continue
         
         print(f"[DATA FETCHER] All sources failed for {symbol}")
-        return None
+        return None, None
     
-    def _fetch_binance(self, symbol: str, interval: str, limit: int) -> Optional[pd.DataFrame]:
+    def get_ohlcv_incremental(self, symbol: str, interval: str = '1d', limit: int = 100) -> Optional[pd.DataFrame]:
+        """
+        Fetch OHLCV data, requesting only the bars since the last cached close.
+        
+        The previous frame's newest bar may still have been forming, so it is
+        re-requested along with anything newer and spliced onto the cache. Falls
+        back to a full fetch (with exchange fallbacks) when there is no Binance
+        frame cached, too many bars were missed, or the partial request fails.
+        
+        Args:
+            symbol: Trading pair (e.g., 'BTCUSDT')
+            interval: Timeframe ('1m', '5m', '15m', '1h', '4h', '1d')
+            limit: Number of candles to return (default: 100)
+            
+        Returns:
+            DataFrame with columns [Open, High, Low, Close, Volume] or None if failed
+        """
+        key = (symbol, interval)
+        with self._candle_cache_lock:
+            cached = self._candle_cache.get(key)
+        
+        if cached is not None and cached[0] == 'Binance' and len(cached[1]) >= limit:
+            cached_df = cached[1]
+            try:
+                start_ms = int(cached_df.index[-1].value // 1_000_000)
+                new_df = self._fetch_binance(symbol, interval, limit, start_time_ms=start_ms)
+                # A full page means we missed more bars than the window holds
+                if new_df is not None and 0 < len(new_df) < limit:
+                    merged = pd.concat([cached_df[cached_df.index < new_df.index[0]], new_df]).iloc[-limit:]
+                    if self.validate_data(merged):
+                        print(f"[DATA FETCHER] Incremental {symbol} {interval}: {len(new_df)} new/updated candles")
+                        with self._candle_cache_lock:
+                            self._candle_cache[key] = ('Binance', merged)
+                        return merged
+            except Exception as e:
+                print(f"[DATA FETCHER] Incremental fetch failed for {symbol}: {e}")
+        
+        source_name, df = self._fetch_with_fallback(symbol, interval, limit)
+        if df is not None:
+            with self._candle_cache_lock:
+                self._candle_cache[key] = (source_name, df)
+        return df
+    
+    def _get(self, exchange: str, url: str, params: Dict) -> requests.Response:
+        """GET through the pooled session, inside the exchange's weight budget"""
+        self.rate_limiter.acquire(exchange, REQUEST_WEIGHTS.get(exchange, 1))
+        response = self.session.get(url, params=params, timeout=10)
+        
+        used_weight = response.headers.get('X-MBX-USED-WEIGHT-1M')
+        if used_weight is not None:
+            self.rate_limiter.report_used_weight(exchange, int(used_weight))
+        if response.status_code in (418, 429):
+            retry_after = float(response.headers.get('Retry-After', 60))
+            self.rate_limiter.block(exchange, retry_after)
+            print(f"[DATA FETCHER] {exchange} rate limited - backing off {retry_after:.0f}s")
+        
+        response.raise_for_status()
+        return response
+    
+    def _fetch_binance(self, symbol: str, interval: str, limit: int, start_time_ms: Optional[int] = None) -> Optional[pd.DataFrame]:
         """Fetch from Binance API (primary source)"""
         # Convert symbol format if needed (e.g., BTC-USD -> BTCUSDT)
         binance_symbol = symbol.replace('-', '').replace('_', '')
@@ -96,11 +257,12 @@ class BinanceDataFetcher:
             'interval': self.interval_map[interval]['binance'],
             'limit': limit
         }
+        if start_time_ms is not None:
+            params['startTime'] = start_time_ms
         
         for attempt in range(self.retry_attempts):
             try:
-                response = requests.get(url, params=params, timeout=10)
-                response.raise_for_status()
+                response = self._get('binance', url, params)
                 data = response.json()
                 
                 if not data:
@@ -153,8 +315,7 @@ class BinanceDataFetcher:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
+            response = self._get('coinbase', url, params)
             data = response.json()
             
             if not data:
@@ -192,8 +353,7 @@ class BinanceDataFetcher:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
+            response = self._get('kraken', url, params)
             data = response.json()
             
             if data.get('error') or not data.get('result'):
@@ -244,8 +404,7 @@ class BinanceDataFetcher:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
+            response = self._get('kucoin', url, params)
             data = response.json()
             
             if data.get('code') != '200000' or not data.get('data'):
@@ -318,27 +477,30 @@ class BinanceDataFetcher:
         print(f"[VALIDATION] Data valid ({len(df)} candles)")
         return True
     
-    def fetch_multiple_symbols(self, symbols: List[str], interval: str = '1d', limit: int = 100) -> Dict[str, pd.DataFrame]:
+    def fetch_multiple_symbols(self, symbols: List[str], interval: str = '1d', limit: int = 100,
+                               incremental: bool = False) -> Dict[str, pd.DataFrame]:
         """
-        Fetch OHLCV data for multiple symbols.
+        Fetch OHLCV data for multiple symbols concurrently.
+        
+        Up to max_workers requests are in flight at once; the shared weight
+        limiter keeps every exchange inside its budget.
         
         Args:
             symbols: List of trading pairs
             interval: Timeframe
             limit: Number of candles
+            incremental: Only request bars since the last fetch of each symbol
             
         Returns:
-            Dictionary mapping symbols to DataFrames
+            Dictionary mapping symbols to DataFrames (in the order given)
         """
-        results = {}
+        fetch = self.get_ohlcv_incremental if incremental else self.get_ohlcv
+        print(f"\n[MULTI-FETCH] Fetching {len(symbols)} symbols ({self.max_workers} concurrent)...")
         
-        for symbol in symbols:
-            print(f"\n[MULTI-FETCH] Processing {symbol}...")
-            df = self.get_ohlcv(symbol, interval, limit)
-            if df is not None:
-                results[symbol] = df
-            time.sleep(0.5)  # Rate limiting between requests
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers), thread_name_prefix='ohlcv-fetch') as pool:
+            frames = list(pool.map(lambda symbol: fetch(symbol, interval, limit), symbols))
         
+        results = {symbol: df for symbol, df in zip(symbols, frames) if df is not None}
         print(f"\n[MULTI-FETCH] Successfully fetched {len(results)}/{len(symbols)} symbols")
         return results
 
@@ -2,24 +2,219 @@
 Data Reader Service
 Reads market data collected by data.py agents (OI, Funding, Chart Analysis)
 """
+import os
 import redis
 import pandas as pd
+import numpy as np
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 import json
+import threading
 from datetime import datetime, timedelta
 import logging
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
+class ParquetFileIndex:
+    """
+    Row-group layout and time ranges of one Parquet file.
+    
+    Built from the footer only (no data pages) and valid for one (mtime, size)
+    signature; readers reuse the parsed metadata so later opens skip the footer.
+    """
+    
+    def __init__(self, file_path: Path, time_column: str = 'timestamp'):
+        stat = os.stat(file_path)
+        self.file_path = file_path
+        self.signature = (stat.st_mtime_ns, stat.st_size)
+        self.time_column = time_column
+        
+        with pq.ParquetFile(file_path, memory_map=True) as parquet_file:
+            self.metadata = parquet_file.metadata
+        
+        self.num_rows = self.metadata.num_rows
+        self.row_group_rows = [self.metadata.row_group(i).num_rows for i in range(self.metadata.num_row_groups)]
+        self.row_group_starts = list(np.cumsum([0] + self.row_group_rows[:-1])) if self.row_group_rows else []
+        
+        # A time column stored as the DataFrame index is not a column after to_pandas()
+        pandas_metadata = self.metadata.schema.to_arrow_schema().pandas_metadata or {}
+        self.has_time_column = (
+            time_column in self.metadata.schema.names
+            and time_column not in pandas_metadata.get('index_columns', [])
+        )
+        self.time_ranges = self._time_ranges()
+        self.row_group_fingerprints = [self._row_group_fingerprint(i) for i in range(self.metadata.num_row_groups)]
+    
+    def _row_group_fingerprint(self, i: int) -> Tuple:
+        """Per-column offsets, sizes and statistics; any rewrite of the group's pages changes one of them"""
+        row_group = self.metadata.row_group(i)
+        columns = []
+        for j in range(row_group.num_columns):
+            column = row_group.column(j)
+            statistics = column.statistics
+            stats = None
+            if statistics is not None:
+                stats = (
+                    statistics.null_count,
+                    statistics.min if statistics.has_min_max else None,
+                    statistics.max if statistics.has_min_max else None,
+                )
+            columns.append((column.path_in_schema, column.file_offset, column.data_page_offset,
+                            column.total_compressed_size, column.total_uncompressed_size, stats))
+        return tuple(columns)
+    
+    def _time_ranges(self) -> List[Optional[Tuple]]:
+        """(min, max) of the time column per row group, None where stats are missing"""
+        column_paths = [self.metadata.schema.column(j).path for j in range(self.metadata.num_columns)]
+        if not self.has_time_column or self.time_column not in column_paths:
+            return [None] * len(self.row_group_rows)
+        
+        column = column_paths.index(self.time_column)
+        ranges = []
+        for i in range(self.metadata.num_row_groups):
+            statistics = self.metadata.row_group(i).column(column).statistics
+            if statistics is None or not statistics.has_min_max:
+                ranges.append(None)
+            else:
+                ranges.append((pd.Timestamp(statistics.min), pd.Timestamp(statistics.max)))
+        return ranges
+    
+    def is_current(self) -> bool:
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            return False
+        return (stat.st_mtime_ns, stat.st_size) == self.signature
+    
+    def tail_row_groups(self, rows: int) -> List[int]:
+        """Smallest run of final row groups holding at least `rows` rows"""
+        groups = []
+        covered = 0
+        for i in range(len(self.row_group_rows) - 1, -1, -1):
+            if covered >= rows:
+                break
+            groups.insert(0, i)
+            covered += self.row_group_rows[i]
+        return groups
+    
+    def row_groups_after(self, cutoff: pd.Timestamp) -> List[int]:
+        """Row groups that may hold rows newer than cutoff (per their max statistic)"""
+        groups = []
+        for i, time_range in enumerate(self.time_ranges):
+            try:
+                if time_range is None or time_range[1] > cutoff:
+                    groups.append(i)
+            except TypeError:  # tz-aware vs naive; let the row filter decide
+                groups.append(i)
+        return groups
+    
+    def extends(self, older: 'ParquetFileIndex') -> bool:
+        """True if this file is `older` with row groups appended after it"""
+        count = len(older.row_group_rows)
+        return (
+            count <= len(self.row_group_rows)
+            and self.row_group_rows[:count] == older.row_group_rows
+            and self.time_ranges[:count] == older.time_ranges
+            and self.row_group_fingerprints[:count] == older.row_group_fingerprints
+        )
+    
+    def read(self, row_groups: List[int]) -> 'pa.Table':
+        with pq.ParquetFile(self.file_path, memory_map=True, metadata=self.metadata) as parquet_file:
+            return parquet_file.read_row_groups(row_groups)
+    
+    def row_positions(self, row_groups: List[int]) -> np.ndarray:
+        """File row numbers of the given row groups (matches a full read's RangeIndex)"""
+        if not row_groups:
+            return np.array([], dtype=np.int64)
+        return np.concatenate([
+            np.arange(self.row_group_starts[i], self.row_group_starts[i] + self.row_group_rows[i])
+            for i in row_groups
+        ])
+
+
+class RollingArrowBuffer:
+    """
+    Last `capacity` rows of one Parquet file kept as an Arrow table.
+    
+    When the writer appends row groups, only the new groups are read and
+    concatenated; any other change to the file reloads the tail.
+    """
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.index: Optional[ParquetFileIndex] = None
+        self.table = None
+        self.first_row = 0  # file row number of table row 0
+    
+    def refresh(self, index: ParquetFileIndex) -> str:
+        """Bring the buffer up to date with `index`; returns 'hit', 'append' or 'reload'"""
+        if self.index is not None and self.index.signature == index.signature:
+            return 'hit'
+        
+        if self.index is not None and self.table is not None and index.extends(self.index):
+            new_groups = list(range(len(self.index.row_group_rows), len(index.row_group_rows)))
+            table = pa.concat_tables([self.table, index.read(new_groups)]) if new_groups else self.table
+            outcome = 'append'
+        else:
+            groups = index.tail_row_groups(self.capacity)
+            table = index.read(groups) if groups else None
+            self.first_row = index.row_group_starts[groups[0]] if groups else 0
+            outcome = 'reload'
+        
+        if table is not None and table.num_rows > self.capacity:
+            self.first_row += table.num_rows - self.capacity
+            table = table.slice(table.num_rows - self.capacity)
+        self.table = table
+        self.index = index
+        return outcome
+    
+    def tail(self, rows: int) -> pd.DataFrame:
+        if self.table is None:
+            return pd.DataFrame()
+        rows = min(rows, self.table.num_rows)
+        end = self.first_row + self.table.num_rows
+        return _table_to_frame(self.table.slice(self.table.num_rows - rows), np.arange(end - rows, end))
+
+
+def _table_to_frame(table: 'pa.Table', row_positions: np.ndarray) -> pd.DataFrame:
+    """
+    Convert part of a file to a DataFrame indexed the way a full pd.read_parquet would be.
+    
+    A stored RangeIndex is only metadata and cannot be rebuilt from a subset of
+    rows, so it is recomputed from the rows' positions in the file.
+    """
+    df = table.to_pandas()
+    index_columns = (table.schema.pandas_metadata or {}).get('index_columns', [])
+    if not all(isinstance(column, dict) and column.get('kind') == 'range' for column in index_columns):
+        return df  # a real index column was stored and has been restored
+    
+    start, step, name = 0, 1, None
+    if index_columns:
+        start, step, name = index_columns[0]['start'], index_columns[0]['step'], index_columns[0].get('name')
+    positions = start + step * row_positions
+    if len(positions) and (np.diff(positions) == step).all():
+        df.index = pd.RangeIndex(positions[0], positions[0] + step * len(positions), step, name=name)
+    else:
+        df.index = pd.Index(positions, name=name)
+    return df
+
+
 class DataReader:
     """
     Reads market data from Redis and Parquet files that data.py agents write.
     Provides market context for pattern detection strategies.
     """
     
-    def __init__(self, redis_host='localhost', redis_port=6379, parquet_base_path='data/parquet'):
+    def __init__(self, redis_host='localhost', redis_port=6379, parquet_base_path='data/parquet',
+                 rolling_buffer_rows=0):
         """
         Initialize data reader.
         
@@ -27,6 +222,8 @@ class DataReader:
             redis_host: Redis server host
             redis_port: Redis server port
             parquet_base_path: Base directory for Parquet data files
+            rolling_buffer_rows: Keep this many trailing rows per file in memory and
+                extend them as row groups are appended (0 = read the file tail each time)
         """
         try:
             self.redis_client = redis.Redis(
@@ -47,6 +244,16 @@ class DataReader:
         self.cache = {}
         self.cache_duration = timedelta(seconds=30)
         
+        # Parquet tail reads: per-file row-group index, latest rows and rolling buffers,
+        # all validated against the file's mtime/size rather than a TTL
+        self.rolling_buffer_rows = rolling_buffer_rows
+        self._parquet_indexes: Dict[Path, ParquetFileIndex] = {}
+        self._parquet_latest: Dict[Path, Tuple[Tuple[int, int], Dict]] = {}
+        self._rolling_buffers: Dict[Path, RollingArrowBuffer] = {}
+        self._parquet_lock = threading.Lock()
+        self.parquet_stats = {'index_builds': 0, 'row_groups_read': 0, 'latest_hits': 0,
+                              'buffer_hits': 0, 'buffer_appends': 0, 'buffer_reloads': 0}
+        
         logger.info("[DATA READER] Data Reader initialized")
     
     def get_latest_oi_data(self, symbol: str) -> Optional[Dict]:
@@ -156,17 +363,7 @@ class DataReader:
         Returns:
             DataFrame with historical OI data
         """
-        file_path = self.parquet_path / "oi" / f"{symbol}_oi.parquet"
-        if file_path.exists():
-            try:
-                df = pd.read_parquet(file_path)
-                if 'timestamp' in df.columns:
-                    cutoff = pd.Timestamp.now() - pd.Timedelta(days=days)
-                    return df[df['timestamp'] > cutoff]
-                return df.tail(days * 24)  # Rough estimate
-            except Exception as e:
-                logger.error(f"[DATA READER] Failed to read OI parquet for {symbol}: {e}")
-        return pd.DataFrame()
+        return self._get_historical_from_parquet('oi', symbol, days, rows_per_day=24)  # Rough estimate
     
     def get_historical_funding(self, symbol: str, days: int = 7) -> pd.DataFrame:
         """
@@ -179,22 +376,72 @@ class DataReader:
         Returns:
             DataFrame with historical funding data
         """
-        file_path = self.parquet_path / "funding" / f"{symbol}_funding.parquet"
+        return self._get_historical_from_parquet('funding', symbol, days, rows_per_day=8)  # Funding every 8 hours typically
+    
+    def get_recent_rows(self, data_type: str, symbol: str, rows: int) -> pd.DataFrame:
+        """
+        Load the last N rows of a Parquet data file.
+        
+        Only the trailing row groups are read (or the rolling buffer is used when
+        it holds enough rows); the result matches pd.read_parquet(...).tail(rows).
+        
+        Args:
+            data_type: Type of data ('oi', 'funding', 'chart')
+            symbol: Trading symbol
+            rows: Number of rows to return
+            
+        Returns:
+            DataFrame with up to `rows` rows, oldest first
+        """
+        file_path = self._parquet_file(data_type, symbol)
+        if not file_path.exists() or rows <= 0:
+            return pd.DataFrame()
+        try:
+            if not PYARROW_AVAILABLE:
+                return pd.read_parquet(file_path).tail(rows)
+            
+            index = self._get_parquet_index(file_path)
+            if rows <= self.rolling_buffer_rows:
+                return self._refresh_rolling_buffer(file_path, index).tail(rows)
+            
+            df = self._read_row_groups(index, index.tail_row_groups(rows))
+            return df.tail(rows)
+        except Exception as e:
+            self._forget_parquet_file(file_path)
+            logger.error(f"[DATA READER] Failed to read parquet for {symbol} ({data_type}): {e}")
+        return pd.DataFrame()
+    
+    def _get_historical_from_parquet(self, data_type: str, symbol: str, days: int, rows_per_day: int) -> pd.DataFrame:
+        """Rows newer than `days` ago, reading only row groups whose timestamps reach the cutoff"""
+        file_path = self._parquet_file(data_type, symbol)
         if file_path.exists():
             try:
-                df = pd.read_parquet(file_path)
-                if 'timestamp' in df.columns:
-                    cutoff = pd.Timestamp.now() - pd.Timedelta(days=days)
-                    return df[df['timestamp'] > cutoff]
-                return df.tail(days * 8)  # Funding every 8 hours typically
+                if not PYARROW_AVAILABLE:
+                    df = pd.read_parquet(file_path)
+                    if 'timestamp' in df.columns:
+                        cutoff = pd.Timestamp.now() - pd.Timedelta(days=days)
+                        return df[df['timestamp'] > cutoff]
+                    return df.tail(days * rows_per_day)
+                
+                index = self._get_parquet_index(file_path)
+                if not index.has_time_column:
+                    return self._read_row_groups(index, index.tail_row_groups(days * rows_per_day)).tail(days * rows_per_day)
+                
+                cutoff = pd.Timestamp.now() - pd.Timedelta(days=days)
+                df = self._read_row_groups(index, index.row_groups_after(cutoff))
+                return df[df['timestamp'] > cutoff]
             except Exception as e:
-                logger.error(f"[DATA READER] Failed to read funding parquet for {symbol}: {e}")
+                self._forget_parquet_file(file_path)
+                logger.error(f"[DATA READER] Failed to read {data_type} parquet for {symbol}: {e}")
         return pd.DataFrame()
     
     def _get_latest_from_parquet(self, data_type: str, symbol: str) -> Optional[Dict]:
         """
         Fallback method to get latest data from Parquet files.
         
+        Reads only the final non-empty row group; the row is cached until the
+        file's mtime or size changes.
+        
         Args:
             data_type: Type of data ('oi', 'funding', 'chart')
             symbol: Trading symbol
@@ -202,18 +449,74 @@ class DataReader:
         Returns:
             Dict with latest data or None
         """
-        file_path = self.parquet_path / data_type / f"{symbol}_{data_type}.parquet"
+        file_path = self._parquet_file(data_type, symbol)
         if file_path.exists():
             try:
-                df = pd.read_parquet(file_path)
-                if not df.empty:
-                    # Get most recent row
-                    latest = df.iloc[-1].to_dict()
-                    return latest
+                if not PYARROW_AVAILABLE:
+                    df = pd.read_parquet(file_path)
+                    return df.iloc[-1].to_dict() if not df.empty else None
+                
+                index = self._get_parquet_index(file_path)
+                cached = self._parquet_latest.get(file_path)
+                if cached is not None and cached[0] == index.signature:
+                    self.parquet_stats['latest_hits'] += 1
+                    return dict(cached[1])
+                
+                if self.rolling_buffer_rows > 0:
+                    df = self._refresh_rolling_buffer(file_path, index).tail(1)
+                else:
+                    df = self._read_row_groups(index, index.tail_row_groups(1)).tail(1)
+                if df.empty:
+                    return None
+                
+                # Get most recent row
+                latest = df.iloc[-1].to_dict()
+                self._parquet_latest[file_path] = (index.signature, latest)
+                return dict(latest)
             except Exception as e:
+                self._forget_parquet_file(file_path)
                 logger.error(f"[DATA READER] Failed to read parquet for {symbol} ({data_type}): {e}")
         return None
     
+    def _parquet_file(self, data_type: str, symbol: str) -> Path:
+        return self.parquet_path / data_type / f"{symbol}_{data_type}.parquet"
+    
+    def _get_parquet_index(self, file_path: Path) -> ParquetFileIndex:
+        """Row-group index for a file, rebuilt only when its mtime or size changes"""
+        with self._parquet_lock:
+            index = self._parquet_indexes.get(file_path)
+            if index is None or not index.is_current():
+                index = ParquetFileIndex(file_path)
+                self._parquet_indexes[file_path] = index
+                self.parquet_stats['index_builds'] += 1
+            return index
+    
+    def _forget_parquet_file(self, file_path: Path):
+        """Drop cached state for a file (e.g. it was read mid-rewrite)"""
+        with self._parquet_lock:
+            self._parquet_indexes.pop(file_path, None)
+            self._parquet_latest.pop(file_path, None)
+            self._rolling_buffers.pop(file_path, None)
+    
+    def _refresh_rolling_buffer(self, file_path: Path, index: ParquetFileIndex) -> RollingArrowBuffer:
+        with self._parquet_lock:
+            buffer = self._rolling_buffers.get(file_path)
+            if buffer is None:
+                buffer = RollingArrowBuffer(self.rolling_buffer_rows)
+                self._rolling_buffers[file_path] = buffer
+            previous_groups = len(buffer.index.row_group_rows) if buffer.index is not None else 0
+            outcome = buffer.refresh(index)
+            self.parquet_stats[f'buffer_{outcome}s'] += 1
+            if outcome == 'append':
+                self.parquet_stats['row_groups_read'] += len(index.row_group_rows) - previous_groups
+            elif outcome == 'reload':
+                self.parquet_stats['row_groups_read'] += len(index.tail_row_groups(self.rolling_buffer_rows))
+            return buffer
+    
+    def _read_row_groups(self, index: ParquetFileIndex, row_groups: List[int]) -> pd.DataFrame:
+        self.parquet_stats['row_groups_read'] += len(row_groups)
+        return _table_to_frame(index.read(row_groups), index.row_positions(row_groups))
+    
     def get_all_market_context(self, symbol: str) -> Dict:
         """
         Get all available market data for a symbol.
@@ -234,3 +537,80 @@ class DataReader:
         """Check if data reader has active connections"""
         return self.redis_available or self.parquet_path.exists()
 
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    import time
+    
+    # Benchmark: full pd.read_parquet vs row-group tail reads on a year of 1m bars
+    def bench(label, fn, repeats=20):
+        fn()
+        started = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+        elapsed = (time.perf_counter() - started) / repeats
+        print(f"{label:<44} {elapsed * 1000:>9.2f}ms")
+        return elapsed
+    
+    if not PYARROW_AVAILABLE:
+        print("pyarrow is not installed - nothing to benchmark")
+        sys.exit(1)
+    
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    row_group_size = 10_000
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / 'oi').mkdir()
+        file_path = Path(tmp) / 'oi' / 'BTC_oi.parquet'
+        timestamps = pd.date_range(end=pd.Timestamp.now().floor('min'), periods=rows, freq='1min')
+        df = pd.DataFrame({
+            'timestamp': timestamps,
+            'open_interest': np.random.default_rng(0).normal(1e9, 1e7, rows),
+            'price': np.random.default_rng(1).normal(60_000, 500, rows),
+        })
+        df.to_parquet(file_path, row_group_size=row_group_size)
+        print(f"{rows:,} rows, {len(df) // row_group_size} row groups, "
+              f"{file_path.stat().st_size / 1e6:.1f}MB on disk\n")
+        
+        reader = DataReader(redis_host='127.0.0.1', redis_port=1, parquet_base_path=tmp)
+        buffered = DataReader(redis_host='127.0.0.1', redis_port=1, parquet_base_path=tmp, rolling_buffer_rows=2000)
+        
+        def tail_read_latest():
+            reader._parquet_latest.clear()
+            return reader._get_latest_from_parquet('oi', 'BTC')
+        
+        full = bench("latest row: full read", lambda: pd.read_parquet(file_path).iloc[-1].to_dict())
+        tail = bench("latest row: tail row group", tail_read_latest)
+        bench("latest row: cached (file unchanged)", lambda: reader._get_latest_from_parquet('oi', 'BTC'))
+        print(f"{'':<44} {full / tail:>8.0f}x\n")
+        
+        full = bench("last 1,000 bars: full read", lambda: pd.read_parquet(file_path).tail(1000))
+        tail = bench("last 1,000 bars: tail row groups", lambda: reader.get_recent_rows('oi', 'BTC', 1000))
+        bench("last 1,000 bars: rolling buffer", lambda: buffered.get_recent_rows('oi', 'BTC', 1000))
+        print(f"{'':<44} {full / tail:>8.0f}x\n")
+        
+        full = bench("last 7 days: full read + filter", lambda: (
+            lambda d: d[d['timestamp'] > pd.Timestamp.now() - pd.Timedelta(days=7)])(pd.read_parquet(file_path)))
+        pruned = bench("last 7 days: row-group pruning", lambda: reader.get_historical_oi('BTC', days=7))
+        print(f"{'':<44} {full / pruned:>8.0f}x\n")
+        
+        # Writer appends a row group: the buffer reads just that group
+        appended = pd.DataFrame({
+            'timestamp': pd.date_range(timestamps[-1] + pd.Timedelta(minutes=1), periods=row_group_size, freq='1min'),
+            'open_interest': 1e9,
+            'price': 60_000.0,
+        })
+        with pq.ParquetWriter(file_path.with_suffix('.tmp'), pa.Table.from_pandas(df).schema) as writer:
+            for start in range(0, rows, row_group_size):
+                writer.write_table(pa.Table.from_pandas(df.iloc[start:start + row_group_size]))
+            writer.write_table(pa.Table.from_pandas(appended, preserve_index=False).cast(pa.Table.from_pandas(df).schema))
+        os.replace(file_path.with_suffix('.tmp'), file_path)
+        
+        before = dict(buffered.parquet_stats)
+        started = time.perf_counter()
+        recent = buffered.get_recent_rows('oi', 'BTC', 1000)
+        elapsed = time.perf_counter() - started
+        print(f"{'rolling buffer after append':<44} {elapsed * 1000:>9.2f}ms  "
+              f"({buffered.parquet_stats['row_groups_read'] - before['row_groups_read']} row group read, "
+              f"latest price {recent['price'].iloc[-1]:.0f})")
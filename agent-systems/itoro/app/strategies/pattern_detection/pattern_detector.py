@@ -4,25 +4,161 @@ Extracted from PatternCatalyst_BTFinal_v3.py with 100% fidelity
 86% historical win rate across multiple market conditions
 """
 
+import math
 import pandas as pd
 import numpy as np
 import talib
+from collections import deque
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
 
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# TA-Lib candle functions and the trailing bars each one reads per output
+CANDLE_PATTERN_FUNCTIONS = {
+    'engulfing': talib.CDLENGULFING,
+    'hammer': talib.CDLHAMMER,
+    'doji': talib.CDLDOJI,
+    'morning_star': talib.CDLMORNINGSTAR,
+    'evening_star': talib.CDLEVENINGSTAR,
+}
+CANDLE_PATTERN_LOOKBACK = {
+    'engulfing': 2,
+    'hammer': 11,
+    'doji': 10,
+    'morning_star': 12,
+    'evening_star': 12,
+}
+
+# Appending more bars than this in one update is cheaper as a full rebuild
+MAX_INCREMENTAL_BARS = 5
+
+
+class _RollingBuffer:
+    """Trailing window of values exposed as a zero-copy numpy view"""
+
+    def __init__(self, capacity: int, dtype=np.float64):
+        self.capacity = capacity
+        self._data = np.zeros(capacity * 2, dtype=dtype)
+        self._start = 0
+        self._end = 0
+
+    def reset(self, values):
+        values = np.asarray(values, dtype=self._data.dtype)[-self.capacity:]
+        self._data[:len(values)] = values
+        self._start = 0
+        self._end = len(values)
+
+    def append(self, value):
+        if self._end == len(self._data):
+            # Compact once per `capacity` appends, so appends stay amortised O(1)
+            keep = self._end - self._start
+            self._data[:keep] = self._data[self._start:self._end]
+            self._start, self._end = 0, keep
+        self._data[self._end] = value
+        self._end += 1
+        if self._end - self._start > self.capacity:
+            self._start += 1
+
+    def view(self) -> np.ndarray:
+        return self._data[self._start:self._end]
+
+
+class _RollingSMA:
+    """
+    Simple moving average over the trailing `period` values.
+    
+    Each value is a correctly rounded sum of just those values, so no running
+    total drifts over a long session (prices sitting exactly on their average
+    stay exactly on it).
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self._values = deque(maxlen=period)
+
+    def update(self, value: float) -> float:
+        self._values.append(value)
+        if len(self._values) < self.period:
+            return np.nan
+        return math.fsum(self._values) / self.period
+
+
+class _WindowedRSI:
+    """
+    talib.RSI of the trailing `window` closes, maintained one bar at a time.
+    
+    TA-Lib seeds Wilder's averages with the first `period` changes it is given,
+    so the value of a full-window call depends on where the window starts. The
+    average is kept as that seed plus an exponentially weighted tail, and both
+    slide forward in O(1) when the oldest bar leaves the window.
+    """
+
+    def __init__(self, period: int, window: int):
+        self.period = period
+        self.window = window
+        self.decay = (period - 1) / period
+        self._closes = deque(maxlen=window)
+        self._changes = deque()  # (gain, loss) between consecutive closes in the window
+        self._seed = [0.0, 0.0]
+        self._tail = [0.0, 0.0]
+
+    def update(self, value: float) -> float:
+        if not self._closes:
+            self._closes.append(value)
+            return np.nan
+        
+        change = value - self._closes[-1]
+        gain, loss = (0.0, -change) if change < 0 else (change, 0.0)
+        evicting = len(self._closes) == self.window
+        self._closes.append(value)
+        self._changes.append((gain, loss))
+        
+        count = len(self._changes)
+        if count <= self.period:
+            self._seed[0] += gain
+            self._seed[1] += loss
+        else:
+            self._tail[0] = self._tail[0] * self.decay + gain
+            self._tail[1] = self._tail[1] * self.decay + loss
+        
+        if evicting:
+            # The oldest change leaves the seed and the first tail change joins it
+            dropped = self._changes.popleft()
+            promoted = self._changes[self.period - 1]
+            weight = self.decay ** (count - 1 - self.period)
+            for side in (0, 1):
+                self._seed[side] += promoted[side] - dropped[side]
+                self._tail[side] -= weight * promoted[side]
+            count -= 1
+        
+        if count < self.period:
+            return np.nan
+        
+        weight = self.decay ** (count - self.period)
+        avg_gain = (weight * self._seed[0] + self._tail[0]) / self.period
+        avg_loss = (weight * self._seed[1] + self._tail[1]) / self.period
+        total = avg_gain + avg_loss
+        if -0.00000001 < total < 0.00000001:
+            return 0.0
+        return 100.0 * (avg_gain / total)
+
+
 class PatternDetector:
     """
     Real-time pattern detection engine with regime-aware filtering.
     Maintains all logic from the backtested PatternCatalyst strategy.
     """
     
-    def __init__(self, ohlcv_history_length=100):
+    def __init__(self, ohlcv_history_length=100, incremental=True):
         """
         Initialize pattern detector with all strategy parameters.
         
         Args:
             ohlcv_history_length: Number of historical bars to maintain (default: 100)
+            incremental: Keep rolling indicator state between updates instead of
+                recalculating the whole window on every bar (default: True)
         """
         print("[PATTERN DETECTOR] Initializing...")
         
@@ -44,6 +180,14 @@ class PatternDetector:
         self.rsi = None
         self.volume_sma = None
         
+        # Rolling state for incremental updates
+        self.incremental = incremental
+        self._buffers = None
+        self._indicators = None
+        self._last_bar = None  # (index label, OHLCV tuple) of the newest bar
+        self._data_version = 0
+        self._regime_cache = None  # (data version, detected regime)
+        
         # Strategy parameters - EXACT from backtest (lines 27-40)
         self.available_patterns = ['engulfing', 'hammer', 'doji', 'morning_star', 'evening_star']
         self.risk_percentage = 0.02  # 2% risk per trade
@@ -83,6 +227,10 @@ class PatternDetector:
         """
         Update OHLCV data and recalculate all indicators.
         
+        When the frame extends the previous one by a few bars, only those bars are
+        pushed through the rolling indicator state. Any other frame (different
+        symbol, revised or still-forming last candle, gaps) rebuilds from scratch.
+        
         Args:
             ohlcv_df: DataFrame with columns [Open, High, Low, Close, Volume]
         """
@@ -90,9 +238,32 @@ class PatternDetector:
         if len(ohlcv_df) > self.ohlcv_history_length:
             ohlcv_df = ohlcv_df.iloc[-self.ohlcv_history_length:]
         
-        self.ohlcv_data = ohlcv_df.copy()
         self.bar_count += 1
         
+        if not self.incremental:
+            self.ohlcv_data = ohlcv_df.copy()
+            self._recalculate_indicators(ohlcv_df)
+            return
+        
+        values = self._ohlcv_values(ohlcv_df)
+        new_bars = self._count_appended_bars(ohlcv_df, values)
+        
+        if new_bars is None:
+            self._rebuild_state(ohlcv_df, values)
+        elif new_bars > 0:
+            for row in values[-new_bars:]:
+                self._append_bar(*row)
+            self._publish_indicators()
+        
+        if new_bars != 0:
+            self._last_bar = (ohlcv_df.index[-1], tuple(values[-1])) if len(values) else None
+            self._data_version += 1
+        
+        # The rolling buffers hold every value the scan reads, so no defensive copy
+        self.ohlcv_data = ohlcv_df
+    
+    def _recalculate_indicators(self, ohlcv_df: pd.DataFrame):
+        """Calculate every indicator over the full window (the non-incremental path)"""
         # Calculate pattern indicators (lines 10-14)
         self.engulfing = talib.CDLENGULFING(
             ohlcv_df['Open'].values,
@@ -135,6 +306,98 @@ class PatternDetector:
         self.rsi = talib.RSI(ohlcv_df['Close'].values, timeperiod=14)
         self.volume_sma = talib.SMA(ohlcv_df['Volume'].values, timeperiod=20)
     
+    @staticmethod
+    def _ohlcv_values(ohlcv_df: pd.DataFrame) -> np.ndarray:
+        """OHLCV rows as a float array (one block copy for plain OHLCV frames)"""
+        if list(ohlcv_df.columns) == OHLCV_COLUMNS:
+            return ohlcv_df.to_numpy(dtype=np.float64)
+        return np.column_stack([ohlcv_df[column].to_numpy(dtype=np.float64) for column in OHLCV_COLUMNS])
+    
+    def _count_appended_bars(self, ohlcv_df: pd.DataFrame, values: np.ndarray) -> Optional[int]:
+        """
+        Number of new bars ohlcv_df adds on top of the current window.
+        
+        Returns:
+            0 if nothing changed, N if the frame is the current window plus N new
+            bars, or None when the rolling state cannot be reused.
+        """
+        if self._last_bar is None or len(ohlcv_df) == 0:
+            return None
+        
+        last_label, last_values = self._last_bar
+        index = ohlcv_df.index
+        for new_bars in range(min(MAX_INCREMENTAL_BARS, len(ohlcv_df) - 1) + 1):
+            if index[-1 - new_bars] == last_label:
+                break
+        else:
+            return None
+        
+        # The overlapping bar must be unchanged (a still-forming candle rebuilds)
+        if tuple(values[-1 - new_bars]) != last_values:
+            return None
+        
+        # ...and the window must be exactly the old one slid forward
+        window_length = len(self._buffers['Close'].view())
+        if len(ohlcv_df) != min(window_length + new_bars, self.ohlcv_history_length):
+            return None
+        
+        return new_bars
+    
+    def _rebuild_state(self, ohlcv_df: pd.DataFrame, values: np.ndarray):
+        """Recalculate the whole window and re-seed the rolling state from it"""
+        capacity = self.ohlcv_history_length
+        self._buffers = {name: _RollingBuffer(capacity) for name in OHLCV_COLUMNS}
+        for name, column in zip(OHLCV_COLUMNS, values.T):
+            self._buffers[name].reset(column)
+        
+        self._indicators = {
+            'sma_20': _RollingSMA(20),
+            'sma_50': _RollingSMA(50),
+            'volume_sma': _RollingSMA(20),
+            'rsi': _WindowedRSI(14, capacity),
+        }
+        for close, volume in values[:, 3:5]:
+            self._indicators['sma_20'].update(close)
+            self._indicators['sma_50'].update(close)
+            self._indicators['volume_sma'].update(volume)
+            self._indicators['rsi'].update(close)
+        
+        self._recalculate_indicators(ohlcv_df)
+        for name in self.available_patterns + ['sma_20', 'sma_50', 'rsi', 'volume_sma']:
+            values = getattr(self, name)
+            self._buffers[name] = _RollingBuffer(capacity, dtype=values.dtype)
+            self._buffers[name].reset(values)
+        self._publish_indicators()
+    
+    def _append_bar(self, open_, high, low, close, volume):
+        """Push one bar through the rolling indicator state"""
+        for name, value in zip(OHLCV_COLUMNS, (open_, high, low, close, volume)):
+            self._buffers[name].append(value)
+        
+        opens = self._buffers['Open'].view()
+        highs = self._buffers['High'].view()
+        lows = self._buffers['Low'].view()
+        closes = self._buffers['Close'].view()
+        
+        # Candle patterns only look back a fixed number of bars
+        for name, pattern_function in CANDLE_PATTERN_FUNCTIONS.items():
+            bars = CANDLE_PATTERN_LOOKBACK[name] + 1
+            if len(closes) < bars:
+                signal = 0
+            else:
+                signal = pattern_function(opens[-bars:], highs[-bars:], lows[-bars:], closes[-bars:])[-1]
+            self._buffers[name].append(signal)
+        
+        self._buffers['sma_20'].append(self._indicators['sma_20'].update(close))
+        self._buffers['sma_50'].append(self._indicators['sma_50'].update(close))
+        self._buffers['volume_sma'].append(self._indicators['volume_sma'].update(volume))
+        self._buffers['rsi'].append(self._indicators['rsi'].update(close))
+    
+    def _publish_indicators(self):
+        """Point the public indicator arrays at the rolling buffers"""
+        for name in self.available_patterns + ['sma_20', 'sma_50', 'rsi', 'volume_sma']:
+            setattr(self, name, self._buffers[name].view())
+    
     def check_trend_confirmation(self, direction: str) -> bool:
         """
         Check if trend supports the trade direction (lines 63-77).
@@ -289,12 +552,18 @@ class PatternDetector:
         Update regime confidence scores based on trend strength (lines 165-218).
         No hard switches - smooth confidence blending.
         
+        In incremental mode the result is cached until new bars arrive, so
+        re-scanning unchanged data does not decay/boost the confidences again.
+        
         Returns:
             Detected regime name
         """
         if self.ohlcv_data is None or len(self.ohlcv_data) < 50:
             return "neutral_sideways"
         
+        if self.incremental and self._regime_cache is not None and self._regime_cache[0] == self._data_version:
+            return self._regime_cache[1]
+        
         current_price = self.ohlcv_data['Close'].iloc[-1]
         sma_20 = self.sma_20[-1]
         sma_50 = self.sma_50[-1]
@@ -343,7 +612,9 @@ class PatternDetector:
             self.regime_confidence[detected_regime] = min(1.0, self.regime_confidence[detected_regime])
         
         print(f"[REGIME] Detected: {detected_regime}, Confidence: {self.regime_confidence[detected_regime]:.3f}")
-        return detected_regime or "neutral_sideways"
+        detected_regime = detected_regime or "neutral_sideways"
+        self._regime_cache = (self._data_version, detected_regime)
+        return detected_regime
     
     def set_regime_parameters(self, detected_regime: str):
         """
@@ -636,8 +907,89 @@ class PatternDetector:
         return detected_patterns
 
 
+def replay_benchmark(ohlcv_df: pd.DataFrame, ohlcv_history_length: int = 100, warmup_bars: int = 50) -> Dict:
+    """
+    Replay recorded bars through a full-recalculation and an incremental detector.
+    
+    Each bar is fed the way a live scanner sees it (the history up to that bar),
+    and every scan result of the two detectors is compared.
+    
+    Returns:
+        Dict with per-bar update timings, signal count and mismatching bars
+    """
+    import io
+    import time
+    from contextlib import redirect_stdout
+    
+    detectors = {
+        'full': PatternDetector(ohlcv_history_length, incremental=False),
+        'incremental': PatternDetector(ohlcv_history_length, incremental=True),
+    }
+    update_seconds = {name: 0.0 for name in detectors}
+    signals = 0
+    mismatches = []
+    
+    with redirect_stdout(io.StringIO()):
+        for end in range(warmup_bars, len(ohlcv_df)):
+            window = ohlcv_df.iloc[:end + 1]
+            results = {}
+            for name, detector in detectors.items():
+                started = time.perf_counter()
+                detector.update_data(window)
+                update_seconds[name] += time.perf_counter() - started
+                results[name] = detector.scan_for_patterns()
+            
+            signals += len(results['full'])
+            if _signal_key(results['full']) != _signal_key(results['incremental']):
+                mismatches.append(window.index[-1])
+    
+    bars = max(1, len(ohlcv_df) - warmup_bars)
+    return {
+        'bars': bars,
+        'signals': signals,
+        'mismatches': mismatches,
+        'full_update_us': update_seconds['full'] / bars * 1e6,
+        'incremental_update_us': update_seconds['incremental'] / bars * 1e6,
+    }
+
+
+def _signal_key(patterns: List[Dict]) -> List[Tuple]:
+    """Fields of a scan result that make up the trading signal"""
+    return [
+        (p['pattern'], p['signal'], p['direction'], p['regime'], p['regime_confidence'],
+         tuple(p['confirmations'].items()), tuple(p['parameters'].items()))
+        for p in patterns
+    ]
+
+
 if __name__ == "__main__":
-    print("Pattern Detector - Core Logic Loaded")
-    print("Extracted from PatternCatalyst_BTFinal_v3.py with 100% fidelity")
-    print("Ready for real-time pattern detection")
+    import sys
+    import glob
+    import os
+    
+    if '--benchmark' not in sys.argv:
+        print("Pattern Detector - Core Logic Loaded")
+        print("Extracted from PatternCatalyst_BTFinal_v3.py with 100% fidelity")
+        print("Ready for real-time pattern detection")
+        sys.exit(0)
+    
+    # Replay benchmark: python pattern_detector.py --benchmark [csv ...]
+    paths = [arg for arg in sys.argv[1:] if arg != '--benchmark']
+    if not paths:
+        data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'src', 'data', 'rbi')
+        paths = sorted(glob.glob(os.path.join(data_dir, '*.csv')))
+    
+    for path in paths:
+        df = pd.read_csv(path)
+        df.columns = df.columns.str.strip().str.lower()
+        time_column = next((c for c in ('datetime', 'timestamp', 'date') if c in df.columns), None)
+        if time_column:
+            df.index = pd.to_datetime(df[time_column])
+        df = df.rename(columns={c.lower(): c for c in OHLCV_COLUMNS})[OHLCV_COLUMNS]
+        
+        result = replay_benchmark(df)
+        print(f"{os.path.basename(path):<36} {result['bars']:>6} bars  "
+              f"full {result['full_update_us']:>7.1f}us/bar  "
+              f"incremental {result['incremental_update_us']:>6.1f}us/bar  "
+              f"signals {result['signals']:>4}  mismatches {len(result['mismatches'])}")
 
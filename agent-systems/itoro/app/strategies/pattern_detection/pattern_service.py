@@ -28,8 +28,10 @@ except ImportError:
 # Add current directory to Python path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from concurrent.futures import ThreadPoolExecutor
 from pattern_detector import PatternDetector
 from data_fetcher import BinanceDataFetcher
+from scan_pipeline import DetectionPool, run_scan_pipeline
 from alert_system import AlertSystem
 from pattern_storage import PatternStorage
 from data_reader import DataReader
@@ -59,7 +61,9 @@ class PatternService(QObject):
         data_timeframe: str = '1d',
         deepseek_api_key: str = None,
         enable_desktop_notifications: bool = True,
-        db_path: str = 'data/patterns.db'
+        db_path: str = 'data/patterns.db',
+        fetch_concurrency: int = None,
+        detection_workers: int = None
     ):
         """
         Initialize pattern service.
@@ -71,6 +75,8 @@ class PatternService(QObject):
             deepseek_api_key: DeepSeek API key for AI analysis
             enable_desktop_notifications: Enable desktop notifications
             db_path: SQLite database path
+            fetch_concurrency: Concurrent OHLCV requests per scan (default: config)
+            detection_workers: Detection worker processes, 0 = in-process (default: config)
         """
         # Initialize QObject parent if Qt is available
         if QT_AVAILABLE:
@@ -80,12 +86,15 @@ class PatternService(QObject):
         trading_config = config.get_trading_config()
         system_config = config.get_system_config()
         notification_config = config.get_notification_config()
+        scan_config = config.get_scan_config()
 
         # Configuration with fallbacks
         self.symbols = symbols or trading_config['symbols']
         self.scan_interval = scan_interval or trading_config['scan_interval']
         self.data_timeframe = data_timeframe or trading_config['data_timeframe']
         self.alert_cooldown_hours = system_config['alert_cooldown_hours']
+        self.fetch_concurrency = fetch_concurrency if fetch_concurrency is not None else scan_config['fetch_concurrency']
+        self.detection_workers = detection_workers if detection_workers is not None else scan_config['detection_workers']
         
         # Initialize components
         print("\n" + "="*80)
@@ -95,9 +104,13 @@ class PatternService(QObject):
         print(f"\n[CONFIG] Symbols: {', '.join(self.symbols)}")
         print(f"[CONFIG] Scan Interval: {scan_interval} seconds ({scan_interval/60:.1f} minutes)")
         print(f"[CONFIG] Data Timeframe: {data_timeframe}")
+        print(f"[CONFIG] Fetch Concurrency: {self.fetch_concurrency}, Detection Workers: {self.detection_workers}")
         
+        # Standalone detector for ad-hoc use; scans keep one detector per symbol in the detection pool
         self.pattern_detector = PatternDetector(ohlcv_history_length=100)
-        self.data_fetcher = BinanceDataFetcher()
+        self.data_fetcher = BinanceDataFetcher(max_workers=self.fetch_concurrency)
+        self.fetch_pool = ThreadPoolExecutor(max_workers=max(1, self.fetch_concurrency), thread_name_prefix='scan-fetch')
+        self.detection_pool = DetectionPool(workers=self.detection_workers, ohlcv_history_length=100)
         self.data_reader = DataReader()
         print("[INIT] Data Reader initialized - connected to market data stream")
         self.alert_system = AlertSystem(
@@ -113,6 +126,7 @@ class PatternService(QObject):
         self.scan_count = 0
         self.patterns_detected = 0
         self.last_scan_time = None
+        self.last_scan_timings = None
 
         # Pattern alert tracking to prevent duplicate alerts
         self.alerted_patterns = {}  # Will be loaded from database
@@ -251,6 +265,111 @@ class PatternService(QObject):
             if not self.alerted_patterns[symbol]:
                 del self.alerted_patterns[symbol]
     
+    def _fetch_symbol_data(self, symbol: str) -> Optional[tuple]:
+        """
+        I/O stage for one symbol: new candles plus market context.
+        
+        Returns:
+            (ohlcv_df, market_context) or None if no data is available
+        """
+        print(f"\n[SCAN] {symbol} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        
+        # Fetch OHLCV data (only the bars since the last scan of this symbol)
+        ohlcv_data = self.data_fetcher.get_ohlcv_incremental(symbol, self.data_timeframe, limit=100)
+        
+        if ohlcv_data is None or len(ohlcv_data) == 0:
+            print(f"[SCAN] {symbol} - No data available")
+            return None
+        
+        # Get market data context from data collection service
+        market_context = self.data_reader.get_all_market_context(symbol)
+        
+        # Log market context availability
+        context_status = []
+        if market_context.get('oi'):
+            context_status.append("OI")
+        if market_context.get('funding'):
+            context_status.append("Funding")
+        if market_context.get('chart'):
+            context_status.append("Chart")
+        if context_status:
+            print(f"[MARKET DATA] {symbol} - Available: {', '.join(context_status)}")
+        else:
+            print(f"[MARKET DATA] {symbol} - No market context available (data collection may not be running)")
+        
+        return ohlcv_data, market_context
+    
+    def _handle_detected_patterns(self, symbol: str, detected_patterns: List[Dict], market_context: Dict) -> List[Dict]:
+        """
+        Alert, store and publish the patterns detected for one symbol.
+        
+        Returns:
+            The detected patterns (empty list if none)
+        """
+        if not detected_patterns:
+            print(f"[SCAN] {symbol} - No patterns detected")
+            return []
+        
+        print(f"[SCAN] {symbol} - {len(detected_patterns)} pattern(s) detected")
+
+        # Process each detected pattern
+        for pattern_data in detected_patterns:
+            pattern_type = pattern_data['pattern']
+            
+            # Enhance pattern data with market context
+            pattern_data['market_context'] = market_context
+
+            # Check if we should alert for this pattern (prevent duplicates)
+            if self._should_alert_for_pattern(symbol, pattern_type):
+                # Get Discord user ID for notifications (you'll need to implement user session management)
+                discord_user_id = self._get_current_user_discord_id()
+
+                # Generate AI analysis with market context and send alerts
+                alert_result = self.alert_system.send_alert(
+                    pattern_data,
+                    symbol,
+                    include_ai_analysis=True,
+                    discord_user_id=discord_user_id
+                )
+                print(f"[ALERT] Sent alert for {symbol} {pattern_type} (with market context)")
+
+                # SAVE ALERT TIMESTAMP TO DATABASE
+                self.storage.save_alert_timestamp(symbol, pattern_type, datetime.now())
+                
+                # Emit signal for UI (if Qt available)
+                if QT_AVAILABLE and self.pattern_detected:
+                    pattern_ui_data = {
+                        'symbol': symbol,
+                        'pattern_type': pattern_type,
+                        'timeframe': self.data_timeframe,
+                        'ai_analysis': alert_result.get('ai_analysis', 'AI analysis not available'),
+                        'recommendation': self._generate_recommendation(pattern_data, market_context),
+                        'timestamp': datetime.now()
+                    }
+                    self.pattern_detected.emit(pattern_ui_data)
+            else:
+                # Skip alert - only generate AI analysis for storage (NO notifications)
+                ai_analysis = self.alert_system.generate_ai_analysis(pattern_data, symbol) if self.alert_system.ai_enabled else f"{pattern_type.upper()} pattern detected ({pattern_data['confidence']:.1%} confidence) - Alert already sent recently"
+                alert_result = {
+                    'symbol': symbol,
+                    'pattern_data': pattern_data,
+                    'ai_analysis': ai_analysis,
+                    'alert_timestamp': datetime.now().isoformat()
+                }
+                print(f"[SKIP] Alert skipped for {symbol} {pattern_type} (recently alerted)")
+
+            # Store pattern in database regardless of alert status
+            pattern_id = self.storage.save_pattern(
+                symbol,
+                pattern_data,
+                alert_result['ai_analysis']
+            )
+
+            if pattern_id > 0:
+                self.patterns_detected += 1
+        
+        return detected_patterns
+    
     def scan_symbol(self, symbol: str) -> List[Dict]:
         """
         Scan a single symbol for patterns.
@@ -262,100 +381,15 @@ class PatternService(QObject):
             List of detected patterns
         """
         try:
-            print(f"\n[SCAN] {symbol} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            
-            # Fetch OHLCV data
-            ohlcv_data = self.data_fetcher.get_ohlcv(symbol, self.data_timeframe, limit=100)
-            
-            if ohlcv_data is None or len(ohlcv_data) == 0:
-                print(f"[SCAN] {symbol} - No data available")
+            fetched = self._fetch_symbol_data(symbol)
+            if fetched is None:
                 return []
+            ohlcv_data, market_context = fetched
             
-            # Get market data context from data collection service
-            market_context = self.data_reader.get_all_market_context(symbol)
-            
-            # Log market context availability
-            context_status = []
-            if market_context.get('oi'):
-                context_status.append("OI")
-            if market_context.get('funding'):
-                context_status.append("Funding")
-            if market_context.get('chart'):
-                context_status.append("Chart")
-            if context_status:
-                print(f"[MARKET DATA] {symbol} - Available: {', '.join(context_status)}")
-            else:
-                print(f"[MARKET DATA] {symbol} - No market context available (data collection may not be running)")
+            # Update this symbol's detector with new data and scan for patterns
+            detected_patterns, _ = self.detection_pool.submit(symbol, ohlcv_data).result()
             
-            # Update pattern detector with new data
-            self.pattern_detector.update_data(ohlcv_data)
-            
-            # Scan for patterns
-            detected_patterns = self.pattern_detector.scan_for_patterns()
-            
-            if detected_patterns:
-                print(f"[SCAN] {symbol} - {len(detected_patterns)} pattern(s) detected")
-
-                # Process each detected pattern
-                for pattern_data in detected_patterns:
-                    pattern_type = pattern_data['pattern']
-                    
-                    # Enhance pattern data with market context
-                    pattern_data['market_context'] = market_context
-
-                    # Check if we should alert for this pattern (prevent duplicates)
-                    if self._should_alert_for_pattern(symbol, pattern_type):
-                        # Get Discord user ID for notifications (you'll need to implement user session management)
-                        discord_user_id = self._get_current_user_discord_id()
-
-                        # Generate AI analysis with market context and send alerts
-                        alert_result = self.alert_system.send_alert(
-                            pattern_data,
-                            symbol,
-                            include_ai_analysis=True,
-                            discord_user_id=discord_user_id
-                        )
-                        print(f"[ALERT] Sent alert for {symbol} {pattern_type} (with market context)")
-
-                        # SAVE ALERT TIMESTAMP TO DATABASE
-                        self.storage.save_alert_timestamp(symbol, pattern_type, datetime.now())
-                        
-                        # Emit signal for UI (if Qt available)
-                        if QT_AVAILABLE and self.pattern_detected:
-                            pattern_ui_data = {
-                                'symbol': symbol,
-                                'pattern_type': pattern_type,
-                                'timeframe': self.data_timeframe,
-                                'ai_analysis': alert_result.get('ai_analysis', 'AI analysis not available'),
-                                'recommendation': self._generate_recommendation(pattern_data, market_context),
-                                'timestamp': datetime.now()
-                            }
-                            self.pattern_detected.emit(pattern_ui_data)
-                    else:
-                        # Skip alert - only generate AI analysis for storage (NO notifications)
-                        ai_analysis = self.alert_system.generate_ai_analysis(pattern_data, symbol) if self.alert_system.ai_enabled else f"{pattern_type.upper()} pattern detected ({pattern_data['confidence']:.1%} confidence) - Alert already sent recently"
-                        alert_result = {
-                            'symbol': symbol,
-                            'pattern_data': pattern_data,
-                            'ai_analysis': ai_analysis,
-                            'alert_timestamp': datetime.now().isoformat()
-                        }
-                        print(f"[SKIP] Alert skipped for {symbol} {pattern_type} (recently alerted)")
-
-                    # Store pattern in database regardless of alert status
-                    pattern_id = self.storage.save_pattern(
-                        symbol,
-                        pattern_data,
-                        alert_result['ai_analysis']
-                    )
-
-                    if pattern_id > 0:
-                        self.patterns_detected += 1
-                
-                return detected_patterns
-            else:
-                print(f"[SCAN] {symbol} - No patterns detected")
-                return []
+            return self._handle_detected_patterns(symbol, detected_patterns, market_context)
                 
         except Exception as e:
             print(f"[ERROR] Scan failed for {symbol}: {e}")
@@ -365,17 +399,23 @@ class PatternService(QObject):
         """
         Scan all configured symbols.
         
+        Fetches run concurrently (bounded, inside each exchange's weight budget),
+        detection runs in the worker pool as each symbol's data arrives, and
+        alerts/storage are handled here one symbol at a time.
+        
         Returns:
             Dictionary mapping symbols to detected patterns
         """
-        results = {}
-        
-        for symbol in self.symbols:
-            patterns = self.scan_symbol(symbol)
-            if patterns:
-                results[symbol] = patterns
-            time.sleep(1)  # Small delay between symbol scans
+        results, timings = run_scan_pipeline(
+            self.symbols,
+            fetch=self._fetch_symbol_data,
+            detection_pool=self.detection_pool,
+            handle=self._handle_detected_patterns,
+            fetch_pool=self.fetch_pool
+        )
         
+        self.last_scan_timings = timings.summary()
+        print(timings.format())
         return results
     
     def run(self):
@@ -489,6 +529,9 @@ class PatternService(QObject):
         if self.alerted_patterns:
             print(f"  Tracked symbols: {list(self.alerted_patterns.keys())}")
         
+        self.fetch_pool.shutdown(wait=False, cancel_futures=True)
+        self.detection_pool.shutdown()
+        
         print("\n[SERVICE] Stopped successfully")
         print("="*80 + "\n")
         
@@ -516,6 +559,7 @@ class PatternService(QObject):
             'data_timeframe': self.data_timeframe,
             'alerted_patterns': self.alerted_patterns,
             'alert_cooldown_hours': self.alert_cooldown_hours,
+            'last_scan_timings': self.last_scan_timings,
             'database_stats': stats
         }
 
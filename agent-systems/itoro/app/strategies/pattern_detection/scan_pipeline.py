@@ -0,0 +1,179 @@
+"""
+Scan Pipeline - Concurrent Multi-Symbol Scanning
+Fetch stage (I/O threads) -> detection stage (worker processes) -> result handling,
+with per-stage timing for every scan
+"""
+
+import time
+import zlib
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from pattern_detector import PatternDetector
+
+
+# One detector per symbol, living in whichever process runs that symbol's detection
+_symbol_detectors: Dict[str, PatternDetector] = {}
+
+
+def _detect_symbol(symbol: str, ohlcv_df: pd.DataFrame, ohlcv_history_length: int) -> Tuple[List[Dict], float]:
+    """Update the symbol's detector and scan it (runs in a detection worker)"""
+    started = time.perf_counter()
+    detector = _symbol_detectors.get(symbol)
+    if detector is None:
+        detector = PatternDetector(ohlcv_history_length=ohlcv_history_length)
+        _symbol_detectors[symbol] = detector
+    detector.update_data(ohlcv_df)
+    patterns = detector.scan_for_patterns()
+    return patterns, time.perf_counter() - started
+
+
+class DetectionPool:
+    """
+    CPU stage of the scan: pattern detection in worker processes.
+
+    Each symbol is pinned to one single-process shard, so its detector (rolling
+    indicators, regime confidence, pending doji) persists between scans. With
+    workers=0 detection runs inline in the calling thread.
+    """
+
+    def __init__(self, workers: int = 2, ohlcv_history_length: int = 100):
+        self.workers = max(0, int(workers))
+        self.ohlcv_history_length = ohlcv_history_length
+        # spawn: safe alongside the fetch threads, and the same on Windows
+        context = multiprocessing.get_context('spawn')
+        self._shards = [ProcessPoolExecutor(max_workers=1, mp_context=context) for _ in range(self.workers)]
+
+    def submit(self, symbol: str, ohlcv_df: pd.DataFrame) -> Future:
+        """Queue detection for one symbol; the future yields (patterns, seconds)"""
+        if not self._shards:
+            future = Future()
+            try:
+                future.set_result(_detect_symbol(symbol, ohlcv_df, self.ohlcv_history_length))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        shard = self._shards[zlib.crc32(symbol.encode()) % len(self._shards)]
+        return shard.submit(_detect_symbol, symbol, ohlcv_df, self.ohlcv_history_length)
+
+    def shutdown(self):
+        for shard in self._shards:
+            shard.shutdown(wait=True, cancel_futures=True)
+        self._shards = []
+
+
+class StageTimings:
+    """Per-stage durations for one scan"""
+
+    STAGES = ('fetch', 'detect', 'handle')
+
+    def __init__(self):
+        self.durations: Dict[str, List[float]] = {stage: [] for stage in self.STAGES}
+        self.started = time.perf_counter()
+        self.wall_seconds = 0.0
+
+    def record(self, stage: str, seconds: float):
+        self.durations[stage].append(seconds)
+
+    def finish(self):
+        self.wall_seconds = time.perf_counter() - self.started
+
+    def summary(self) -> Dict:
+        summary = {'wall_seconds': self.wall_seconds}
+        for stage, values in self.durations.items():
+            summary[stage] = {
+                'count': len(values),
+                'total_seconds': sum(values),
+                'avg_ms': (sum(values) / len(values) * 1000) if values else 0.0,
+                'max_ms': max(values) * 1000 if values else 0.0,
+            }
+        return summary
+
+    def format(self) -> str:
+        summary = self.summary()
+        stages = ' | '.join(
+            f"{stage}: n={summary[stage]['count']} avg={summary[stage]['avg_ms']:.0f}ms max={summary[stage]['max_ms']:.0f}ms"
+            for stage in self.STAGES
+        )
+        return f"[TIMING] {stages} | wall {summary['wall_seconds']:.2f}s"
+
+
+def run_scan_pipeline(
+    symbols: List[str],
+    fetch: Callable[[str], Optional[Tuple[pd.DataFrame, Dict]]],
+    detection_pool: DetectionPool,
+    handle: Callable[[str, List[Dict], Dict], List[Dict]],
+    fetch_pool: ThreadPoolExecutor,
+) -> Tuple[Dict[str, List[Dict]], StageTimings]:
+    """
+    Scan symbols with the stages overlapping.
+
+    Args:
+        symbols: Symbols to scan
+        fetch: symbol -> (ohlcv_df, market_context) or None; runs on fetch_pool threads
+        detection_pool: Where detection runs
+        handle: (symbol, patterns, market_context) -> patterns to report; runs in
+            the calling thread (alerts, storage, UI signals are not thread-safe)
+        fetch_pool: Bounded thread pool for the I/O stage
+
+    Returns:
+        (symbol -> reported patterns, stage timings)
+    """
+    timings = StageTimings()
+
+    def timed_fetch(symbol):
+        started = time.perf_counter()
+        try:
+            return fetch(symbol)
+        finally:
+            timings.record('fetch', time.perf_counter() - started)
+
+    fetch_futures = {fetch_pool.submit(timed_fetch, symbol): symbol for symbol in symbols}
+    detect_futures = {}
+    results = {}
+    pending = set(fetch_futures)
+
+    # Detection starts as soon as a symbol's data lands, handling as soon as it is scanned
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future in fetch_futures:
+                symbol = fetch_futures[future]
+                try:
+                    fetched = future.result()
+                except Exception as e:
+                    print(f"[ERROR] Fetch failed for {symbol}: {e}")
+                    continue
+                if fetched is None:
+                    continue
+                ohlcv_df, market_context = fetched
+                detect_future = detection_pool.submit(symbol, ohlcv_df)
+                detect_futures[detect_future] = (symbol, market_context)
+                pending.add(detect_future)
+                continue
+
+            symbol, market_context = detect_futures[future]
+            try:
+                patterns, detect_seconds = future.result()
+            except Exception as e:
+                print(f"[ERROR] Detection failed for {symbol}: {e}")
+                continue
+            timings.record('detect', detect_seconds)
+
+            started = time.perf_counter()
+            try:
+                reported = handle(symbol, patterns, market_context)
+            except Exception as e:
+                print(f"[ERROR] Handling patterns failed for {symbol}: {e}")
+                reported = []
+            timings.record('handle', time.perf_counter() - started)
+            if reported:
+                results[symbol] = reported
+
+    timings.finish()
+    return results, timings
+
@@ -0,0 +1,215 @@
+"""
+Test Data Reader - Parquet Tail Reads Match Full Reads
+Verifies row-group pruning, the mtime-validated file index and the rolling buffer
+"""
+
+import sys
+import os
+import time
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_reader import DataReader
+
+
+ROW_GROUP_SIZE = 100
+
+
+def make_oi_frame(rows, start=None):
+    """Hourly OI rows, stamped on the half hour so no row sits on a day cutoff"""
+    end = pd.Timestamp.now().floor('h') - pd.Timedelta(minutes=30)
+    start = start if start is not None else end - pd.Timedelta(hours=rows - 1)
+    timestamps = pd.date_range(start, periods=rows, freq='1h')
+    return pd.DataFrame({
+        'timestamp': timestamps,
+        'open_interest': np.linspace(1e9, 2e9, rows),
+        'symbol': 'BTC',
+    })
+
+
+def make_reader(base_path, **kwargs):
+    return DataReader(redis_host='127.0.0.1', redis_port=1, parquet_base_path=base_path, **kwargs)
+
+
+def write_parquet(base_path, data_type, df, **kwargs):
+    file_path = Path(base_path) / data_type / f"BTC_{data_type}.parquet"
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(file_path, row_group_size=ROW_GROUP_SIZE, **kwargs)
+    return file_path
+
+
+def test_tail_reads_match_full_read():
+    """Latest row, last-N and day-window reads equal the full-file results"""
+    print("\n" + "="*80)
+    print("TEST: Tail Reads Match Full Read")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = write_parquet(tmp, 'oi', make_oi_frame(1000))
+        full = pd.read_parquet(file_path)
+        reader = make_reader(tmp)
+
+        assert reader.get_latest_oi_data('BTC') == full.iloc[-1].to_dict()
+        for rows in (1, 99, 100, 101, 1000, 5000):
+            assert reader.get_recent_rows('oi', 'BTC', rows).equals(full.tail(rows)), rows
+        for days in (1, 3, 100):
+            cutoff = pd.Timestamp.now() - pd.Timedelta(days=days)
+            assert reader.get_historical_oi('BTC', days=days).equals(full[full['timestamp'] > cutoff]), days
+
+        # 1 day of hourly rows lives in the last row group
+        before = reader.parquet_stats['row_groups_read']
+        reader.get_historical_oi('BTC', days=1)
+        assert reader.parquet_stats['row_groups_read'] - before == 1
+        print(f"[PASS] Reads matched, {reader.parquet_stats['row_groups_read']} row groups read in total")
+    return True
+
+
+def test_time_index_without_column():
+    """A timestamp index is not filtered on, same as the full-read fallback"""
+    print("\n" + "="*80)
+    print("TEST: Timestamp Stored As Index")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = write_parquet(tmp, 'funding', make_oi_frame(500).set_index('timestamp'))
+        full = pd.read_parquet(file_path)
+        reader = make_reader(tmp)
+
+        assert reader.get_historical_funding('BTC', days=7).equals(full.tail(7 * 8))
+        assert reader.get_latest_funding_data('BTC') == full.iloc[-1].to_dict()
+        print("[PASS] Index-stored timestamps fall back to row counts")
+    return True
+
+
+def test_index_invalidated_on_rewrite():
+    """Rewriting a file rebuilds its index and refreshes the cached latest row"""
+    print("\n" + "="*80)
+    print("TEST: Index Invalidated On Rewrite")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        df = make_oi_frame(300)
+        file_path = write_parquet(tmp, 'oi', df)
+        reader = make_reader(tmp)
+
+        first = reader.get_latest_oi_data('BTC')
+        assert reader.get_latest_oi_data('BTC') == first
+        assert reader.parquet_stats['index_builds'] == 1
+        assert reader.parquet_stats['latest_hits'] == 1
+
+        time.sleep(0.01)
+        rewritten = df.copy()
+        rewritten.loc[rewritten.index[-1], 'open_interest'] = -1.0
+        write_parquet(tmp, 'oi', rewritten)
+
+        assert reader.get_latest_oi_data('BTC')['open_interest'] == -1.0
+        assert reader.parquet_stats['index_builds'] == 2
+        assert reader.get_recent_rows('oi', 'BTC', 150).equals(pd.read_parquet(file_path).tail(150))
+        print("[PASS] Rewritten file picked up without a TTL")
+    return True
+
+
+def test_rolling_buffer_reloads_on_in_place_rewrite():
+    """A rewrite that keeps the row-group layout is not mistaken for an append"""
+    print("\n" + "="*80)
+    print("TEST: Rolling Buffer In-Place Rewrite")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        df = make_oi_frame(300)
+        write_parquet(tmp, 'oi', df)
+        reader = make_reader(tmp, rolling_buffer_rows=100)
+
+        assert reader.get_latest_oi_data('BTC') == df.iloc[-1].to_dict()
+
+        time.sleep(0.01)
+        rewritten = df.copy()
+        rewritten.loc[rewritten.index[-1], 'open_interest'] = -1.0
+        file_path = write_parquet(tmp, 'oi', rewritten)
+
+        assert reader.get_latest_oi_data('BTC')['open_interest'] == -1.0
+        assert reader.get_recent_rows('oi', 'BTC', 100).equals(pd.read_parquet(file_path).tail(100))
+        assert reader.parquet_stats['buffer_appends'] == 0
+        assert reader.parquet_stats['buffer_reloads'] == 2
+        print(f"[PASS] Buffer stats: {reader.parquet_stats}")
+    return True
+
+
+def test_rolling_buffer_appends_new_row_groups():
+    """Appended row groups are read on their own; a shrunken file reloads the tail"""
+    print("\n" + "="*80)
+    print("TEST: Rolling Buffer Append")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        df = make_oi_frame(1000)
+        write_parquet(tmp, 'oi', df.iloc[:800])
+        reader = make_reader(tmp, rolling_buffer_rows=250)
+
+        assert reader.get_recent_rows('oi', 'BTC', 250).equals(df.iloc[:800].tail(250))
+        assert reader.parquet_stats['buffer_reloads'] == 1
+        assert reader.get_recent_rows('oi', 'BTC', 10).equals(df.iloc[:800].tail(10))
+        assert reader.parquet_stats['buffer_hits'] == 1
+
+        time.sleep(0.01)
+        file_path = write_parquet(tmp, 'oi', df)
+        before = reader.parquet_stats['row_groups_read']
+        assert reader.get_recent_rows('oi', 'BTC', 250).equals(df.tail(250))
+        assert reader.get_latest_oi_data('BTC') == pd.read_parquet(file_path).iloc[-1].to_dict()
+        assert reader.parquet_stats['buffer_appends'] == 1
+        assert reader.parquet_stats['row_groups_read'] - before == 2
+
+        time.sleep(0.01)
+        write_parquet(tmp, 'oi', df.iloc[:500])
+        assert reader.get_recent_rows('oi', 'BTC', 250).equals(df.iloc[:500].tail(250))
+        assert reader.parquet_stats['buffer_reloads'] == 2
+        print(f"[PASS] Buffer stats: {reader.parquet_stats}")
+    return True
+
+
+def run_all_tests():
+    """Run all data reader tests"""
+    print("\n" + "#"*80)
+    print("# DATA READER TEST SUITE")
+    print("#"*80)
+
+    tests = [
+        ("Tail Reads Match Full Read", test_tail_reads_match_full_read),
+        ("Timestamp Stored As Index", test_time_index_without_column),
+        ("Index Invalidated On Rewrite", test_index_invalidated_on_rewrite),
+        ("Rolling Buffer In-Place Rewrite", test_rolling_buffer_reloads_on_in_place_rewrite),
+        ("Rolling Buffer Append", test_rolling_buffer_appends_new_row_groups)
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_name, test_func in tests:
+        try:
+            result = test_func()
+            if result:
+                passed += 1
+                print(f"\n[PASS] {test_name}")
+            else:
+                failed += 1
+                print(f"\n[FAIL] {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"\n[FAIL] {test_name} - Exception: {e}")
+
+    print("\n" + "#"*80)
+    print(f"# TEST RESULTS: {passed} passed, {failed} failed")
+    print("#"*80)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
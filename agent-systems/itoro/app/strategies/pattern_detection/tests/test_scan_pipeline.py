@@ -0,0 +1,258 @@
+"""
+Test Scan Pipeline - Concurrent Fetching Against a Local Fake Exchange
+Verifies weight limits, incremental candle fetches and per-stage timing
+"""
+
+import sys
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_fetcher import BinanceDataFetcher, ExchangeWeightLimiter
+from scan_pipeline import DetectionPool, run_scan_pipeline
+
+
+HOUR_MS = 3600 * 1000
+
+
+class FakeExchange:
+    """
+    Minimal Binance /api/v3/klines server on localhost.
+
+    Candles are deterministic per symbol; `now_ms` decides which bars exist, so
+    tests can advance the clock to make new candles appear.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.now_ms = (int(time.time() * 1000) // HOUR_MS) * HOUR_MS
+        self.requests = []  # (arrival time, params)
+        self.lock = threading.Lock()
+        exchange = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                with exchange.lock:
+                    exchange.requests.append((time.monotonic(), params))
+                    used_weight = 2 * len(exchange.requests)
+                time.sleep(exchange.latency)
+
+                body = json.dumps(exchange.klines(params)).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('X-MBX-USED-WEIGHT-1M', str(used_weight))
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/api/v3"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def candle(self, symbol, open_ms):
+        seed = sum(map(ord, symbol))
+        step = open_ms // HOUR_MS
+        base = 100 + seed % 50 + 5 * np.sin(step / 7.0 + seed)
+        open_ = base + np.sin(step * 1.3)
+        close = base + np.cos(step * 0.9)
+        high = max(open_, close) + 0.5 + abs(np.sin(step))
+        low = min(open_, close) - 0.5 - abs(np.cos(step))
+        volume = 1000 + 300 * np.sin(step / 3.0)
+        return [open_ms, str(open_), str(high), str(low), str(close), str(volume),
+                open_ms + HOUR_MS - 1, '0', 0, '0', '0', '0']
+
+    def klines(self, params):
+        limit = int(params.get('limit', 500))
+        if 'startTime' in params:
+            start = int(params['startTime'])
+            opens = list(range(start, self.now_ms + 1, HOUR_MS))[:limit]
+        else:
+            opens = [self.now_ms - HOUR_MS * i for i in range(limit)][::-1]
+        return [self.candle(params['symbol'], open_ms) for open_ms in opens]
+
+    def stop(self):
+        self.server.shutdown()
+
+
+def make_fetcher(exchange, **kwargs):
+    fetcher = BinanceDataFetcher(retry_attempts=1, retry_delay=0, **kwargs)
+    fetcher.binance_base_url = exchange.base_url
+    return fetcher
+
+
+def test_incremental_fetch_requests_only_new_bars():
+    """Second fetch asks for bars since the last cached candle and splices them on"""
+    print("\n" + "="*80)
+    print("TEST: Incremental Candle Fetch")
+    print("="*80)
+
+    exchange = FakeExchange()
+    try:
+        fetcher = make_fetcher(exchange)
+        first = fetcher.get_ohlcv_incremental('BTCUSDT', '1h', 100)
+        assert len(first) == 100
+        assert 'startTime' not in exchange.requests[-1][1]
+
+        exchange.now_ms += 2 * HOUR_MS
+        second = fetcher.get_ohlcv_incremental('BTCUSDT', '1h', 100)
+        params = exchange.requests[-1][1]
+        assert int(params['startTime']) == first.index[-1].value // 1_000_000
+
+        full = fetcher.get_ohlcv('BTCUSDT', '1h', 100)
+        assert len(second) == 100
+        assert second.index.equals(full.index)
+        assert np.array_equal(second.to_numpy(), full.to_numpy())
+        print(f"[PASS] Incremental fetch returned {len(second)} candles, identical to a full fetch")
+    finally:
+        exchange.stop()
+    return True
+
+
+def test_weight_limiter_caps_request_rate():
+    """Concurrent fetches never exceed the exchange weight budget"""
+    print("\n" + "="*80)
+    print("TEST: Exchange Weight Limit")
+    print("="*80)
+
+    exchange = FakeExchange()
+    try:
+        # 4 weight per second, klines cost 2: at most 2 requests per second
+        limiter = ExchangeWeightLimiter({'binance': (4, 1.0)})
+        fetcher = make_fetcher(exchange, max_workers=6, rate_limiter=limiter)
+        symbols = [f"SYM{i}USDT" for i in range(6)]
+        started = time.monotonic()
+        results = fetcher.fetch_multiple_symbols(symbols, '1h', 60)
+        elapsed = time.monotonic() - started
+
+        assert len(results) == 6
+        arrivals = [arrival for arrival, _ in exchange.requests]
+        for arrival in arrivals:
+            in_window = [a for a in arrivals if arrival <= a < arrival + 0.95]
+            assert len(in_window) <= 2, f"{len(in_window)} requests inside one window"
+        assert elapsed >= 1.9
+        print(f"[PASS] 6 requests spread over {elapsed:.2f}s under a 2-request/s budget")
+    finally:
+        exchange.stop()
+    return True
+
+
+def test_concurrent_fetch_overlaps_latency():
+    """Bounded concurrency turns N round-trips into roughly N / workers"""
+    print("\n" + "="*80)
+    print("TEST: Concurrent Fetch")
+    print("="*80)
+
+    exchange = FakeExchange(latency=0.2)
+    try:
+        fetcher = make_fetcher(exchange, max_workers=8)
+        symbols = [f"SYM{i}USDT" for i in range(8)]
+        started = time.monotonic()
+        results = fetcher.fetch_multiple_symbols(symbols, '1h', 60)
+        elapsed = time.monotonic() - started
+
+        assert list(results) == symbols
+        assert elapsed < 8 * 0.2 / 2
+        print(f"[PASS] 8 symbols x 200ms latency fetched in {elapsed:.2f}s")
+    finally:
+        exchange.stop()
+    return True
+
+
+def test_pipeline_stages_and_worker_detection():
+    """Pipeline reports per-stage timing; worker-process detection matches in-process"""
+    print("\n" + "="*80)
+    print("TEST: Scan Pipeline Stages")
+    print("="*80)
+
+    exchange = FakeExchange(latency=0.05)
+    fetch_pool = ThreadPoolExecutor(max_workers=4)
+    inline_pool = DetectionPool(workers=0)
+    worker_pool = DetectionPool(workers=2)
+    try:
+        fetcher = make_fetcher(exchange, max_workers=4)
+        symbols = [f"SYM{i}USDT" for i in range(6)]
+
+        def fetch(symbol):
+            return fetcher.get_ohlcv_incremental(symbol, '1h', 100), {}
+
+        handled = []
+
+        def handle(symbol, patterns, market_context):
+            handled.append(symbol)
+            return patterns
+
+        scans = {}
+        for name, pool in (('inline', inline_pool), ('workers', worker_pool)):
+            results, timings = run_scan_pipeline(symbols, fetch, pool, handle, fetch_pool)
+            summary = timings.summary()
+            print(timings.format())
+            assert summary['fetch']['count'] == len(symbols)
+            assert summary['detect']['count'] == len(symbols)
+            assert summary['handle']['count'] == len(symbols)
+            assert summary['wall_seconds'] > 0
+            scans[name] = {symbol: [(p['pattern'], p['signal']) for p in patterns]
+                           for symbol, patterns in results.items()}
+
+        assert sorted(handled) == sorted(symbols * 2)
+        assert scans['inline'] == scans['workers']
+        print(f"[PASS] {len(symbols)} symbols through fetch -> detect -> handle")
+    finally:
+        worker_pool.shutdown()
+        fetch_pool.shutdown()
+        exchange.stop()
+    return True
+
+
+def run_all_tests():
+    """Run all scan pipeline tests"""
+    print("\n" + "#"*80)
+    print("# SCAN PIPELINE TEST SUITE")
+    print("#"*80)
+
+    tests = [
+        ("Incremental Candle Fetch", test_incremental_fetch_requests_only_new_bars),
+        ("Exchange Weight Limit", test_weight_limiter_caps_request_rate),
+        ("Concurrent Fetch", test_concurrent_fetch_overlaps_latency),
+        ("Scan Pipeline Stages", test_pipeline_stages_and_worker_detection)
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_name, test_func in tests:
+        try:
+            result = test_func()
+            if result:
+                passed += 1
+                print(f"\n[PASS] {test_name}")
+            else:
+                failed += 1
+                print(f"\n[FAIL] {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"\n[FAIL] {test_name} - Exception: {e}")
+
+    print("\n" + "#"*80)
+    print(f"# TEST RESULTS: {passed} passed, {failed} failed")
+    print("#"*80)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -11,8 +11,6 @@ import pandas as pd
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')  # Use non-GUI backend to avoid threading warnings
-import mplfinance as mpf
-import matplotlib.pyplot as plt
 from datetime import datetime, timedelta, time
 from pathlib import Path
 import time as time_module  # Rename to avoid conflict with datetime.time
@@ -42,6 +40,7 @@ from colorama import init, Fore, Back, Style
 from src.scripts.shared_services.logger import debug, info, warning, error, critical, system
 from src.scripts.shared_services.shared_api_manager import get_shared_api_manager
 from src.scripts.shared_services.shared_data_coordinator import get_shared_data_coordinator
+from src.scripts.data_processing.chart_indicators import ChartIndicatorCache, ChartRenderer, calculate_indicators
 # Trade lock manager removed - now using SimpleAgentCoordinator
 
 # Cloud database import
@@ -106,6 +105,11 @@ class ChartAnalysisAgent(BaseAgent):
         self.charts_dir = PROJECT_ROOT / "src" / "data" / "charts"
         self.charts_dir.mkdir(parents=True, exist_ok=True)
         
+        # Indicators advance only on newly closed candles; chart + AI analysis are reused until one closes
+        self.indicator_cache = ChartIndicatorCache()
+        self.chart_renderer = None  # one reused figure, created on the first chart
+        self.last_analyzed = {}  # (symbol, timeframe) -> {'candle', 'analysis', 'chart_path'}
+        
         # Aggregated sentiment cache and tracking
         self.aggregated_sentiment_cache = {}
         self.last_sentiment_update = None
@@ -173,34 +177,8 @@ class ChartAnalysisAgent(BaseAgent):
 
         
     def _calculate_indicators(self, data):
-        """Calculate all required indicators"""
-        # Moving Averages
-        data['20EMA'] = data['close'].ewm(span=20, adjust=False).mean()
-        data['50EMA'] = data['close'].ewm(span=50, adjust=False).mean()
-        data['100EMA'] = data['close'].ewm(span=100, adjust=False).mean()
-        data['200SMA'] = data['close'].rolling(window=200).mean()
-        
-        # MACD
-        exp1 = data['close'].ewm(span=12, adjust=False).mean()
-        exp2 = data['close'].ewm(span=26, adjust=False).mean()
-        data['MACD'] = exp1 - exp2
-        data['MACD_Signal'] = data['MACD'].ewm(span=9, adjust=False).mean()
-        
-        # RSI
-        delta = data['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        data['RSI'] = 100 - (100 / (1 + rs))
-        
-        # ATR
-        high_low = data['high'] - data['low']
-        high_close = np.abs(data['high'] - data['close'].shift())
-        low_close = np.abs(data['low'] - data['close'].shift())
-        true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        data['ATR'] = true_range.rolling(window=14).mean()
-        
-        return data
+        """Calculate all required indicators over the full frame"""
+        return calculate_indicators(data)
     
     def _detect_market_regime(self, data):
         """Detect market regime (trending, sideways, stable)"""
@@ -276,31 +254,36 @@ class ChartAnalysisAgent(BaseAgent):
         try:
             # Prepare data
             df = data.copy()
-            df.index = pd.to_datetime(df.index)
+            if 'timestamp' in df.columns:
+                df.index = pd.DatetimeIndex(pd.to_datetime(df['timestamp']))
+            else:
+                df.index = pd.to_datetime(df.index)
             
             # Check if data is valid
             if df.empty:
                 error("No data available for chart generation")
                 return None
                 
-            # Calculate indicators
-            df = self._calculate_indicators(df)
+            # Indicators normally come from the incremental cache already
+            if 'MACD' not in df.columns:
+                df = self._calculate_indicators(df)
             
-            # Create addplot for indicators
-            ap = []
+            # Overlays on the price panel
+            overlays = []
             colors = ['blue', 'orange', 'purple', 'green', 'red']
             for i, indicator in enumerate(['20EMA', '50EMA', '100EMA', '200SMA']):
                 if indicator in CHART_INDICATORS and indicator in df.columns and not df[indicator].isna().all():
-                    ap.append(mpf.make_addplot(df[indicator], color=colors[i]))
+                    overlays.append((df[indicator], {'color': colors[i]}))
             
             # MACD
+            macd = None
             if 'MACD' in CHART_INDICATORS and 'MACD' in df.columns:
-                ap.append(mpf.make_addplot(df['MACD'], panel=1, color='blue', secondary_y=False))
-                ap.append(mpf.make_addplot(df['MACD_Signal'], panel=1, color='orange', secondary_y=False))
+                macd = (df['MACD'], df['MACD_Signal'])
             
             # RSI
+            rsi = None
             if 'RSI' in CHART_INDICATORS and 'RSI' in df.columns:
-                ap.append(mpf.make_addplot(df['RSI'], panel=2, color='purple', ylim=(0, 100), secondary_y=False))
+                rsi = df['RSI']
             
             # Add Fibonacci levels if enabled
             if ENABLE_FIBONACCI:
@@ -332,26 +315,21 @@ class ChartAnalysisAgent(BaseAgent):
                             fib_color = 'gray'
                             
                         # Add to plot with reduced opacity and dashed style
-                        ap.append(mpf.make_addplot(
-                            fib_df['fib_{:.3f}'.format(level)], 
-                            color=fib_color,
-                            linestyle='dashed',
-                            width=1,
-                            alpha=0.6
+                        overlays.append((
+                            fib_df['fib_{:.3f}'.format(level)],
+                            {'color': fib_color, 'linestyle': 'dashed', 'width': 1, 'alpha': 0.6}
                         ))
             
             # Save chart
             filename = f"{symbol}_{timeframe}_{int(time_module.time())}.png"
             chart_path = self.charts_dir / filename
             
-            # Create the chart
-            mpf.plot(df,
-                    type='candle',
-                    style=CHART_STYLE,
-                    volume=CHART_VOLUME_PANEL,
-                    addplot=ap if ap else None,
-                    title=f"\n{symbol} {timeframe} Chart Analysis",
-                    savefig=chart_path)
+            # Draw onto the reused Agg figure
+            if self.chart_renderer is None:
+                self.chart_renderer = ChartRenderer(style=CHART_STYLE, volume=CHART_VOLUME_PANEL,
+                                                    macd='MACD' in CHART_INDICATORS, rsi='RSI' in CHART_INDICATORS)
+            self.chart_renderer.render(df, chart_path, f"{symbol} {timeframe} Chart Analysis",
+                                       overlays, macd=macd, rsi=rsi)
             
             return chart_path
             
@@ -1156,7 +1134,7 @@ class ChartAnalysisAgent(BaseAgent):
             return None
             
     def analyze_symbol(self, token_info, timeframe):
-        """Analyze a single symbol on a specific timeframe"""
+        """Analyze a single symbol on a specific timeframe; False if nothing was fetched or analyzed"""
         try:
             symbol = token_info["symbol"]
             hl_symbol = token_info["hl_symbol"]
@@ -1182,10 +1160,18 @@ class ChartAnalysisAgent(BaseAgent):
             # If Hyperliquid data is not available, skip analysis
             if data is None or data.empty:
                 error(f"No Hyperliquid data available for {symbol} {timeframe} - skipping analysis")
-                return
+                return False
             
-            # Calculate additional indicators
-            data = self._calculate_indicators(data)
+            # Indicators only advance for newly closed candles
+            data, last_closed = self.indicator_cache.update(
+                symbol, timeframe, data, interval_ms=hl.CANDLE_INTERVAL_MS.get(timeframe)
+            )
+            key = (symbol, timeframe)
+            previous = self.last_analyzed.get(key)
+            if previous and last_closed is not None and previous['candle'] == last_closed:
+                info(f"No new closed {timeframe} candle for {symbol} since {last_closed} - reusing last chart and analysis")
+                self.sentiment_analysis_results[symbol] = previous['analysis']
+                return False
             
             # Generate and save chart first
             info(f"Generating chart for {symbol} {timeframe}")
@@ -1223,6 +1209,7 @@ class ChartAnalysisAgent(BaseAgent):
             if analysis and all(k in analysis for k in ['direction', 'analysis', 'action', 'confidence', 'market_regime']):
                 # Store analysis for sentiment aggregation
                 self.sentiment_analysis_results[symbol] = analysis
+                self.last_analyzed[key] = {'candle': last_closed, 'analysis': analysis, 'chart_path': chart_path}
                 
                 # Save analysis to CSV - this now captures all values correctly
                 self._save_analysis_to_csv(symbol, timeframe, analysis, address)
@@ -1281,16 +1268,20 @@ class ChartAnalysisAgent(BaseAgent):
                                     info(f"Previous SELL signal profit: {profit_pct:.2f}%")
             else:
                 warning(f"Invalid analysis result for {symbol}")
+            return True
             
         except Exception as e:
             error(f"Error analyzing {symbol} {timeframe}: {str(e)}")
             traceback.print_exc()
+            return True
             
     def _cleanup_old_charts(self):
-        """Remove all existing charts from the charts directory"""
+        """Remove charts from the charts directory, except those still backing a reused analysis"""
         try:
+            keep = {entry['chart_path'] for entry in self.last_analyzed.values() if entry.get('chart_path')}
             for chart in self.charts_dir.glob("*.png"):
-                chart.unlink()
+                if chart not in keep:
+                    chart.unlink()
             info("Cleaned up old charts")
         except Exception as e:
             error(f"Error cleaning up charts: {str(e)}")
@@ -1306,8 +1297,8 @@ class ChartAnalysisAgent(BaseAgent):
             
             for token_info in self.dca_tokens:
                 for timeframe in TIMEFRAMES:
-                    self.analyze_symbol(token_info, timeframe)
-                    time_module.sleep(2)  # Small delay between analyses
+                    if self.analyze_symbol(token_info, timeframe):
+                        time_module.sleep(2)  # Small delay between analyses
             
             # Generate aggregated sentiment after all tokens are analyzed
             if ENABLE_AGGREGATED_SENTIMENT:
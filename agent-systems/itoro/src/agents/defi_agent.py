@@ -21,7 +21,7 @@ try:
     from src.scripts.utilities.telegram_bot import TelegramBot
     from src.scripts.defi.defi_event_manager import DeFiEventManager
     from src.scripts.defi.defi_integration_layer import get_defi_integration_layer, DeFiExecutionRequest
-    from src.scripts.shared_services.logger import debug, info, warning, error, critical, system
+    from src.scripts.shared_services.logger import debug, info, warning, error, critical, system, set_agent_context
     from src.scripts.defi.leverage_loop_engine import get_leverage_loop_engine
     from src.scripts.defi.defi_safety_validator import get_defi_safety_validator
     from src.scripts.defi.ai_defi_advisor import get_ai_defi_advisor
@@ -36,7 +36,7 @@ except ImportError:
     from src.scripts.utilities.telegram_bot import TelegramBot
     from src.scripts.defi.defi_event_manager import DeFiEventManager
     from src.scripts.defi.defi_integration_layer import get_defi_integration_layer, DeFiExecutionRequest
-    from src.scripts.shared_services.logger import debug, info, warning, error, critical, system
+    from src.scripts.shared_services.logger import debug, info, warning, error, critical, system, set_agent_context
     from src.scripts.defi.leverage_loop_engine import get_leverage_loop_engine
     from src.scripts.defi.defi_safety_validator import get_defi_safety_validator
     from src.scripts.defi.ai_defi_advisor import get_ai_defi_advisor
@@ -201,6 +201,7 @@ class DeFiAgent(BaseAgent):
     
     def _run_agent_loop(self):
         """Main agent loop"""
+        set_agent_context('defi_agent')  # Console color/context for everything logged on this thread
         info("🔄 DeFi Agent loop started")
         
         while self.running:
@@ -12,7 +12,7 @@ from typing import Dict, Any, List, Optional
 from pathlib import Path
 
 from src.agents.base_agent import BaseAgent
-from src.scripts.shared_services.logger import info, warning, error, debug
+from src.scripts.shared_services.logger import info, warning, error, debug, set_agent_context
 from src.scripts.shared_services.config_manager import get_config_manager
 from src.scripts.shared_services.performance_monitor import get_performance_monitor
 from src.scripts.trading.master_agent_ai import get_master_agent_ai
@@ -117,6 +117,7 @@ class MasterAgent(BaseAgent):
     
     def _monitoring_loop(self):
         """Main monitoring loop for the Master Agent"""
+        set_agent_context('master_agent')  # Console color/context for everything logged on this thread
         while self.is_running:
             try:
                 # Run monitoring cycle
@@ -141,6 +141,14 @@ MAX_OPTIMIZATION_ITERATIONS = 10  # Max times to KEEP OPTIMIZING until target is
                                   # Higher = more chances to hit target, but takes longer
 EXECUTION_TIMEOUT = 300  # 5 minutes
 
+# Backtest worker pool: warm workers in the conda env with the RBI data preloaded,
+# fed code over a local IPC channel, plus a result cache keyed by code + dataset version
+USE_BACKTEST_POOL = True  # False = fresh conda subprocess per backtest (original behavior)
+BACKTEST_POOL_WORKERS = 1
+BACKTEST_MEMORY_LIMIT_MB = 4096  # Per worker address-space limit (POSIX only)
+BACKTEST_MAX_TASKS_PER_WORKER = 25  # Recycle workers so state leaked by generated code doesn't pile up
+CONDA_PYTHON = r"C:\Users\Top Cash Pawn\AppData\Local\anaconda3\envs\tflow\python.exe"
+
 # DeepSeek Configuration
 DEEPSEEK_BASE_URL = "https://api.deepseek.com"
 
@@ -163,6 +171,16 @@ PROCESSED_IDEAS_LOG = DATA_DIR / "processed_ideas.log"
 # IDEAS file is in the main data/rbi folder (shared with other versions)
 IDEAS_FILE = PROJECT_ROOT / "data/rbi/ideas.txt"
 
+# Result cache for the backtest worker pool, and the data that versions it
+BACKTEST_CACHE_DIR = DATA_DIR / "backtest_cache"
+BACKTEST_DATASET_PATHS = [
+    PROJECT_ROOT / "data" / "rbi",
+    PROJECT_ROOT / "data" / "oi",
+    PROJECT_ROOT / "data" / "funding",
+    PROJECT_ROOT / "data" / "liquidations",
+    PROJECT_ROOT / "data" / "token_onchain_data.json",
+]
+
 # Create main directories if they don't exist
 for dir in [DATA_DIR, TODAY_DIR, RESEARCH_DIR, BACKTEST_DIR, PACKAGE_DIR,
             FINAL_BACKTEST_DIR, OPTIMIZATION_DIR, CHARTS_DIR, EXECUTION_DIR]:
@@ -626,6 +644,40 @@ def parse_return_from_output(stdout: str) -> float:
         cprint(f"❌ Error parsing return: {str(e)}", "red")
         return None
 
+_backtest_pool = None
+
+
+def get_backtest_pool():
+    """Start the backtest worker pool on first use (same interpreter the subprocess path would use)"""
+    global _backtest_pool
+    if _backtest_pool is None:
+        import atexit
+        from scripts.utilities.backtest_worker_pool import BacktestWorkerPool, data_files, resolve_conda_python
+
+        if os.name == 'nt':
+            python_executable = CONDA_PYTHON if os.path.exists(CONDA_PYTHON) else sys.executable
+        else:
+            python_executable = resolve_conda_python(CONDA_ENV)
+
+        # Preload what the load_*_data helpers (and the paths PACKAGE_PROMPT rewrites them to) read
+        preload = [PROJECT_ROOT / "data" / "rbi" / "BTC-USD-15m.csv"]
+        for folder in ("oi", "funding", "liquidations"):
+            preload += data_files([PROJECT_ROOT / "data" / folder])[:1]
+
+        cprint(f"[ROCKET] Starting {BACKTEST_POOL_WORKERS} warm backtest worker(s) with {python_executable}", "cyan")
+        _backtest_pool = BacktestWorkerPool(
+            python_executable=python_executable,
+            workers=BACKTEST_POOL_WORKERS,
+            timeout=EXECUTION_TIMEOUT,
+            memory_limit_mb=BACKTEST_MEMORY_LIMIT_MB,
+            max_tasks_per_worker=BACKTEST_MAX_TASKS_PER_WORKER,
+            preload_files=preload,
+            dataset_paths=BACKTEST_DATASET_PATHS,
+            cache_dir=BACKTEST_CACHE_DIR,
+        )
+        atexit.register(_backtest_pool.close)
+    return _backtest_pool
+
 def execute_backtest(file_path: str, strategy_name: str) -> dict:
     """
     Execute a backtest file in conda environment and capture output
@@ -696,6 +748,14 @@ def execute_backtest(file_path: str, strategy_name: str) -> dict:
         # #endregion
         raise FileNotFoundError(f"File not found: {file_path}")
 
+    if USE_BACKTEST_POOL:
+        output = get_backtest_pool().run_file(file_path)
+        if output.get('cached'):
+            cprint("[CACHE] Identical code + data already executed, reusing result", "cyan")
+        else:
+            cprint(f"[POOL] Dispatched to warm worker in {output['dispatch_time'] * 1000:.1f}ms", "cyan")
+        return save_execution_result(output, strategy_name)
+
     start_time = datetime.now()
 
     # Run the backtest with better Windows conda handling
@@ -944,7 +1004,14 @@ def execute_backtest(file_path: str, strategy_name: str) -> dict:
         }, f)
         f.write('\n')
     # #endregion
-    
+
+    return save_execution_result(output, strategy_name)
+
+def save_execution_result(output: dict, strategy_name: str) -> dict:
+    """Save an execution result to EXECUTION_DIR and print it"""
+    log_path = r"c:\Users\Top Cash Pawn\ITORO\.cursor\debug.log"
+    execution_time = output['execution_time']
+
     # Save execution results
     result_file = EXECUTION_DIR / f"{strategy_name}_{datetime.now().strftime('%H%M%S')}.json"
 
@@ -19,7 +19,7 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
 # Local imports
-from src.scripts.shared_services.logger import debug, info, warning, error, critical
+from src.scripts.shared_services.logger import debug, info, warning, error, critical, set_agent_context
 from src.scripts.trading.portfolio_tracker import get_portfolio_tracker, PortfolioSnapshot
 from src.scripts.trading.breakeven import get_breakeven_manager
 from src.scripts.database.execution_tracker import get_execution_tracker
@@ -1482,6 +1482,7 @@ REASONING: [detailed explanation of your decision]
     
     def _monitoring_loop(self):
         """Main monitoring loop for interval-based checks"""
+        set_agent_context('risk_agent')  # Console color/context for everything logged on this thread
         while self.is_running:
             try:
                 self._interval_risk_check()
@@ -33,8 +33,6 @@ from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
 import numpy as np
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import openai
 import anthropic
 from dotenv import load_dotenv
@@ -44,6 +42,7 @@ from apify_client import ApifyClient
 # Import configuration
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import src.config as config
+from src.scripts.data_processing.sentiment_scorer import get_sentiment_scorer
 
 # Cloud database import
 try:
@@ -82,12 +81,17 @@ logger = logging.getLogger(__name__)
 # Initialize Apify client
 apify_client = ApifyClient(apify_api_token)
 
+# Column order of the per-token tweet CSVs; appended rows must line up with the file's header
+TWEET_CSV_COLUMNS = [
+    "collection_time", "tweet_id", "text", "likes", "replies", "retweets", "quotes",
+    "timestamp", "search_query", "url", "sentiment_score", "engagement_score",
+]
+
 class SentimentAgent:
     def __init__(self, analysis_mode: str = config.SENTIMENT_DEFAULT_ANALYSIS_MODE):
         """Initialize the Enhanced Sentiment Agent"""
         self.apify_client = apify_client
-        self.tokenizer = None
-        self.model = None
+        self.scorer = None
         self.analysis_mode = analysis_mode
         self.audio_dir = Path("src/audio")
         self.audio_dir.mkdir(parents=True, exist_ok=True)
@@ -220,11 +224,17 @@ class SentimentAgent:
             ]).to_csv(config.SENTIMENT_HISTORY_FILE, index=False)
     
     def init_sentiment_model(self):
-        """Initialize the BERT model for sentiment analysis"""
-        if self.model is None:
+        """Initialize the BERT model for sentiment analysis (loaded once per process)"""
+        if self.scorer is None:
             try:
-                self.tokenizer = AutoTokenizer.from_pretrained(config.SENTIMENT_BERT_MODEL)
-                self.model = AutoModelForSequenceClassification.from_pretrained(config.SENTIMENT_BERT_MODEL)
+                self.scorer = get_sentiment_scorer(
+                    config.SENTIMENT_BERT_MODEL,
+                    quantize=config.SENTIMENT_BERT_QUANTIZE,
+                    cache_path=config.SENTIMENT_SQLITE_DB_FILE,
+                    max_batch_size=config.SENTIMENT_BERT_BATCH_SIZE,
+                    max_batch_tokens=config.SENTIMENT_BERT_MAX_BATCH_TOKENS,
+                    retention_days=config.SENTIMENT_DATA_RETENTION_DAYS,
+                )
                 cprint("✨ BERT sentiment model loaded!", "green")
                 logger.info("BERT sentiment model loaded successfully")
             except Exception as e:
@@ -232,42 +242,25 @@ class SentimentAgent:
                 logger.error(f"BERT sentiment model loading error: {str(e)}")
                 raise
 
-    def analyze_sentiment(self, texts: List[str]) -> float:
-        """Analyze sentiment of a batch of texts using BERT"""
+    def score_texts(self, texts: List[str]) -> List[float]:
+        """Per-text BERT sentiment scores (-1 to 1); texts scored in earlier cycles come from the cache"""
         self.init_sentiment_model()
         
         if not texts:
-            return 0.0
+            return []
         
         try:
-            sentiments = []
-            batch_size = config.SENTIMENT_BERT_BATCH_SIZE
-            
-            for i in range(0, len(texts), batch_size):
-                batch_texts = texts[i:i + batch_size]
-                inputs = self.tokenizer(batch_texts, padding=True, truncation=True, max_length=128, return_tensors="pt")
-                
-                with torch.no_grad():
-                    outputs = self.model(**inputs)
-                    predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-                    sentiments.extend(predictions.tolist())
-            
-            # Convert to sentiment scores (-1 to 1)
-            scores = []
-            for sentiment in sentiments:
-                # NEG, NEU, POS
-                neg, neu, pos = sentiment
-                # Convert to -1 to 1 scale
-                score = pos - neg  # Will be between -1 and 1
-                scores.append(score)
-                
-            return float(np.mean(scores))
-            
+            return self.scorer.score(texts)
         except Exception as e:
             logger.error(f"BERT sentiment analysis error: {str(e)}")
             cprint(f"❌ Error in BERT sentiment analysis: {str(e)}", "red")
-            return 0.0
-    
+            return [0.0] * len(texts)
+
+    def analyze_sentiment(self, texts: List[str]) -> float:
+        """Analyze sentiment of a batch of texts using BERT"""
+        scores = self.score_texts(texts)
+        return float(np.mean(scores)) if scores else 0.0
+
     def ai_enhance_sentiment(self, texts: List[str], base_sentiment: float, engagement_data: List[Dict]) -> Tuple[float, str]:
         """Use AI to enhance sentiment analysis with context and nuance"""
         if not self.ai_client or not texts:
@@ -595,7 +588,8 @@ class SentimentAgent:
                 return
             
             # Get base BERT sentiment score
-            base_sentiment_score = self.analyze_sentiment(texts)
+            text_scores = self.score_texts(texts)
+            base_sentiment_score = float(np.mean(text_scores))
             
             # Calculate engagement scores and weighted sentiment
             engagement_scores = []
@@ -607,7 +601,7 @@ class SentimentAgent:
                     engagement_scores.append(engagement_score)
                     
                     # Weight sentiment by engagement (higher engagement = more influence)
-                    individual_sentiment = self.analyze_sentiment([texts[i]])
+                    individual_sentiment = text_scores[i]
                     weighted_sentiment = individual_sentiment * (1 + engagement_score)
                     weighted_sentiments.append(weighted_sentiment)
             
@@ -885,6 +879,10 @@ class SentimentAgent:
             saved_count = 0
             duplicate_count = 0
             
+            # Score every tweet in one batched pass
+            texts = [tweet['text'] for tweet in tweets_data if tweet.get('text')]
+            text_scores = dict(zip(texts, self.score_texts(texts)))
+            
             for tweet in tweets_data:
                 try:
                     # Generate a unique tweet_id from URL if available, otherwise use text hash
@@ -895,7 +893,7 @@ class SentimentAgent:
                         tweet_id = str(hash(tweet.get('text', '')))
                     
                     # Calculate sentiment and engagement scores for this tweet
-                    sentiment_score = self.analyze_sentiment([tweet['text']]) if tweet.get('text') else 0.0
+                    sentiment_score = text_scores.get(tweet.get('text'), 0.0)
                     engagement_score = self.calculate_engagement_score(tweet)
                     classification = self.classify_sentiment(sentiment_score)
                     
@@ -959,7 +957,9 @@ class SentimentAgent:
         if not token_tweets:
             return
         
-        # Prepare new tweets data
+        # Prepare new tweets data (scores are cache hits after save_tweets)
+        texts = [tweet['text'] for tweet in token_tweets if tweet.get('text')]
+        text_scores = dict(zip(texts, self.score_texts(texts)))
         new_tweets_data = []
         for tweet in token_tweets:
             try:
@@ -974,7 +974,7 @@ class SentimentAgent:
                     "timestamp": tweet['timestamp'],
                     "search_query": tweet['search_query'],
                     "url": tweet['url'],
-                    "sentiment_score": self.analyze_sentiment([tweet['text']]) if tweet.get('text') else 0.0,
+                    "sentiment_score": text_scores.get(tweet.get('text'), 0.0),
                     "engagement_score": self.calculate_engagement_score(tweet)
                 }
                 new_tweets_data.append(tweet_data)
@@ -986,17 +986,26 @@ class SentimentAgent:
             return
             
         # Convert to DataFrame
-        new_df = pd.DataFrame(new_tweets_data)
+        new_df = pd.DataFrame(new_tweets_data, columns=TWEET_CSV_COLUMNS)
         
         try:
             # Load existing data if file exists
             if os.path.exists(filename):
-                existing_df = pd.read_csv(filename)
-                # Remove duplicates based on tweet_id
-                new_df = new_df[~new_df['tweet_id'].isin(existing_df['tweet_id'])]
-                # Append new data
+                # Only the header and the id column are needed to deduplicate
+                header = list(pd.read_csv(filename, nrows=0).columns)
+                existing_ids = pd.read_csv(filename, usecols=['tweet_id'], dtype={'tweet_id': str})['tweet_id']
+                new_df = new_df[~new_df['tweet_id'].astype(str).isin(existing_ids)]
                 if not new_df.empty:
-                    pd.concat([existing_df, new_df], ignore_index=True).to_csv(filename, index=False)
+                    if header == TWEET_CSV_COLUMNS:
+                        # Append new rows instead of rewriting the whole file
+                        new_df.to_csv(filename, mode='a', header=False, index=False)
+                    else:
+                        # Header from an older column layout: rewrite the file in the current order
+                        existing_df = pd.read_csv(filename, dtype={'tweet_id': str})
+                        merged = pd.concat([existing_df, new_df], ignore_index=True)
+                        extra = [column for column in merged.columns if column not in TWEET_CSV_COLUMNS]
+                        merged[TWEET_CSV_COLUMNS + extra].to_csv(filename, index=False)
+                        logger.info(f"Rewrote {filename} with the current tweet column order")
             else:
                 # Save new file
                 new_df.to_csv(filename, index=False)
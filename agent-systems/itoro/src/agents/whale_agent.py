@@ -11,6 +11,7 @@ import csv
 import time
 import logging
 import asyncio
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -45,6 +46,7 @@ try:
         LOG_LEVEL, LOG_TO_FILE, LOG_DIRECTORY,
         WHALE_TRADING_MODE, WHALE_APIFY_ACTOR_FUTURES, WHALE_APIFY_INPUT_FUTURES,
         WHALE_ENRICHMENT_7D_ENABLED, WHALE_ENRICHMENT_MAX_WALLETS, WHALE_ENRICHMENT_RATE_LIMIT_SEC,
+        WHALE_ENRICHMENT_CONCURRENCY,
     )
     # Try to import core_bridge (may not be available)
     try:
@@ -68,6 +70,7 @@ except ImportError:
         LOG_LEVEL, LOG_TO_FILE, LOG_DIRECTORY,
         WHALE_TRADING_MODE, WHALE_APIFY_ACTOR_FUTURES, WHALE_APIFY_INPUT_FUTURES,
         WHALE_ENRICHMENT_7D_ENABLED, WHALE_ENRICHMENT_MAX_WALLETS, WHALE_ENRICHMENT_RATE_LIMIT_SEC,
+        WHALE_ENRICHMENT_CONCURRENCY,
     )
     # Try to import core_bridge (may not be available)
     try:
@@ -810,92 +813,272 @@ class WhaleAgent(BaseAgent):
             logger.error(f"Error calculating score for wallet: {e}")
             return 0.0
     
+    def _numeric_column(self, df: pd.DataFrame, columns: List[str], default: float,
+                        zero_as_default: bool = False) -> pd.Series:
+        """First present column coerced to float; missing/unparseable values become default"""
+        for col in columns:
+            if col in df.columns:
+                values = pd.to_numeric(df[col], errors="coerce").fillna(default)
+                if zero_as_default:
+                    values = values.mask(values == 0, default)
+                return values.astype(float)
+        return pd.Series(default, index=df.index, dtype=float)
+
+    def _unparseable(self, df: pd.DataFrame, columns: List[str]) -> pd.Series:
+        """Rows whose first present column holds a value float() rejects (the per-row path skipped these)"""
+        for col in columns:
+            if col in df.columns:
+                raw = df[col]
+                bad = raw.notna() & pd.to_numeric(raw, errors="coerce").isna()
+                if bad.any():
+                    bad[bad] = raw[bad].astype(str).str.strip() != ""  # blank strings count as missing
+                return bad
+        return pd.Series(False, index=df.index)
+
+    def _text_column(self, df: pd.DataFrame, columns: List[str], default: str = "") -> pd.Series:
+        """First present column as strings; missing values become default"""
+        for col in columns:
+            if col in df.columns:
+                values = df[col]
+                return values.where(values.notna() & (values != ""), default).astype(str)
+        return pd.Series(default, index=df.index, dtype=object)
+
+    def _build_wallet_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Canonical columnar view of raw wallet data (GMGN or normalized Hyperliquid rows).
+        Holds both the display fields stored on WhaleWallet and the inputs to scoring.
+        """
+        frame = pd.DataFrame(index=df.index)
+        frame["address"] = self._text_column(df, ["address", "wallet_address", "ethAddress"])
+        frame["twitter_handle"] = self._text_column(df, ["twitter_username", "twitter_handle", "displayName"])
+
+        # Display values fall back to realized profit; scoring uses the ROI/PnL % columns only
+        frame["pnl_30d"] = self._numeric_column(df, ["pnl_30d", "realized_profit_30d"], 0.0)
+        frame["pnl_7d"] = self._numeric_column(df, ["pnl_7d", "realized_profit_7d"], 0.0)
+        frame["pnl_1d"] = self._numeric_column(df, ["pnl_1d", "realized_profit_1d"], 0.0)
+        frame["score_pnl_30d"] = self._numeric_column(df, ["pnl_30d"], 0.0)
+        frame["score_pnl_7d"] = self._numeric_column(df, ["pnl_7d"], 0.0)
+        frame["score_pnl_1d"] = self._numeric_column(df, ["pnl_1d"], 0.0)
+        frame["realized_profit_30d"] = self._numeric_column(df, ["realized_profit_30d"], 0.0)
+
+        frame["winrate_7d"] = self._numeric_column(df, ["winrate_7d"], 0.0)
+        frame["txs_30d"] = self._numeric_column(df, ["txs_30d"], 0.0).astype(int)
+
+        token_active = self._numeric_column(df, ["token_active"], 0.0)
+        if "risk" in df.columns:
+            risk_token_active = pd.to_numeric(
+                df["risk"].map(lambda r: r.get("token_active") if isinstance(r, dict) else None),
+                errors="coerce",
+            )
+            token_active = risk_token_active.fillna(token_active)
+        frame["token_active"] = token_active.fillna(0).astype(int)
+
+        frame["avg_holding_period_7d"] = self._numeric_column(df, ["avg_holding_period_7d"], 86400.0, zero_as_default=True)
+        frame["score_holding_period_7d"] = self._numeric_column(df, ["avg_holding_period_7d"], 1.0, zero_as_default=True)
+
+        now_iso = datetime.now().isoformat()
+        last_active = self._text_column(df, ["last_active"])
+        frame["last_active"] = last_active.mask(last_active == "", now_iso)
+
+        if "is_blue_verified" in df.columns:
+            frame["is_blue_verified"] = df["is_blue_verified"].fillna(False).astype(bool)
+        else:
+            frame["is_blue_verified"] = False
+        if "is_futures" in df.columns:
+            frame["is_futures"] = df["is_futures"].fillna(False).astype(bool)
+        else:
+            frame["is_futures"] = False
+
+        # A non-numeric value in a field the per-row path parsed strictly skips that wallet
+        malformed = pd.Series(False, index=df.index)
+        for columns in (["pnl_30d", "realized_profit_30d"], ["pnl_7d", "realized_profit_7d"], ["pnl_30d"],
+                        ["pnl_7d"], ["realized_profit_30d"], ["realized_profit_7d"], ["winrate_7d"],
+                        ["txs_30d"], ["avg_holding_period_7d"]):
+            malformed |= self._unparseable(df, columns)
+        token_active_bad = self._unparseable(df, ["token_active"])
+        if "risk" in df.columns:
+            # risk["token_active"] takes precedence over the top-level column when present
+            in_risk = df["risk"].map(lambda r: isinstance(r, dict) and "token_active" in r).astype(bool)
+            risk_bad = in_risk & risk_token_active.isna() & df["risk"].map(
+                lambda r: isinstance(r, dict) and str(r.get("token_active") or "").strip() != ""
+            ).astype(bool)
+            token_active_bad = token_active_bad.where(~in_risk, risk_bad)
+        frame["malformed"] = malformed | token_active_bad
+        return frame
+
+    def _normalize_metric_array(self, values: np.ndarray, min_val: float, max_val: float) -> np.ndarray:
+        """Vectorized _normalize_metric"""
+        if max_val == min_val:
+            return np.full(len(values), 0.5)
+        return np.clip((values - min_val) / (max_val - min_val), 0.0, 1.0)
+
+    def _score_wallet_frame(self, frame: pd.DataFrame) -> pd.Series:
+        """
+        Vectorized _calculate_wallet_score over a frame from _build_wallet_frame.
+        Spot wallets failing WHALE_THRESHOLDS score 0.
+        """
+        is_futures = frame["is_futures"].to_numpy(dtype=bool)
+        winrate = frame["winrate_7d"].to_numpy(dtype=float)
+        txs = frame["txs_30d"].to_numpy(dtype=float)
+        token_active = frame["token_active"].to_numpy(dtype=float)
+        holding = frame["score_holding_period_7d"].to_numpy(dtype=float)
+
+        pnl_30d_norm = self._normalize_metric_array(frame["score_pnl_30d"].to_numpy(dtype=float), -50, 100)
+        pnl_7d_norm = self._normalize_metric_array(frame["score_pnl_7d"].to_numpy(dtype=float), -30, 50)
+        pnl_1d_norm = self._normalize_metric_array(frame["score_pnl_1d"].to_numpy(dtype=float), -20, 20)
+
+        max_txs = WHALE_THRESHOLDS["max_txs_30d"]
+        txs_norm = 1 - self._normalize_metric_array(txs, 0, max_txs) if max_txs else np.full(len(frame), 0.5)
+        token_norm = np.where(
+            is_futures,
+            0.5,
+            self._normalize_metric_array(token_active, WHALE_THRESHOLDS["min_token_active"], WHALE_THRESHOLDS["max_token_active"]),
+        )
+
+        holding_days = holding / 86400.0
+        optimal_holding_min, optimal_holding_max = 1.0 / 24.0, 7.0
+        holding_norm = np.select(
+            [
+                (holding_days >= optimal_holding_min) & (holding_days <= optimal_holding_max),
+                holding_days < optimal_holding_min,
+            ],
+            [
+                1.0 - np.abs(holding_days - 1.0) / 6.0,
+                0.2,
+            ],
+            default=np.maximum(0.1, 1.0 / (1.0 + (holding_days - optimal_holding_max) / 30.0)),
+        )
+        holding_norm = np.where(is_futures, 0.5, holding_norm)
+
+        score = (
+            WHALE_SCORING_WEIGHTS["pnl_30d"] * pnl_30d_norm
+            + WHALE_SCORING_WEIGHTS["pnl_7d"] * pnl_7d_norm
+            + WHALE_SCORING_WEIGHTS["pnl_1d"] * pnl_1d_norm
+            + WHALE_SCORING_WEIGHTS["winrate_7d"] * winrate
+            + WHALE_SCORING_WEIGHTS["avg_holding_period_7d"] * holding_norm
+            + WHALE_SCORING_WEIGHTS["token_active"] * token_norm
+            + WHALE_SCORING_WEIGHTS["is_blue_verified"] * frame["is_blue_verified"].to_numpy(dtype=float)
+            + WHALE_SCORING_WEIGHTS["txs_30d"] * txs_norm
+        )
+        score = np.clip(score, 0.0, 1.0)
+
+        # Spot: apply strict thresholds
+        fails_thresholds = (
+            (frame["realized_profit_30d"].to_numpy(dtype=float) < WHALE_THRESHOLDS["min_pnl_30d"])
+            | (winrate < WHALE_THRESHOLDS["min_winrate_7d"])
+            | (txs > WHALE_THRESHOLDS["max_txs_30d"])
+            | (token_active < WHALE_THRESHOLDS["min_token_active"])
+            | (token_active > WHALE_THRESHOLDS["max_token_active"])
+            | (holding < WHALE_THRESHOLDS["min_avg_holding_period"])
+            | (holding > WHALE_THRESHOLDS["max_avg_holding_period"])
+        )
+        score = np.where(~is_futures & fails_thresholds, 0.0, score)
+        score = np.where(frame["malformed"].to_numpy(dtype=bool), 0.0, score)
+        return pd.Series(score, index=frame.index)
+
+    def _enrich_wallet_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Enrichment stage: fill winrate_7d / avg_holding_period_7d from Hyperliquid fills
+        for the first WHALE_ENRICHMENT_MAX_WALLETS wallets, concurrently and rate limited.
+        """
+        try:
+            try:
+                from src.scripts.trading.hyperliquid_enrichment import enrich_wallets_7d, EnrichmentCache
+            except ImportError:
+                from ..scripts.trading.hyperliquid_enrichment import enrich_wallets_7d, EnrichmentCache
+        except ImportError as e:
+            logger.debug(f"Enrichment skipped: {e}")
+            return df
+
+        if not hasattr(self, "_enrichment_cache"):
+            self._enrichment_cache = EnrichmentCache(str(self.data_dir / "enrichment_cache"))
+
+        addresses = df["address"].head(WHALE_ENRICHMENT_MAX_WALLETS).tolist()
+        started = time.perf_counter()
+        rate = 1.0 / WHALE_ENRICHMENT_RATE_LIMIT_SEC if WHALE_ENRICHMENT_RATE_LIMIT_SEC > 0 else 1000.0
+        enriched = enrich_wallets_7d(
+            addresses,
+            max_workers=WHALE_ENRICHMENT_CONCURRENCY,
+            rate_per_sec=rate,
+            cache=self._enrichment_cache,
+        )
+        logger.info(f"🔎 Enriched {len(enriched)} wallets with 7d stats in {time.perf_counter() - started:.1f}s")
+
+        df = df.copy()
+        winrate = df["address"].map(lambda a: enriched[a].get("winrate_7d") if a in enriched else None)
+        holding = df["address"].map(lambda a: enriched[a].get("avg_holding_period_7d") if a in enriched else None)
+        df["winrate_7d"] = pd.to_numeric(winrate, errors="coerce").fillna(df["winrate_7d"])
+        df["avg_holding_period_7d"] = pd.to_numeric(holding, errors="coerce").fillna(df["avg_holding_period_7d"])
+        return df
+
+    def _normalize_hyperliquid_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Normalize Hyperliquid rows one by one, skipping rows that cannot be normalized"""
+        rows = []
+        for record in df.to_dict("records"):
+            try:
+                row = self._normalize_hyperliquid_row(record)
+            except Exception as e:
+                logger.error(f"Error processing wallet data: {e}")
+                continue
+            if row and row.get("address"):
+                rows.append(row)
+        return pd.DataFrame(rows)
+
     def _process_wallet_data(self, df: pd.DataFrame) -> List[WhaleWallet]:
         """
         Process raw wallet data and create WhaleWallet objects.
         Handles both GMGN (spot) and Hyperliquid (futures) formats.
+
+        Scoring and ranking run over the whole frame at once; Hyperliquid
+        7d enrichment runs as a separate concurrent stage before scoring.
         """
-        wallets = []
         is_hyperliquid = self._is_hyperliquid_format(df)
         if is_hyperliquid:
             logger.info("🔮 Processing Hyperliquid (futures) data format")
+            df = self._normalize_hyperliquid_rows(df)
+            if df.empty:
+                return []
+            if WHALE_ENRICHMENT_7D_ENABLED:
+                df = self._enrich_wallet_frame(df)
         else:
             logger.info("💎 Processing GMGN (spot) data format")
+        if df.empty:
+            return []
 
-        enrichment_count = 0
-        for _, row in df.iterrows():
-            try:
-                if is_hyperliquid:
-                    wallet_data = self._normalize_hyperliquid_row(row)
-                    if not wallet_data or not wallet_data.get("address"):
-                        continue
-                    if WHALE_ENRICHMENT_7D_ENABLED and enrichment_count < WHALE_ENRICHMENT_MAX_WALLETS:
-                        try:
-                            try:
-                                from src.scripts.trading.hyperliquid_enrichment import enrich_wallet_7d_from_hyperliquid
-                            except ImportError:
-                                from ..scripts.trading.hyperliquid_enrichment import enrich_wallet_7d_from_hyperliquid
-                            addr = wallet_data.get("address", "")
-                            enriched = enrich_wallet_7d_from_hyperliquid(addr)
-                            wallet_data["winrate_7d"] = enriched["winrate_7d"]
-                            wallet_data["avg_holding_period_7d"] = enriched["avg_holding_period_7d"]
-                            enrichment_count += 1
-                            time.sleep(WHALE_ENRICHMENT_RATE_LIMIT_SEC)
-                        except Exception as e:
-                            logger.debug(f"Enrichment skipped for {wallet_data.get('address', '')[:8]}...: {e}")
-                else:
-                    wallet_data = row.to_dict()
-
-                score = self._calculate_wallet_score(wallet_data)
-                if score <= 0:
-                    continue
-
-                address = str(wallet_data.get("address", wallet_data.get("wallet_address", wallet_data.get("ethAddress", ""))) or "")
-                twitter_handle = str(wallet_data.get("twitter_username", wallet_data.get("twitter_handle", wallet_data.get("displayName", ""))) or "")
-                pnl_30d = float(wallet_data.get("pnl_30d", wallet_data.get("realized_profit_30d", 0)) or 0)
-                pnl_7d = float(wallet_data.get("pnl_7d", wallet_data.get("realized_profit_7d", 0)) or 0)
-                pnl_1d_raw = wallet_data.get("pnl_1d", wallet_data.get("realized_profit_1d", 0))
-                if pnl_1d_raw is None or str(pnl_1d_raw).lower() in ("nan", "null", ""):
-                    pnl_1d = 0.0
-                else:
-                    try:
-                        pnl_1d = float(pnl_1d_raw)
-                    except (ValueError, TypeError):
-                        pnl_1d = 0.0
-                winrate_7d = float(wallet_data.get("winrate_7d", 0) or 0)
-                txs_30d = int(wallet_data.get("txs_30d", 0) or 0)
-                risk_data = wallet_data.get("risk", {})
-                token_active = int(risk_data.get("token_active", wallet_data.get("token_active", 0)) or 0) if isinstance(risk_data, dict) else int(wallet_data.get("token_active", 0) or 0)
-                last_active = str(wallet_data.get("last_active", "") or datetime.now().isoformat())
-                is_blue_verified = bool(wallet_data.get("is_blue_verified", False))
-                avg_holding_period_7d = float(wallet_data.get("avg_holding_period_7d", 86400.0) or 86400.0)
-
-                wallet = WhaleWallet(
-                    address=address,
-                    twitter_handle=twitter_handle,
-                    pnl_30d=pnl_30d,
-                    pnl_7d=pnl_7d,
-                    pnl_1d=pnl_1d,
-                    winrate_7d=winrate_7d,
-                    txs_30d=txs_30d,
-                    token_active=token_active,
-                    last_active=last_active,
-                    is_blue_verified=is_blue_verified,
-                    avg_holding_period_7d=avg_holding_period_7d,
-                    score=score,
-                    rank=0,
-                    last_updated=datetime.now().isoformat(),
-                    is_active=True,
-                )
-                wallets.append(wallet)
-            except Exception as e:
-                logger.error(f"Error processing wallet data: {e}")
-                continue
+        frame = self._build_wallet_frame(df)
+        frame["score"] = self._score_wallet_frame(frame)
+        malformed = int(frame["malformed"].sum())
+        if malformed:
+            logger.warning(f"Skipped {malformed} wallet(s) with non-numeric metrics")
+        frame = frame[frame["score"] > 0].copy()
+        if frame.empty:
+            return []
 
-        wallets.sort(key=lambda x: x.score, reverse=True)
-        for i, w in enumerate(wallets):
-            w.rank = i + 1
-        return wallets
+        # Ties keep input order, matching a stable sort by score
+        frame["rank"] = frame["score"].rank(method="first", ascending=False).astype(int)
+        frame = frame.sort_values("rank")
+
+        last_updated = datetime.now().isoformat()
+        return [
+            WhaleWallet(
+                address=row.address,
+                twitter_handle=row.twitter_handle,
+                pnl_30d=float(row.pnl_30d),
+                pnl_7d=float(row.pnl_7d),
+                pnl_1d=float(row.pnl_1d),
+                winrate_7d=float(row.winrate_7d),
+                txs_30d=int(row.txs_30d),
+                token_active=int(row.token_active),
+                last_active=row.last_active,
+                is_blue_verified=bool(row.is_blue_verified),
+                avg_holding_period_7d=float(row.avg_holding_period_7d),
+                score=float(row.score),
+                rank=int(row.rank),
+                last_updated=last_updated,
+                is_active=True,
+            )
+            for row in frame.itertuples(index=False)
+        ]
     
     def _update_ranked_wallets(self, new_wallets: List[WhaleWallet]):
         """
@@ -1221,13 +1404,56 @@ def get_whale_agent_singleton() -> WhaleAgent:
         get_whale_agent_singleton._instance = WhaleAgent()
     return get_whale_agent_singleton._instance
 
+def benchmark_wallet_scoring(n_wallets: int = 10000, seed: int = 7) -> Dict[str, float]:
+    """
+    Compare the per-row scoring loop (iterrows + _calculate_wallet_score) with the
+    columnar pipeline on synthetic GMGN-format wallets. No network or Apify access.
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "wallet_address": [f"wallet_{i:05d}" for i in range(n_wallets)],
+        "twitter_username": [f"trader_{i}" for i in range(n_wallets)],
+        "pnl_30d": rng.normal(20, 40, n_wallets),
+        "pnl_7d": rng.normal(5, 20, n_wallets),
+        "pnl_1d": rng.normal(0, 8, n_wallets),
+        "realized_profit_30d": rng.lognormal(11, 1.2, n_wallets),
+        "winrate_7d": rng.uniform(0, 1, n_wallets),
+        "txs_30d": rng.integers(0, 12000, n_wallets),
+        "token_active": rng.integers(0, 1200, n_wallets),
+        "avg_holding_period_7d": rng.uniform(0, 30 * 86400, n_wallets),
+        "is_blue_verified": rng.random(n_wallets) < 0.1,
+        "last_active": datetime.now().isoformat(),
+    })
+    agent = WhaleAgent.__new__(WhaleAgent)  # scoring needs no Apify client or scheduler
+
+    started = time.perf_counter()
+    legacy_scores = [agent._calculate_wallet_score(row.to_dict()) for _, row in df.iterrows()]
+    legacy_ranked = sorted((s, i) for i, s in enumerate(legacy_scores) if s > 0)
+    legacy_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    wallets = agent._process_wallet_data(df)
+    columnar_seconds = time.perf_counter() - started
+
+    legacy_order = [df["wallet_address"].iloc[i] for _, i in sorted(legacy_ranked, key=lambda x: (-x[0], x[1]))]
+    max_diff = float(np.max(np.abs(np.asarray(legacy_scores) - agent._score_wallet_frame(agent._build_wallet_frame(df)).to_numpy())))
+    return {
+        "wallets": n_wallets,
+        "qualifying": len(wallets),
+        "legacy_seconds": legacy_seconds,
+        "columnar_seconds": columnar_seconds,
+        "speedup": legacy_seconds / columnar_seconds if columnar_seconds else float("inf"),
+        "max_score_diff": max_diff,
+        "same_ranking": legacy_order == [w.address for w in wallets],
+    }
+
 if __name__ == "__main__":
     import argparse
     
     # Command line argument parsing
     parser = argparse.ArgumentParser(description='Whale Agent - Track and rank cryptocurrency wallets')
-    parser.add_argument('--mode', choices=['test', 'run', 'execute-now', 'status'], default='run',
-                       help='Execution mode: test, run, execute-now, or status')
+    parser.add_argument('--mode', choices=['test', 'run', 'execute-now', 'status', 'benchmark'], default='run',
+                       help='Execution mode: test, run, execute-now, status, or benchmark')
     parser.add_argument('--scheduler', action='store_true', default=True,
                        help='Use background scheduler (default: True)')
     parser.add_argument('--no-scheduler', dest='scheduler', action='store_false',
@@ -1324,4 +1550,11 @@ if __name__ == "__main__":
         asyncio.run(execute_now())
     elif args.mode == 'status':
         print("📋 Showing status...")
-        show_status() 
\ No newline at end of file
+        show_status()
+    elif args.mode == 'benchmark':
+        print("⏱️ Benchmarking wallet scoring (10,000 synthetic wallets)...")
+        results = benchmark_wallet_scoring(10000)
+        print(f"Per-row loop:    {results['legacy_seconds'] * 1000:.0f}ms")
+        print(f"Columnar:        {results['columnar_seconds'] * 1000:.0f}ms ({results['speedup']:.0f}x)")
+        print(f"Qualifying:      {results['qualifying']} / {results['wallets']}")
+        print(f"Max score diff:  {results['max_score_diff']:.2e}, same ranking: {results['same_ranking']}")
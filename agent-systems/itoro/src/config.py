@@ -114,6 +114,8 @@ LOG_BACKUP_COUNT = 5  # Number of backup log files to keep
 CONSOLE_LOG_LEVEL = "DEBUG"  # Temporarily enable debug in console to see stSOL selection logic
 SHOW_DEBUG_IN_CONSOLE = False  # Whether to show DEBUG messages in the UI console
 SHOW_TIMESTAMPS_IN_CONSOLE = False  # Whether to show timestamps in console messages
+LOG_RATE_LIMIT_PER_SITE = 20  # Max messages from one logging call site per window (excess is counted, not shown)
+LOG_RATE_LIMIT_WINDOW_SEC = 1.0  # Rate limit window in seconds
 
 # =============================================================================
 # 🤖 AI MODEL CONFIGURATION
@@ -333,7 +335,8 @@ WHALE_HISTORY_RETENTION_DAYS = 365 # Keep 365 days of history data
 # Whale 7d enrichment from Hyperliquid user_fills (futures path only)
 WHALE_ENRICHMENT_7D_ENABLED = os.getenv('WHALE_ENRICHMENT_7D_ENABLED', 'true').lower() == 'true'
 WHALE_ENRICHMENT_MAX_WALLETS = int(os.getenv('WHALE_ENRICHMENT_MAX_WALLETS', '1000'))
-WHALE_ENRICHMENT_RATE_LIMIT_SEC = float(os.getenv('WHALE_ENRICHMENT_RATE_LIMIT_SEC', '0.5'))
+WHALE_ENRICHMENT_RATE_LIMIT_SEC = float(os.getenv('WHALE_ENRICHMENT_RATE_LIMIT_SEC', '0.5'))  # Min seconds between requests (token bucket rate)
+WHALE_ENRICHMENT_CONCURRENCY = int(os.getenv('WHALE_ENRICHMENT_CONCURRENCY', '4'))  # Requests in flight at once
 
 # =============================================================================
 # 💰 CORE TRADING CONFIGURATION
@@ -1587,7 +1590,9 @@ SENTIMENT_AI_MAX_TOKENS = 1024
 
 # BERT Model Configuration (for sentiment analysis)
 SENTIMENT_BERT_MODEL = "finiteautomata/bertweet-base-sentiment-analysis"
-SENTIMENT_BERT_BATCH_SIZE = 8  # Process in small batches to avoid memory issues
+SENTIMENT_BERT_BATCH_SIZE = 32  # Max tweets per forward pass (batches are grouped by length)
+SENTIMENT_BERT_MAX_BATCH_TOKENS = 2048  # Max padded tokens per forward pass, bounds memory
+SENTIMENT_BERT_QUANTIZE = False  # Dynamic int8 quantization for CPU inference; enable once the sentiment_scorer --benchmark label agreement vs fp32 is acceptable
 
 # =============================================================================
 # 🔔 WEBHOOK CONFIGURATION
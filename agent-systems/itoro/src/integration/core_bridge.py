@@ -4,24 +4,43 @@ Bridge utilities to publish crypto ecosystem data into the shared core layer.
 
 from __future__ import annotations
 
+import atexit
 import logging
 import os
-from typing import Iterable, Sequence, Optional
+import threading
+from typing import Dict, Iterable, Sequence, Optional
 
-import requests
 from datetime import datetime
 
 from core.database import UnifiedTradingSignal, WhaleRankingRecord
 from core.messaging import get_global_event_bus
 
+from .signal_forwarder import MAX_BATCH_SIZE, SignalForwarder
+
 logger = logging.getLogger(__name__)
 
 SIGNAL_SERVICE_ENDPOINT = os.getenv("SIGNAL_SERVICE_ENDPOINT")
 SIGNAL_SERVICE_API_KEY = os.getenv("SIGNAL_SERVICE_API_KEY")
+SIGNAL_SERVICE_BATCH_SIZE = int(os.getenv("SIGNAL_SERVICE_BATCH_SIZE", str(MAX_BATCH_SIZE)))
+SIGNAL_SERVICE_SPOOL_DIR = os.getenv("SIGNAL_SERVICE_SPOOL_DIR")
+SIGNAL_SERVICE_BATCH_MODE = os.getenv("SIGNAL_SERVICE_BATCH_MODE", "auto")  # auto | envelope | single
+
+# One message per wallet (symbol = address), as the data aggregator publishes them
+WHALE_RANKINGS_TOPIC = "whale_rankings"
+# One message per refresh carrying every ranking
+WHALE_RANKINGS_SNAPSHOT_TOPIC = "whale_rankings_snapshot"
+
+_forwarder: Optional[SignalForwarder] = None
+_forwarder_lock = threading.Lock()
 
 
 def publish_trading_signals(signals: Sequence[UnifiedTradingSignal]) -> None:
-    """Publish unified trading signals to the global event bus."""
+    """
+    Publish unified trading signals to the global event bus.
+
+    Forwarding to the commerce ingest API is queued for the background
+    forwarder, so a slow endpoint never delays the caller.
+    """
     bus = get_global_event_bus()
     for signal in signals:
         _post_to_signal_service(signal)
@@ -32,10 +51,14 @@ def publish_trading_signals(signals: Sequence[UnifiedTradingSignal]) -> None:
 def publish_whale_rankings(wallets: Iterable) -> None:
     """
     Publish whale rankings derived from WhaleWallet objects produced by
-    `whale_agent`. The objects must expose the attributes used below.
+    `whale_agent`. Each wallet goes to "whale_rankings" as its own message,
+    and the whole refresh is also published once on
+    "whale_rankings_snapshot" for consumers that want it in one piece. The
+    objects must expose the attributes used below.
     """
 
     bus = get_global_event_bus()
+    records = []
     for wallet in wallets:
         try:
             record = _wallet_to_record(wallet)
@@ -43,6 +66,7 @@ def publish_whale_rankings(wallets: Iterable) -> None:
             logger.exception("Failed to convert whale wallet into record")
             continue
 
+        records.append(record)
         logger.debug("Publishing whale ranking %s", record.ranking_id)
         bus.publish_signal(
             UnifiedTradingSignal(
@@ -55,8 +79,52 @@ def publish_whale_rankings(wallets: Iterable) -> None:
                 confidence=record.score,
                 raw_payload=record.to_dict(),
             ),
-            topic="whale_rankings",
+            topic=WHALE_RANKINGS_TOPIC,
         )
+    if not records:
+        return
+
+    published_at = datetime.utcnow()
+    logger.debug("Publishing whale rankings snapshot of %d wallets", len(records))
+    bus.publish_signal(
+        UnifiedTradingSignal(
+            signal_id=f"whale_rankings:{published_at.strftime('%Y%m%dT%H%M%S%f')}",
+            ecosystem="crypto",
+            timestamp=published_at,
+            symbol="WHALE_RANKINGS",
+            action="HOLD",
+            signal_type="ANALYTICS",
+            agent_source="whale_agent",
+            tags=["whale_rankings", "batch"],
+            raw_payload={"count": len(records), "rankings": [record.to_dict() for record in records]},
+        ),
+        topic=WHALE_RANKINGS_SNAPSHOT_TOPIC,
+    )
+
+
+def get_signal_forwarder() -> Optional[SignalForwarder]:
+    """Shared, started forwarder for the commerce ingest API (None if not configured)."""
+    global _forwarder
+    if not SIGNAL_SERVICE_ENDPOINT or not SIGNAL_SERVICE_API_KEY:
+        return None
+    if _forwarder is None:
+        with _forwarder_lock:
+            if _forwarder is None:
+                _forwarder = SignalForwarder(
+                    SIGNAL_SERVICE_ENDPOINT,
+                    SIGNAL_SERVICE_API_KEY,
+                    spool_dir=SIGNAL_SERVICE_SPOOL_DIR,
+                    max_batch_size=SIGNAL_SERVICE_BATCH_SIZE,
+                    batch_mode=SIGNAL_SERVICE_BATCH_MODE,
+                ).start()
+                atexit.register(_forwarder.stop)
+    return _forwarder
+
+
+def get_forwarding_stats() -> Optional[Dict]:
+    """Forwarder counters and current lag in seconds (None if forwarding is not configured)."""
+    forwarder = get_signal_forwarder()
+    return forwarder.get_stats() if forwarder else None
 
 
 def _wallet_to_record(wallet) -> WhaleRankingRecord:
@@ -101,10 +169,16 @@ def _maybe_float(value):
 
 
 def _post_to_signal_service(signal: UnifiedTradingSignal) -> bool:
-    if not SIGNAL_SERVICE_ENDPOINT or not SIGNAL_SERVICE_API_KEY:
+    """Queue a signal for the commerce ingest API; True if queued."""
+    forwarder = get_signal_forwarder()
+    if forwarder is None:
         return False
+    forwarder.submit(_signal_payload(signal))
+    return True
 
-    payload = {
+
+def _signal_payload(signal: UnifiedTradingSignal) -> Dict:
+    return {
         "ecosystem": signal.ecosystem or "crypto",
         "symbol": signal.symbol,
         "action": signal.action,
@@ -116,28 +190,3 @@ def _post_to_signal_service(signal: UnifiedTradingSignal) -> bool:
         "signal_id": signal.signal_id,
         "metadata": signal.raw_payload or {},
     }
-
-    try:
-        response = requests.post(
-            SIGNAL_SERVICE_ENDPOINT,
-            json=payload,
-            headers={
-                "Content-Type": "application/json",
-                "X-API-Key": SIGNAL_SERVICE_API_KEY,
-            },
-            timeout=10,
-        )
-        if response.status_code >= 400:
-            logger.error(
-                "Failed to forward crypto signal %s to commerce ingest: %s %s",
-                signal.signal_id,
-                response.status_code,
-                response.text[:200],
-            )
-            return False
-        logger.debug("Forwarded crypto signal %s via commerce ingest API", signal.signal_id)
-        return True
-    except requests.RequestException:
-        logger.exception("Error posting crypto signal %s to commerce ingest endpoint", signal.signal_id)
-        return False
-
@@ -0,0 +1,324 @@
+"""
+Background forwarder that batches crypto signals to the commerce ingest API.
+
+Producers call `submit()`, which only appends to a bounded in-memory queue and
+returns immediately, so a slow ingest endpoint never throttles the agents that
+emit signals. A daemon thread drains the queue into batched, authenticated
+POSTs over a keep-alive session. Batches that cannot be delivered (network
+errors, 429/5xx, auth or routing errors) are written to an on-disk spool and
+retried with exponential backoff, oldest first, including spool files left
+behind by a previous run. Only statuses that say the payload itself is
+invalid drop signals.
+
+Batches go out as one {"signals": [...]} POST. In the default "auto" mode an
+endpoint that answers the envelope with a client error gets the same signals
+one payload per POST instead, and keeps getting single POSTs once that works.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DEFAULT_SPOOL_DIR = PROJECT_ROOT / "src" / "data" / "signal_spool"
+
+MAX_QUEUE_SIZE = 10_000
+MAX_BATCH_SIZE = 100
+MAX_BATCH_WAIT_SEC = 0.25  # How long the first signal of a batch waits for company
+REQUEST_TIMEOUT_SEC = 10
+RETRY_DELAY_SEC = 1.0
+RETRY_MAX_DELAY_SEC = 60.0
+PERMANENT_STATUS = {400, 409, 413, 415, 422}  # The payload will never be accepted; other errors are retried
+ENVELOPE_UNSUPPORTED_STATUS = {400, 413, 415, 422}  # Replies to a batch from a one-signal-per-POST endpoint
+BATCH_MODES = ("auto", "envelope", "single")
+
+
+class SignalForwarder:
+    """
+    Bounded, batching, spool-backed forwarder for signal payload dicts.
+
+    Args:
+        endpoint: Ingest URL
+        api_key: Sent as the X-API-Key header
+        spool_dir: Directory for batches awaiting retry
+        max_queue_size: In-memory queue bound; overflow goes straight to the spool
+        max_batch_size: Signals per POST
+        max_batch_wait: Seconds to wait for more signals before sending a partial batch
+        timeout: Per-request timeout in seconds
+        batch_mode: "envelope" posts {"signals": [payload, ...]}, "single" posts each payload,
+            "auto" starts with the envelope and falls back to single POSTs if it is refused
+    """
+
+    def __init__(self, endpoint: str, api_key: str, spool_dir: Optional[Path] = None,
+                 max_queue_size: int = MAX_QUEUE_SIZE, max_batch_size: int = MAX_BATCH_SIZE,
+                 max_batch_wait: float = MAX_BATCH_WAIT_SEC, timeout: float = REQUEST_TIMEOUT_SEC,
+                 session: Optional[requests.Session] = None, batch_mode: str = "auto") -> None:
+        if batch_mode not in BATCH_MODES:
+            raise ValueError(f"batch_mode must be one of {BATCH_MODES}, got {batch_mode!r}")
+        self.endpoint = endpoint
+        self.batch_mode = batch_mode
+        self._use_envelope = batch_mode != "single"
+        self.spool_dir = Path(spool_dir) if spool_dir is not None else DEFAULT_SPOOL_DIR
+        self.max_batch_size = max_batch_size
+        self.max_batch_wait = max_batch_wait
+        self.timeout = timeout
+
+        self.session = session or requests.Session()
+        self.session.headers.update({"Content-Type": "application/json", "X-API-Key": api_key})
+
+        # Entries are (enqueued_at, payload); enqueued_at is wall-clock so it survives the spool
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=max_queue_size)
+        self._spool_lock = threading.Lock()
+        self._spool_seq = 0
+        self._retry_delay = RETRY_DELAY_SEC
+        self._next_retry_at = 0.0
+        self._in_flight_since: Optional[float] = None  # Oldest signal of the batch being sent
+        self._idle = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {'submitted': 0, 'delivered': 0, 'batches': 0, 'spooled': 0, 'retries': 0,
+                      'rejected': 0, 'envelope_fallbacks': 0, 'last_lag_sec': None}
+
+    # ==== Lifecycle ====
+
+    def start(self) -> "SignalForwarder":
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="signal-forwarder", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the worker; anything still queued is spooled for the next run"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        leftover = self._drain()
+        if leftover:
+            self._spool(leftover)
+            self._mark_done(leftover)
+        self.session.close()
+
+    # ==== Producer side ====
+
+    def submit(self, payload: Dict) -> None:
+        """Queue one signal payload for forwarding; never blocks"""
+        self.stats['submitted'] += 1
+        entry = (time.time(), payload)
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            logger.warning("Signal forwarder queue full, spooling signal %s", payload.get("signal_id"))
+            self._spool([entry])
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until the queue and spool are empty; False if still pending after timeout"""
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self.pending() > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(min(remaining, 0.1))
+        return True
+
+    def pending(self) -> int:
+        # unfinished_tasks covers queued signals and the batch currently being sent
+        return self._queue.unfinished_tasks + sum(count for _, _, count in self._spool_files())
+
+    def lag(self) -> float:
+        """Seconds the oldest undelivered signal has been waiting (0 if none)"""
+        oldest = [ts for ts in (self._queue_head_time(), self._in_flight_since) if ts is not None]
+        oldest.extend(ts for _, ts, _ in self._spool_files()[:1])
+        return max(0.0, time.time() - min(oldest)) if oldest else 0.0
+
+    def get_stats(self) -> Dict:
+        spool = self._spool_files()
+        return {**self.stats, 'queued': self._queue.qsize(), 'spool_files': len(spool),
+                'spooled_pending': sum(count for _, _, count in spool),
+                'lag_sec': round(self.lag(), 3)}
+
+    # ==== Worker ====
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            if self._spool_files() and time.monotonic() >= self._next_retry_at:
+                self._retry_spool()
+                continue
+
+            batch = self._collect()
+            if not batch:
+                continue
+            undelivered = self._send(batch)
+            if undelivered:
+                self._spool(undelivered)
+                self._schedule_retry()
+            self._mark_done(batch)
+
+    def _collect(self) -> List[tuple]:
+        """Block briefly for a first signal, then gather a batch"""
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        self._in_flight_since = first[0]
+        batch = [first]
+        deadline = time.monotonic() + self.max_batch_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self) -> List[tuple]:
+        items = []
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _mark_done(self, batch: List[tuple]) -> None:
+        for _ in batch:
+            self._queue.task_done()
+        with self._idle:
+            self._in_flight_since = None
+            self._idle.notify_all()
+
+    def _send(self, batch: List[tuple]) -> List[tuple]:
+        """Deliver one batch; returns the entries still to retry (empty if delivered or rejected)"""
+        if not self._use_envelope:
+            return self._send_singles(batch)[0]
+
+        status, text = self._post({"signals": [payload for _, payload in batch]}, len(batch))
+        if status is not None and status < 400:
+            self._delivered(batch)
+            return []
+        if self.batch_mode == "auto" and status in ENVELOPE_UNSUPPORTED_STATUS:
+            self.stats['envelope_fallbacks'] += 1
+            logger.warning("Commerce ingest answered %s to a batched POST, sending %d signals one per POST",
+                           status, len(batch))
+            undelivered, delivered = self._send_singles(batch)
+            if delivered:
+                # The endpoint takes single payloads, so the envelope was the problem
+                self._use_envelope = False
+            return undelivered
+        if status in PERMANENT_STATUS:
+            self._rejected(batch, status, text)
+            return []
+        self._busy(status, len(batch))
+        return batch
+
+    def _send_singles(self, batch: List[tuple]) -> tuple:
+        """One POST per payload; returns (entries still to retry, number delivered)"""
+        delivered = 0
+        for i, entry in enumerate(batch):
+            status, text = self._post(entry[1], 1)
+            if status is not None and status < 400:
+                self._delivered([entry])
+                delivered += 1
+            elif status in PERMANENT_STATUS:
+                self._rejected([entry], status, text)
+            else:
+                # Endpoint unavailable: keep this and the rest, in order, for the retry
+                self._busy(status, len(batch) - i)
+                return batch[i:], delivered
+        return [], delivered
+
+    def _post(self, body, count: int) -> tuple:
+        """(status, response text) of one POST; status is None if the request failed"""
+        try:
+            response = self.session.post(self.endpoint, data=json.dumps(body, default=str), timeout=self.timeout)
+        except requests.RequestException as exc:
+            logger.warning("Signal batch of %d not delivered to commerce ingest: %s", count, exc)
+            return None, ""
+        return response.status_code, response.text
+
+    def _delivered(self, entries: List[tuple]) -> None:
+        self.stats['delivered'] += len(entries)
+        self.stats['batches'] += 1
+        self.stats['last_lag_sec'] = round(time.time() - entries[0][0], 3)
+        # Endpoint is healthy again: replay the spool without waiting out the backoff
+        self._retry_delay, self._next_retry_at = RETRY_DELAY_SEC, 0.0
+        logger.debug("Forwarded %d crypto signals via commerce ingest API", len(entries))
+
+    def _rejected(self, entries: List[tuple], status: int, text: str) -> None:
+        self.stats['rejected'] += len(entries)
+        logger.error("Commerce ingest rejected %d crypto signals: %s %s", len(entries), status, text[:200])
+
+    def _busy(self, status: Optional[int], count: int) -> None:
+        if status is not None:
+            logger.warning("Commerce ingest unavailable (%s), will retry %d signals", status, count)
+
+    def _schedule_retry(self) -> None:
+        self._next_retry_at = time.monotonic() + self._retry_delay
+        self._retry_delay = min(self._retry_delay * 2, RETRY_MAX_DELAY_SEC)
+
+    # ==== Spool ====
+
+    def _spool(self, batch: List[tuple]) -> None:
+        with self._spool_lock:
+            self.spool_dir.mkdir(parents=True, exist_ok=True)
+            self._spool_seq += 1
+            oldest_ms = int(batch[0][0] * 1000)
+            name = f"{oldest_ms:015d}-{os.getpid()}-{self._spool_seq:06d}-{len(batch)}.json"
+            tmp_path = self.spool_dir / f".{name}.tmp"
+            tmp_path.write_text(json.dumps([[ts, payload] for ts, payload in batch], default=str))
+            os.replace(tmp_path, self.spool_dir / name)
+        self.stats['spooled'] += len(batch)
+
+    def _spool_files(self) -> List[tuple]:
+        """(path, oldest_enqueued_at, count) for spooled batches, oldest first"""
+        try:
+            names = sorted(p.name for p in self.spool_dir.glob("*.json"))
+        except OSError:
+            return []
+        files = []
+        for name in names:
+            try:
+                oldest_ms, _, _, count = name[:-len(".json")].split("-")
+                files.append((self.spool_dir / name, int(oldest_ms) / 1000, int(count)))
+            except ValueError:
+                continue
+        return files
+
+    def _retry_spool(self) -> None:
+        path = self._spool_files()[0][0]
+        try:
+            batch = [tuple(entry) for entry in json.loads(path.read_text())]
+        except (OSError, ValueError) as exc:
+            logger.error("Dropping unreadable signal spool file %s: %s", path.name, exc)
+            path.unlink(missing_ok=True)
+            return
+
+        self.stats['retries'] += 1
+        undelivered = self._send(batch)
+        if len(undelivered) < len(batch):
+            if undelivered:
+                self._spool(undelivered)  # Keep only what is left, under the same oldest-first order
+            path.unlink(missing_ok=True)
+            with self._idle:
+                self._idle.notify_all()
+        if undelivered:
+            self._schedule_retry()
+
+    def _queue_head_time(self) -> Optional[float]:
+        with self._queue.mutex:
+            return self._queue.queue[0][0] if self._queue.queue else None
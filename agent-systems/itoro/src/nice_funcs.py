@@ -1855,95 +1855,78 @@ def get_time_range(days_back):
 
     return time_from, time_to
 
-def get_data(address, days_back_4_data, timeframe):
+# Birdeye OHLCV series are kept in the candle store with their indicators; a call within
+# this many seconds of the last tail refresh makes no API request
+OHLCV_CACHE_MAX_AGE_SEC = 60
+_ohlcv_store = None
+
+
+def _get_ohlcv_store():
+    global _ohlcv_store
+    if _ohlcv_store is None:
+        from pathlib import Path
+        from src.scripts.data_processing.candle_store import CandleStore
+        _ohlcv_store = CandleStore(Path(__file__).parent / "data" / "candles")
+    return _ohlcv_store
+
+
+def _fetch_birdeye_ohlcv(address, timeframe, time_from, time_to, api_key):
+    """Birdeye bars for [time_from, time_to] as store rows, or None if the request failed"""
+    from src.scripts.data_processing.ohlcv_store import items_to_frame
+
+    url = f"https://public-api.birdeye.so/defi/ohlcv?address={address}&type={timeframe}&time_from={time_from}&time_to={time_to}"
+    headers = {"X-API-KEY": api_key}
+    try:
+        response = requests.get(url, headers=headers, timeout=10)
+    except requests.RequestException as e:
+        error(f"Failed to fetch data for address {address}: {str(e)}")
+        return None
+
+    if response.status_code == 200:
+        return items_to_frame(response.json().get('data', {}).get('items', []))
+
+    error(f"Failed to fetch data for address {address}. Status code: {response.status_code}")
+    if response.status_code == 401:
+        warning("Check your BIRDEYE_API_KEY in .env file!")
+    return None
+
+
+def _coingecko_data(address, days_back_4_data):
     import pandas as pd  # Lazy import to avoid hangs
-    time_from, time_to = get_time_range(days_back_4_data)
+    info(f"Falling back to CoinGecko for {address}...")
+    prices = fetch_coingecko_data(address, days_back_4_data)
+    if prices:
+        df = pd.DataFrame(prices, columns=["timestamp", "price"])
+        df["date"] = pd.to_datetime(df["timestamp"], unit="ms")
+        return df[["date", "price"]]
+    return pd.DataFrame()
 
-    # Check temp data first
-    temp_file = f"temp_data/{address}_latest.csv"
-    if os.path.exists(temp_file):
-        debug(f"Found cached data for {address[:4]}")
-        return pd.read_csv(temp_file)
+
+def get_data(address, days_back_4_data, timeframe):
+    """
+    OHLCV bars with MA20/MA40/RSI for the last days_back_4_data days.
+    Bars and indicators come from the local store; Birdeye is only asked for bars
+    newer than the stored tail (and for older history than was stored so far).
+    """
+    from src.scripts.data_processing.ohlcv_store import cached_ohlcv
+    time_from, time_to = get_time_range(days_back_4_data)
 
     # Lazy load API key when needed
     api_key = get_birdeye_api_key()
     if not api_key:
         warning("⚠️ Cannot fetch OHLCV data - BIRDEYE_API_KEY not available")
-        # Fallback to CoinGecko
-        info(f"Falling back to CoinGecko for {address}...")
-        prices = fetch_coingecko_data(address, days_back_4_data)
-        if prices:
-            df = pd.DataFrame(prices, columns=["timestamp", "price"])
-            df["date"] = pd.to_datetime(df["timestamp"], unit="ms")
-            df = df[["date", "price"]]
-            return df
-        return pd.DataFrame()
-        
-    url = f"https://public-api.birdeye.so/defi/ohlcv?address={address}&type={timeframe}&time_from={time_from}&time_to={time_to}"
-    headers = {"X-API-KEY": api_key}
-    response = requests.get(url, headers=headers)
-    
-    if response.status_code == 200:
-        json_response = response.json()
-        items = json_response.get('data', {}).get('items', [])
-
-        processed_data = [{
-            'Datetime (UTC)': datetime.utcfromtimestamp(item['unixTime']).strftime('%Y-%m-%d %H:%M:%S'),
-            'Open': item['o'],
-            'High': item['h'],
-            'Low': item['l'],
-            'Close': item['c'],
-            'Volume': item['v']
-        } for item in items]
-
-        df = pd.DataFrame(processed_data)
-
-        # Remove any rows with dates far in the future
-        current_date = datetime.now()
-        df['datetime_obj'] = pd.to_datetime(df['Datetime (UTC)'])
-        df = df[df['datetime_obj'] <= current_date]
-        df = df.drop('datetime_obj', axis=1)
-
-        # Pad if needed
-        if len(df) < 40:
-            warning(f"Padding data to ensure minimum 40 rows for analysis")
-            rows_to_add = 40 - len(df)
-            first_row_replicated = pd.concat([df.iloc[0:1]] * rows_to_add, ignore_index=True)
-            df = pd.concat([first_row_replicated, df], ignore_index=True)
-
-        info(f"Data Analysis Ready! Processing {len(df)} candles")
-
-        # Always save to temp for current run
-        df.to_csv(temp_file)
-        debug(f"Cached data for {address[:4]}")
-
-        # Calculate indicators
-        df['MA20'] = ta.sma(df['Close'], length=20)
-        df['RSI'] = ta.rsi(df['Close'], length=14)
-        df['MA40'] = ta.sma(df['Close'], length=40)
-
-        df['Price_above_MA20'] = df['Close'] > df['MA20']
-        df['Price_above_MA40'] = df['Close'] > df['MA40']
-        df['MA20_above_MA40'] = df['MA20'] > df['MA40']
+        return _coingecko_data(address, days_back_4_data)
 
-        return df
-    else:
-        error(f"Failed to fetch data for address {address}. Status code: {response.status_code}")
-        if response.status_code == 401:
-            warning("Check your BIRDEYE_API_KEY in .env file!")
-        
-        # Fallback to CoinGecko
-        info(f"Falling back to CoinGecko for {address}...")
-        prices = fetch_coingecko_data(address, days_back_4_data)
-        if prices:
-            df = pd.DataFrame(prices, columns=["timestamp", "price"])
-            df["date"] = pd.to_datetime(df["timestamp"], unit="ms")
-            df = df[["date", "price"]]
-            df.to_csv(temp_file)
-            debug(f"Cached data from CoinGecko for {address[:4]}")
-            return df
-        else:
-            return pd.DataFrame()
+    df = cached_ohlcv(
+        _get_ohlcv_store(), address, timeframe, time_from, time_to,
+        lambda start, stop: _fetch_birdeye_ohlcv(address, timeframe, start, stop, api_key),
+        max_age=OHLCV_CACHE_MAX_AGE_SEC,
+    )
+    if df is None:
+        return _coingecko_data(address, days_back_4_data)
+
+    info(f"Data Analysis Ready! Processing {len(df)} candles")
+    return df
 
 
 
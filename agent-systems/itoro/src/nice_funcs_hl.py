@@ -10,6 +10,8 @@ import requests
 from datetime import datetime, timedelta
 import numpy as np
 import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 try:
     import pandas_ta as ta
 except (ImportError, ModuleNotFoundError):
@@ -25,6 +27,8 @@ except ImportError:
     def warning(msg, **kwargs): print(f"[WARN] {msg}")
     def error(msg, **kwargs): print(f"[ERROR] {msg}")
     def critical(msg, **kwargs): print(f"[CRITICAL] {msg}")
+from src.scripts.shared_services.hyperliquid_price_book import get_price_book
+from src.scripts.data_processing.candle_store import CandleStore
 
 # Constants
 BATCH_SIZE = 5000  # MAX IS 5000 FOR HYPERLIQUID
@@ -32,6 +36,20 @@ MAX_RETRIES = 3
 MAX_ROWS = 5000
 BASE_URL = 'https://api.hyperliquid.xyz/info'
 
+# Candle fetch layer: long ranges are split into BATCH_SIZE-candle pages fetched concurrently,
+# and candles are kept in a local Parquet cache per (coin, interval)
+CANDLE_INTERVAL_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '8h': 28_800_000, '12h': 43_200_000,
+    '1d': 86_400_000, '3d': 259_200_000, '1w': 604_800_000, '1M': 2_592_000_000,
+}
+CANDLE_COLUMNS = ['t', 'o', 'h', 'l', 'c', 'v']
+CANDLE_FETCH_WORKERS = 4  # Concurrent page requests
+CANDLE_RETRY_BACKOFF_SEC = 0.5  # Doubles after each failed attempt
+CANDLE_CACHE_MAX_AGE_SEC = 30  # Tail younger than this is served from the cache without an API call
+CANDLE_SOURCE = 'hyperliquid'
+_candle_store = CandleStore(Path(__file__).parent / "data" / "candles")
+
 # Global variable to store timestamp offset
 timestamp_offset = None
 
@@ -42,17 +60,8 @@ def adjust_timestamp(dt):
         return corrected_dt
     return dt
 
-def _get_ohlcv(symbol, interval, start_time, end_time, batch_size=BATCH_SIZE):
-    """Internal function to fetch OHLCV data from Hyperliquid"""
-    global timestamp_offset
-    info(f'Requesting data for {symbol}:')
-    debug(f'Batch Size: {batch_size}')
-    debug(f'Start: {start_time.strftime("%Y-%m-%d %H:%M:%S")} UTC')
-    debug(f'End: {end_time.strftime("%Y-%m-%d %H:%M:%S")} UTC')
-
-    start_ts = int(start_time.timestamp() * 1000)
-    end_ts = int(end_time.timestamp() * 1000)
-
+def _fetch_candle_page(symbol, interval, start_ts, end_ts, batch_size=BATCH_SIZE):
+    """Fetch one candleSnapshot page; [] if the API has no candles there, None if every attempt failed"""
     for attempt in range(MAX_RETRIES):
         try:
             response = requests.post(
@@ -70,65 +79,145 @@ def _get_ohlcv(symbol, interval, start_time, end_time, batch_size=BATCH_SIZE):
                 },
                 timeout=10
             )
-
             if response.status_code == 200:
-                snapshot_data = response.json()
-                if snapshot_data:
-                    # Handle timestamp offset
-                    if timestamp_offset is None:
-                        latest_api_timestamp = datetime.utcfromtimestamp(snapshot_data[-1]['t'] / 1000)
-                        system_current_date = datetime.utcnow()
-                        expected_latest_timestamp = system_current_date
-                        timestamp_offset = latest_api_timestamp - expected_latest_timestamp
-                        debug(f"Calculated timestamp offset: {timestamp_offset}")
-
-                    # Adjust timestamps
-                    for candle in snapshot_data:
-                        dt = datetime.utcfromtimestamp(candle['t'] / 1000)
-                        adjusted_dt = adjust_timestamp(dt)
-                        candle['t'] = int(adjusted_dt.timestamp() * 1000)
-
-                    first_time = datetime.utcfromtimestamp(snapshot_data[0]['t'] / 1000)
-                    last_time = datetime.utcfromtimestamp(snapshot_data[-1]['t'] / 1000)
-                    info(f'Received {len(snapshot_data)} candles')
-                    debug(f'First: {first_time}')
-                    debug(f'Last: {last_time}')
-                    return snapshot_data
-                warning('No data returned by API')
-                return None
+                return response.json() or []
             error(f'HTTP Error {response.status_code}: {response.text}')
         except requests.exceptions.RequestException as e:
             warning(f'Request failed (attempt {attempt + 1}): {str(e)}')
-            time.sleep(1)
+        if attempt < MAX_RETRIES - 1:
+            time.sleep(CANDLE_RETRY_BACKOFF_SEC * 2 ** attempt)
     return None
 
+def _candles_to_frame(snapshot_data):
+    """Raw API candles (list of dicts) to a columnar frame: t (ms) + float OHLCV"""
+    df = pd.DataFrame.from_records(snapshot_data or [], columns=CANDLE_COLUMNS)
+    return df.astype({'t': 'int64', 'o': 'float64', 'h': 'float64', 'l': 'float64', 'c': 'float64', 'v': 'float64'})
+
+def _fetch_candle_range(symbol, interval, start_ts, end_ts, batch_size=BATCH_SIZE):
+    """Fetch [start_ts, end_ts] as concurrently requested pages of batch_size candles; None on failure"""
+    page_ms = batch_size * CANDLE_INTERVAL_MS[interval]
+    pages = [(page_start, min(page_start + page_ms - 1, end_ts)) for page_start in range(start_ts, end_ts + 1, page_ms)]
+    fetch = lambda page: _fetch_candle_page(symbol, interval, page[0], page[1], batch_size)
+    if len(pages) == 1:
+        results = [fetch(pages[0])]
+    else:
+        debug(f'Fetching {len(pages)} pages of {symbol} {interval} candles concurrently')
+        with ThreadPoolExecutor(max_workers=min(CANDLE_FETCH_WORKERS, len(pages))) as pool:
+            results = list(pool.map(fetch, pages))
+    if any(result is None for result in results):
+        return None
+    return pd.concat([_candles_to_frame(result) for result in results], ignore_index=True)
+
+def _cached_candles(symbol, interval, start_ts, end_ts, batch_size=BATCH_SIZE, max_age=CANDLE_CACHE_MAX_AGE_SEC):
+    """
+    Raw candles for [start_ts, end_ts] from the local candle cache, fetching only what it lacks:
+    history before what was requested so far, and the tail once it's older than max_age seconds
+    (from the last cached candle, which may still have been forming). refreshed_at records how
+    far the cached series is known to be complete.
+    """
+    with _candle_store.lock(CANDLE_SOURCE, symbol, interval):
+        cached, metadata = _candle_store.load(CANDLE_SOURCE, symbol, interval)
+        history_start = metadata.get('history_start')
+        refreshed_at = metadata.get('refreshed_at', 0)
+        now_ms = int(time.time() * 1000)
+
+        # Cached history is contiguous from history_start to the last candle
+        head = tail = None
+        last_cached = int(cached['t'].iloc[-1]) if not cached.empty else None
+        if history_start is None or last_cached is None or last_cached < start_ts:
+            tail = (start_ts, end_ts)  # Nothing usable cached: start a new contiguous range
+            history_start = None
+        else:
+            if start_ts < history_start:
+                head = (start_ts, history_start - 1)
+            if end_ts > refreshed_at + max_age * 1000:
+                tail = (last_cached, end_ts)
+
+        if head is None and tail is None:
+            debug(f'Candle cache hit: {symbol} {interval} ({len(cached)} cached)')
+            candles = cached
+        else:
+            new_frames, updates = [], {}
+            for fetch_range, update in ((head, {'history_start': start_ts}), (tail, {'refreshed_at': min(end_ts, now_ms)})):
+                if fetch_range is None:
+                    continue
+                fetched = _fetch_candle_range(symbol, interval, fetch_range[0], fetch_range[1], batch_size)
+                if fetched is None:
+                    continue
+                new_frames.append(fetched)
+                updates.update(update)
+            if history_start is None and 'refreshed_at' in updates:
+                updates['history_start'] = start_ts
+
+            if not updates:
+                if cached.empty:
+                    return None
+                warning(f'Candle fetch failed, serving cached {symbol} {interval} candles')
+                candles = cached
+            else:
+                new_candles = pd.concat(new_frames, ignore_index=True) if len(new_frames) > 1 else new_frames[0]
+                candles = _candle_store.merge(CANDLE_SOURCE, symbol, interval, new_candles, metadata=updates)
+
+    in_range = candles[(candles['t'] >= start_ts) & (candles['t'] <= end_ts)]
+    return in_range.reset_index(drop=True)
+
+def _get_ohlcv(symbol, interval, start_time, end_time, batch_size=BATCH_SIZE):
+    """Internal function to fetch OHLCV data from Hyperliquid (via the local candle cache)"""
+    global timestamp_offset
+    info(f'Requesting data for {symbol}:')
+    debug(f'Batch Size: {batch_size}')
+    debug(f'Start: {start_time.strftime("%Y-%m-%d %H:%M:%S")} UTC')
+    debug(f'End: {end_time.strftime("%Y-%m-%d %H:%M:%S")} UTC')
+
+    if interval not in CANDLE_INTERVAL_MS:
+        error(f'Unsupported Hyperliquid interval: {interval}')
+        return None
+
+    # start_time/end_time are naive UTC
+    start_ts = pd.Timestamp(start_time).value // 1_000_000
+    end_ts = pd.Timestamp(end_time).value // 1_000_000
+    candles = _cached_candles(symbol, interval, start_ts, end_ts, batch_size)
+    if candles is None:
+        return None
+    if candles.empty:
+        warning('No data returned by API')
+        return None
+
+    # Handle timestamp offset
+    if timestamp_offset is None:
+        latest_api_timestamp = datetime.utcfromtimestamp(candles['t'].iloc[-1] / 1000)
+        timestamp_offset = latest_api_timestamp - datetime.utcnow()
+        debug(f"Calculated timestamp offset: {timestamp_offset}")
+
+    # Adjust timestamps (vectorized adjust_timestamp)
+    candles = candles.copy()
+    candles['t'] -= timestamp_offset // timedelta(milliseconds=1)
+
+    info(f'Received {len(candles)} candles')
+    debug(f'First: {datetime.utcfromtimestamp(candles["t"].iloc[0] / 1000)}')
+    debug(f'Last: {datetime.utcfromtimestamp(candles["t"].iloc[-1] / 1000)}')
+    return candles
+
 def _process_data_to_df(snapshot_data):
-    """Convert raw API data to DataFrame"""
-    if snapshot_data:
-        columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
-        data = []
-        for snapshot in snapshot_data:
-            timestamp = datetime.utcfromtimestamp(snapshot['t'] / 1000)
-            # Convert all numeric values to float
-            data.append([
-                timestamp,
-                float(snapshot['o']),
-                float(snapshot['h']),
-                float(snapshot['l']),
-                float(snapshot['c']),
-                float(snapshot['v'])
-            ])
-        df = pd.DataFrame(data, columns=columns)
-        
-        # Ensure numeric columns are float64
-        numeric_cols = ['open', 'high', 'low', 'close', 'volume']
-        df[numeric_cols] = df[numeric_cols].astype('float64')
-        
-        debug("OHLCV Data Types:", file_only=True)
-        debug(df.dtypes, file_only=True)
-        
-        return df
-    return pd.DataFrame()
+    """Convert candles (frame from _get_ohlcv, or raw API list) to an OHLCV DataFrame"""
+    if snapshot_data is None or len(snapshot_data) == 0:
+        return pd.DataFrame()
+    if not isinstance(snapshot_data, pd.DataFrame):
+        snapshot_data = _candles_to_frame(snapshot_data)
+
+    df = pd.DataFrame({
+        'timestamp': pd.to_datetime(snapshot_data['t'].to_numpy(), unit='ms').astype('datetime64[ns]'),
+        'open': snapshot_data['o'].to_numpy(dtype='float64'),
+        'high': snapshot_data['h'].to_numpy(dtype='float64'),
+        'low': snapshot_data['l'].to_numpy(dtype='float64'),
+        'close': snapshot_data['c'].to_numpy(dtype='float64'),
+        'volume': snapshot_data['v'].to_numpy(dtype='float64'),
+    })
+
+    debug("OHLCV Data Types:", file_only=True)
+    debug(df.dtypes, file_only=True)
+
+    return df
 
 def add_technical_indicators(df):
     """Add technical indicators to the dataframe"""
@@ -204,14 +293,17 @@ def get_data(address=None, symbol=None, timeframe="1h", bars=100, add_indicators
     # Ensure we don't exceed max rows
     bars = min(bars, MAX_ROWS)
     
-    # Calculate time window
+    # Calculate time window: enough for the requested bars (plus the forming one), at most 60 days
     end_time = datetime.utcnow()
-    # Add extra time to ensure we get enough bars
-    start_time = end_time - timedelta(days=60)
+    interval_ms = CANDLE_INTERVAL_MS.get(timeframe)
+    window = timedelta(days=60)
+    if interval_ms:
+        window = min(window, timedelta(milliseconds=interval_ms * (bars + 1)))
+    start_time = end_time - window
 
-    data = _get_ohlcv(identifier, timeframe, start_time, end_time, batch_size=bars)
+    data = _get_ohlcv(identifier, timeframe, start_time, end_time)
     
-    if not data:
+    if data is None or data.empty:
         warning("No data available.")
         return pd.DataFrame()
 
@@ -234,24 +326,12 @@ def get_data(address=None, symbol=None, timeframe="1h", bars=100, add_indicators
     return df
 
 def get_market_info():
-    """Get current market info for all coins on Hyperliquid"""
+    """Get current mid prices for all coins on Hyperliquid (from the streaming price book)"""
     try:
-        debug("Sending request to Hyperliquid API...")
-        response = requests.post(
-            BASE_URL,
-            headers={'Content-Type': 'application/json'},
-            json={"type": "allMids"}
-        )
-        
-        debug(f"Response status code: {response.status_code}")
-        
-        if response.status_code == 200:
-            data = response.json()
-            debug(f"Raw response data: {data}", file_only=True)
-            return data
-        error(f"Bad status code: {response.status_code}")
-        error(f"Response text: {response.text}")
-        return None
+        data = get_price_book().snapshot()
+        if data is None:
+            error("No fresh Hyperliquid mids available")
+        return data
     except Exception as e:
         error(f"Error getting market info: {str(e)}")
         traceback.print_exc()  # Print full error traceback
@@ -462,12 +542,6 @@ def calculate_liquidation_price(symbol, position_size, entry_price, leverage, is
         float: Liquidation price
     """
     try:
-        # Get funding rate as it affects liquidation price
-        funding_data = get_funding_rates(symbol)
-        funding_rate = 0
-        if funding_data:
-            funding_rate = funding_data.get('funding_rate', 0)
-        
         # Calculate maintenance margin (typical 0.5-1% for crypto)
         maintenance_margin = 0.005  # 0.5%
         
@@ -683,20 +757,8 @@ def get_current_price(symbol: str):
         float: Current price or None
     """
     try:
-        # Try to get from Hyperliquid API
-        response = requests.post(BASE_URL, json={
-            "type": "allMids"
-        })
-
-        if response.status_code == 200:
-            data = response.json()
-            # Find the symbol in the response
-            for coin, price in data.items():
-                if coin.replace('PERP', '') == symbol:
-                    return float(price)
-
-        # Fallback to local data
-        return None
+        # O(1) lookup in the streamed allMids book (REST snapshot if the stream is stale)
+        return get_price_book().get_price(symbol)
 
     except Exception as e:
         error(f"Failed to get price for {symbol}: {str(e)}")
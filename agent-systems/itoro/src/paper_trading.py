@@ -5,6 +5,8 @@ Paper Trading Module with Enhanced Trade Simulation
 import os
 import json
 import time
+import itertools
+import threading
 import pandas as pd
 from datetime import datetime
 import sqlite3
@@ -75,6 +77,22 @@ os.makedirs(data_dir, exist_ok=True)
 # SQLite database for paper trading
 DB_PATH = os.path.join(data_dir, 'paper_trading.db')
 
+USDC_ADDRESS = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+SOL_ADDRESS = "So11111111111111111111111111111111111111112"
+STAKED_SOL_ADDRESS = "STAKED_SOL_So11111111111111111111111111111111111111112"
+
+# Portfolio valuation snapshot shared by concurrent callers (dashboard refreshes, trade checks)
+PORTFOLIO_VALUE_TTL_SEC = 2.0
+_valuation_lock = threading.Lock()
+_valuation_snapshot = None  # (computed_at monotonic, portfolio generation, value)
+_generation_counter = itertools.count(1)
+_portfolio_generation = 0  # bumped whenever a paper trade or reset changes the portfolio
+
+def _get_shared_db():
+    """Shared per-thread WAL connection manager for the paper trading database"""
+    from src.scripts.database.sqlite_manager import get_sqlite_manager
+    return get_sqlite_manager(DB_PATH)
+
 def get_paper_trading_db():
     """Get paper trading database connection with Windows-safe settings"""
     conn = sqlite3.connect(DB_PATH, timeout=10, check_same_thread=False)
@@ -172,7 +190,9 @@ def reset_paper_trading():
     """Reset paper trading to initial state using database reset manager"""
     try:
         from src.scripts.database.database_reset_manager import reset_paper_trading_database
-        return reset_paper_trading_database()
+        result = reset_paper_trading_database()
+        _invalidate_portfolio_value()
+        return result
     except Exception as e:
         error(f"Error resetting paper trading: {str(e)}")
         return False
@@ -180,7 +200,7 @@ def reset_paper_trading():
 def _is_database_empty():
     """Check if the paper trading database is empty"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _get_shared_db().read() as conn:
             cursor = conn.execute("SELECT COUNT(*) FROM paper_portfolio")
             count = cursor.fetchone()[0]
             return count == 0
@@ -190,7 +210,7 @@ def _is_database_empty():
 def _set_initial_balances():
     """Set initial balances in the paper trading database - START WITH 100% SOL"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _get_shared_db().transaction() as conn:
             # NEW: ensure idempotency
             conn.execute("DELETE FROM paper_portfolio")
 
@@ -240,13 +260,14 @@ def _set_initial_balances():
                         0.0,
                         datetime.now().isoformat()
                     ))
+        _invalidate_portfolio_value()
     except Exception as e:
         error(f"Error resetting paper trading: {e}")
 
 def get_paper_portfolio():
     """Get current paper trading portfolio"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _get_shared_db().read() as conn:
             df = pd.read_sql_query("SELECT * FROM paper_portfolio", conn)
             return df
     except Exception as e:
@@ -256,7 +277,7 @@ def get_paper_portfolio():
 def get_paper_trades(limit=5):
     """Get recent paper trades"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with _get_shared_db().read() as conn:
             df = pd.read_sql_query(
                 "SELECT * FROM paper_trades ORDER BY timestamp DESC LIMIT ?",
                 conn,
@@ -267,60 +288,78 @@ def get_paper_trades(limit=5):
         error(f"Error getting paper trades: {e}")
         return pd.DataFrame()
 
-def get_portfolio_value():
-    """Calculate total portfolio value in USD for paper trading"""
-    try:
-        portfolio_df = get_paper_portfolio()
-        if portfolio_df.empty:
-            return 0.0
-        
-        total_value = 0.0
-        price_service = get_optimized_price_service()
-        
-        # Track price updates to persist back to database
-        price_updates = []
+def _invalidate_portfolio_value():
+    """Drop the shared valuation snapshot after the portfolio changes"""
+    global _portfolio_generation
+    _portfolio_generation = next(_generation_counter)
+
+def _compute_portfolio_value() -> float:
+    """Value every position with one batched price lookup"""
+    portfolio_df = get_paper_portfolio()
+    if portfolio_df.empty:
+        return 0.0
+    
+    amounts = pd.to_numeric(portfolio_df['amount'], errors='coerce').fillna(0.0)
+    held = portfolio_df[amounts > 0]
+    amounts = amounts[amounts > 0]
+    
+    # USDC is always $1
+    is_usdc = held['token_address'] == USDC_ADDRESS
+    total_value = float(amounts[is_usdc].sum())
+    
+    priced = held[~is_usdc]
+    if priced.empty:
+        return total_value
+    
+    addresses = priced['token_address'].tolist()
+    prices = get_optimized_price_service().get_prices(list(dict.fromkeys(addresses)))
+    
+    live = pd.to_numeric(priced['token_address'].map(prices), errors='coerce')
+    live = live.where(live > 0)
+    # Fallback to last known price if current price unavailable
+    last = pd.to_numeric(priced['last_price'], errors='coerce')
+    unit_price = live.fillna(last.where(last > 0)).fillna(0.0)
+    total_value += float((amounts[~is_usdc] * unit_price).sum())
+    
+    # Persist fresh prices back to the database
+    fresh = live.notna()
+    if fresh.any():
         timestamp = int(time.time())
+        price_updates = [
+            (float(price), timestamp, token_address)
+            for price, token_address in zip(live[fresh], priced['token_address'][fresh])
+        ]
+        try:
+            with _get_shared_db().transaction() as conn:
+                conn.executemany(
+                    "UPDATE paper_portfolio SET last_price = ?, last_update = ? WHERE token_address = ?",
+                    price_updates
+                )
+        except Exception as e:
+            debug(f"Failed to update prices in database: {e}")
+    
+    return total_value
+
+def get_portfolio_value(max_age: float = PORTFOLIO_VALUE_TTL_SEC):
+    """Calculate total portfolio value in USD for paper trading
+    
+    Callers within max_age seconds of the last valuation (and with no paper
+    trade since) share it; concurrent callers wait for one computation.
+    """
+    global _valuation_snapshot
+    try:
+        snapshot = _valuation_snapshot
+        if snapshot and snapshot[1] == _portfolio_generation and time.monotonic() - snapshot[0] <= max_age:
+            return snapshot[2]
         
-        for _, row in portfolio_df.iterrows():
-            token_address = row['token_address']
-            amount = row['amount']
-            
-            if amount <= 0:
-                continue
-            
-            # USDC is always $1
-            if token_address == "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v":
-                current_price = None  # No fallback price
-                total_value += amount
-                continue
-            
-            # Get current price for all other tokens
-            current_price = price_service.get_price(token_address)
-            
-            if current_price and isinstance(current_price, (int, float)) and current_price > 0:
-                token_value = amount * current_price
-                total_value += token_value
-                # Queue price update for database
-                price_updates.append((current_price, timestamp, token_address))
-            else:
-                # Fallback to last known price if current price unavailable
-                last_price = row['last_price']
-                if last_price and last_price > 0:
-                    token_value = amount * last_price
-                    total_value += token_value
-        
-        # Update database with fresh prices
-        if price_updates:
-            try:
-                with sqlite3.connect(DB_PATH) as conn:
-                    conn.executemany(
-                        "UPDATE paper_portfolio SET last_price = ?, last_update = ? WHERE token_address = ?",
-                        price_updates
-                    )
-            except Exception as e:
-                debug(f"Failed to update prices in database: {e}")
-        
-        return total_value
+        with _valuation_lock:
+            snapshot = _valuation_snapshot
+            if snapshot and snapshot[1] == _portfolio_generation and time.monotonic() - snapshot[0] <= max_age:
+                return snapshot[2]
+            generation = _portfolio_generation
+            total_value = _compute_portfolio_value()
+            _valuation_snapshot = (time.monotonic(), generation, total_value)
+            return total_value
         
     except Exception as e:
         error(f"Error calculating paper portfolio value: {e}")
@@ -430,6 +469,49 @@ async def execute_paper_trade_with_delay(
         error(f"Error in delayed paper trade execution: {e}")
         return False, f"Execution error: {str(e)}"
 
+def _get_conversion_sol_price():
+    """SOL price used to convert SOL to USDC for a BUY (None if the lookup failed)"""
+    try:
+        # Try multiple import paths for price service
+        try:
+            from src.scripts.shared_services.optimized_price_service import get_optimized_price_service
+            price_service = get_optimized_price_service()
+        except ImportError:
+            # Fallback: use a reasonable SOL price
+            return 200.0
+        return price_service.get_price(SOL_ADDRESS) or 200.0
+    except Exception as e:
+        error(f"Error converting SOL to USDC: {e}")
+        return None
+
+def _record_entry_price(token_address: str, price: float, amount: float):
+    """Set entry price for unrealized gains calculation"""
+    try:
+        from src.scripts.database.entry_price_tracker import EntryPriceTracker
+        # Force local database usage to avoid cloud connection issues
+        import src.scripts.database.entry_price_tracker as ept
+        original_cloud_available = ept.CLOUD_DB_AVAILABLE
+        ept.CLOUD_DB_AVAILABLE = False
+        
+        entry_tracker = EntryPriceTracker()
+        success = entry_tracker.set_entry_price(
+            mint=token_address,
+            entry_price_usd=price,
+            entry_amount=amount,
+            source="paper_trading_buy",
+            notes=f"Paper trading BUY at ${price:.6f}"
+        )
+        
+        # Restore original setting
+        ept.CLOUD_DB_AVAILABLE = original_cloud_available
+        
+        if success:
+            debug(f"✅ Entry price set for {token_address[:8]}...: ${price:.6f}")
+        else:
+            warning(f"⚠️ Failed to set entry price for {token_address[:8]}...")
+    except Exception as e:
+        warning(f"⚠️ Failed to set entry price for {token_address[:8]}...: {e}")
+
 def execute_paper_trade(token_address: str, action: str, amount: float, price: float, agent: str = "unknown", token_symbol: str = None, token_name: str = None):
     """Execute a paper trade with optional metadata"""
     try:
@@ -464,7 +546,7 @@ def execute_paper_trade(token_address: str, action: str, amount: float, price: f
         
         # SECURITY: Check for excluded tokens (unless agent is harvesting/risk for rebalancing)
         try:
-            from src.config import EXCLUDED_TOKENS, REBALANCING_ALLOWED_TOKENS, SOL_ADDRESS, USDC_ADDRESS
+            from src.config import EXCLUDED_TOKENS, REBALANCING_ALLOWED_TOKENS
             
             if token_address in EXCLUDED_TOKENS:
                 # Allow harvesting and copybot agents to trade excluded tokens for rebalancing
@@ -561,88 +643,67 @@ def execute_paper_trade(token_address: str, action: str, amount: float, price: f
         except Exception as e:
             warning(f"⚠️ Failed to save paper trading transaction to cloud database: {e}")
         
-        with sqlite3.connect(DB_PATH) as conn:
-            # Record the trade with metadata
-            conn.execute(
-                "INSERT INTO paper_trades (timestamp, token_address, action, amount, price, usd_value, agent, token_symbol, token_name) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                (timestamp, token_address, action, amount, price, usd_value, agent, token_symbol, token_name)
+        action_upper = action.upper()
+        
+        # A BUY short on USDC converts SOL; look its price up before taking the write lock
+        sol_price = None
+        if action_upper in ["BUY", "LONG"]:
+            usdc_row = _get_shared_db().fetchone(
+                "SELECT amount FROM paper_portfolio WHERE token_address = ?", (USDC_ADDRESS,)
             )
+            if (usdc_row[0] if usdc_row else 0.0) < usd_value:
+                sol_price = _get_conversion_sol_price()
+        
+        # Every row this trade writes, applied together once it has been validated
+        trade_rows = [(timestamp, token_address, action, amount, price, usd_value, agent, token_symbol, token_name)]
+        writes = []
+        conversion = None
+        
+        with _get_shared_db().transaction() as conn:
+            balances = dict(conn.execute(
+                "SELECT token_address, amount FROM paper_portfolio WHERE token_address IN (?, ?, ?, ?)",
+                (token_address, USDC_ADDRESS, SOL_ADDRESS, STAKED_SOL_ADDRESS)
+            ).fetchall())
             
             # Update portfolio
-            if action.upper() in ["BUY", "LONG"]:
+            if action_upper in ["BUY", "LONG"]:
                 # Check if we have enough USDC
-                usdc_row = conn.execute(
-                    "SELECT amount FROM paper_portfolio WHERE token_address = ?",
-                    ("EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",)
-                ).fetchone()
-                
-                current_usdc = usdc_row[0] if usdc_row else 0.0
+                current_usdc = balances.get(USDC_ADDRESS, 0.0)
                 
                 # If not enough USDC, try to convert SOL to USDC
                 if current_usdc < usd_value:
-                    sol_row = conn.execute(
-                        "SELECT amount FROM paper_portfolio WHERE token_address = ?",
-                        ("So11111111111111111111111111111111111111112",)
-                    ).fetchone()
+                    current_sol = balances.get(SOL_ADDRESS, 0.0)
                     
-                    current_sol = sol_row[0] if sol_row else 0.0
-                    
-                    if current_sol > 0:
-                        # Get SOL price to calculate how much SOL we need to sell
-                        try:
-                            # Try multiple import paths for price service
-                            try:
-                                from src.scripts.shared_services.optimized_price_service import get_optimized_price_service
-                                price_service = get_optimized_price_service()
-                                sol_price = price_service.get_price("So11111111111111111111111111111111111111112")
-                                if not sol_price:
-                                    sol_price = 200.0
-                            except ImportError:
-                                # Fallback: use a reasonable SOL price
-                                sol_price = 200.0
-                                price_service = None
-                            
-                            if price_service:
-                                sol_price = price_service.get_price("So11111111111111111111111111111111111111112") or 200.0
-                            else:
-                                sol_price = 200.0
-                            sol_needed = (usd_value - current_usdc) / sol_price
-                            
-                            if sol_needed <= current_sol:
-                                # Convert SOL to USDC
-                                conn.execute(
-                                    "UPDATE paper_portfolio SET amount = amount - ? WHERE token_address = ?",
-                                    (sol_needed, "So11111111111111111111111111111111111111112")
-                                )
-                                conn.execute(
-                                    "UPDATE paper_portfolio SET amount = amount + ? WHERE token_address = ?",
-                                    (usd_value - current_usdc, "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v")
-                                )
-                                
-                                # Record the SOL->USDC conversion trade
-                                conn.execute(
-                                    "INSERT INTO paper_trades (timestamp, token_address, action, amount, price, usd_value, agent) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                                    (timestamp, "So11111111111111111111111111111111111111112", "SELL", sol_needed, sol_price, usd_value - current_usdc, "conversion")
-                                )
-                                info(f"🔄 Converted {sol_needed:.4f} SOL to ${usd_value - current_usdc:.2f} USDC for trade")
-                            else:
-                                error(f"Insufficient SOL for conversion: need {sol_needed:.4f} SOL, have {current_sol:.4f} SOL")
-                                return False
-                        except Exception as e:
-                            error(f"Error converting SOL to USDC: {e}")
-                            return False
-                    else:
+                    if current_sol <= 0:
                         error(f"Insufficient USDC for trade: ${usd_value:.2f} (no SOL available for conversion)")
                         return False
+                    
+                    if sol_price is None:
+                        # USDC was spent by another trade since the pre-check
+                        sol_price = _get_conversion_sol_price()
+                    if sol_price is None:
+                        return False
+                    sol_needed = (usd_value - current_usdc) / sol_price
+                    
+                    if sol_needed > current_sol:
+                        error(f"Insufficient SOL for conversion: need {sol_needed:.4f} SOL, have {current_sol:.4f} SOL")
+                        return False
+                    
+                    # Convert SOL to USDC and record the conversion trade
+                    writes.append(("UPDATE paper_portfolio SET amount = amount - ? WHERE token_address = ?",
+                                   (sol_needed, SOL_ADDRESS)))
+                    writes.append(("UPDATE paper_portfolio SET amount = amount + ? WHERE token_address = ?",
+                                   (usd_value - current_usdc, USDC_ADDRESS)))
+                    trade_rows.append((timestamp, SOL_ADDRESS, "SELL", sol_needed, sol_price,
+                                       usd_value - current_usdc, "conversion", None, None))
+                    conversion = (sol_needed, usd_value - current_usdc)
                 
                 # Deduct USDC
-                conn.execute(
-                    "UPDATE paper_portfolio SET amount = amount - ? WHERE token_address = ?",
-                    (usd_value, "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v")
-                )
+                writes.append(("UPDATE paper_portfolio SET amount = amount - ? WHERE token_address = ?",
+                               (usd_value, USDC_ADDRESS)))
                 
                 # Add bought token with metadata
-                conn.execute(
+                writes.append((
                     """
                     INSERT INTO paper_portfolio (token_address, amount, last_price, last_update, token_symbol, token_name, normalized_symbol)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
@@ -654,51 +715,20 @@ def execute_paper_trade(token_address: str, action: str, amount: float, price: f
                         token_name = ?
                     """,
                     (token_address, amount, price, timestamp, token_symbol, token_name, normalized_symbol, amount, price, timestamp, token_symbol, token_name)
-                )
+                ))
                 
-                # CRITICAL FIX: Set entry price for unrealized gains calculation
-                try:
-                    from src.scripts.database.entry_price_tracker import EntryPriceTracker
-                    # Force local database usage to avoid cloud connection issues
-                    import src.scripts.database.entry_price_tracker as ept
-                    original_cloud_available = ept.CLOUD_DB_AVAILABLE
-                    ept.CLOUD_DB_AVAILABLE = False
-                    
-                    entry_tracker = EntryPriceTracker()
-                    success = entry_tracker.set_entry_price(
-                        mint=token_address,
-                        entry_price_usd=price,
-                        entry_amount=amount,
-                        source="paper_trading_buy",
-                        notes=f"Paper trading BUY at ${price:.6f}"
-                    )
-                    
-                    # Restore original setting
-                    ept.CLOUD_DB_AVAILABLE = original_cloud_available
-                    
-                    if success:
-                        debug(f"✅ Entry price set for {token_address[:8]}...: ${price:.6f}")
-                    else:
-                        warning(f"⚠️ Failed to set entry price for {token_address[:8]}...")
-                except Exception as e:
-                    warning(f"⚠️ Failed to set entry price for {token_address[:8]}...: {e}")
-                
-                debug(f"Paper trade executed: BUY {amount:.4f} {token_address[:8]} @ ${price:.4f} (${usd_value:.2f})")
-                return True
-                
-            elif action.upper() in ["SELL", "SHORT", "CLOSE"]:
+            elif action_upper in ["SELL", "SHORT", "CLOSE", "PARTIAL_CLOSE"]:
                 # Check if we have enough tokens
-                token_row = conn.execute(
-                    "SELECT amount FROM paper_portfolio WHERE token_address = ?",
-                    (token_address,)
-                ).fetchone()
-                
-                if not token_row or token_row[0] < amount:
-                    error(f"Insufficient tokens for trade: {amount}")
+                current_amount = balances.get(token_address)
+                if current_amount is None or current_amount < amount:
+                    if action_upper == "PARTIAL_CLOSE":
+                        error(f"Insufficient tokens for partial close: {amount}")
+                    else:
+                        error(f"Insufficient tokens for trade: {amount}")
                     return False
                 
                 # Add USDC (create entry if it doesn't exist)
-                conn.execute(
+                writes.append((
                     """
                     INSERT INTO paper_portfolio (token_address, amount, last_price, last_update)
                     VALUES (?, ?, ?, ?)
@@ -707,48 +737,29 @@ def execute_paper_trade(token_address: str, action: str, amount: float, price: f
                         last_price = ?,
                         last_update = ?
                     """,
-                    ("EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v", usd_value, 1.0, timestamp, usd_value, 1.0, timestamp)
-                )
+                    (USDC_ADDRESS, usd_value, 1.0, timestamp, usd_value, 1.0, timestamp)
+                ))
                 
                 # Remove sold tokens
-                conn.execute(
-                    "UPDATE paper_portfolio SET amount = amount - ? WHERE token_address = ?",
-                    (amount, token_address)
-                )
-                
-                # Remove token if balance is 0
-                conn.execute(
-                    "DELETE FROM paper_portfolio WHERE token_address = ? AND amount <= 0",
-                    (token_address,)
-                )
-                
-                # Record closed trade for wins/losses tracking
-                # SKIP RECORDING FOR HARVESTING AGENT (it's rebalancing, not trading)
-                if agent != "harvesting":
-                    try:
-                        from src.scripts.trading.portfolio_tracker import get_portfolio_tracker
-                        tracker = get_portfolio_tracker()
-                        if tracker:
-                            tracker.record_closed_trade(token_address, price, amount, token_symbol)
-                    except Exception as e:
-                        debug(f"Could not record closed trade: {e}")
+                writes.append(("UPDATE paper_portfolio SET amount = amount - ? WHERE token_address = ?",
+                               (amount, token_address)))
                 
-                debug(f"Paper trade executed: SELL {amount:.4f} {token_address[:8]} @ ${price:.4f} (${usd_value:.2f})")
-                return True
+                # Remove token if balance is 0 (a partial close keeps the row)
+                if action_upper != "PARTIAL_CLOSE":
+                    writes.append(("DELETE FROM paper_portfolio WHERE token_address = ? AND amount <= 0",
+                                   (token_address,)))
                 
-            elif action.upper() == "PARTIAL_CLOSE":
-                # Check if we have enough tokens
-                token_row = conn.execute(
-                    "SELECT amount FROM paper_portfolio WHERE token_address = ?",
-                    (token_address,)
-                ).fetchone()
-                
-                if not token_row or token_row[0] < amount:
-                    error(f"Insufficient tokens for partial close: {amount}")
+            elif action_upper == "STAKE":
+                # Check if we have enough SOL to stake
+                current_sol = balances.get(SOL_ADDRESS, 0.0)
+                if current_sol < amount:
+                    error(f"Insufficient SOL for staking: {amount} (have {current_sol})")
                     return False
                 
-                # Add USDC (create entry if it doesn't exist)
-                conn.execute(
+                # Move SOL from regular balance to staked balance (a special token address for staked SOL)
+                writes.append(("UPDATE paper_portfolio SET amount = amount - ? WHERE token_address = ?",
+                               (amount, SOL_ADDRESS)))
+                writes.append((
                     """
                     INSERT INTO paper_portfolio (token_address, amount, last_price, last_update)
                     VALUES (?, ?, ?, ?)
@@ -757,113 +768,74 @@ def execute_paper_trade(token_address: str, action: str, amount: float, price: f
                         last_price = ?,
                         last_update = ?
                     """,
-                    ("EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v", usd_value, 1.0, timestamp, usd_value, 1.0, timestamp)
-                )
-                
-                # Remove sold tokens
-                conn.execute(
-                    "UPDATE paper_portfolio SET amount = amount - ? WHERE token_address = ?",
-                    (amount, token_address)
-                )
+                    (STAKED_SOL_ADDRESS, amount, price, timestamp, amount, price, timestamp)
+                ))
                 
-                # Record closed trade for wins/losses tracking
-                # SKIP RECORDING FOR HARVESTING AGENT (it's rebalancing, not trading)
-                if agent != "harvesting":
-                    try:
-                        from src.scripts.trading.portfolio_tracker import get_portfolio_tracker
-                        tracker = get_portfolio_tracker()
-                        if tracker:
-                            tracker.record_closed_trade(token_address, price, amount, token_symbol)
-                    except Exception as e:
-                        debug(f"Could not record closed trade: {e}")
+            elif action_upper == "UNSTAKE":
+                # Check if we have enough staked SOL to unstake
+                current_staked = balances.get(STAKED_SOL_ADDRESS, 0.0)
+                if current_staked < amount:
+                    error(f"Insufficient staked SOL for unstaking: {amount} (have {current_staked})")
+                    return False
                 
-                debug(f"Paper trade executed: PARTIAL_CLOSE {amount:.4f} {token_address[:8]} @ ${price:.4f} (${usd_value:.2f})")
-                return True
+                # Move SOL from staked balance back to regular balance
+                writes.append(("UPDATE paper_portfolio SET amount = amount - ? WHERE token_address = ?",
+                               (amount, STAKED_SOL_ADDRESS)))
+                writes.append((
+                    """
+                    INSERT INTO paper_portfolio (token_address, amount, last_price, last_update)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(token_address) DO UPDATE SET
+                        amount = amount + ?,
+                        last_price = ?,
+                        last_update = ?
+                    """,
+                    (SOL_ADDRESS, amount, price, timestamp, amount, price, timestamp)
+                ))
                 
-            elif action.upper() in ["STAKE", "UNSTAKE"]:
-                # Handle staking/unstaking actions
-                if action.upper() == "STAKE":
-                    # Check if we have enough SOL to stake
-                    sol_row = conn.execute(
-                        "SELECT amount FROM paper_portfolio WHERE token_address = ?",
-                        ("So11111111111111111111111111111111111111112",)
-                    ).fetchone()
-                    
-                    current_sol = sol_row[0] if sol_row else 0.0
-                    
-                    if current_sol < amount:
-                        error(f"Insufficient SOL for staking: {amount} (have {current_sol})")
-                        return False
-                    
-                    # Move SOL from regular balance to staked balance
-                    conn.execute(
-                        "UPDATE paper_portfolio SET amount = amount - ? WHERE token_address = ?",
-                        (amount, "So11111111111111111111111111111111111111112")
-                    )
-                    
-                    # Add to staked SOL balance (using a special token address for staked SOL)
-                    staked_sol_address = "STAKED_SOL_So11111111111111111111111111111111111111112"
-                    conn.execute(
-                        """
-                        INSERT INTO paper_portfolio (token_address, amount, last_price, last_update)
-                        VALUES (?, ?, ?, ?)
-                        ON CONFLICT(token_address) DO UPDATE SET
-                            amount = amount + ?,
-                            last_price = ?,
-                            last_update = ?
-                        """,
-                        (staked_sol_address, amount, price, timestamp, amount, price, timestamp)
-                    )
-                    
-                    info(f"Paper staking executed: STAKE {amount:.4f} SOL @ ${price:.4f} (${usd_value:.2f})")
-                    return True
-                    
-                elif action.upper() == "UNSTAKE":
-                    # Check if we have enough staked SOL to unstake
-                    staked_sol_address = "STAKED_SOL_So11111111111111111111111111111111111111112"
-                    staked_row = conn.execute(
-                        "SELECT amount FROM paper_portfolio WHERE token_address = ?",
-                        (staked_sol_address,)
-                    ).fetchone()
-                    
-                    current_staked = staked_row[0] if staked_row else 0.0
-                    
-                    if current_staked < amount:
-                        error(f"Insufficient staked SOL for unstaking: {amount} (have {current_staked})")
-                        return False
-                    
-                    # Move SOL from staked balance back to regular balance
-                    conn.execute(
-                        "UPDATE paper_portfolio SET amount = amount - ? WHERE token_address = ?",
-                        (amount, staked_sol_address)
-                    )
-                    
-                    # Add back to regular SOL balance
-                    conn.execute(
-                        """
-                        INSERT INTO paper_portfolio (token_address, amount, last_price, last_update)
-                        VALUES (?, ?, ?, ?)
-                        ON CONFLICT(token_address) DO UPDATE SET
-                            amount = amount + ?,
-                            last_price = ?,
-                            last_update = ?
-                        """,
-                        ("So11111111111111111111111111111111111111112", amount, price, timestamp, amount, price, timestamp)
-                    )
-                    
-                    # Remove staked SOL entry if balance is 0
-                    conn.execute(
-                        "DELETE FROM paper_portfolio WHERE token_address = ? AND amount <= 0",
-                        (staked_sol_address,)
-                    )
-                    
-                    info(f"Paper unstaking executed: UNSTAKE {amount:.4f} SOL @ ${price:.4f} (${usd_value:.2f})")
-                    return True
+                # Remove staked SOL entry if balance is 0
+                writes.append(("DELETE FROM paper_portfolio WHERE token_address = ? AND amount <= 0",
+                               (STAKED_SOL_ADDRESS,)))
                 
             else:
                 error(f"Invalid trade action: {action}")
                 return False
             
+            # Record the trade(s) with metadata, then apply the portfolio changes
+            conn.executemany(
+                "INSERT INTO paper_trades (timestamp, token_address, action, amount, price, usd_value, agent, token_symbol, token_name) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                trade_rows
+            )
+            for sql, params in writes:
+                conn.execute(sql, params)
+        
+        _invalidate_portfolio_value()
+        
+        # Follow-up bookkeeping runs after the write lock is released
+        if action_upper in ["BUY", "LONG"]:
+            if conversion:
+                info(f"🔄 Converted {conversion[0]:.4f} SOL to ${conversion[1]:.2f} USDC for trade")
+            _record_entry_price(token_address, price, amount)
+            debug(f"Paper trade executed: BUY {amount:.4f} {token_address[:8]} @ ${price:.4f} (${usd_value:.2f})")
+        elif action_upper in ["SELL", "SHORT", "CLOSE", "PARTIAL_CLOSE"]:
+            # Record closed trade for wins/losses tracking
+            # SKIP RECORDING FOR HARVESTING AGENT (it's rebalancing, not trading)
+            if agent != "harvesting":
+                try:
+                    from src.scripts.trading.portfolio_tracker import get_portfolio_tracker
+                    tracker = get_portfolio_tracker()
+                    if tracker:
+                        tracker.record_closed_trade(token_address, price, amount, token_symbol)
+                except Exception as e:
+                    debug(f"Could not record closed trade: {e}")
+            label = "PARTIAL_CLOSE" if action_upper == "PARTIAL_CLOSE" else "SELL"
+            debug(f"Paper trade executed: {label} {amount:.4f} {token_address[:8]} @ ${price:.4f} (${usd_value:.2f})")
+        elif action_upper == "STAKE":
+            info(f"Paper staking executed: STAKE {amount:.4f} SOL @ ${price:.4f} (${usd_value:.2f})")
+        else:
+            info(f"Paper unstaking executed: UNSTAKE {amount:.4f} SOL @ ${price:.4f} (${usd_value:.2f})")
+        return True
+            
     except Exception as e:
         error(f"Error executing paper trade: {e}")
     return False
@@ -1126,3 +1098,97 @@ def print_portfolio_status(include_history=True):
 # Initialize database on import if enabled (but don't reset automatically)
 if PAPER_TRADING_ENABLED:
     init_paper_trading_db()
+
+def _benchmark(n_positions: int = 200, latency_ms: float = 2.0, callers: int = 8):
+    """Valuation time for n_positions: legacy per-token lookups vs one batched call, plus concurrent callers"""
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+    global DB_PATH, get_optimized_price_service, _valuation_snapshot
+
+    class SimulatedPriceService:
+        """Each request pays latency_ms, batched or not"""
+        def __init__(self):
+            self.requests = 0
+        def _price(self, token_address):
+            return 1.0 + (sum(map(ord, token_address)) % 1000) / 100.0
+        def get_price(self, token_address):
+            self.requests += 1
+            time.sleep(latency_ms / 1000)
+            return self._price(token_address)
+        def get_prices(self, token_addresses):
+            self.requests += 1
+            time.sleep(latency_ms / 1000)
+            return {address: self._price(address) for address in token_addresses}
+
+    def legacy_value(price_service):
+        total = 0.0
+        price_updates = []
+        for _, row in get_paper_portfolio().iterrows():
+            if row['amount'] <= 0:
+                continue
+            if row['token_address'] == USDC_ADDRESS:
+                total += row['amount']
+                continue
+            current_price = price_service.get_price(row['token_address'])
+            total += row['amount'] * current_price
+            price_updates.append((current_price, int(time.time()), row['token_address']))
+        with _get_shared_db().transaction() as conn:
+            conn.executemany("UPDATE paper_portfolio SET last_price = ?, last_update = ? WHERE token_address = ?",
+                             price_updates)
+        return total
+
+    def timed(fn, *args):
+        started = time.perf_counter()
+        result = fn(*args)
+        return (time.perf_counter() - started) * 1000, result
+
+    original = DB_PATH, globals().get('get_optimized_price_service')
+    DB_PATH = os.path.join(tempfile.mkdtemp(prefix='paper_bench_'), 'paper_trading.db')
+    init_paper_trading_db()
+    timestamp = int(time.time())
+    with _get_shared_db().transaction() as conn:
+        conn.execute("INSERT INTO paper_portfolio (token_address, amount, last_price, last_update) VALUES (?, ?, ?, ?)",
+                     (USDC_ADDRESS, 500.0, 1.0, timestamp))
+        conn.executemany(
+            "INSERT INTO paper_portfolio (token_address, amount, last_price, last_update) VALUES (?, ?, ?, ?)",
+            [(f"TOKEN{i:04d}", 10.0 + i, 1.0, timestamp) for i in range(n_positions - 1)]
+        )
+
+    try:
+        service = SimulatedPriceService()
+        get_optimized_price_service = lambda: service
+        legacy_ms, legacy_total = timed(legacy_value, service)
+        legacy_requests, service.requests = service.requests, 0
+
+        _invalidate_portfolio_value()
+        batched_ms, batched_total = timed(get_portfolio_value)
+        batched_requests, service.requests = service.requests, 0
+
+        _invalidate_portfolio_value()
+        with ThreadPoolExecutor(max_workers=callers) as pool:
+            concurrent_ms, values = timed(lambda: list(pool.map(lambda _: get_portfolio_value(), range(callers))))
+
+        print(f"[BENCHMARK] {n_positions} positions, {latency_ms:.1f} ms simulated price latency")
+        print(f"[BENCHMARK] legacy per-token valuation: {legacy_ms:,.1f} ms ({legacy_requests} price requests)")
+        print(f"[BENCHMARK] batched valuation: {batched_ms:,.1f} ms ({batched_requests} price request)"
+              f" | values match: {abs(legacy_total - batched_total) < 1e-6}")
+        print(f"[BENCHMARK] {callers} concurrent callers: {concurrent_ms:,.1f} ms "
+              f"({service.requests} price request, {len(set(values))} distinct value)")
+    finally:
+        DB_PATH, get_optimized_price_service = original
+        if get_optimized_price_service is None:
+            del get_optimized_price_service
+        _valuation_snapshot = None
+        _invalidate_portfolio_value()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Paper trading")
+    parser.add_argument('--benchmark', action='store_true', help='Compare per-token and batched portfolio valuation')
+    parser.add_argument('--positions', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=2.0)
+    args = parser.parse_args()
+    if args.benchmark:
+        _benchmark(args.positions, args.latency_ms)
@@ -0,0 +1,147 @@
+"""
+Candle Store
+Local columnar (Parquet) cache of OHLCV candles, one file per (source, coin, interval)
+Built with love by Anarcho Capital 🚀
+
+Fetchers merge freshly downloaded pages into the store and read back only
+the range they need, so repeated requests for the same history become local
+reads and only missing head/tail ranges go to the network. Small per-key
+metadata (e.g. how far back history was requested, when the tail was last
+refreshed) is kept in the Parquet schema next to the candles. The most
+recently used series are kept in memory (LRU) so hot series skip the read.
+"""
+
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+try:
+    from src.scripts.shared_services.logger import debug, info, warning, error
+except ImportError:
+    def debug(msg, file_only=False):
+        if not file_only:
+            print(f"DEBUG: {msg}")
+    def info(msg):
+        print(f"INFO: {msg}")
+    def warning(msg):
+        print(f"WARNING: {msg}")
+    def error(msg):
+        print(f"ERROR: {msg}")
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Get project root (go up to itoro directory)
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+DEFAULT_CANDLE_DIR = PROJECT_ROOT / "src" / "data" / "candles"
+
+METADATA_KEY = b'candle_store'
+MAX_MEMORY_SERIES = 256  # Series kept in the in-memory LRU front
+
+
+class CandleStore:
+    """Parquet candle cache keyed by (source, coin, interval)"""
+
+    def __init__(self, data_dir: Optional[Path] = None, time_column: str = 't',
+                 max_memory_series: int = MAX_MEMORY_SERIES):
+        self.data_dir = Path(data_dir) if data_dir is not None else DEFAULT_CANDLE_DIR
+        self.time_column = time_column
+        self.max_memory_series = max_memory_series
+        self._memory: "OrderedDict[Path, Tuple[tuple, pd.DataFrame, dict]]" = OrderedDict()
+        self._memory_guard = threading.Lock()
+        self._locks: Dict[Tuple[str, ...], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def path(self, source: str, coin: str, interval: str) -> Path:
+        safe = lambda part: re.sub(r'[^\w.-]', '_', str(part))
+        return self.data_dir / safe(source) / f"{safe(coin)}_{safe(interval)}.parquet"
+
+    def lock(self, source: str, coin: str, interval: str) -> threading.Lock:
+        """Per-key lock so concurrent refreshes of one series don't download it twice"""
+        key = (source, coin, interval)
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def load(self, source: str, coin: str, interval: str) -> Tuple[pd.DataFrame, dict]:
+        """Cached candles (sorted by time) and metadata; empty frame and {} if nothing stored"""
+        path = self.path(source, coin, interval)
+        try:
+            stat = path.stat()
+        except OSError:
+            return pd.DataFrame(), {}
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._memory_guard:
+            cached = self._memory.get(path)
+            if cached is not None and cached[0] == signature:
+                self._memory.move_to_end(path)
+                return cached[1], cached[2]
+
+        try:
+            if PYARROW_AVAILABLE:
+                table = pq.read_table(path)
+                schema_metadata = table.schema.metadata or {}
+                metadata = json.loads(schema_metadata.get(METADATA_KEY, b'{}'))
+                df = table.to_pandas()
+            else:
+                df, metadata = pd.read_parquet(path), {}
+        except Exception as e:
+            warning(f"Unreadable candle cache {path.name}, ignoring it: {e}")
+            return pd.DataFrame(), {}
+
+        self._remember(path, signature, df, metadata)
+        return df, metadata
+
+    def _remember(self, path: Path, signature: tuple, df: pd.DataFrame, metadata: dict) -> None:
+        with self._memory_guard:
+            self._memory[path] = (signature, df, metadata)
+            self._memory.move_to_end(path)
+            while len(self._memory) > self.max_memory_series:
+                self._memory.popitem(last=False)
+
+    def merge(self, source: str, coin: str, interval: str, candles: pd.DataFrame,
+              metadata: Optional[dict] = None) -> pd.DataFrame:
+        """Merge new candles into the stored series (new rows win on equal timestamps) and persist"""
+        existing, stored_metadata = self.load(source, coin, interval)
+        frames = [df for df in (existing, candles) if not df.empty]
+        if frames:
+            merged = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+            merged = (merged.drop_duplicates(self.time_column, keep='last')
+                      .sort_values(self.time_column, ignore_index=True))
+        else:
+            merged = existing
+        metadata = {**stored_metadata, **(metadata or {})}
+        self._write(self.path(source, coin, interval), merged, metadata)
+        return merged
+
+    def save(self, source: str, coin: str, interval: str, candles: pd.DataFrame, metadata: dict) -> None:
+        """Replace the stored series and its metadata (for callers that merge themselves)"""
+        self._write(self.path(source, coin, interval), candles, metadata)
+
+    def _write(self, path: Path, df: pd.DataFrame, metadata: dict) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        if PYARROW_AVAILABLE:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            table = table.replace_schema_metadata({
+                **(table.schema.metadata or {}),
+                METADATA_KEY: json.dumps(metadata).encode(),
+            })
+            pq.write_table(table, tmp_path, compression='snappy')
+        else:
+            df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+        stat = path.stat()
+        self._remember(path, (stat.st_mtime_ns, stat.st_size), df, metadata)
+        debug(f"💾 Candle cache {path.parent.name}/{path.name}: {len(df)} candles", file_only=True)
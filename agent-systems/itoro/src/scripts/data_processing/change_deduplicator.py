@@ -4,13 +4,14 @@ Prevents duplicate trade executions from false positive change detections
 Built with love by Anarcho Capital 🚀
 """
 
+import heapq
 import threading
 import time
 import hashlib
 import json
-from typing import Dict, List, Set, Optional, Any
+from typing import Dict, List, Set, Optional, Any, Tuple
 from datetime import datetime, timedelta
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from src.scripts.shared_services.logger import debug, info, warning, error
 
 @dataclass
@@ -24,29 +25,114 @@ class ChangeEvent:
     usd_change: Optional[float]
     timestamp: datetime
     fingerprint: str
+    source: str = 'webhook'
+    recorded_at: float = 0.0  # time.time() when recorded, used for window checks
+
+@dataclass
+class DedupWindow:
+    """Deduplication windows for one change source"""
+    min_time_between_same_changes: float  # Seconds an identical change is suppressed
+    dedup_window_seconds: float  # Seconds a similar change is suppressed
+
+# Webhooks can deliver the same event several times within seconds; polling
+# re-detects a change on every cycle until the snapshot catches up, so it needs
+# a wider window
+DEFAULT_SOURCE_WINDOWS = {
+    'webhook': DedupWindow(min_time_between_same_changes=60, dedup_window_seconds=300),
+    'polling': DedupWindow(min_time_between_same_changes=300, dedup_window_seconds=900),
+}
+PROCESSED_RETENTION_SECONDS = 3600  # Keep 1 hour of processed changes
 
 class ChangeDeduplicator:
     """
     Deduplicates change events to prevent false positive trading
     Maintains a sliding window of recent changes and filters duplicates
+
+    Recent changes are indexed by fingerprint (exact duplicates) and by
+    (wallet, token, change_type) (similar changes), and expire lazily from a
+    time-ordered heap on each call, so no sweeper thread is needed.
     """
     
-    def __init__(self):
+    def __init__(self, source_windows: Optional[Dict[str, DedupWindow]] = None):
         self.recent_changes: Dict[str, ChangeEvent] = {}  # fingerprint -> ChangeEvent
-        self.processed_changes: Set[str] = set()  # Set of processed fingerprints
+        self.processed_changes: Dict[str, float] = {}  # fingerprint -> processed time
         self.change_lock = threading.RLock()
+
+        # (wallet, token, change_type) -> {fingerprint: ChangeEvent}
+        self._changes_by_key: Dict[Tuple[str, str, str], Dict[str, ChangeEvent]] = {}
+        # (expires_at, sequence, kind, fingerprint, recorded_at)
+        self._expiry_heap: List[Tuple[float, int, str, str, float]] = []
+        self._sequence = 0
         
         # Configuration
-        self.dedup_window_minutes = 5  # Consider changes within 5 minutes as potential duplicates
-        self.cleanup_interval_seconds = 300  # Clean up old entries every 5 minutes
-        self.min_time_between_same_changes = 60  # Minimum seconds between identical changes
-        
-        # Start cleanup thread
-        self.cleanup_thread = threading.Thread(target=self._cleanup_worker, daemon=True)
-        self.cleanup_active = True
-        self.cleanup_thread.start()
+        self.source_windows: Dict[str, DedupWindow] = dict(DEFAULT_SOURCE_WINDOWS)
+        if source_windows:
+            self.source_windows.update(source_windows)
+        self.default_source = 'webhook'
+        self._update_retention()
+
+        # Hit-rate metrics per source
+        self.stats: Dict[str, Dict[str, int]] = {}
         
         info("Change Deduplicator initialized")
+
+    # Backwards-compatible views of the default (webhook) window
+    @property
+    def dedup_window_minutes(self) -> float:
+        return self.source_windows[self.default_source].dedup_window_seconds / 60
+
+    @property
+    def min_time_between_same_changes(self) -> float:
+        return self.source_windows[self.default_source].min_time_between_same_changes
+
+    def configure_source_window(self, source: str, min_time_between_same_changes: float,
+                                dedup_window_seconds: float):
+        """Set the deduplication windows for a change source (e.g. 'webhook', 'polling')"""
+        with self.change_lock:
+            self.source_windows[source] = DedupWindow(min_time_between_same_changes, dedup_window_seconds)
+            self._update_retention()
+
+    def _update_retention(self):
+        # Records must outlive the widest window of any source that may check them
+        self.retention_seconds = max(
+            max(window.min_time_between_same_changes, window.dedup_window_seconds)
+            for window in self.source_windows.values()
+        )
+
+    def _get_window(self, source: str) -> DedupWindow:
+        return self.source_windows.get(source) or self.source_windows[self.default_source]
+
+    def _push_expiry(self, expires_at: float, kind: str, fingerprint: str, recorded_at: float):
+        self._sequence += 1
+        heapq.heappush(self._expiry_heap, (expires_at, self._sequence, kind, fingerprint, recorded_at))
+
+    def _expire(self, now: float):
+        """Drop records whose retention has passed (caller holds the lock)"""
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            _, _, kind, fingerprint, recorded_at = heapq.heappop(heap)
+            if kind == 'change':
+                change = self.recent_changes.get(fingerprint)
+                # Skip stale heap entries for fingerprints that were re-recorded
+                if change is None or change.recorded_at != recorded_at:
+                    continue
+                del self.recent_changes[fingerprint]
+                key = (change.wallet_address, change.token_address, change.change_type)
+                bucket = self._changes_by_key.get(key)
+                if bucket is not None:
+                    bucket.pop(fingerprint, None)
+                    if not bucket:
+                        del self._changes_by_key[key]
+            elif self.processed_changes.get(fingerprint) == recorded_at:
+                del self.processed_changes[fingerprint]
+
+    def _record_stat(self, source: str, outcome: str):
+        source_stats = self.stats.get(source)
+        if source_stats is None:
+            source_stats = self.stats[source] = {'checks': 0, 'exact_hits': 0, 'similar_hits': 0}
+        source_stats['checks'] += 1
+        if outcome:
+            source_stats[outcome] += 1
     
     def create_change_fingerprint(self, wallet_address: str, token_address: str, 
                                 change_type: str, amount_change: float, 
@@ -65,16 +151,23 @@ class ChangeDeduplicator:
     
     def is_duplicate_change(self, wallet_address: str, token_address: str, 
                           change_type: str, amount_change: float, 
-                          percentage_change: float, usd_change: Optional[float] = None) -> bool:
+                          percentage_change: float, usd_change: Optional[float] = None,
+                          source: Optional[str] = None) -> bool:
         """
         Check if this change is a duplicate of a recent change
+
+        Args:
+            source: Where the change was detected ('webhook' or 'polling'),
+                selects the deduplication windows
         
         Returns:
             True if this is a duplicate that should be ignored
             False if this is a new/valid change
         """
         try:
+            source = source or self.default_source
             current_time = datetime.now()
+            now = time.time()
             
             # Create fingerprint for this change
             fingerprint = self.create_change_fingerprint(
@@ -82,31 +175,33 @@ class ChangeDeduplicator:
             )
             
             with self.change_lock:
+                self._expire(now)
+                window = self._get_window(source)
+
                 # Check if we've seen this exact change recently
-                if fingerprint in self.recent_changes:
-                    previous_change = self.recent_changes[fingerprint]
-                    time_diff = (current_time - previous_change.timestamp).total_seconds()
+                previous_change = self.recent_changes.get(fingerprint)
+                if previous_change is not None:
+                    time_diff = now - previous_change.recorded_at
                     
-                    if time_diff < self.min_time_between_same_changes:
+                    if time_diff < window.min_time_between_same_changes:
                         debug(f"Duplicate change detected for {token_address[:8]}... in {wallet_address[:8]}... "
                               f"(last seen {time_diff:.1f}s ago)", file_only=True)
+                        self._record_stat(source, 'exact_hits')
                         return True
                 
                 # Check for similar changes (different fingerprint but similar parameters)
-                for existing_fingerprint, existing_change in self.recent_changes.items():
-                    if (existing_change.wallet_address == wallet_address and 
-                        existing_change.token_address == token_address and
-                        existing_change.change_type == change_type):
-                        
-                        time_diff = (current_time - existing_change.timestamp).total_seconds()
-                        
-                        # If within dedup window, check similarity
-                        if time_diff < self.dedup_window_minutes * 60:
-                            # Check if changes are similar (within tolerance)
-                            if self._are_changes_similar(existing_change, amount_change, percentage_change, usd_change):
-                                debug(f"Similar change detected for {token_address[:8]}... in {wallet_address[:8]}... "
-                                      f"(similar change {time_diff:.1f}s ago)", file_only=True)
-                                return True
+                key = (wallet_address, token_address, change_type)
+                for existing_change in self._changes_by_key.get(key, {}).values():
+                    time_diff = now - existing_change.recorded_at
+                    
+                    # If within dedup window, check similarity
+                    if time_diff < window.dedup_window_seconds:
+                        # Check if changes are similar (within tolerance)
+                        if self._are_changes_similar(existing_change, amount_change, percentage_change, usd_change):
+                            debug(f"Similar change detected for {token_address[:8]}... in {wallet_address[:8]}... "
+                                  f"(similar change {time_diff:.1f}s ago)", file_only=True)
+                            self._record_stat(source, 'similar_hits')
+                            return True
                 
                 # Record this change
                 change_event = ChangeEvent(
@@ -117,10 +212,15 @@ class ChangeDeduplicator:
                     percentage_change=percentage_change,
                     usd_change=usd_change,
                     timestamp=current_time,
-                    fingerprint=fingerprint
+                    fingerprint=fingerprint,
+                    source=source,
+                    recorded_at=now
                 )
                 
                 self.recent_changes[fingerprint] = change_event
+                self._changes_by_key.setdefault(key, {})[fingerprint] = change_event
+                self._push_expiry(now + self.retention_seconds, 'change', fingerprint, now)
+                self._record_stat(source, None)
                 debug(f"Recorded new change: {token_address[:8]}... in {wallet_address[:8]}... "
                       f"({change_type}, {percentage_change:.2f}%)", file_only=True)
                 
@@ -169,8 +269,11 @@ class ChangeDeduplicator:
             wallet_address, token_address, change_type, amount_change, percentage_change
         )
         
+        now = time.time()
         with self.change_lock:
-            self.processed_changes.add(fingerprint)
+            self._expire(now)
+            self.processed_changes[fingerprint] = now
+            self._push_expiry(now + PROCESSED_RETENTION_SECONDS, 'processed', fingerprint, now)
     
     def is_change_processed(self, wallet_address: str, token_address: str, 
                           change_type: str, amount_change: float, percentage_change: float) -> bool:
@@ -180,54 +283,37 @@ class ChangeDeduplicator:
         )
         
         with self.change_lock:
+            self._expire(time.time())
             return fingerprint in self.processed_changes
     
-    def _cleanup_worker(self):
-        """Background worker to clean up old change records"""
-        while self.cleanup_active:
-            try:
-                current_time = datetime.now()
-                cutoff_time = current_time - timedelta(minutes=self.dedup_window_minutes * 2)  # Keep 2x window for safety
-                
-                with self.change_lock:
-                    # Clean up old changes
-                    old_fingerprints = [
-                        fp for fp, change in self.recent_changes.items()
-                        if change.timestamp < cutoff_time
-                    ]
-                    
-                    for fp in old_fingerprints:
-                        del self.recent_changes[fp]
-                    
-                    # Clean up old processed changes (keep more history for these)
-                    processed_cutoff = current_time - timedelta(hours=1)  # Keep 1 hour of processed changes
-                    # Note: We can't easily clean processed_changes since they don't have timestamps
-                    # This is acceptable as the set won't grow too large in practice
-                    
-                    if old_fingerprints:
-                        debug(f"Cleaned up {len(old_fingerprints)} old change records", file_only=True)
-                
-                time.sleep(self.cleanup_interval_seconds)
-                
-            except Exception as e:
-                error(f"Error in change deduplicator cleanup: {str(e)}")
-                time.sleep(60)  # Wait longer on error
-    
     def get_recent_changes_summary(self) -> Dict[str, Any]:
         """Get summary of recent changes for monitoring"""
         with self.change_lock:
+            self._expire(time.time())
             return {
                 'recent_changes_count': len(self.recent_changes),
                 'processed_changes_count': len(self.processed_changes),
                 'oldest_change': min(change.timestamp for change in self.recent_changes.values()).isoformat() if self.recent_changes else None,
-                'newest_change': max(change.timestamp for change in self.recent_changes.values()).isoformat() if self.recent_changes else None
+                'newest_change': max(change.timestamp for change in self.recent_changes.values()).isoformat() if self.recent_changes else None,
+                'sources': self.get_hit_rate_stats()
             }
+
+    def get_hit_rate_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Duplicate hit rates per source"""
+        with self.change_lock:
+            result = {}
+            for source, source_stats in self.stats.items():
+                hits = source_stats['exact_hits'] + source_stats['similar_hits']
+                result[source] = {
+                    **source_stats,
+                    'hit_rate': hits / source_stats['checks'] if source_stats['checks'] else 0.0
+                }
+            return result
     
     def stop(self):
-        """Stop the deduplicator"""
-        self.cleanup_active = False
-        if self.cleanup_thread.is_alive():
-            self.cleanup_thread.join(timeout=5)
+        """Stop the deduplicator (expiry is lazy, there is no background thread)"""
+        with self.change_lock:
+            self._expire(time.time())
 
 # Global instance
 _change_deduplicator = None
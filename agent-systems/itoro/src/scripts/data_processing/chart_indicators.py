@@ -0,0 +1,390 @@
+"""
+Chart Indicators
+Incremental chart indicators per (symbol, timeframe) and a reusable chart renderer
+Built with love by Anarcho Capital 🚀
+
+ChartIndicatorCache computes the ChartAnalysisAgent indicators (20/50/100 EMA,
+200 SMA, MACD, RSI, ATR) over the full OHLCV frame once per (symbol, timeframe)
+and afterwards only feeds newly closed candles through the streaming
+indicators from ta_indicators. The still-forming candle is evaluated on a copy
+of the state, so it never leaks into the stored series. EMAs continue from the
+first bar seen instead of restarting at the start of each fetched window.
+
+ChartRenderer draws every chart onto one long-lived Agg figure instead of
+building (and tearing down) a new matplotlib figure per symbol.
+
+Benchmark:
+    python -m src.scripts.data_processing.chart_indicators --benchmark
+"""
+
+import copy
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.ta_indicators import SMA, RSI, PandasEWM
+
+try:
+    from src.scripts.shared_services.logger import debug, info, warning, error
+except ImportError:
+    def debug(msg, file_only=False):
+        if not file_only:
+            print(f"DEBUG: {msg}")
+    def info(msg):
+        print(f"INFO: {msg}")
+    def warning(msg):
+        print(f"WARNING: {msg}")
+    def error(msg):
+        print(f"ERROR: {msg}")
+
+try:
+    import matplotlib
+    matplotlib.use('Agg')
+    import mplfinance as mpf
+    MPLFINANCE_AVAILABLE = True
+except ImportError:
+    MPLFINANCE_AVAILABLE = False
+
+INDICATOR_COLUMNS = ['20EMA', '50EMA', '100EMA', '200SMA', 'MACD', 'MACD_Signal', 'RSI', 'ATR']
+DEFAULT_HISTORY_BARS = 1000  # closed bars of indicator history kept per key
+
+
+def calculate_indicators(data: pd.DataFrame) -> pd.DataFrame:
+    """Full recompute of the chart indicators over an OHLCV frame (adds columns in place)"""
+    # Moving Averages
+    data['20EMA'] = data['close'].ewm(span=20, adjust=False).mean()
+    data['50EMA'] = data['close'].ewm(span=50, adjust=False).mean()
+    data['100EMA'] = data['close'].ewm(span=100, adjust=False).mean()
+    data['200SMA'] = data['close'].rolling(window=200).mean()
+
+    # MACD
+    exp1 = data['close'].ewm(span=12, adjust=False).mean()
+    exp2 = data['close'].ewm(span=26, adjust=False).mean()
+    data['MACD'] = exp1 - exp2
+    data['MACD_Signal'] = data['MACD'].ewm(span=9, adjust=False).mean()
+
+    # RSI
+    delta = data['close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    data['RSI'] = 100 - (100 / (1 + rs))
+
+    # ATR
+    high_low = data['high'] - data['low']
+    high_close = np.abs(data['high'] - data['close'].shift())
+    low_close = np.abs(data['low'] - data['close'].shift())
+    true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
+    data['ATR'] = true_range.rolling(window=14).mean()
+
+    return data
+
+
+def _timestamps(data: pd.DataFrame) -> pd.DatetimeIndex:
+    source = data['timestamp'] if 'timestamp' in data.columns else data.index
+    return pd.DatetimeIndex(pd.to_datetime(source))
+
+
+def _nan(value):
+    return np.nan if value is None else value
+
+
+# ============================================================================
+# INCREMENTAL INDICATORS
+# ============================================================================
+
+class _IndicatorState:
+    """Streaming indicators plus the indicator rows for the closed bars of one key"""
+
+    def __init__(self, history: int):
+        self.ema20, self.ema50, self.ema100 = PandasEWM(20), PandasEWM(50), PandasEWM(100)
+        self.ema12, self.ema26, self.signal = PandasEWM(12), PandasEWM(26), PandasEWM(9)
+        self.sma200 = SMA(200)
+        self.rsi = RSI(14)
+        self.atr = SMA(14)
+        self.prev_close = None
+        self.timestamps: deque = deque(maxlen=history)
+        self.rows: deque = deque(maxlen=history)
+
+    @property
+    def last_timestamp(self):
+        return self.timestamps[-1] if self.timestamps else None
+
+    def step(self, high: float, low: float, close: float) -> Tuple[float, ...]:
+        if self.prev_close is None:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        macd = self.ema12.update(close) - self.ema26.update(close)
+        return (self.ema20.update(close), self.ema50.update(close), self.ema100.update(close),
+                _nan(self.sma200.update(close)), macd, self.signal.update(macd),
+                _nan(self.rsi.update(close)), _nan(self.atr.update(true_range)))
+
+    def warm_up(self, timestamps, highs, lows, closes):
+        """Seed from closed history: vectorized columns, streaming state taken from the tail"""
+        frame = calculate_indicators(pd.DataFrame({'high': highs, 'low': lows, 'close': closes}))
+        close_list = closes.tolist()
+        for ewm, column in ((self.ema20, '20EMA'), (self.ema50, '50EMA'), (self.ema100, '100EMA'),
+                            (self.signal, 'MACD_Signal')):
+            ewm.value = float(frame[column].iloc[-1])
+        self.ema12.value = float(frame['close'].ewm(span=12, adjust=False).mean().iloc[-1])
+        self.ema26.value = float(frame['close'].ewm(span=26, adjust=False).mean().iloc[-1])
+        self.sma200.warm_up(close_list)
+        self.rsi.warm_up(close_list)
+        prev_closes = np.concatenate(([np.nan], closes[:-1]))
+        true_ranges = np.fmax(highs - lows, np.fmax(np.abs(highs - prev_closes), np.abs(lows - prev_closes)))
+        self.atr.warm_up(true_ranges.tolist())
+        self.prev_close = close_list[-1]
+        self.timestamps.extend(timestamps)
+        self.rows.extend(map(tuple, frame[INDICATOR_COLUMNS].to_numpy().tolist()))
+
+    def append(self, timestamp, high: float, low: float, close: float):
+        self.timestamps.append(timestamp)
+        self.rows.append(self.step(high, low, close))
+
+    def peek(self, high: float, low: float, close: float) -> Tuple[float, ...]:
+        """Indicator values for a forming bar without committing it"""
+        return copy.deepcopy(self).step(high, low, close) if self.rows else (np.nan,) * len(INDICATOR_COLUMNS)
+
+    def __deepcopy__(self, memo):
+        # The stored rows aren't needed to evaluate one more bar
+        clone = object.__new__(_IndicatorState)
+        for name, value in self.__dict__.items():
+            if name in ('timestamps', 'rows'):
+                continue
+            setattr(clone, name, copy.deepcopy(value, memo) if name in ('sma200', 'rsi', 'atr') else copy.copy(value))
+        return clone
+
+
+class ChartIndicatorCache:
+    """Chart indicators per (symbol, timeframe), updated only for newly closed candles"""
+
+    def __init__(self, history: int = DEFAULT_HISTORY_BARS):
+        self.history = history
+        self._states: Dict[Tuple[str, str], _IndicatorState] = {}
+        self.stats = {'warm_ups': 0, 'incremental_bars': 0, 'unchanged': 0}
+
+    def last_closed(self, symbol: str, timeframe: str):
+        state = self._states.get((symbol, timeframe))
+        return state.last_timestamp if state else None
+
+    def reset(self, symbol: Optional[str] = None, timeframe: Optional[str] = None):
+        if symbol is None:
+            self._states.clear()
+        else:
+            self._states.pop((symbol, timeframe), None)
+
+    def update(self, symbol: str, timeframe: str, data: pd.DataFrame, interval_ms: Optional[int] = None,
+               now: Optional[pd.Timestamp] = None) -> Tuple[pd.DataFrame, Optional[pd.Timestamp]]:
+        """Return (data with indicator columns, timestamp of the last closed candle).
+
+        With interval_ms, rows whose candle hasn't closed by `now` (UTC) are
+        treated as forming; otherwise every row is closed.
+        """
+        data = data.copy()
+        if data.empty:
+            for column in INDICATOR_COLUMNS:
+                data[column] = pd.Series(dtype=float)
+            return data, self.last_closed(symbol, timeframe)
+
+        timestamps = _timestamps(data)
+        if interval_ms:
+            now = now if now is not None else pd.Timestamp.now(tz='UTC').tz_localize(None)
+            n_closed = int(((timestamps + pd.Timedelta(milliseconds=interval_ms)) <= now).sum())
+        else:
+            n_closed = len(data)
+        highs = data['high'].to_numpy(dtype=float)
+        lows = data['low'].to_numpy(dtype=float)
+        closes = data['close'].to_numpy(dtype=float)
+
+        key = (symbol, timeframe)
+        state = self._states.get(key)
+        if n_closed and not self._extend(state, timestamps[:n_closed], highs, lows, closes):
+            state = self._states[key] = _IndicatorState(self.history)
+            state.warm_up(list(timestamps[:n_closed]), highs[:n_closed], lows[:n_closed], closes[:n_closed])
+            self.stats['warm_ups'] += 1
+
+        rows = list(state.rows)[-n_closed:] if n_closed else []
+        for i in range(n_closed, len(data)):
+            rows.append(state.peek(highs[i], lows[i], closes[i]) if state else (np.nan,) * len(INDICATOR_COLUMNS))
+        values = np.array(rows, dtype=float).reshape(len(data), len(INDICATOR_COLUMNS))
+        for j, column in enumerate(INDICATOR_COLUMNS):
+            data[column] = values[:, j]
+        return data, (timestamps[n_closed - 1] if n_closed else self.last_closed(symbol, timeframe))
+
+    def _extend(self, state: Optional[_IndicatorState], closed: pd.DatetimeIndex, highs, lows, closes) -> bool:
+        """Feed closed candles newer than the state; False if the state can't be extended"""
+        if state is None or state.last_timestamp is None:
+            return False
+        position = closed.searchsorted(state.last_timestamp)
+        if position >= len(closed) or closed[position] != state.last_timestamp:
+            return False  # gap or rewind: the fetched window no longer overlaps what we have
+        if closes[position] != state.prev_close:
+            return False  # candle was revised
+        overlap = position + 1
+        if len(state.timestamps) < overlap or list(state.timestamps)[-overlap:] != list(closed[:overlap]):
+            return False  # fetched window has bars the state doesn't (e.g. a candle filled in late)
+        new = len(closed) - overlap
+        for i in range(position + 1, len(closed)):
+            state.append(closed[i], highs[i], lows[i], closes[i])
+        if new:
+            self.stats['incremental_bars'] += int(new)
+        else:
+            self.stats['unchanged'] += 1
+        return True
+
+
+# ============================================================================
+# RENDERING
+# ============================================================================
+
+class ChartRenderer:
+    """Candlestick charts drawn onto one reused Agg figure"""
+
+    def __init__(self, style: str = 'yahoo', volume: bool = True, macd: bool = True, rsi: bool = True,
+                 figsize: Tuple[float, float] = (12, 9)):
+        if not MPLFINANCE_AVAILABLE:
+            raise ImportError("mplfinance is required for chart rendering")
+        self.style = style
+        self.fig = mpf.figure(style=style, figsize=figsize)
+        panels = ['price'] + [name for name, enabled in (('volume', volume), ('macd', macd), ('rsi', rsi)) if enabled]
+        ratios = [3] + [1] * (len(panels) - 1)
+        grid = self.fig.add_gridspec(len(panels), 1, height_ratios=ratios, hspace=0.05)
+        self.axes = {}
+        for i, name in enumerate(panels):
+            self.axes[name] = self.fig.add_subplot(grid[i, 0], sharex=self.axes.get('price'))
+        self.renders = 0
+
+    @staticmethod
+    def _clear(ax):
+        # Drop the plotted artists but keep the axes and their tick objects: rebuilding
+        # ticks is most of what ax.clear() + redraw costs
+        for artist in [*ax.lines, *ax.collections, *ax.patches, *ax.texts]:
+            artist.remove()
+        ax.relim()
+
+    def render(self, df: pd.DataFrame, path, title: str, overlays: List[Tuple[pd.Series, dict]] = (),
+               macd: Optional[Tuple[pd.Series, pd.Series]] = None, rsi: Optional[pd.Series] = None) -> Path:
+        """Draw df (DatetimeIndex, OHLCV) with overlays on the price panel and save it to path"""
+        for ax in self.axes.values():
+            self._clear(ax)
+        price_ax = self.axes['price']
+        addplots = [mpf.make_addplot(series, ax=price_ax, **kwargs) for series, kwargs in overlays]
+        if macd is not None and 'macd' in self.axes:
+            addplots.append(mpf.make_addplot(macd[0], ax=self.axes['macd'], color='blue'))
+            addplots.append(mpf.make_addplot(macd[1], ax=self.axes['macd'], color='orange'))
+        if rsi is not None and 'rsi' in self.axes:
+            addplots.append(mpf.make_addplot(rsi, ax=self.axes['rsi'], color='purple', ylim=(0, 100)))
+        mpf.plot(df, type='candle', ax=price_ax, volume=self.axes.get('volume', False),
+                 addplot=addplots or None, warn_too_much_data=len(df) + 1)
+        for name, ax in self.axes.items():
+            if name != list(self.axes)[-1]:
+                ax.tick_params(labelbottom=False)
+        price_ax.set_title(title)
+        self.fig.savefig(path)
+        self.renders += 1
+        return Path(path)
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def _synthetic_candles(n_bars: int, seed: int, start='2025-01-01', freq='4h') -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+    opens = np.concatenate(([closes[0]], closes[:-1]))
+    spread = np.abs(rng.normal(0, 0.005, n_bars)) * closes
+    return pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=n_bars, freq=freq),
+        'open': opens, 'high': np.maximum(opens, closes) + spread, 'low': np.minimum(opens, closes) - spread,
+        'close': closes, 'volume': rng.uniform(1e3, 1e5, n_bars),
+    })
+
+
+def _benchmark(n_symbols: int = 20, bars: int = 120, out_dir: Optional[str] = None):
+    """Cycle time for n_symbols: legacy full recompute + new figure vs incremental cache + reused figure"""
+    import tempfile
+
+    out_dir = Path(out_dir or tempfile.mkdtemp(prefix='chart_bench_'))
+    interval_ms = 4 * 3_600_000
+    full = {f"SYM{i}": _synthetic_candles(bars + 2, seed=i) for i in range(n_symbols)}
+
+    def window(symbol, end):
+        frame = full[symbol].iloc[end - bars:end].reset_index(drop=True)
+        now = frame['timestamp'].iloc[-1] + pd.Timedelta(hours=1)  # last row still forming
+        return frame, now
+
+    def chart_frame(frame):
+        df = frame.set_index(pd.DatetimeIndex(frame['timestamp']))
+        overlays = [(df[col], {'color': color}) for col, color in
+                    (('20EMA', 'blue'), ('50EMA', 'orange'), ('100EMA', 'purple')) if not df[col].isna().all()]
+        return df, overlays
+
+    def legacy_cycle(end, render=True):
+        for symbol in full:
+            frame, _ = window(symbol, end)
+            frame = calculate_indicators(frame.copy())
+            if render and MPLFINANCE_AVAILABLE:
+                df, overlays = chart_frame(frame)
+                ap = [mpf.make_addplot(series, **kwargs) for series, kwargs in overlays]
+                ap.append(mpf.make_addplot(df['MACD'], panel=1, color='blue', secondary_y=False))
+                ap.append(mpf.make_addplot(df['MACD_Signal'], panel=1, color='orange', secondary_y=False))
+                ap.append(mpf.make_addplot(df['RSI'], panel=2, color='purple', ylim=(0, 100), secondary_y=False))
+                mpf.plot(df, type='candle', style='yahoo', volume=True, addplot=ap,
+                         title=f"\n{symbol} 4h Chart Analysis", savefig=out_dir / f"legacy_{symbol}.png")
+
+    cache = ChartIndicatorCache()
+    renderer = ChartRenderer() if MPLFINANCE_AVAILABLE else None
+    last_seen = {}
+
+    def new_cycle(end):
+        rendered = 0
+        for symbol in full:
+            frame, now = window(symbol, end)
+            frame, last_closed = cache.update(symbol, '4h', frame, interval_ms=interval_ms, now=now)
+            if last_seen.get(symbol) == last_closed:
+                continue
+            last_seen[symbol] = last_closed
+            if renderer:
+                df, overlays = chart_frame(frame)
+                renderer.render(df, out_dir / f"new_{symbol}.png", f"{symbol} 4h Chart Analysis", overlays,
+                                macd=(df['MACD'], df['MACD_Signal']), rsi=df['RSI'])
+            rendered += 1
+        return rendered
+
+    def timed(fn, *args):
+        started = time.perf_counter()
+        result = fn(*args)
+        return (time.perf_counter() - started) * 1000, result
+
+    end = bars
+    legacy_ms, _ = timed(legacy_cycle, end + 1)
+    legacy_calc_ms, _ = timed(legacy_cycle, end + 1, False)
+    cold_ms, _ = timed(new_cycle, end)
+    new_candle_ms, rendered = timed(new_cycle, end + 1)
+    unchanged_ms, skipped = timed(new_cycle, end + 1)
+
+    print(f"[BENCHMARK] {n_symbols} symbols x {bars} bars, charts {'on' if MPLFINANCE_AVAILABLE else 'off (no mplfinance)'}")
+    print(f"[BENCHMARK] legacy cycle (recompute + new figure): {legacy_ms:,.0f} ms "
+          f"(indicators only {legacy_calc_ms:,.1f} ms)")
+    print(f"[BENCHMARK] first cycle (warm-up + reused figure): {cold_ms:,.0f} ms")
+    print(f"[BENCHMARK] new candle closed (incremental + reused figure, {rendered} charts): {new_candle_ms:,.0f} ms")
+    print(f"[BENCHMARK] no new closed candle ({skipped} charts): {unchanged_ms:,.1f} ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Chart indicators")
+    parser.add_argument('--benchmark', action='store_true', help='Compare legacy and incremental chart cycles')
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--bars', type=int, default=120)
+    args = parser.parse_args()
+    if args.benchmark:
+        _benchmark(args.symbols, args.bars)
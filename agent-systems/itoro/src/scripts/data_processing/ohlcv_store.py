@@ -0,0 +1,326 @@
+"""
+OHLCV Store
+Birdeye OHLCV series for nice_funcs.get_data, kept in the candle store with their indicators
+Built with love by Anarcho Capital 🚀
+
+Each (address, timeframe) series lives in the Parquet candle store together
+with its MA20/MA40/RSI columns and the running RSI state. A call only asks
+Birdeye for bars from the stored tail onwards (the last stored bar may still
+have been forming), plus any older history the caller now wants, and only
+the bars from the first new one onwards get their indicators computed; the
+rest of the frame is served from the store (LRU in memory, Parquet on disk).
+Stored bars older than the longest lookback any caller has asked for (plus
+WARMUP_BARS for MA40/RSI) are dropped on each refresh, so a series stays
+bounded instead of growing with every tail fetch.
+
+Indicators use the same arithmetic as pandas_ta: sma is a rolling mean,
+rsi smooths gains and losses with rma (Series.ewm(alpha=1/length,
+min_periods=length).mean()). Because they are computed over the whole stored
+series, the first bars of a window carry values from earlier history instead
+of warm-up NaNs, and RSI no longer depends on where the window starts.
+
+Benchmark:
+    python -m src.scripts.data_processing.ohlcv_store --benchmark
+"""
+
+import time
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from src.scripts.shared_services.logger import debug, info, warning, error
+except ImportError:
+    def debug(msg, file_only=False):
+        if not file_only:
+            print(f"DEBUG: {msg}")
+    def info(msg):
+        print(f"INFO: {msg}")
+    def warning(msg):
+        print(f"WARNING: {msg}")
+    def error(msg):
+        print(f"ERROR: {msg}")
+
+from src.scripts.data_processing.candle_store import CandleStore
+
+OHLCV_SOURCE = 'birdeye'
+BAR_COLUMNS = ['t', 'Datetime (UTC)', 'Open', 'High', 'Low', 'Close', 'Volume']  # t = bar open, epoch seconds
+MA_LENGTHS = (20, 40)
+RSI_LENGTH = 14
+MIN_ROWS = 40  # Shorter windows are padded with their first bar, as get_data always did
+STATE_COLUMNS = ['_rsi_gain', '_rsi_loss', '_rsi_wt']  # rma state after each bar
+# Kept before the oldest bar a caller can ask for: MA40's window plus enough rma history
+# that a from-scratch RSI recompute agrees with the stored one ((13/14)^140 ~ 3e-5)
+WARMUP_BARS = max(MA_LENGTHS) + 10 * RSI_LENGTH
+OUTPUT_COLUMNS = BAR_COLUMNS[1:] + ['MA20', 'RSI', 'MA40']
+
+
+# ============================================================================
+# INDICATORS
+# ============================================================================
+
+def items_to_frame(items) -> pd.DataFrame:
+    """Birdeye ohlcv items to the stored bar columns (timestamps are formatted once, when fetched)"""
+    df = pd.DataFrame.from_records(
+        [(item['unixTime'], item['o'], item['h'], item['l'], item['c'], item['v']) for item in items or []],
+        columns=['t', 'Open', 'High', 'Low', 'Close', 'Volume'],
+    )
+    df = df.astype({'t': 'int64', 'Open': 'float64', 'High': 'float64', 'Low': 'float64',
+                    'Close': 'float64', 'Volume': 'float64'})
+    df.insert(1, 'Datetime (UTC)', pd.to_datetime(df['t'], unit='s').dt.strftime('%Y-%m-%d %H:%M:%S'))
+    return df
+
+
+def compute_indicators(raw: pd.DataFrame) -> pd.DataFrame:
+    """MA20/MA40/RSI and rma state for a whole series"""
+    df = raw[BAR_COLUMNS].reset_index(drop=True)
+    close = df['Close']
+    for length in MA_LENGTHS:
+        df[f'MA{length}'] = close.rolling(length, min_periods=length).mean()
+
+    # pandas_ta rsi: rma of the clipped changes, first change is NaN
+    change = close.diff()
+    gain = change.clip(lower=0)
+    loss = change.clip(upper=0)
+    alpha = 1.0 / RSI_LENGTH
+    df['_rsi_gain'] = gain.ewm(alpha=alpha, min_periods=0).mean()
+    df['_rsi_loss'] = loss.ewm(alpha=alpha, min_periods=0).mean()
+    weights = np.full(len(df), np.nan)
+    weight = 1.0
+    for i in range(1, len(df)):
+        if i > 1:
+            weight = weight * (1.0 - alpha) + 1.0
+        weights[i] = weight
+    df['_rsi_wt'] = weights
+    df['RSI'] = _rsi(df['_rsi_gain'], df['_rsi_loss'])
+    df.loc[df.index < RSI_LENGTH, 'RSI'] = np.nan
+    return df
+
+
+def extend_indicators(df: pd.DataFrame, start: int) -> pd.DataFrame:
+    """Fill indicators for rows start.. from the stored rows before them (frame already merged)"""
+    if start <= RSI_LENGTH or start <= max(MA_LENGTHS) or df[STATE_COLUMNS].iloc[start - 1].isna().any():
+        return compute_indicators(df)
+
+    df = df.copy()
+    closes = df['Close'].to_numpy()
+    alpha = 1.0 / RSI_LENGTH
+    old_wt_factor = 1.0 - alpha
+    avg_gain, avg_loss, weight = df[STATE_COLUMNS].iloc[start - 1]
+    columns = {name: df[name].to_numpy(copy=True) for name in ['MA20', 'MA40', 'RSI'] + STATE_COLUMNS}
+
+    for i in range(start, len(df)):
+        for length in MA_LENGTHS:
+            columns[f'MA{length}'][i] = closes[i - length + 1:i + 1].mean()
+        change = closes[i] - closes[i - 1]
+        gain, loss = max(change, 0.0), min(change, 0.0)
+        # Same update as pandas' adjusted ewm
+        weight *= old_wt_factor
+        if avg_gain != gain:
+            avg_gain = ((weight * avg_gain) + gain) / (weight + 1.0)
+        if avg_loss != loss:
+            avg_loss = ((weight * avg_loss) + loss) / (weight + 1.0)
+        weight += 1.0
+        columns['_rsi_gain'][i], columns['_rsi_loss'][i], columns['_rsi_wt'][i] = avg_gain, avg_loss, weight
+        columns['RSI'][i] = _rsi(avg_gain, avg_loss)
+
+    for name, values in columns.items():
+        df[name] = values
+    return df
+
+
+def _rsi(avg_gain, avg_loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100.0 * avg_gain / (avg_gain + abs(avg_loss))
+
+
+def to_frame(series: pd.DataFrame) -> pd.DataFrame:
+    """Stored rows to the frame get_data returns"""
+    df = series[OUTPUT_COLUMNS].reset_index(drop=True)
+    df['Price_above_MA20'] = df['Close'] > df['MA20']
+    df['Price_above_MA40'] = df['Close'] > df['MA40']
+    df['MA20_above_MA40'] = df['MA20'] > df['MA40']
+    return df
+
+
+# ============================================================================
+# STORE-BACKED FETCH
+# ============================================================================
+
+def cached_ohlcv(store: CandleStore, address: str, timeframe: str, time_from: int, time_to: int,
+                 fetch: Callable[[int, int], Optional[pd.DataFrame]], max_age: float,
+                 now: Optional[float] = None) -> Optional[pd.DataFrame]:
+    """
+    get_data frame for [time_from, time_to] (epoch seconds), fetching only what the store lacks:
+    history before what was stored so far, and the tail from the last stored bar once the
+    series is older than max_age seconds. None if nothing is stored and the fetch failed.
+    """
+    now = time.time() if now is None else now
+    with store.lock(OHLCV_SOURCE, address, timeframe):
+        stored, metadata = store.load(OHLCV_SOURCE, address, timeframe)
+        history_start = metadata.get('history_start')
+        refreshed_at = metadata.get('refreshed_at', 0)
+        # Longest lookback from "now" any caller has asked for; older bars are trimmed on refresh
+        lookback = max(metadata.get('max_lookback', 0), int(now) - time_from)
+
+        # Stored history is contiguous from history_start to the last bar
+        head = tail = None
+        last_stored = int(stored['t'].iloc[-1]) if not stored.empty else None
+        if history_start is None or last_stored is None or last_stored < time_from:
+            stored, history_start = stored.iloc[0:0], None  # Start a new contiguous series
+            tail = (time_from, time_to)
+        else:
+            if time_from < history_start:
+                head = (time_from, history_start - 1)
+            if time_to > refreshed_at + max_age:
+                tail = (last_stored, time_to)
+
+        if head is None and tail is None:
+            debug(f"OHLCV store hit: {address[:4]} {timeframe} ({len(stored)} bars)", file_only=True)
+            series = stored
+        else:
+            series = _refresh(store, address, timeframe, fetch, stored, {**metadata, 'max_lookback': lookback},
+                              head, tail, history_start, now)
+            if series is None:
+                return None
+
+    window = series[(series['t'] >= time_from) & (series['t'] <= time_to)]
+    if window.empty:
+        return pd.DataFrame()
+    if len(window) < MIN_ROWS:
+        warning(f"Padding data to ensure minimum {MIN_ROWS} rows for analysis")
+        padded = pd.concat([window.iloc[[0] * (MIN_ROWS - len(window))], window], ignore_index=True)
+        return to_frame(compute_indicators(padded))
+    return to_frame(window)
+
+
+def _refresh(store, address, timeframe, fetch, stored, metadata, head, tail, history_start, now):
+    """Fetch the head/tail ranges, merge them into the stored series and bring its indicators up to date"""
+    fetched, updates = {}, {}
+    for name, fetch_range in (('head', head), ('tail', tail)):
+        if fetch_range is None:
+            continue
+        frame = fetch(*fetch_range)
+        if frame is None:
+            continue
+        fetched[name] = frame[frame['t'] <= now]  # Drop bars dated in the future
+        if name == 'head':
+            updates['history_start'] = fetch_range[0]
+        else:
+            updates['refreshed_at'] = min(fetch_range[1], int(now))
+    if history_start is None and 'refreshed_at' in updates:
+        updates['history_start'] = tail[0]
+
+    if not updates:
+        if stored.empty:
+            return None
+        warning(f"OHLCV fetch failed, serving stored {address[:4]} {timeframe} bars")
+        return stored
+
+    new_tail = fetched.get('tail')
+    if new_tail is not None and not new_tail.empty:
+        new_tail = new_tail.sort_values('t', ignore_index=True)
+    if stored.empty or 'head' in fetched:
+        # New or prepended history: merge everything and compute from the start
+        frames = [df for df in (fetched.get('head'), stored, new_tail) if df is not None and not df.empty]
+        if not frames:
+            return None if stored.empty else stored
+        merged = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        series = compute_indicators(merged.drop_duplicates('t', keep='last').sort_values('t', ignore_index=True))
+    elif new_tail is not None and not new_tail.empty:
+        # Tail starts at the last stored bar: replace from there and extend the indicators
+        start = int(stored['t'].searchsorted(new_tail['t'].iloc[0]))
+        series = extend_indicators(pd.concat([stored.iloc[:start], new_tail], ignore_index=True), start)
+    else:
+        series = stored
+
+    # Drop bars older than the longest lookback; the kept rows' indicators and rma state are unchanged
+    cutoff = int(series['t'].iloc[-1]) - metadata['max_lookback'] if not series.empty else None
+    first_kept = max(0, int(series['t'].searchsorted(cutoff)) - WARMUP_BARS) if cutoff is not None else 0
+    if first_kept > 0:
+        series = series.iloc[first_kept:].reset_index(drop=True)
+        updates['history_start'] = int(series['t'].iloc[0])
+        debug(f"OHLCV store trimmed {first_kept} old bars from {address[:4]} {timeframe}", file_only=True)
+    store.save(OHLCV_SOURCE, address, timeframe, series, {**metadata, **updates})
+    return series
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def _synthetic_items(n_bars: int, interval: int, end: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    closes = 1.0 + np.cumsum(rng.normal(0, 0.01, n_bars)).clip(-0.9)
+    start = end - n_bars * interval
+    return [{'unixTime': start + i * interval, 'o': float(c), 'h': float(c) * 1.01, 'l': float(c) * 0.99,
+             'c': float(c), 'v': float(rng.uniform(1e3, 1e5))} for i, c in enumerate(closes)]
+
+
+def _benchmark(n_tokens: int = 50, days: int = 10, interval: int = 900, latency_ms: float = 0.0):
+    """Cycle time for n_tokens: legacy download + CSV + full recompute vs tail fetch + incremental indicators"""
+    import tempfile
+    from pathlib import Path
+
+    tmp = Path(tempfile.mkdtemp(prefix='ohlcv_bench_'))
+    n_bars = days * 86400 // interval
+    end = int(time.time()) // interval * interval
+    series = {f"TOKEN{i}": _synthetic_items(n_bars + 2, interval, end + 2 * interval, seed=i) for i in range(n_tokens)}
+    bars_fetched = []
+
+    def api(address, time_from, time_to, upto):
+        time.sleep(latency_ms / 1000)
+        items = [item for item in series[address][:upto] if time_from <= item['unixTime'] <= time_to]
+        bars_fetched.append(len(items))
+        return items
+
+    def legacy_cycle(upto, now):
+        for address in series:
+            items = api(address, now - days * 86400, now, upto)
+            df = pd.DataFrame([{
+                'Datetime (UTC)': datetime.utcfromtimestamp(item['unixTime']).strftime('%Y-%m-%d %H:%M:%S'),
+                'Open': item['o'], 'High': item['h'], 'Low': item['l'], 'Close': item['c'], 'Volume': item['v'],
+            } for item in items])
+            df.to_csv(tmp / f"{address}_latest.csv")
+            df = pd.read_csv(tmp / f"{address}_latest.csv")  # next agent in the cycle
+            compute_indicators(df.assign(t=0))
+
+    store = CandleStore(tmp / "candles")
+
+    def store_cycle(upto, now):
+        for address in series:
+            fetch = lambda start, stop, address=address: items_to_frame(api(address, start, stop, upto))
+            cached_ohlcv(store, address, '15m', now - days * 86400, now, fetch, max_age=60, now=now)
+
+    def timed(fn, *args):
+        bars_fetched.clear()
+        started = time.perf_counter()
+        fn(*args)
+        return (time.perf_counter() - started) * 1000, sum(bars_fetched)
+
+    now = end
+    legacy_ms, legacy_bars = timed(legacy_cycle, n_bars + 1, now + interval)
+    cold_ms, cold_bars = timed(store_cycle, n_bars + 1, now)
+    warm_ms, warm_bars = timed(store_cycle, n_bars + 2, now + interval)
+    hit_ms, _ = timed(store_cycle, n_bars + 2, now + interval)
+
+    print(f"[BENCHMARK] {n_tokens} tokens x {n_bars} bars ({days}d of {interval // 60}m), {latency_ms:.0f} ms simulated API latency")
+    print(f"[BENCHMARK] legacy cycle (full download + CSV + full indicators): {legacy_ms:,.0f} ms ({legacy_bars:,} bars fetched)")
+    print(f"[BENCHMARK] first store cycle: {cold_ms:,.0f} ms ({cold_bars:,} bars fetched)")
+    print(f"[BENCHMARK] next bar (tail fetch + incremental indicators): {warm_ms:,.0f} ms ({warm_bars:,} bars fetched)")
+    print(f"[BENCHMARK] within max_age (store only): {hit_ms:,.1f} ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="OHLCV store")
+    parser.add_argument('--benchmark', action='store_true', help='Compare legacy get_data cycles with the store')
+    parser.add_argument('--tokens', type=int, default=50)
+    parser.add_argument('--days', type=int, default=10)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Simulated Birdeye latency per request')
+    args = parser.parse_args()
+    if args.benchmark:
+        _benchmark(args.tokens, args.days, latency_ms=args.latency_ms)
@@ -0,0 +1,350 @@
+"""
+Sentiment Scorer
+CPU inference service for the tweet sentiment model, with a persistent score cache
+Built with love by Anarcho Capital 🚀
+
+The BERT model is loaded once per process (get_sentiment_scorer) and can be
+dynamically quantized to int8 so the Linear layers run on the CPU's integer
+kernels. Quantization is off by default; the benchmark reports its label
+agreement with fp32, which should be checked before turning it on. Texts are tokenized once, sorted by token length and cut into
+batches bounded by both row count and padded-token budget, so short tweets are
+never padded out to the longest tweet of the cycle.
+
+Scores (P(POS) - P(NEG), -1 to 1) are cached in SQLite keyed by a hash of the
+model variant and the text, so each cycle only runs the model on tweets it has
+not seen before.
+
+Benchmark (downloads the model on first run):
+    python -m src.scripts.data_processing.sentiment_scorer --benchmark
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+
+try:
+    from src.scripts.shared_services.logger import debug, info, warning, error
+except ImportError:
+    def debug(msg, file_only=False):
+        if not file_only:
+            print(f"DEBUG: {msg}")
+    def info(msg):
+        print(f"INFO: {msg}")
+    def warning(msg):
+        print(f"WARNING: {msg}")
+    def error(msg):
+        print(f"ERROR: {msg}")
+
+DEFAULT_MAX_LENGTH = 128
+DEFAULT_MAX_BATCH_SIZE = 32
+DEFAULT_MAX_BATCH_TOKENS = 2048  # padded tokens per forward pass
+MEMORY_CACHE_SIZE = 50_000
+SQLITE_MAX_PARAMS = 500
+
+# ============================================================================
+# BATCHING
+# ============================================================================
+
+def length_buckets(lengths: Sequence[int], max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                   max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS) -> List[List[int]]:
+    """Group indices into batches of similar length.
+
+    Indices are sorted by length and a batch is closed as soon as adding the
+    next item would exceed max_batch_size rows or max_batch_tokens padded
+    tokens (rows x longest row).
+    """
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    longest = 0
+    for idx in sorted(range(len(lengths)), key=lengths.__getitem__):
+        length = max(1, lengths[idx])
+        if batch and (len(batch) >= max_batch_size or (len(batch) + 1) * max(longest, length) > max_batch_tokens):
+            batches.append(batch)
+            batch, longest = [], 0
+        batch.append(idx)
+        longest = max(longest, length)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+# ============================================================================
+# MODEL BACKEND
+# ============================================================================
+
+class BertBackend:
+    """Hugging Face sequence classifier on CPU, optionally int8-quantized"""
+
+    def __init__(self, model_name: str, quantize: bool = False, max_length: int = DEFAULT_MAX_LENGTH,
+                 num_threads: Optional[int] = None):
+        import torch
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+        self._torch = torch
+        self.model_name = model_name
+        self.max_length = max_length
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model.eval()
+        if quantize:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model
+        self.variant = f"{model_name}:{'int8' if quantize else 'fp32'}"
+
+    def encode(self, texts: List[str]) -> List[List[int]]:
+        """Token ids per text, truncated but not padded"""
+        return self.tokenizer(texts, truncation=True, max_length=self.max_length)['input_ids']
+
+    def predict(self, encoded: List[List[int]]) -> List[float]:
+        """POS - NEG probability for one batch of encoded texts"""
+        torch = self._torch
+        inputs = self.tokenizer.pad({'input_ids': encoded}, padding=True, return_tensors="pt")
+        with torch.inference_mode():
+            logits = self.model(**inputs).logits
+            probs = torch.nn.functional.softmax(logits, dim=-1)
+        # Labels are NEG, NEU, POS
+        return (probs[:, 2] - probs[:, 0]).tolist()
+
+
+# ============================================================================
+# SCORE CACHE
+# ============================================================================
+
+class ScoreCache:
+    """Text-hash -> score cache in SQLite with an in-memory front"""
+
+    def __init__(self, db_path: Optional[str], retention_days: Optional[int] = None):
+        self.db_path = db_path
+        self._memory: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        if db_path:
+            if os.path.dirname(db_path):
+                os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS sentiment_score_cache (
+                        text_hash TEXT PRIMARY KEY,
+                        score REAL NOT NULL,
+                        created_at TEXT NOT NULL
+                    )
+                ''')
+                if retention_days:
+                    cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat()
+                    conn.execute('DELETE FROM sentiment_score_cache WHERE created_at < ?', (cutoff,))
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _remember(self, key: str, score: float):
+        self._memory[key] = score
+        self._memory.move_to_end(key)
+        if len(self._memory) > MEMORY_CACHE_SIZE:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, float]:
+        found: Dict[str, float] = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    found[key] = self._memory[key]
+                else:
+                    missing.append(key)
+        if missing and self.db_path:
+            with self._connect() as conn:
+                for i in range(0, len(missing), SQLITE_MAX_PARAMS):
+                    chunk = missing[i:i + SQLITE_MAX_PARAMS]
+                    rows = conn.execute(
+                        f"SELECT text_hash, score FROM sentiment_score_cache "
+                        f"WHERE text_hash IN ({','.join('?' * len(chunk))})", chunk).fetchall()
+                    found.update(rows)
+            with self._lock:
+                for key in missing:
+                    if key in found:
+                        self._remember(key, found[key])
+        return found
+
+    def put_many(self, scores: Dict[str, float]):
+        if not scores:
+            return
+        with self._lock:
+            for key, score in scores.items():
+                self._remember(key, score)
+        if self.db_path:
+            now = datetime.now().isoformat()
+            with self._connect() as conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO sentiment_score_cache (text_hash, score, created_at) VALUES (?, ?, ?)',
+                    [(key, float(score), now) for key, score in scores.items()])
+
+
+# ============================================================================
+# SCORER
+# ============================================================================
+
+class SentimentScorer:
+    """Scores texts with a backend, only running the model on uncached texts"""
+
+    def __init__(self, backend, cache: Optional[ScoreCache] = None,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS):
+        self.backend = backend
+        self.cache = cache if cache is not None else ScoreCache(None)
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self._lock = threading.Lock()  # one forward pass at a time; torch already uses every core
+        self.stats = {'texts': 0, 'cache_hits': 0, 'scored': 0, 'batches': 0,
+                      'tokens': 0, 'padded_tokens': 0, 'inference_sec': 0.0}
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.backend.variant}\0{text}".encode('utf-8')).hexdigest()
+
+    def score(self, texts: List[str]) -> List[float]:
+        """Per-text sentiment scores (-1 to 1), in input order"""
+        if not texts:
+            return []
+        keys = [self._key(text) for text in texts]
+        scores = self.cache.get_many(set(keys))
+
+        pending: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in scores:
+                pending.setdefault(key, text)
+
+        self.stats['texts'] += len(texts)
+        self.stats['cache_hits'] += len(texts) - len(pending)
+        if pending:
+            scores.update(self._run_model(pending))
+        return [scores[key] for key in keys]
+
+    def _run_model(self, pending: Dict[str, str]) -> Dict[str, float]:
+        keys = list(pending)
+        with self._lock:
+            started = time.perf_counter()
+            encoded = self.backend.encode([pending[key] for key in keys])
+            lengths = [len(ids) for ids in encoded]
+            fresh: Dict[str, float] = {}
+            for batch in length_buckets(lengths, self.max_batch_size, self.max_batch_tokens):
+                batch_scores = self.backend.predict([encoded[i] for i in batch])
+                for i, score in zip(batch, batch_scores):
+                    fresh[keys[i]] = float(score)
+                self.stats['batches'] += 1
+                self.stats['tokens'] += sum(lengths[i] for i in batch)
+                self.stats['padded_tokens'] += len(batch) * max(lengths[i] for i in batch)
+            self.stats['inference_sec'] += time.perf_counter() - started
+            self.stats['scored'] += len(fresh)
+        self.cache.put_many(fresh)
+        debug(f"Sentiment scorer: {len(fresh)} new texts scored in {self.stats['batches']} batches so far", file_only=True)
+        return fresh
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats['padding_ratio'] = (stats['padded_tokens'] / stats['tokens']) if stats['tokens'] else 0.0
+        stats['variant'] = self.backend.variant
+        return stats
+
+
+# ============================================================================
+# PROCESS-WIDE INSTANCE
+# ============================================================================
+
+_scorers: Dict[tuple, SentimentScorer] = {}
+_scorers_lock = threading.Lock()
+
+
+def get_sentiment_scorer(model_name: str, quantize: bool = False, cache_path: Optional[str] = None,
+                         max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                         max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS,
+                         retention_days: Optional[int] = None) -> SentimentScorer:
+    """Scorer for model_name, loading the model only the first time it's asked for"""
+    key = (model_name, quantize, cache_path)
+    with _scorers_lock:
+        scorer = _scorers.get(key)
+        if scorer is None:
+            started = time.perf_counter()
+            backend = BertBackend(model_name, quantize=quantize)
+            scorer = SentimentScorer(backend, ScoreCache(cache_path, retention_days),
+                                     max_batch_size=max_batch_size, max_batch_tokens=max_batch_tokens)
+            _scorers[key] = scorer
+            info(f"Sentiment model {backend.variant} loaded in {time.perf_counter() - started:.1f}s")
+        return scorer
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def _benchmark_texts(n: int, seed: int = 7) -> List[str]:
+    import random
+    rng = random.Random(seed)
+    openers = ["$SOL", "Bitcoin", "Solana", "$BTC", "ETH", "This token", "The market", "My bags"]
+    moods = ["is pumping hard 🚀", "looks dead", "is consolidating", "just broke resistance",
+             "got rugged again", "is the future", "is overvalued", "keeps bleeding", "is so bullish"]
+    filler = ["ngl", "fr", "lfg", "wagmi", "nfa", "dyor", "imo", "gm", "ser", "anon", "ser this is fine",
+              "watch the 4h chart", "funding is flipping", "whales are accumulating", "volume is thin"]
+    texts = []
+    for i in range(n):
+        words = [rng.choice(openers), rng.choice(moods)]
+        words += [rng.choice(filler) for _ in range(int(rng.expovariate(1 / 6)))]
+        texts.append(f"{' '.join(words)} #{i}")
+    return texts
+
+
+def _benchmark(model_name: str, n: int = 512, legacy_batch_size: int = 8,
+               bullish: float = 0.2, bearish: float = -0.2):
+    """Tweets/sec for the legacy fixed-batch fp32 path vs the quantized bucketed scorer, plus parity"""
+    texts = _benchmark_texts(n)
+
+    fp32 = BertBackend(model_name, quantize=False)
+    int8 = BertBackend(model_name, quantize=True)
+
+    # Legacy: fixed batches in arrival order, padded to the longest in each batch
+    started = time.perf_counter()
+    legacy_scores = []
+    for i in range(0, n, legacy_batch_size):
+        legacy_scores.extend(fp32.predict(fp32.encode(texts[i:i + legacy_batch_size])))
+    legacy_sec = time.perf_counter() - started
+    print(f"[BENCHMARK] legacy fp32, fixed batch {legacy_batch_size}: {n / legacy_sec:,.1f} tweets/s")
+
+    for name, backend in (('fp32', fp32), ('int8', int8)):
+        scorer = SentimentScorer(backend)
+        started = time.perf_counter()
+        scores = scorer.score(texts)
+        cold_sec = time.perf_counter() - started
+        started = time.perf_counter()
+        scorer.score(texts)
+        warm_sec = time.perf_counter() - started
+        stats = scorer.get_stats()
+        print(f"[BENCHMARK] {name} bucketed: {n / cold_sec:,.1f} tweets/s cold, "
+              f"{n / max(warm_sec, 1e-9):,.0f} tweets/s cached, padding ratio {stats['padding_ratio']:.2f}")
+        if name == 'int8':
+            int8_scores = scores
+
+    def label(score):
+        return 'BULLISH' if score > bullish else 'BEARISH' if score < bearish else 'NEUTRAL'
+
+    diffs = [abs(a - b) for a, b in zip(legacy_scores, int8_scores)]
+    agreement = sum(label(a) == label(b) for a, b in zip(legacy_scores, int8_scores)) / n
+    mean_legacy = sum(legacy_scores) / n
+    mean_int8 = sum(int8_scores) / n
+    print(f"[BENCHMARK] parity int8 vs fp32: mean |diff| {sum(diffs) / n:.4f}, max |diff| {max(diffs):.4f}, "
+          f"label agreement {agreement:.1%}, cycle score {mean_legacy:.4f} vs {mean_int8:.4f}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sentiment scorer")
+    parser.add_argument('--benchmark', action='store_true', help='Compare legacy and optimized inference')
+    parser.add_argument('--model', default="finiteautomata/bertweet-base-sentiment-analysis")
+    parser.add_argument('--n', type=int, default=512)
+    args = parser.parse_args()
+    if args.benchmark:
+        _benchmark(args.model, n=args.n)
@@ -13,7 +13,8 @@ def get_token_decimals(token_address: str) -> int:
         token_address: The token mint address
         
     Returns:
-        Number of decimals (defaults to 9 for SOL-like tokens)
+        Number of decimals from the token metadata store
+        (defaults to 9 for SOL-like tokens if it cannot be resolved)
     """
     # Common token decimals mapping
     common_tokens = {
@@ -27,6 +28,13 @@ def get_token_decimals(token_address: str) -> int:
     if token_address in common_tokens:
         return common_tokens[token_address]
     
+    # Persistent metadata store (resolves misses with one batched RPC call)
+    try:
+        from src.scripts.data_processing.token_metadata_service import get_token_metadata_service
+        return get_token_metadata_service().get_token_decimals(token_address)
+    except Exception:
+        pass
+    
     # Default to 9 decimals (like SOL) if we can't determine
     return 9
 
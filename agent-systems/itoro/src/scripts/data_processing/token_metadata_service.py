@@ -13,6 +13,8 @@ import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
+from src.scripts.database.sqlite_manager import get_sqlite_manager
+
 # Load environment variables
 load_dotenv()
 
@@ -34,12 +36,140 @@ except ImportError:
     def debug(msg, file_only=False):
         print(f"DEBUG: {msg}")
 
+    def warning(msg, file_only=False):
+        print(f"WARNING: {msg}")
+
+# Persistent metadata store
+METADATA_DB_PATH = os.path.join('src', 'data', 'token_metadata.db')
+DECIMALS_CACHE_DAYS = 365  # Decimals read from the mint account are fixed when the mint is created
+UNVERIFIED_DECIMALS_SECONDS = 3600  # Birdeye-reported (possibly defaulted) decimals until a mint read succeeds
+FAILURE_CACHE_SECONDS = 4 * 3600  # Unresolvable mints are retried after 4 hours
+
+# getMultipleAccounts accepts at most 100 pubkeys per call
+RPC_MULTIPLE_ACCOUNTS_LIMIT = 100
+SPL_TOKEN_PROGRAM_IDS = {
+    "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",  # SPL Token
+    "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb",  # Token-2022
+}
+
+
+class TokenMetadataStore:
+    """
+    SQLite-backed metadata store so lookups survive restarts.
+
+    Metadata (symbol, name, logo) and decimals carry separate expiry times:
+    decimals never change for a mint, so they are kept much longer and a
+    decimals lookup still hits after the descriptive metadata has expired.
+    A row with NULL metadata and a future expiry is a cached failure.
+    """
+
+    def __init__(self, db_path: str = METADATA_DB_PATH):
+        self.db_path = db_path
+        self.db = get_sqlite_manager(db_path)
+        self._initialize_db()
+
+    def _initialize_db(self):
+        with self.db.transaction() as conn:
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS token_metadata (
+                token_mint TEXT PRIMARY KEY,
+                metadata TEXT,
+                expiry_time INTEGER DEFAULT 0,
+                decimals INTEGER,
+                decimals_expiry_time INTEGER DEFAULT 0,
+                update_time INTEGER,
+                decimals_verified INTEGER DEFAULT 1
+            )
+            ''')
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(token_metadata)')}
+            if 'decimals_verified' not in columns:
+                # Older stores long-cached Birdeye's defaulted decimals next to mint reads;
+                # treat them all as unverified so they are re-read from the mint account
+                conn.execute('ALTER TABLE token_metadata ADD COLUMN decimals_verified INTEGER DEFAULT 1')
+                conn.execute(
+                    'UPDATE token_metadata SET decimals_verified = 0, '
+                    'decimals_expiry_time = MIN(decimals_expiry_time, ?) WHERE decimals IS NOT NULL',
+                    (int(time.time()) + UNVERIFIED_DECIMALS_SECONDS,)
+                )
+
+    def load_valid(self) -> List[tuple]:
+        """Rows with unexpired metadata or decimals: (mint, metadata, expiry, decimals, decimals_expiry, verified)"""
+        now = int(time.time())
+        rows = self.db.fetchall(
+            '''
+            SELECT token_mint, metadata, expiry_time, decimals, decimals_expiry_time, decimals_verified
+            FROM token_metadata
+            WHERE expiry_time > ? OR decimals_expiry_time > ?
+            ''',
+            (now, now)
+        )
+        result = []
+        for mint, metadata_json, expiry, decimals, decimals_expiry, verified in rows:
+            metadata = None
+            if metadata_json:
+                try:
+                    metadata = json.loads(metadata_json)
+                except ValueError:
+                    expiry = 0
+            result.append((mint, metadata, expiry, decimals, decimals_expiry, bool(verified)))
+        return result
+
+    def get_decimals(self, token_mint: str) -> Optional[int]:
+        row = self.db.fetchone(
+            'SELECT decimals FROM token_metadata WHERE token_mint = ? AND decimals_expiry_time > ?',
+            (token_mint, int(time.time()))
+        )
+        if row and row[0] is not None:
+            return int(row[0])
+        return None
+
+    def store_metadata(self, metadata_dict: Dict[str, Optional[Dict[str, Any]]], expiry_time: float) -> None:
+        """Upsert metadata (None marks a failed lookup) without touching stored decimals"""
+        now = int(time.time())
+        rows = [
+            (mint, json.dumps(metadata) if metadata is not None else None, int(expiry_time), now)
+            for mint, metadata in metadata_dict.items()
+        ]
+        self.db.executemany(
+            '''
+            INSERT INTO token_metadata (token_mint, metadata, expiry_time, update_time)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(token_mint) DO UPDATE SET
+                metadata = excluded.metadata,
+                expiry_time = excluded.expiry_time,
+                update_time = excluded.update_time
+            ''',
+            rows
+        )
+
+    def store_decimals(self, decimals_dict: Dict[str, int], expiry_time: float, verified: bool = True) -> None:
+        """Upsert decimals with their expiry; unverified decimals never replace an unexpired verified value"""
+        now = int(time.time())
+        rows = [(mint, int(decimals), int(expiry_time), now, int(verified)) for mint, decimals in decimals_dict.items()]
+        self.db.executemany(
+            '''
+            INSERT INTO token_metadata (token_mint, decimals, decimals_expiry_time, update_time, decimals_verified)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(token_mint) DO UPDATE SET
+                decimals = excluded.decimals,
+                decimals_expiry_time = excluded.decimals_expiry_time,
+                update_time = excluded.update_time,
+                decimals_verified = excluded.decimals_verified
+            WHERE excluded.decimals_verified = 1 OR token_metadata.decimals_verified = 0
+                OR token_metadata.decimals_expiry_time <= excluded.update_time
+            ''',
+            rows
+        )
+
+    def clear(self) -> None:
+        self.db.execute('DELETE FROM token_metadata')
+
 class TokenMetadataService:
     """
     Efficient token metadata service with extended caching
     """
     
-    def __init__(self, cache_days=7, batch_size=None):
+    def __init__(self, cache_days=7, batch_size=None, db_path: str = METADATA_DB_PATH):
         """Initialize the token metadata service with the specified settings"""
         # Default cache period is 7 days since token metadata rarely changes
         self.cache_days = int(os.getenv("METADATA_CACHE_DAYS", cache_days))
@@ -50,6 +180,8 @@ class TokenMetadataService:
         # Initialize metadata cache
         self.metadata_cache = {}
         self.metadata_cache_expiry = {}
+        self.decimals_cache = {}  # mint -> (decimals, expiry, read from the mint account)
+        self.decimals_misses = {}  # mint -> retry-after time for mints RPC could not resolve
         self.cache_lock = threading.Lock()
 
         # Get Birdeye API key
@@ -60,6 +192,14 @@ class TokenMetadataService:
         # Common token metadata (pre-populated for efficiency)
         self.common_tokens = self._initialize_common_tokens()
 
+        # Disk-backed store; warm the in-memory cache from it
+        self.store = None
+        try:
+            self.store = TokenMetadataStore(db_path)
+            self._warm_start()
+        except Exception as e:
+            warning(f"Token metadata store unavailable, using memory-only cache: {e}")
+
         # Service is ready when initialized
         self._ready = True
 
@@ -106,6 +246,19 @@ class TokenMetadataService:
             }
         }
     
+    def _warm_start(self) -> None:
+        """Load unexpired metadata and decimals persisted by previous runs"""
+        rows = self.store.load_valid()
+        now = time.time()
+        with self.cache_lock:
+            for mint, metadata, expiry, decimals, decimals_expiry, verified in rows:
+                if expiry > now:
+                    self.metadata_cache[mint] = metadata
+                    self.metadata_cache_expiry[mint] = expiry
+                if decimals is not None and decimals_expiry > now:
+                    self.decimals_cache[mint] = (int(decimals), decimals_expiry, verified)
+        debug(f"Token metadata store warm start: {len(rows)} tokens", file_only=True)
+
     def get_metadata(self, token_mint: str) -> Optional[Dict[str, Any]]:
         """
         Get metadata for a single token with caching
@@ -125,9 +278,9 @@ class TokenMetadataService:
         if token_mint in self.common_tokens:
             return self.common_tokens[token_mint]
             
-        # Check if metadata is in cache and still valid
-        cached_metadata = self._get_from_cache(token_mint)
-        if cached_metadata is not None:
+        # Check if metadata (or a recent failure) is in cache and still valid
+        hit, cached_metadata = self._lookup_cache(token_mint)
+        if hit:
             return cached_metadata
             
         # Get metadata in batch for efficiency (even for single token)
@@ -156,8 +309,8 @@ class TokenMetadataService:
                 continue
                 
             # Check cache
-            cached_metadata = self._get_from_cache(mint)
-            if cached_metadata is not None:
+            hit, cached_metadata = self._lookup_cache(mint)
+            if hit:
                 result[mint] = cached_metadata
             else:
                 tokens_to_fetch.append(mint)
@@ -166,134 +319,165 @@ class TokenMetadataService:
         if not tokens_to_fetch:
             return result
             
-        # Process remaining tokens in batches
-        if USE_PARALLEL_PROCESSING:
-            # Process batches in parallel
-            with ThreadPoolExecutor(max_workers=min(10, len(tokens_to_fetch))) as executor:
-                for i in range(0, len(tokens_to_fetch), self.batch_size):
-                    batch = tokens_to_fetch[i:i + self.batch_size]
-                    
-                    # Process tokens within batch in parallel
-                    future_to_mint = {
-                        executor.submit(self._fetch_token_metadata, mint): mint 
-                        for mint in batch
-                    }
-                    
-                    for future in as_completed(future_to_mint):
-                        mint = future_to_mint[future]
-                        try:
-                            metadata = future.result()
-                            result[mint] = metadata
-                            self._cache_metadata({mint: metadata})
-                        except Exception as e:
-                            print(f"Error fetching metadata for {mint}: {str(e)}")
-                            result[mint] = None
-                            
-                            # Cache failures too, but for a shorter period
-                            self._cache_metadata({mint: None}, is_failure=True)
-        else:
-            # Process batches sequentially
-            for i in range(0, len(tokens_to_fetch), self.batch_size):
-                batch = tokens_to_fetch[i:i + self.batch_size]
-                
-                for mint in batch:
-                    metadata = self._fetch_token_metadata(mint)
-                    result[mint] = metadata
-                    self._cache_metadata({mint: metadata})
-                    
+        result.update(self._resolve_metadata_batch(tokens_to_fetch))
         return result
-    
-    def _fetch_token_metadata(self, token_mint: str) -> Optional[Dict[str, Any]]:
-        """Fetch metadata for a single token using Birdeye API (preferred) or RPC fallback"""
 
-        # Try Birdeye API first (much better metadata)
+    def _resolve_metadata_batch(self, token_mints: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Resolve cache misses: Birdeye per mint (preferred, has names and logos),
+        then one getMultipleAccounts call per 100 mints for decimals not yet read
+        from the mint account. Results, failures and decimals are cached in memory
+        and on disk; only mint-account decimals get the long decimals expiry.
+        """
+        resolved = {}
+
         if self.birdeye_api_key:
-            try:
-                url = f"https://public-api.birdeye.so/defi/token_overview?address={token_mint}"
-                headers = {"X-API-KEY": self.birdeye_api_key}
+            if USE_PARALLEL_PROCESSING and len(token_mints) > 1:
+                with ThreadPoolExecutor(max_workers=min(10, len(token_mints))) as executor:
+                    for i in range(0, len(token_mints), self.batch_size):
+                        batch = token_mints[i:i + self.batch_size]
+                        future_to_mint = {
+                            executor.submit(self._fetch_birdeye_metadata, mint): mint
+                            for mint in batch
+                        }
+                        for future in as_completed(future_to_mint):
+                            mint = future_to_mint[future]
+                            try:
+                                metadata = future.result()
+                            except Exception as e:
+                                print(f"Error fetching metadata for {mint}: {str(e)}")
+                                metadata = None
+                            if metadata:
+                                resolved[mint] = metadata
+            else:
+                for mint in token_mints:
+                    metadata = self._fetch_birdeye_metadata(mint)
+                    if metadata:
+                        resolved[mint] = metadata
 
-                response = requests.get(url, headers=headers, timeout=5)
+        # Authoritative decimals: cached mint reads, then one batched RPC read for the rest
+        # (mints RPC recently failed to resolve are not asked again)
+        mint_decimals = {}
+        to_read = []
+        now = time.time()
+        for mint in token_mints:
+            cached = self._get_cached_decimals(mint, verified_only=True)
+            if cached is not None:
+                mint_decimals[mint] = cached
+            elif self.decimals_misses.get(mint, 0) <= now:
+                to_read.append(mint)
+        if to_read:
+            rpc_decimals = self._fetch_decimals_rpc_batch(to_read)
+            self._cache_decimals(rpc_decimals)
+            self._record_decimals_misses([mint for mint in to_read if mint not in rpc_decimals], now)
+            mint_decimals.update(rpc_decimals)
 
-                if response.status_code == 200:
-                    data = response.json()
+        unverified = {}
+        for mint in token_mints:
+            decimals = mint_decimals.get(mint)
+            if mint in resolved:
+                if decimals is not None:
+                    resolved[mint]["decimals"] = decimals
+                elif resolved[mint].get("decimals") is not None:
+                    unverified[mint] = int(resolved[mint]["decimals"])
+            elif decimals is not None:
+                resolved[mint] = {"symbol": "UNK", "name": "Unknown Token", "decimals": decimals, "logo": ""}
 
-                    if data.get("success") and data.get("data"):
-                        token_data = data["data"]
-                        metadata = {
-                            "symbol": token_data.get("symbol", "UNK"),
-                            "name": token_data.get("name", "Unknown Token"),
-                            "decimals": int(token_data.get("decimals", 9)),
-                            "logo": token_data.get("logo", "")
-                        }
-                        return metadata
+        failed = [mint for mint in token_mints if mint not in resolved]
 
-            except Exception as e:
-                debug(f"Birdeye metadata fetch failed for {token_mint[:8]}...: {str(e)}", file_only=True)
+        self._cache_metadata(resolved)
+        self._cache_decimals(unverified, verified=False)
+        if failed:
+            # Cache failures too, but for a shorter period
+            self._cache_metadata({mint: None for mint in failed}, is_failure=True)
+
+        result = dict(resolved)
+        for mint in failed:
+            result[mint] = None if SKIP_UNKNOWN_TOKENS else self._unknown_metadata()
+        return result
 
-        # Fallback to RPC method if Birdeye fails or is not available
+    def _unknown_metadata(self) -> Dict[str, Any]:
+        return {"symbol": "UNK", "name": "Unknown Token", "decimals": 9, "logo": ""}
+
+    def _fetch_token_metadata(self, token_mint: str) -> Optional[Dict[str, Any]]:
+        """Fetch metadata for a single token using Birdeye API (preferred) or RPC fallback"""
+        return self._resolve_metadata_batch([token_mint]).get(token_mint)
+
+    def _fetch_birdeye_metadata(self, token_mint: str) -> Optional[Dict[str, Any]]:
+        """Fetch metadata for a single token from Birdeye token_overview"""
         try:
-            # Get RPC endpoint for fallback
-            rpc_endpoint = os.getenv("RPC_ENDPOINT")
-            if not rpc_endpoint:
-                debug(f"No RPC endpoint available for fallback metadata for {token_mint[:8]}...", file_only=True)
-                if SKIP_UNKNOWN_TOKENS:
-                    return None
-                else:
-                    return {"symbol": "UNK", "name": "Unknown Token", "decimals": 9, "logo": ""}
-
-            # Use RPC to get token metadata
+            url = f"https://public-api.birdeye.so/defi/token_overview?address={token_mint}"
+            headers = {"X-API-KEY": self.birdeye_api_key}
+
+            response = requests.get(url, headers=headers, timeout=5)
+
+            if response.status_code == 200:
+                data = response.json()
+
+                if data.get("success") and data.get("data"):
+                    token_data = data["data"]
+                    return {
+                        "symbol": token_data.get("symbol", "UNK"),
+                        "name": token_data.get("name", "Unknown Token"),
+                        "decimals": int(token_data.get("decimals", 9)),
+                        "logo": token_data.get("logo", "")
+                    }
+
+        except Exception as e:
+            debug(f"Birdeye metadata fetch failed for {token_mint[:8]}...: {str(e)}", file_only=True)
+
+        return None
+
+    def _fetch_decimals_rpc_batch(self, token_mints: List[str]) -> Dict[str, int]:
+        """
+        Read mint decimals with one getMultipleAccounts call per 100 mints.
+        Returns only the mints that resolved to an SPL token mint account.
+        """
+        rpc_endpoint = os.getenv("RPC_ENDPOINT")
+        if not rpc_endpoint:
+            debug(f"No RPC endpoint available for fallback metadata for {len(token_mints)} tokens", file_only=True)
+            return {}
+
+        decimals = {}
+        for i in range(0, len(token_mints), RPC_MULTIPLE_ACCOUNTS_LIMIT):
+            chunk = token_mints[i:i + RPC_MULTIPLE_ACCOUNTS_LIMIT]
             payload = {
                 "jsonrpc": "2.0",
                 "id": "anarcho-metadata",
-                "method": "getAccountInfo",
+                "method": "getMultipleAccounts",
                 "params": [
-                    token_mint,
+                    chunk,
                     {"encoding": "jsonParsed"}
                 ]
             }
 
-            response = requests.post(rpc_endpoint, json=payload, timeout=5)
-
-            if response.status_code == 200:
-                data = response.json()
+            try:
+                response = requests.post(rpc_endpoint, json=payload, timeout=10)
+                if response.status_code != 200:
+                    debug(f"getMultipleAccounts returned HTTP {response.status_code} for {len(chunk)} tokens", file_only=True)
+                    continue
 
-                if "result" in data and data["result"]["value"]:
-                    # Extract metadata
-                    account_data = data["result"]["value"]
-                    program_id = account_data.get("owner")
-
-                    # Check if it's a token account
-                    if program_id == "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA":
-                        parsed_data = account_data.get("data", {}).get("parsed", {}).get("info", {})
-                        metadata = {
-                            "symbol": parsed_data.get("symbol", "UNK"),
-                            "name": parsed_data.get("name", "Unknown Token"),
-                            "decimals": int(parsed_data.get("decimals", 9)),
-                            "logo": ""  # No logo in basic metadata
-                        }
-                        return metadata
+                accounts = (response.json().get("result") or {}).get("value") or []
+                for mint, account in zip(chunk, accounts):
+                    if not account or account.get("owner") not in SPL_TOKEN_PROGRAM_IDS:
+                        continue
+                    data = account.get("data")
+                    if not isinstance(data, dict):
+                        continue
+                    parsed = data.get("parsed", {})
+                    if parsed.get("type") != "mint":
+                        continue
+                    mint_decimals = parsed.get("info", {}).get("decimals")
+                    if mint_decimals is not None:
+                        decimals[mint] = int(mint_decimals)
 
-            # Return default values if metadata not found
-            if SKIP_UNKNOWN_TOKENS:
-                return None
-            else:
-                return {"symbol": "UNK", "name": "Unknown Token", "decimals": 9, "logo": ""}
+            except requests.exceptions.Timeout:
+                debug(f"Timeout fetching metadata for {len(chunk)} tokens (10s timeout)", file_only=True)
+            except Exception as e:
+                debug(f"Error fetching metadata for {len(chunk)} tokens: {str(e)}", file_only=True)
 
-        except requests.exceptions.Timeout:
-            debug(f"Timeout fetching metadata for {token_mint[:8]}... (5s timeout)", file_only=True)
-            if SKIP_UNKNOWN_TOKENS:
-                return None
-            else:
-                return {"symbol": "UNK", "name": "Unknown Token", "decimals": 9, "logo": ""}
-        except Exception as e:
-            debug(f"Error fetching metadata for {token_mint[:8]}...: {str(e)}", file_only=True)
+        return decimals
 
-            # Return default values on error if not skipping unknown tokens
-            if SKIP_UNKNOWN_TOKENS:
-                return None
-            else:
-                return {"symbol": "UNK", "name": "Unknown Token", "decimals": 9, "logo": ""}
-    
     def _cache_metadata(self, metadata_dict: Dict[str, Optional[Dict[str, Any]]], is_failure=False) -> None:
         """Save metadata to cache with expiry time"""
         if not metadata_dict:
@@ -312,22 +496,87 @@ class TokenMetadataService:
             for mint, metadata in metadata_dict.items():
                 self.metadata_cache[mint] = metadata
                 self.metadata_cache_expiry[mint] = expiry_time
-    
+
+        if self.store:
+            try:
+                self.store.store_metadata(metadata_dict, expiry_time)
+            except Exception as e:
+                debug(f"Could not persist token metadata: {e}", file_only=True)
+
+    def _cache_decimals(self, decimals_dict: Dict[str, int], verified: bool = True) -> None:
+        """
+        Save decimals to cache. Decimals read from the mint account get the long
+        decimals expiry; unverified ones (Birdeye, which defaults to 9) only
+        UNVERIFIED_DECIMALS_SECONDS, and never replace a verified value.
+        """
+        if not decimals_dict:
+            return
+
+        now = time.time()
+        if verified:
+            expiry_time = now + DECIMALS_CACHE_DAYS * 24 * 3600
+        else:
+            expiry_time = now + UNVERIFIED_DECIMALS_SECONDS
+        with self.cache_lock:
+            if not verified:
+                decimals_dict = {
+                    mint: decimals for mint, decimals in decimals_dict.items()
+                    if mint not in self.decimals_cache or not self.decimals_cache[mint][2]
+                    or self.decimals_cache[mint][1] <= now
+                }
+            for mint, decimals in decimals_dict.items():
+                self.decimals_cache[mint] = (int(decimals), expiry_time, verified)
+                if verified:
+                    self.decimals_misses.pop(mint, None)
+        if not decimals_dict:
+            return
+
+        if self.store:
+            try:
+                self.store.store_decimals(decimals_dict, expiry_time, verified)
+            except Exception as e:
+                debug(f"Could not persist token decimals: {e}", file_only=True)
+
+    def _lookup_cache(self, token_mint: str) -> tuple:
+        """Return (hit, metadata); a hit with None metadata is a cached failure"""
+        current_time = time.time()
+
+        with self.cache_lock:
+            if token_mint in self.metadata_cache and self.metadata_cache_expiry.get(token_mint, 0) > current_time:
+                metadata = self.metadata_cache[token_mint]
+                if metadata is None and not SKIP_UNKNOWN_TOKENS:
+                    metadata = self._unknown_metadata()
+                return True, metadata
+
+        return False, None
+
     def _get_from_cache(self, token_mint: str) -> Optional[Dict[str, Any]]:
         """Check if metadata is in cache and still valid"""
+        return self._lookup_cache(token_mint)[1]
+
+    def _get_cached_decimals(self, token_mint: str, verified_only: bool = False) -> Optional[int]:
         current_time = time.time()
-        
         with self.cache_lock:
-            if token_mint in self.metadata_cache and self.metadata_cache_expiry.get(token_mint, 0) > current_time:
-                return self.metadata_cache[token_mint]
-                
+            cached = self.decimals_cache.get(token_mint)
+            if cached and cached[1] > current_time and (cached[2] or not verified_only):
+                return cached[0]
         return None
+
+    def _record_decimals_misses(self, token_mints: List[str], now: float) -> None:
+        with self.cache_lock:
+            for mint in token_mints:
+                self.decimals_misses[mint] = now + FAILURE_CACHE_SECONDS
     
     def clear_cache(self) -> None:
         """Clear the metadata cache"""
         with self.cache_lock:
             self.metadata_cache = {}
             self.metadata_cache_expiry = {}
+            self.decimals_cache = {}
+            self.decimals_misses = {}
+
+        if self.store:
+            self.store.clear()
             
         print("Metadata cache cleared")
     
@@ -349,8 +598,42 @@ class TokenMetadataService:
             return metadata.get("symbol", "UNK")
         return "UNK"
     
+    def get_decimals_batch(self, token_mints: List[str]) -> Dict[str, int]:
+        """
+        Get decimals for multiple tokens, resolving misses with batched RPC.
+        Mints whose decimals cannot be determined are omitted.
+        """
+        result = {}
+        to_fetch = []
+        now = time.time()
+
+        for mint in dict.fromkeys(token_mints):
+            if mint.startswith("STAKED_SOL_"):
+                result[mint] = 9
+                continue
+            if mint in self.common_tokens:
+                result[mint] = int(self.common_tokens[mint]["decimals"])
+                continue
+            cached = self._get_cached_decimals(mint)
+            if cached is not None:
+                result[mint] = cached
+            elif self.decimals_misses.get(mint, 0) <= now:
+                to_fetch.append(mint)
+
+        if to_fetch:
+            fetched = self._fetch_decimals_rpc_batch(to_fetch)
+            self._cache_decimals(fetched)
+            result.update(fetched)
+            self._record_decimals_misses([mint for mint in to_fetch if mint not in fetched], now)
+
+        return result
+
     def get_token_decimals(self, token_mint: str) -> int:
         """Convenience method to get just the token decimals"""
+        decimals = self.get_decimals_batch([token_mint]).get(token_mint)
+        if decimals is not None:
+            return decimals
+
         metadata = self.get_metadata(token_mint)
         if metadata:
             # Ensure return value is an integer
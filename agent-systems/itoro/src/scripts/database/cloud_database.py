@@ -439,12 +439,22 @@ class CloudDatabaseManager:
             )
         ''')
         
+        # Idempotency key for write-behind replication (snapshot outbox retries)
+        cursor.execute('''
+            ALTER TABLE portfolio_history ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(64)
+        ''')
+        
         # Create indexes
         cursor.execute('''
             CREATE INDEX IF NOT EXISTS idx_portfolio_history_timestamp 
             ON portfolio_history(timestamp DESC)
         ''')
         
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_portfolio_history_idempotency_key 
+            ON portfolio_history(idempotency_key)
+        ''')
+        
         cursor.execute('''
             CREATE INDEX IF NOT EXISTS idx_portfolio_balances_token 
             ON portfolio_balances(token_mint)
@@ -1376,6 +1386,41 @@ class CloudDatabaseManager:
             warning(f"Failed to upsert live portfolio snapshot: {e}")
             return False
 
+    def save_portfolio_history_batch(self, rows: List[Dict]) -> int:
+        """Insert many portfolio_history rows in one statement.
+        
+        Rows already stored under the same idempotency_key are skipped, so a batch
+        retried after a timeout never duplicates snapshots. Raises on failure so the
+        caller can keep the rows queued.
+        """
+        if not rows:
+            return 0
+        
+        placeholders = ', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)'] * len(rows))
+        query = f'''
+            INSERT INTO portfolio_history (
+                timestamp, total_value_usd, usdc_balance, sol_balance, sol_value_usd,
+                positions_value_usd, change_detected, change_type, metadata, idempotency_key
+            ) VALUES {placeholders}
+            ON CONFLICT (idempotency_key) DO NOTHING
+        '''
+        params = []
+        for row in rows:
+            params.extend((
+                row.get('timestamp'),
+                row.get('total_value_usd', 0.0),
+                row.get('usdc_balance', 0.0),
+                row.get('sol_balance', 0.0),
+                row.get('sol_value_usd', 0.0),
+                row.get('positions_value_usd', 0.0),
+                row.get('change_detected', False),
+                row.get('change_type'),
+                json.dumps(row.get('metadata', {})),
+                row.get('idempotency_key')
+            ))
+        
+        return self.execute_query(query, tuple(params), fetch=False)
+
     def add_live_trade(self, signature: str, side: str, size: float, price_usd: float,
                        usd_value: float, agent: str, token_mint: str,
                        metadata: Optional[dict] = None, token_symbol: str = None, token_name: str = None) -> bool:
@@ -5,7 +5,7 @@ from datetime import datetime
 from typing import Optional, List, Dict
 
 import requests
-from src.scripts.shared_services.logger import info
+from src.scripts.shared_services.logger import info, warning
 
 
 class RestDatabaseManager:
@@ -26,6 +26,8 @@ class RestDatabaseManager:
             'apikey': service_role,
             'Content-Type': 'application/json',
         }
+        # Cleared if portfolio_history lacks migration 003 (idempotency_key + unique index)
+        self._history_idempotency = True
     
     def _test_connection(self) -> bool:
         """Test if the REST API connection is working"""
@@ -122,6 +124,74 @@ class RestDatabaseManager:
         }
         return self._post('portfolio_history', payload)
 
+    def save_portfolio_history_batch(self, rows: List[dict]) -> int:
+        if not rows:
+            return 0
+        # One bulk insert; rows already stored under the same idempotency_key are skipped
+        if self._history_idempotency:
+            rsp = self._post_rows('portfolio_history?on_conflict=idempotency_key', rows, upsert='ignore-duplicates')
+            if self._missing_idempotency_schema(rsp):
+                warning("portfolio_history has no idempotency_key unique index (run migration "
+                        "003_add_portfolio_history_idempotency_key.sql); inserting one row at a time")
+                self._history_idempotency = False
+            elif not rsp.ok:
+                raise RuntimeError(f'REST bulk insert into portfolio_history failed ({rsp.status_code})')
+        if not self._history_idempotency:
+            self._insert_history_rows(rows)
+
+        # Dashboard, position validator and paper trading read the latest snapshot from here
+        portfolio_rows = [{
+            'timestamp': row.get('timestamp'),
+            'total_value_usd': row.get('total_value_usd', 0.0),
+            'usdc_balance': row.get('usdc_balance', 0.0),
+            'sol_balance': row.get('sol_balance', 0.0),
+            'sol_value_usd': row.get('sol_value_usd', 0.0),
+            'positions_value_usd': row.get('positions_value_usd', 0.0),
+            'change_detected': row.get('change_detected', False),
+            'change_type': row.get('change_type') or 'snapshot',
+            'metadata': row.get('metadata', {}),
+        } for row in rows]
+        if not self._post('paper_trading_portfolio', portfolio_rows):
+            raise RuntimeError('REST bulk insert into paper_trading_portfolio failed')
+        return len(rows)
+
+    def _insert_history_rows(self, rows: List[dict]) -> None:
+        """
+        Insert rows one at a time, skipping timestamps already stored. Without the
+        unique index a retried multi-row insert that had partly failed would
+        duplicate the rows that made it in.
+        """
+        for row in rows:
+            stored = self._get('portfolio_history', {
+                'select': 'id',
+                'timestamp': f"eq.{row.get('timestamp')}",
+                'limit': 1,
+            })
+            if stored is None:
+                raise RuntimeError('REST lookup in portfolio_history failed')
+            if stored:
+                continue
+            rsp = self._post_rows('portfolio_history', [{k: v for k, v in row.items() if k != 'idempotency_key'}])
+            if not rsp.ok:
+                raise RuntimeError(f'REST insert into portfolio_history failed ({rsp.status_code})')
+
+    def _post_rows(self, path: str, rows: List[dict], upsert: Optional[str] = None) -> requests.Response:
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        headers = dict(self.headers)
+        headers['Prefer'] = 'return=minimal' + (f",resolution={upsert}" if upsert else '')
+        return requests.post(url, headers=headers, data=json.dumps(rows, default=str), timeout=15)
+
+    @staticmethod
+    def _missing_idempotency_schema(rsp: requests.Response) -> bool:
+        """Unknown column (PGRST204/42703) or no unique index for on_conflict (42P10)"""
+        if rsp.status_code != 400:
+            return False
+        try:
+            code = rsp.json().get('code')
+        except Exception:
+            return False
+        return code in ('PGRST204', '42703', '42P10')
+
     def add_live_trade(self, signature: str, side: str, size: float, price_usd: float,
                        usd_value: float, agent: str, token_mint: str,
                        metadata: Optional[dict] = None, token_symbol: str = None, token_name: str = None) -> bool:
@@ -86,7 +86,14 @@ class DatabaseResetManager:
                     debug(f"Closed database connection: {id(conn)}")
             except Exception as e:
                 warning(f"Error closing database connection {id(conn)}: {e}")
-        
+
+        # Pooled per-thread connections reopen lazily after the reset
+        try:
+            from src.scripts.database.sqlite_manager import close_sqlite_manager
+            close_sqlite_manager(self.paper_trading_db_path)
+        except ImportError:
+            pass
+
         info(f"Closed {closed_count} database connections")
         return closed_count > 0
     
@@ -5,7 +5,6 @@ Provides efficient SQLite-based caching for token prices and metadata
 
 import os
 import time
-import sqlite3
 import threading
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
@@ -13,6 +12,7 @@ import json
 import logging
 
 from src.scripts.webhooks.webhook_config import CACHE_DB_PATH
+from src.scripts.database.sqlite_manager import get_sqlite_manager
 
 # Set up logging
 # logging.basicConfig(level=logging.INFO)  # Removed - main logger configured in src/scripts/shared_services/logger.py
@@ -45,7 +45,8 @@ class DatabaseCache:
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         
         self.db_path = db_path
-        self.lock = threading.Lock()
+        self.lock = threading.Lock()  # Only guards maintenance (VACUUM); reads/writes rely on WAL
+        self.db = get_sqlite_manager(db_path)
         
         # Initialize database
         self._initialize_db()
@@ -54,8 +55,7 @@ class DatabaseCache:
     
     def _initialize_db(self):
         """Initialize the database schema"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
+        with self.db.transaction() as conn:
             cursor = conn.cursor()
             
             # Create token_prices table
@@ -117,52 +117,35 @@ class DatabaseCache:
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_metadata_expiry ON token_metadata (expiry_time)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_wallet_tokens ON wallet_tokens (wallet_address)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_token_changes_processed ON token_changes (processed)')
-            
-            conn.commit()
-            conn.close()
     
     def get_price(self, token_mint: str) -> Optional[float]:
         """Get price from cache if valid"""
         current_time = int(time.time())
         
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                'SELECT price, expiry_time FROM token_prices WHERE token_mint = ? AND expiry_time > ?',
-                (token_mint, current_time)
-            )
-            result = cursor.fetchone()
-            
-            conn.close()
-            
-            if result:
-                price, expiry = result
-                debug(f"DB Cache hit for {token_mint[:8]}... price: ${price}", file_only=True)
-                return price
-            
-            return None
+        result = self.db.fetchone(
+            'SELECT price, expiry_time FROM token_prices WHERE token_mint = ? AND expiry_time > ?',
+            (token_mint, current_time)
+        )
+        
+        if result:
+            price, expiry = result
+            debug(f"DB Cache hit for {token_mint[:8]}... price: ${price}", file_only=True)
+            return price
+        
+        return None
     
     def store_price(self, token_mint: str, price: Optional[float], expiry_time: int) -> None:
         """Store price in cache with expiry time"""
         current_time = int(time.time())
         
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                '''
-                INSERT OR REPLACE INTO token_prices 
-                (token_mint, price, update_time, expiry_time) 
-                VALUES (?, ?, ?, ?)
-                ''',
-                (token_mint, price, current_time, expiry_time)
-            )
-            
-            conn.commit()
-            conn.close()
+        self.db.execute(
+            '''
+            INSERT OR REPLACE INTO token_prices 
+            (token_mint, price, update_time, expiry_time) 
+            VALUES (?, ?, ?, ?)
+            ''',
+            (token_mint, price, current_time, expiry_time)
+        )
     
     def store_prices(self, prices_dict: Dict[str, Optional[float]], expiry_times: Dict[str, int]) -> None:
         """Store multiple prices in cache efficiently"""
@@ -171,66 +154,55 @@ class DatabaseCache:
             
         current_time = int(time.time())
         
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            for token_mint, price in prices_dict.items():
-                expiry_time = expiry_times.get(token_mint, current_time + 3600)  # Default 1 hour
-                
-                cursor.execute(
-                    '''
-                    INSERT OR REPLACE INTO token_prices 
-                    (token_mint, price, update_time, expiry_time) 
-                    VALUES (?, ?, ?, ?)
-                    ''',
-                    (token_mint, price, current_time, expiry_time)
-                )
-            
-            conn.commit()
-            conn.close()
+        rows = [
+            (token_mint, price, current_time, expiry_times.get(token_mint, current_time + 3600))  # Default 1 hour
+            for token_mint, price in prices_dict.items()
+        ]
+        
+        # One transaction for the whole batch
+        self.db.executemany(
+            '''
+            INSERT OR REPLACE INTO token_prices 
+            (token_mint, price, update_time, expiry_time) 
+            VALUES (?, ?, ?, ?)
+            ''',
+            rows
+        )
     
     def get_metadata(self, token_mint: str) -> Optional[Dict[str, Any]]:
         """Get metadata from cache if valid"""
         current_time = int(time.time())
         
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                '''
-                SELECT symbol, name, decimals, logo, extra_data, expiry_time 
-                FROM token_metadata 
-                WHERE token_mint = ? AND expiry_time > ?
-                ''',
-                (token_mint, current_time)
-            )
-            result = cursor.fetchone()
-            
-            conn.close()
-            
-            if result:
-                symbol, name, decimals, logo, extra_data_json, expiry = result
-                metadata = {
-                    "symbol": symbol,
-                    "name": name,
-                    "decimals": decimals,
-                    "logo": logo
-                }
-                
-                # Add any extra data if available
-                if extra_data_json:
-                    try:
-                        extra_data = json.loads(extra_data_json)
-                        metadata.update(extra_data)
-                    except:
-                        pass
-                        
-                debug(f"DB Cache hit for {token_mint[:8]}... metadata: {symbol}/{name}", file_only=True)
-                return metadata
+        result = self.db.fetchone(
+            '''
+            SELECT symbol, name, decimals, logo, extra_data, expiry_time 
+            FROM token_metadata 
+            WHERE token_mint = ? AND expiry_time > ?
+            ''',
+            (token_mint, current_time)
+        )
+        
+        if result:
+            symbol, name, decimals, logo, extra_data_json, expiry = result
+            metadata = {
+                "symbol": symbol,
+                "name": name,
+                "decimals": decimals,
+                "logo": logo
+            }
             
-            return None
+            # Add any extra data if available
+            if extra_data_json:
+                try:
+                    extra_data = json.loads(extra_data_json)
+                    metadata.update(extra_data)
+                except:
+                    pass
+                    
+            debug(f"DB Cache hit for {token_mint[:8]}... metadata: {symbol}/{name}", file_only=True)
+            return metadata
+        
+        return None
     
     def store_metadata(self, token_mint: str, metadata: Optional[Dict[str, Any]], expiry_time: int) -> None:
         """Store metadata in cache with expiry time"""
@@ -249,21 +221,14 @@ class DatabaseCache:
         extra_data = {k: v for k, v in metadata.items() if k not in ["symbol", "name", "decimals", "logo"]}
         extra_data_json = json.dumps(extra_data) if extra_data else None
         
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                '''
-                INSERT OR REPLACE INTO token_metadata 
-                (token_mint, symbol, name, decimals, logo, extra_data, update_time, expiry_time) 
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''',
-                (token_mint, symbol, name, decimals, logo, extra_data_json, current_time, expiry_time)
-            )
-            
-            conn.commit()
-            conn.close()
+        self.db.execute(
+            '''
+            INSERT OR REPLACE INTO token_metadata 
+            (token_mint, symbol, name, decimals, logo, extra_data, update_time, expiry_time) 
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''',
+            (token_mint, symbol, name, decimals, logo, extra_data_json, current_time, expiry_time)
+        )
     
     def store_token_balance(self, wallet: str, token_mint: str, amount: float, 
                            decimals: int, raw_amount: Optional[str] = None) -> None:
@@ -274,8 +239,7 @@ class DatabaseCache:
         if raw_amount is None:
             raw_amount = str(int(amount * (10 ** decimals)))
         
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
+        with self.db.transaction() as conn:
             cursor = conn.cursor()
             
             # First, get the current balance to detect changes
@@ -326,115 +290,81 @@ class DatabaseCache:
                     (wallet, token_mint, 0, amount, amount, 
                      100, decimals, current_time, 'add')
                 )
-            
-            conn.commit()
-            conn.close()
     
     def get_wallet_tokens(self, wallet: str) -> List[Dict[str, Any]]:
         """Get all tokens for a wallet"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # Enable row factory for easy dict conversion
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                '''
-                SELECT wt.*, tp.price, tm.symbol, tm.name 
-                FROM wallet_tokens wt
-                LEFT JOIN token_prices tp ON wt.token_mint = tp.token_mint
-                LEFT JOIN token_metadata tm ON wt.token_mint = tm.token_mint
-                WHERE wt.wallet_address = ?
-                ''',
-                (wallet,)
-            )
-            
-            results = cursor.fetchall()
-            conn.close()
-            
-            # Convert rows to dictionaries
-            tokens = []
-            for row in results:
-                token = dict(row)
-                # Calculate USD value if price is available
-                if token.get('price') is not None:
-                    token['value_usd'] = token['amount'] * token['price']
-                else:
-                    token['value_usd'] = None
-                tokens.append(token)
-            
-            return tokens
+        tokens = self.db.fetchall_dicts(
+            '''
+            SELECT wt.*, tp.price, tm.symbol, tm.name 
+            FROM wallet_tokens wt
+            LEFT JOIN token_prices tp ON wt.token_mint = tp.token_mint
+            LEFT JOIN token_metadata tm ON wt.token_mint = tm.token_mint
+            WHERE wt.wallet_address = ?
+            ''',
+            (wallet,)
+        )
+        
+        for token in tokens:
+            # Calculate USD value if price is available
+            if token.get('price') is not None:
+                token['value_usd'] = token['amount'] * token['price']
+            else:
+                token['value_usd'] = None
+        
+        return tokens
     
     def get_token_changes(self, processed_only: bool = False, 
                          limit: int = 100) -> List[Dict[str, Any]]:
         """Get recent token changes"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            # Query with optional filter for processed status
-            if processed_only:
-                where_clause = "WHERE processed = 1"
+        # Query with optional filter for processed status
+        if processed_only:
+            where_clause = "WHERE processed = 1"
+        else:
+            where_clause = "WHERE processed = 0"
+            
+        changes = self.db.fetchall_dicts(
+            f'''
+            SELECT tc.*, tm.symbol, tm.name, tp.price
+            FROM token_changes tc
+            LEFT JOIN token_metadata tm ON tc.token_mint = tm.token_mint
+            LEFT JOIN token_prices tp ON tc.token_mint = tp.token_mint
+            {where_clause}
+            ORDER BY tc.change_time DESC
+            LIMIT ?
+            ''',
+            (limit,)
+        )
+        
+        # Add USD values where price is available
+        for change in changes:
+            if change.get('price') is not None:
+                change['previous_usd'] = change['previous_amount'] * change['price']
+                change['new_usd'] = change['new_amount'] * change['price']
+                change['usd_change'] = change['amount_change'] * change['price']
             else:
-                where_clause = "WHERE processed = 0"
-                
-            cursor.execute(
-                f'''
-                SELECT tc.*, tm.symbol, tm.name, tp.price
-                FROM token_changes tc
-                LEFT JOIN token_metadata tm ON tc.token_mint = tm.token_mint
-                LEFT JOIN token_prices tp ON tc.token_mint = tp.token_mint
-                {where_clause}
-                ORDER BY tc.change_time DESC
-                LIMIT ?
-                ''',
-                (limit,)
-            )
-            
-            results = cursor.fetchall()
-            conn.close()
-            
-            # Convert to list of dicts
-            changes = [dict(row) for row in results]
-            
-            # Add USD values where price is available
-            for change in changes:
-                if change.get('price') is not None:
-                    change['previous_usd'] = change['previous_amount'] * change['price']
-                    change['new_usd'] = change['new_amount'] * change['price']
-                    change['usd_change'] = change['amount_change'] * change['price']
-                else:
-                    change['previous_usd'] = None
-                    change['new_usd'] = None
-                    change['usd_change'] = None
-            
-            return changes
+                change['previous_usd'] = None
+                change['new_usd'] = None
+                change['usd_change'] = None
+        
+        return changes
     
     def mark_changes_processed(self, change_ids: List[int]) -> None:
         """Mark token changes as processed"""
         if not change_ids:
             return
             
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Use parameterized query with multiple placeholders
-            placeholders = ','.join(['?'] * len(change_ids))
-            cursor.execute(
-                f'UPDATE token_changes SET processed = 1 WHERE id IN ({placeholders})',
-                change_ids
-            )
-            
-            conn.commit()
-            conn.close()
+        # Use parameterized query with multiple placeholders
+        placeholders = ','.join(['?'] * len(change_ids))
+        self.db.execute(
+            f'UPDATE token_changes SET processed = 1 WHERE id IN ({placeholders})',
+            change_ids
+        )
     
     def clear_expired_cache(self, all_price=False, all_metadata=False) -> Tuple[int, int]:
         """Clear expired cache entries, returns (price_count, metadata_count)"""
         current_time = int(time.time())
         
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
+        with self.db.transaction() as conn:
             cursor = conn.cursor()
             
             # Delete expired price entries
@@ -452,19 +382,13 @@ class DatabaseCache:
             else:
                 cursor.execute('DELETE FROM token_metadata WHERE expiry_time < ?', (current_time,))
                 metadata_count = cursor.rowcount
-            
-            conn.commit()
-            conn.close()
-            
-            return price_count, metadata_count
+        
+        return price_count, metadata_count
     
     def vacuum_database(self) -> None:
         """Compact the database to reduce file size"""
         with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('VACUUM')
-            conn.close()
+            self.db.execute('VACUUM')
             
             # Get current file size
             file_size_kb = os.path.getsize(self.db_path) / 1024
@@ -472,8 +396,7 @@ class DatabaseCache:
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get statistics about the cache"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
+        with self.db.read() as conn:
             cursor = conn.cursor()
             
             # Get counts
@@ -493,7 +416,6 @@ class DatabaseCache:
             unprocessed_count = cursor.fetchone()[0]
             
             # Get current file size
-            conn.close()
             file_size_kb = os.path.getsize(self.db_path) / 1024
             
             return {
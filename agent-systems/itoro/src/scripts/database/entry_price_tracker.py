@@ -7,7 +7,6 @@ Uses SQLite database for efficient storage and retrieval.
 
 import os
 import json
-import sqlite3
 import time
 import requests
 from typing import Dict, Optional, List, Tuple
@@ -22,6 +21,8 @@ except ImportError:
     # Try relative imports when running from test directory
     from src.scripts.shared_services.logger import info, warning, error, debug
 
+from src.scripts.database.sqlite_manager import get_sqlite_manager
+
 # Cloud database import
 try:
     from src.scripts.database.cloud_database import get_cloud_database_manager
@@ -55,12 +56,13 @@ class EntryPriceTracker:
     def __init__(self, db_path: str = "src/data/entry_prices.db"):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = get_sqlite_manager(self.db_path)
         self._init_database()
         
     def _init_database(self):
         """Initialize SQLite database with entry prices table"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.transaction() as conn:
                 conn.execute('''
                     CREATE TABLE IF NOT EXISTS entry_prices (
                         mint TEXT PRIMARY KEY,
@@ -201,7 +203,7 @@ class EntryPriceTracker:
         try:
             current_time = time.time()
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.transaction() as conn:
                 # Check if record exists and get current values
                 cursor = conn.execute(
                     "SELECT entry_price_usd, entry_amount FROM entry_prices WHERE mint = ?",
@@ -305,7 +307,7 @@ class EntryPriceTracker:
                             debug(f"REST API also failed, falling back to local: {rest_error}")
             
             # Fallback to local database
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.read() as conn:
                 cursor = conn.execute(
                     "SELECT mint, entry_price_usd, entry_amount, entry_timestamp, last_updated, source, notes FROM entry_prices WHERE mint = ?",
                     (mint,)
@@ -331,7 +333,7 @@ class EntryPriceTracker:
         """Get all entry price records"""
         try:
             entry_prices = {}
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.read() as conn:
                 cursor = conn.execute(
                     "SELECT mint, entry_price_usd, entry_amount, entry_timestamp, last_updated, source, notes FROM entry_prices"
                 )
@@ -357,7 +359,7 @@ class EntryPriceTracker:
     def delete_entry_price(self, mint: str) -> bool:
         """Delete entry price record for a token"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.transaction() as conn:
                 conn.execute("DELETE FROM entry_prices WHERE mint = ?", (mint,))
                 conn.commit()
                 info(f"🗑️ Deleted entry price for {mint[:8]}...")
@@ -370,7 +372,7 @@ class EntryPriceTracker:
     def clear_all_entry_prices(self) -> bool:
         """Clear all entry price records"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.transaction() as conn:
                 conn.execute("DELETE FROM entry_prices")
                 conn.commit()
                 info("🗑️ Cleared all entry price records")
@@ -454,7 +456,7 @@ class EntryPriceTracker:
     def get_entry_price_summary(self) -> Dict:
         """Get summary statistics of entry prices"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.read() as conn:
                 cursor = conn.execute("SELECT COUNT(*) FROM entry_prices")
                 total_count = cursor.fetchone()[0]
                 
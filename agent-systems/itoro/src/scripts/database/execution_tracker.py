@@ -4,13 +4,14 @@ Execution Tracker Database
 Tracks all agent executions including copybot, risk, harvesting, and staking agents
 """
 
-import sqlite3
 import json
 import time
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 import logging
 
+from src.scripts.database.sqlite_manager import get_sqlite_manager
+
 # Cloud database import
 try:
     from src.scripts.database.cloud_database import get_cloud_database_manager
@@ -24,12 +25,13 @@ class ExecutionTracker:
     def __init__(self, db_path: str = "src/data/execution_tracker.db"):
         """Initialize the execution tracker database"""
         self.db_path = db_path
+        self.db = get_sqlite_manager(db_path)
         self._init_database()
     
     def _init_database(self):
         """Initialize the database with required tables"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.transaction() as conn:
                 cursor = conn.cursor()
                 
                 # Create executions table
@@ -178,7 +180,7 @@ class ExecutionTracker:
                                   metadata: Optional[Dict[str, Any]] = None) -> bool:
         """Fallback method to log execution to local database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.transaction() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute("""
@@ -238,7 +240,7 @@ class ExecutionTracker:
             bool: True if logged successfully, False otherwise
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.transaction() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute("""
@@ -277,7 +279,7 @@ class ExecutionTracker:
                       limit: int = 100) -> List[Dict[str, Any]]:
         """Get execution history with optional filters"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.read() as conn:
                 cursor = conn.cursor()
                 
                 query = "SELECT * FROM executions WHERE 1=1"
@@ -317,12 +319,36 @@ class ExecutionTracker:
             logger.error(f"❌ Failed to get executions: {e}")
             return []
     
+    def get_executions_after(self, after_id: int, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Get executions logged after a given id, oldest first (incremental readers keep the last id as a cursor)"""
+        try:
+            with self.db.read() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT * FROM executions WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit))
+                columns = [description[0] for description in cursor.description]
+                
+                results = []
+                for row in cursor.fetchall():
+                    result = dict(zip(columns, row))
+                    if result.get('metadata'):
+                        try:
+                            result['metadata'] = json.loads(result['metadata'])
+                        except:
+                            pass
+                    results.append(result)
+                
+                return results
+                
+        except Exception as e:
+            logger.error(f"❌ Failed to get executions: {e}")
+            return []
+    
     def get_ai_analysis(self, agent_type: Optional[str] = None,
                        wallet_address: Optional[str] = None,
                        limit: int = 100) -> List[Dict[str, Any]]:
         """Get AI analysis history with optional filters"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.read() as conn:
                 cursor = conn.cursor()
                 
                 query = "SELECT * FROM ai_analysis WHERE 1=1"
@@ -357,7 +383,7 @@ class ExecutionTracker:
                               transaction_signature: Optional[str] = None) -> bool:
         """Update execution status after completion"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.transaction() as conn:
                 cursor = conn.cursor()
                 
                 if error_message and transaction_signature:
@@ -398,7 +424,7 @@ class ExecutionTracker:
                           time_period_hours: int = 24) -> Dict[str, Any]:
         """Get execution statistics for the specified time period"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.read() as conn:
                 cursor = conn.cursor()
                 
                 cutoff_time = time.time() - (time_period_hours * 3600)
@@ -0,0 +1,13 @@
+-- Migration: Add idempotency_key to portfolio_history
+-- Purpose: Let the snapshot outbox retry batches without duplicating rows
+--          (the direct-Postgres manager applies this itself; run it on Supabase for the REST backend)
+-- Created: 2026-10-18
+
+ALTER TABLE portfolio_history 
+ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(64);
+
+-- Unique index targeted by ON CONFLICT (idempotency_key) / on_conflict=idempotency_key
+CREATE UNIQUE INDEX IF NOT EXISTS idx_portfolio_history_idempotency_key 
+ON portfolio_history(idempotency_key);
+
+COMMENT ON COLUMN portfolio_history.idempotency_key IS 'Snapshot key from the local outbox; retried batches are skipped on conflict';
@@ -0,0 +1,382 @@
+"""
+🌙 Anarcho Capital's Cloud Snapshot Outbox
+Durable write-behind queue for portfolio snapshots headed to the cloud database
+Built with love by Anarcho Capital 🚀
+
+Snapshots are written to a local SQLite outbox on the snapshot path and a
+background flusher replicates them to ``portfolio_history`` in batches. Every
+row carries an idempotency key so a batch that is retried after a timeout
+never produces duplicates in the cloud.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any
+
+try:
+    from src.scripts.shared_services.logger import debug, info, warning, error
+except ImportError:
+    def debug(msg, file_only=False):
+        if not file_only:
+            print(f"DEBUG: {msg}")
+
+    def info(msg, file_only=False):
+        print(f"INFO: {msg}")
+
+    def warning(msg, file_only=False):
+        print(f"WARNING: {msg}")
+
+    def error(msg, file_only=False):
+        print(f"ERROR: {msg}")
+
+# Cloud database import
+try:
+    from src.scripts.database.cloud_database import get_cloud_database_manager
+    CLOUD_DB_AVAILABLE = True
+except ImportError:
+    CLOUD_DB_AVAILABLE = False
+
+
+def make_idempotency_key(scope: str, timestamp: datetime) -> str:
+    """Deterministic key for a snapshot so re-enqueues and retries collapse to one cloud row"""
+    raw = f"{scope}|{timestamp.isoformat()}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:40]
+
+
+class SnapshotOutbox:
+    """
+    Local SQLite outbox with a background flusher that batches snapshots into
+    multi-row cloud INSERTs. Cloud latency and outages never block enqueue().
+    """
+
+    def __init__(self, db_path: str, batch_size: int = 50, flush_interval: float = 5.0,
+                 max_backoff: float = 300.0, send_batch=None):
+        """
+        Args:
+            db_path: SQLite file holding the outbox table
+            batch_size: Maximum snapshots sent per cloud INSERT
+            flush_interval: Seconds between flush attempts when idle
+            max_backoff: Upper bound on retry delay while the cloud is unreachable
+            send_batch: Optional callable(rows) -> int used instead of the cloud manager
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self._send_batch_override = send_batch
+
+        self.db_lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._flusher_thread = None
+        self._running = False
+        self._backoff = 0.0
+
+        # Replication metrics
+        self.stats_lock = threading.Lock()
+        self.total_enqueued = 0
+        self.total_replicated = 0
+        self.total_batches = 0
+        self.failed_batches = 0
+        self.last_flush_time: Optional[float] = None
+        self.last_flush_duration_ms = 0.0
+        self.last_error: Optional[str] = None
+
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=20.0)
+
+    def _init_database(self):
+        """Create the outbox table"""
+        with self.db_lock:
+            conn = self._connect()
+            try:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS cloud_snapshot_outbox (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        idempotency_key TEXT UNIQUE NOT NULL,
+                        payload TEXT NOT NULL,
+                        enqueued_at REAL NOT NULL,
+                        attempts INTEGER DEFAULT 0,
+                        last_error TEXT
+                    )
+                ''')
+                conn.commit()
+            finally:
+                conn.close()
+
+    # --------------- producer side ---------------
+    def enqueue(self, row: Dict[str, Any], idempotency_key: str) -> bool:
+        """Durably queue a portfolio_history row; returns False only if the local write fails"""
+        row = dict(row)
+        row['idempotency_key'] = idempotency_key
+        try:
+            with self.db_lock:
+                conn = self._connect()
+                try:
+                    cursor = conn.execute(
+                        'INSERT OR IGNORE INTO cloud_snapshot_outbox (idempotency_key, payload, enqueued_at) VALUES (?, ?, ?)',
+                        (idempotency_key, json.dumps(row, default=str), time.time())
+                    )
+                    conn.commit()
+                    inserted = cursor.rowcount > 0
+                finally:
+                    conn.close()
+            if inserted:
+                with self.stats_lock:
+                    self.total_enqueued += 1
+            self._wake_event.set()
+            return True
+        except Exception as e:
+            error(f"Error queueing snapshot for cloud sync: {e}")
+            return False
+
+    # --------------- flusher side ---------------
+    def start(self):
+        """Start the background flusher thread (restarts it after stop())"""
+        if self._flusher_thread is not None and self._flusher_thread.is_alive() and not self._running:
+            self._flusher_thread.join(timeout=10.0)  # Let a stopping flusher finish its final drain
+        if self._flusher_thread is None or not self._flusher_thread.is_alive():
+            self._running = True
+            self._flusher_thread = threading.Thread(target=self._flush_worker, daemon=True, name="snapshot-outbox")
+            self._flusher_thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the flusher after one last best-effort drain"""
+        self._running = False
+        self._wake_event.set()
+        if self._flusher_thread and self._flusher_thread.is_alive():
+            self._flusher_thread.join(timeout=timeout)
+            if self._flusher_thread.is_alive():
+                warning("Snapshot outbox flusher did not stop gracefully")
+
+    def _flush_worker(self):
+        while self._running:
+            self._wake_event.wait(timeout=max(self.flush_interval, self._backoff))
+            self._wake_event.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # Local outbox errors (locked/corrupt file) must not kill the flusher
+                with self.stats_lock:
+                    self.last_error = str(e)
+                self._backoff = min(max(self.flush_interval, self._backoff * 2), self.max_backoff)
+                error(f"Snapshot outbox flush error (retry in {self._backoff:.0f}s): {e}")
+
+        # Final drain on shutdown - anything left stays in the outbox for next start
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+    def flush(self) -> int:
+        """Send pending snapshots in batches until the outbox is empty or a batch fails"""
+        sent = 0
+        while True:
+            pending = self._read_batch()
+            if not pending:
+                self._backoff = 0.0
+                return sent
+
+            ids = [row_id for row_id, _ in pending]
+            rows = [row for _, row in pending]
+            started = time.time()
+            try:
+                self._send(rows)
+            except Exception as e:
+                self._record_failure(ids, str(e))
+                self._backoff = min(max(self.flush_interval, self._backoff * 2), self.max_backoff)
+                warning(f"⚠️ Cloud snapshot flush failed, {len(ids)} snapshot(s) kept in outbox (retry in {self._backoff:.0f}s): {e}")
+                return sent
+
+            self._delete(ids)
+            sent += len(ids)
+            with self.stats_lock:
+                self.total_replicated += len(ids)
+                self.total_batches += 1
+                self.last_flush_time = time.time()
+                self.last_flush_duration_ms = (self.last_flush_time - started) * 1000
+                self.last_error = None
+            debug(f"✅ Replicated {len(ids)} portfolio snapshot(s) to cloud in {self.last_flush_duration_ms:.0f}ms", file_only=True)
+
+    def _send(self, rows: List[Dict[str, Any]]):
+        if self._send_batch_override is not None:
+            self._send_batch_override(rows)
+            return
+
+        if not CLOUD_DB_AVAILABLE:
+            raise RuntimeError("cloud database module not available")
+        db_manager = get_cloud_database_manager()
+        if db_manager is None:
+            raise RuntimeError("cloud database not configured")
+        db_manager.save_portfolio_history_batch(rows)
+
+    def _read_batch(self) -> List[tuple]:
+        with self.db_lock:
+            conn = self._connect()
+            try:
+                cursor = conn.execute(
+                    'SELECT id, payload FROM cloud_snapshot_outbox ORDER BY id LIMIT ?',
+                    (self.batch_size,)
+                )
+                return [(row_id, json.loads(payload)) for row_id, payload in cursor.fetchall()]
+            finally:
+                conn.close()
+
+    def _delete(self, ids: List[int]):
+        with self.db_lock:
+            conn = self._connect()
+            try:
+                conn.executemany('DELETE FROM cloud_snapshot_outbox WHERE id = ?', [(i,) for i in ids])
+                conn.commit()
+            finally:
+                conn.close()
+
+    def _record_failure(self, ids: List[int], message: str):
+        with self.stats_lock:
+            self.failed_batches += 1
+            self.last_error = message
+        try:
+            with self.db_lock:
+                conn = self._connect()
+                try:
+                    conn.executemany(
+                        'UPDATE cloud_snapshot_outbox SET attempts = attempts + 1, last_error = ? WHERE id = ?',
+                        [(message[:500], i) for i in ids]
+                    )
+                    conn.commit()
+                finally:
+                    conn.close()
+        except Exception as e:
+            debug(f"Could not record outbox failure: {e}", file_only=True)
+
+    # --------------- metrics ---------------
+    def get_pending_count(self) -> int:
+        with self.db_lock:
+            conn = self._connect()
+            try:
+                return conn.execute('SELECT COUNT(*) FROM cloud_snapshot_outbox').fetchone()[0]
+            finally:
+                conn.close()
+
+    def get_replication_lag(self) -> float:
+        """Seconds the oldest unreplicated snapshot has been waiting (0 when caught up)"""
+        with self.db_lock:
+            conn = self._connect()
+            try:
+                oldest = conn.execute('SELECT MIN(enqueued_at) FROM cloud_snapshot_outbox').fetchone()[0]
+            finally:
+                conn.close()
+        return max(0.0, time.time() - oldest) if oldest else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Replication status for dashboards and health checks"""
+        with self.stats_lock:
+            stats = {
+                'total_enqueued': self.total_enqueued,
+                'total_replicated': self.total_replicated,
+                'total_batches': self.total_batches,
+                'failed_batches': self.failed_batches,
+                'last_flush_time': self.last_flush_time,
+                'last_flush_duration_ms': self.last_flush_duration_ms,
+                'last_error': self.last_error,
+            }
+        stats['pending'] = self.get_pending_count()
+        stats['replication_lag_seconds'] = self.get_replication_lag()
+        stats['retry_backoff_seconds'] = self._backoff
+        return stats
+
+
+def snapshot_to_history_row(snapshot, change_detected: bool = False, change_type: Optional[str] = None) -> Dict[str, Any]:
+    """Convert a PortfolioSnapshot into a portfolio_history row payload"""
+    timestamp = snapshot.timestamp
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.astimezone()
+    return {
+        'timestamp': timestamp.astimezone(timezone.utc).isoformat(),
+        'total_value_usd': snapshot.total_value_usd,
+        'usdc_balance': snapshot.usdc_balance,
+        'sol_balance': snapshot.sol_balance,
+        'sol_value_usd': snapshot.sol_value_usd,
+        'positions_value_usd': snapshot.positions_value_usd,
+        'change_detected': change_detected,
+        'change_type': change_type,
+        'metadata': {
+            'position_count': snapshot.position_count,
+            'positions': snapshot.positions,
+            'timestamp': snapshot.timestamp.isoformat()
+        }
+    }
+
+
+# Global instances, one per outbox file, with the number of owners still using each
+_snapshot_outboxes: Dict[str, SnapshotOutbox] = {}
+_snapshot_outbox_users: Dict[str, int] = {}
+_snapshot_outboxes_lock = threading.Lock()
+
+def get_snapshot_outbox(db_path: str) -> SnapshotOutbox:
+    """Get (and start) the outbox for the given SQLite file; pair with release_snapshot_outbox()"""
+    with _snapshot_outboxes_lock:
+        outbox = _snapshot_outboxes.get(db_path)
+        if outbox is None:
+            outbox = SnapshotOutbox(db_path)
+            _snapshot_outboxes[db_path] = outbox
+        _snapshot_outbox_users[db_path] = _snapshot_outbox_users.get(db_path, 0) + 1
+        outbox.start()
+        return outbox
+
+def release_snapshot_outbox(db_path: str, timeout: float = 10.0):
+    """Drop one owner of the outbox; the flusher stops (after a final drain) when the last one leaves"""
+    with _snapshot_outboxes_lock:
+        outbox = _snapshot_outboxes.get(db_path)
+        if outbox is None:
+            return
+        users = max(0, _snapshot_outbox_users.get(db_path, 0) - 1)
+        _snapshot_outbox_users[db_path] = users
+        if users == 0:
+            outbox.stop(timeout=timeout)
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    # Simulate a slow cloud round-trip and show that enqueue stays off the slow path
+    def slow_cloud(rows):
+        time.sleep(0.5)
+        return len(rows)
+
+    class _Snap:
+        def __init__(self, value):
+            self.timestamp = datetime.now()
+            self.total_value_usd = value
+            self.usdc_balance = value
+            self.sol_balance = 0.0
+            self.sol_value_usd = 0.0
+            self.positions_value_usd = 0.0
+            self.position_count = 0
+            self.positions = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        outbox = SnapshotOutbox(os.path.join(tmp, 'outbox.db'), flush_interval=0.2, send_batch=slow_cloud)
+        outbox.start()
+
+        started = time.perf_counter()
+        for i in range(200):
+            snap = _Snap(1000.0 + i)
+            outbox.enqueue(snapshot_to_history_row(snap), make_idempotency_key('bench', snap.timestamp) + str(i))
+        enqueue_ms = (time.perf_counter() - started) * 1000
+        print(f"Enqueued 200 snapshots in {enqueue_ms:.1f}ms ({enqueue_ms / 200:.2f}ms each)")
+
+        while outbox.get_pending_count():
+            print(f"  pending={outbox.get_pending_count()} lag={outbox.get_replication_lag():.2f}s")
+            time.sleep(0.5)
+        outbox.stop()
+        print(f"Stats: {outbox.get_stats()}")
@@ -0,0 +1,248 @@
+"""
+🌙 Anarcho Capital's Shared SQLite Access Layer
+Per-thread persistent WAL connections for the local SQLite databases
+Built with love by Anarcho Capital 🚀
+
+Every thread gets one long-lived connection per database file instead of a
+fresh ``sqlite3.connect`` per call. Connections run in WAL mode, so readers
+never block behind a writer, and each keeps its own compiled statement cache,
+so hot queries are prepared once and reused.
+
+Usage:
+    db = get_sqlite_manager("src/data/execution_tracker.db")
+    row = db.fetchone("SELECT ... WHERE id = ?", (1,))
+    with db.transaction() as conn:
+        conn.execute("INSERT ...", params)
+        conn.executemany("UPDATE ...", rows)
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+try:
+    from src.scripts.shared_services.logger import debug, warning
+except ImportError:
+    def debug(msg, file_only=False):
+        if not file_only:
+            print(f"DEBUG: {msg}")
+
+    def warning(msg, file_only=False):
+        print(f"WARNING: {msg}")
+
+# Connection tuning (WAL makes synchronous=NORMAL durable across app crashes)
+DEFAULT_BUSY_TIMEOUT_MS = 30000
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024  # 256MB
+DEFAULT_CACHE_SIZE_KB = 8192  # 8MB page cache per connection
+DEFAULT_CACHED_STATEMENTS = 256
+
+
+class SQLiteManager:
+    """Per-thread persistent connections to a single SQLite database file"""
+
+    def __init__(self, db_path: str, synchronous: str = "NORMAL",
+                 mmap_size: int = DEFAULT_MMAP_SIZE,
+                 busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS,
+                 cached_statements: int = DEFAULT_CACHED_STATEMENTS):
+        self.db_path = str(db_path)
+        self.synchronous = synchronous
+        self.mmap_size = mmap_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._local = threading.local()
+        self._generation = 0
+        self._connections: Dict[int, tuple] = {}  # thread ident -> (thread, connection)
+        self._connections_lock = threading.Lock()
+
+    # --------------- connections ---------------
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            isolation_level=None,  # autocommit; transaction() issues explicit BEGIN/COMMIT
+            check_same_thread=False,  # only so close_all() can close it from another thread
+            cached_statements=self.cached_statements,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size=-{DEFAULT_CACHE_SIZE_KB}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.generation == self._generation:
+            return conn
+
+        conn = self._open()
+        current = threading.current_thread()
+        with self._connections_lock:
+            self._prune_dead_threads()
+            self._connections[current.ident] = (current, conn)
+            self._local.generation = self._generation
+        self._local.conn = conn
+        return conn
+
+    def _prune_dead_threads(self):
+        """Close connections owned by threads that have exited (caller holds the lock)"""
+        for ident, (thread, conn) in list(self._connections.items()):
+            if not thread.is_alive():
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                del self._connections[ident]
+
+    def close_all(self):
+        """Close every thread's connection; threads transparently reopen on next use"""
+        with self._connections_lock:
+            self._generation += 1
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for _, conn in connections:
+            try:
+                conn.close()
+            except Exception as e:
+                debug(f"Error closing SQLite connection for {self.db_path}: {e}", file_only=True)
+
+    # --------------- reads ---------------
+    @contextmanager
+    def read(self):
+        """Yield this thread's connection for reads (no lock, concurrent with writers under WAL)"""
+        yield self.connection()
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> sqlite3.Cursor:
+        return self.connection().execute(sql, params)
+
+    def fetchone(self, sql: str, params: Sequence[Any] = ()) -> Optional[tuple]:
+        return self.connection().execute(sql, params).fetchone()
+
+    def fetchall(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        return self.connection().execute(sql, params).fetchall()
+
+    def fetchall_dicts(self, sql: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        cursor = self.connection().execute(sql, params)
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    # --------------- writes ---------------
+    @contextmanager
+    def transaction(self, immediate: bool = True):
+        """
+        Run a block of statements as one write transaction.
+
+        BEGIN IMMEDIATE takes the write lock up front so read-then-write blocks
+        are atomic across threads and processes. Nested use joins the outer
+        transaction. Explicit conn.commit() inside the block is tolerated.
+        """
+        conn = self.connection()
+        if conn.in_transaction:
+            yield conn
+            return
+
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        else:
+            if conn.in_transaction:
+                conn.commit()
+
+    def executemany(self, sql: str, seq_of_params: Iterable[Sequence[Any]]) -> int:
+        """Apply a batch of writes in a single transaction"""
+        with self.transaction() as conn:
+            cursor = conn.executemany(sql, seq_of_params)
+            return cursor.rowcount
+
+
+# Global instances, one per database file
+_sqlite_managers: Dict[str, SQLiteManager] = {}
+_sqlite_managers_lock = threading.Lock()
+
+def get_sqlite_manager(db_path) -> SQLiteManager:
+    """Get the shared manager for a database file"""
+    key = os.path.abspath(str(db_path))
+    manager = _sqlite_managers.get(key)
+    if manager is None:
+        with _sqlite_managers_lock:
+            manager = _sqlite_managers.get(key)
+            if manager is None:
+                manager = SQLiteManager(str(db_path))
+                _sqlite_managers[key] = manager
+    return manager
+
+def close_sqlite_manager(db_path) -> None:
+    """Close all pooled connections to a database file (e.g. before a reset)"""
+    manager = _sqlite_managers.get(os.path.abspath(str(db_path)))
+    if manager is not None:
+        manager.close_all()
+
+
+if __name__ == "__main__":
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    # Benchmark: connect-per-call (current pattern) vs persistent WAL connections
+    def bench(label, get_fn, put_fn, calls=5000, threads=4):
+        def worker(offset):
+            for i in range(calls // threads):
+                key = f"mint_{(offset + i) % 500}"
+                if i % 10 == 0:
+                    put_fn(key, float(i))
+                else:
+                    get_fn(key)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(worker, [t * 1000 for t in range(threads)]))
+        elapsed = time.perf_counter() - started
+        print(f"{label:<28} {calls / elapsed:>10,.0f} calls/s  ({elapsed * 1000:.0f}ms for {calls} calls, 90% reads)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        schema = "CREATE TABLE IF NOT EXISTS token_prices (token_mint TEXT PRIMARY KEY, price REAL, update_time INTEGER)"
+
+        legacy_path = os.path.join(tmp, "legacy.db")
+        legacy_lock = threading.Lock()
+        with sqlite3.connect(legacy_path) as c:
+            c.execute(schema)
+
+        def legacy_get(key):
+            with legacy_lock:
+                conn = sqlite3.connect(legacy_path)
+                conn.execute("SELECT price FROM token_prices WHERE token_mint = ?", (key,)).fetchone()
+                conn.close()
+
+        def legacy_put(key, value):
+            with legacy_lock:
+                conn = sqlite3.connect(legacy_path)
+                conn.execute("INSERT OR REPLACE INTO token_prices VALUES (?, ?, ?)", (key, value, int(time.time())))
+                conn.commit()
+                conn.close()
+
+        manager = SQLiteManager(os.path.join(tmp, "pooled.db"))
+        manager.execute(schema)
+
+        def pooled_get(key):
+            manager.fetchone("SELECT price FROM token_prices WHERE token_mint = ?", (key,))
+
+        def pooled_put(key, value):
+            with manager.transaction() as conn:
+                conn.execute("INSERT OR REPLACE INTO token_prices VALUES (?, ?, ?)", (key, value, int(time.time())))
+
+        bench("connect-per-call + lock", legacy_get, legacy_put)
+        bench("persistent WAL connections", pooled_get, pooled_put)
+        manager.close_all()
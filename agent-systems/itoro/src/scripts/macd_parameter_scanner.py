@@ -9,6 +9,12 @@ from backtesting import Backtest, Strategy
 import talib
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context, shared_memory
+from typing import Dict, Iterator, List, Optional
+import hashlib
+import json
+import time
 import sys
 import os
 
@@ -18,24 +24,31 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 class ParameterizedMACDStrategy(Strategy):
     """MACD Strategy with configurable parameters"""
     
-    def init(self, fast_period=12, slow_period=26, entry_min_mult=-1.5, entry_max_mult=-0.5, 
-             exit_min=-0.02323, exit_max=-0.00707, stop_loss_pct=0.318, min_holding=5):
-        # Store parameters
-        self.fast_period = fast_period
-        self.slow_period = slow_period
-        self.entry_min_mult = entry_min_mult
-        self.entry_max_mult = entry_max_mult
-        self.exit_min = exit_min
-        self.exit_max = exit_max
-        self.stop_loss_pct = stop_loss_pct
-        self.min_holding = min_holding
-        
+    # Parameters (class variables so Backtest.run(**params) can override them)
+    fast_period = 12
+    slow_period = 26
+    entry_min_mult = -1.5
+    entry_max_mult = -0.5
+    exit_min = -0.02323
+    exit_max = -0.00707
+    stop_loss_pct = 0.318
+    min_holding = 5
+    
+    # (ema_fast, ema_slow) computed ahead of time for this data, shared across runs
+    precomputed_emas = None
+    
+    def init(self):
         # Initialize trade counter
         self.trade_count = 0
         
         # Calculate EMAs
-        self.ema_fast = self.I(talib.EMA, self.data.Close, timeperiod=fast_period)
-        self.ema_slow = self.I(talib.EMA, self.data.Close, timeperiod=slow_period)
+        if self.precomputed_emas is not None:
+            ema_fast, ema_slow = self.precomputed_emas
+            self.ema_fast = self.I(lambda: ema_fast, name=f'EMA({self.fast_period})')
+            self.ema_slow = self.I(lambda: ema_slow, name=f'EMA({self.slow_period})')
+        else:
+            self.ema_fast = self.I(talib.EMA, self.data.Close, timeperiod=self.fast_period)
+            self.ema_slow = self.I(talib.EMA, self.data.Close, timeperiod=self.slow_period)
         
         # Calculate Universal MACD: (EMA_fast/EMA_slow) - 1
         self.universal_macd = (self.ema_fast / self.ema_slow) - 1
@@ -160,114 +173,392 @@ def load_data(data_file_path):
     return price_data
 
 
-def scan_macd_parameters(data_file_path, output_file=None):
+# Default scan grid (fast, slow, signal) x entry range x exit range
+MACD_PERIODS = [
+    (8, 21, 5),    # Shorter for intraday
+    (12, 26, 9),   # Traditional
+    (5, 13, 5),    # Very short
+    (15, 30, 10),  # Longer for 5m
+]
+
+ENTRY_RANGES = [
+    (-2.5, -0.8),   # Much wider
+    (-2.0, -1.0),   # Wider
+    (-1.5, -0.5),   # Current
+    (-1.0, -0.2),   # Narrower
+]
+
+EXIT_RANGES = [
+    (-0.03, -0.01),     # Wider
+    (-0.025, -0.005),   # Current
+    (-0.02, -0.008),    # Narrower
+]
+
+BACKTEST_SETTINGS = {'cash': 1000000, 'commission': 0.002, 'exclusive_orders': True}
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+STRATEGY_PARAMS = ['fast_period', 'slow_period', 'entry_min_mult', 'entry_max_mult', 'exit_min', 'exit_max']
+
+
+def build_parameter_grid(macd_periods=MACD_PERIODS, entry_ranges=ENTRY_RANGES, exit_ranges=EXIT_RANGES) -> List[Dict]:
+    """All parameter combinations, in the scan's reporting order"""
+    combinations = []
+    for fast, slow, signal in macd_periods:
+        for entry_min_mult, entry_max_mult in entry_ranges:
+            for exit_min, exit_max in exit_ranges:
+                combinations.append({
+                    'fast_period': fast,
+                    'slow_period': slow,
+                    'signal_period': signal,  # Note: not used in current strategy but included for completeness
+                    'entry_min_mult': entry_min_mult,
+                    'entry_max_mult': entry_max_mult,
+                    'exit_min': exit_min,
+                    'exit_max': exit_max,
+                })
+    return combinations
+
+
+def compute_emas(price_data, fast_period: int, slow_period: int) -> tuple:
+    """The strategy's EMA pair for one dataset (identical to computing them in init)"""
+    close = np.ascontiguousarray(price_data['Close'].to_numpy(dtype=np.float64))
+    return talib.EMA(close, timeperiod=fast_period), talib.EMA(close, timeperiod=slow_period)
+
+
+def run_combination(price_data, params: Dict, emas: Optional[tuple] = None) -> Dict:
+    """Backtest one parameter combination and extract key metrics"""
+    result = dict(params)
+    try:
+        strategy_class = ParameterizedMACDStrategy
+        if emas is not None:
+            strategy_class = type('MACDStrategy', (ParameterizedMACDStrategy,), {'precomputed_emas': emas})
+        bt = Backtest(price_data, strategy_class, **BACKTEST_SETTINGS)
+        stats = bt.run(**{name: params[name] for name in STRATEGY_PARAMS if name in params})
+        
+        result.update({
+            'return_pct': stats['Return [%]'],
+            'win_rate': stats['Win Rate [%]'] if not pd.isna(stats['Win Rate [%]']) else 0,
+            'sharpe': stats['Sharpe Ratio'] if not pd.isna(stats['Sharpe Ratio']) else 0,
+            'max_dd': stats['Max. Drawdown [%]'],
+            'trades': stats['# Trades'],
+            'profit_factor': stats['Profit Factor'] if not pd.isna(stats['Profit Factor']) else 0,
+            'expectancy': stats['Expectancy [%]'] if not pd.isna(stats['Expectancy [%]']) else 0,
+        })
+    except Exception as e:
+        result.update({
+            'return_pct': None,
+            'win_rate': None,
+            'sharpe': None,
+            'max_dd': None,
+            'trades': 0,
+            'profit_factor': None,
+            'expectancy': None,
+            'error': str(e)
+        })
+    return result
+
+
+class SharedOHLCV:
+    """
+    OHLCV arrays copied into one shared-memory block.
+    
+    Workers attach to the block by name and wrap it in a DataFrame once, so a
+    task only ships its parameters instead of a pickled copy of the data.
+    """
+    
+    def __init__(self, price_data: pd.DataFrame):
+        columns = [column for column in OHLCV_COLUMNS if column in price_data.columns]
+        values = np.ascontiguousarray(price_data[columns].to_numpy(dtype=np.float64))
+        
+        if isinstance(price_data.index, pd.DatetimeIndex):
+            tz = str(price_data.index.tz) if price_data.index.tz is not None else None
+            index = price_data.index.tz_convert(None) if tz else price_data.index
+            index_values = index.values
+            index_dtype = str(index_values.dtype)
+            index_values = index_values.view(np.int64)
+        else:
+            tz, index_dtype = None, None
+            index_values = np.arange(len(price_data), dtype=np.int64)
+        
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, index_values.nbytes + values.nbytes))
+        np.ndarray(index_values.shape, np.int64, buffer=self.shm.buf)[:] = index_values
+        np.ndarray(values.shape, np.float64, buffer=self.shm.buf, offset=index_values.nbytes)[:] = values
+        
+        self.handle = {
+            'name': self.shm.name,
+            'rows': len(price_data),
+            'columns': columns,
+            'index_dtype': index_dtype,
+            'index_name': price_data.index.name,
+            'tz': tz,
+        }
+        self.fingerprint = hashlib.sha1(bytes(self.shm.buf[:index_values.nbytes + values.nbytes])).hexdigest()
+    
+    @staticmethod
+    def attach(handle: Dict):
+        """Map the block and wrap it (no copy); returns (shm, DataFrame) - keep shm alive"""
+        # Pool workers share the creating process's resource tracker, which
+        # unlinks the block once, when SharedOHLCV.close() runs
+        shm = shared_memory.SharedMemory(name=handle['name'])
+        
+        rows, columns = handle['rows'], handle['columns']
+        index_values = np.ndarray((rows,), np.int64, buffer=shm.buf)
+        values = np.ndarray((rows, len(columns)), np.float64, buffer=shm.buf, offset=index_values.nbytes)
+        
+        if handle['index_dtype'] is None:
+            index = pd.RangeIndex(rows, name=handle['index_name'])
+        else:
+            index = pd.DatetimeIndex(index_values.view(handle['index_dtype']), name=handle['index_name'])
+            if handle['tz']:
+                index = index.tz_localize('UTC').tz_convert(handle['tz'])
+        return shm, pd.DataFrame(values, index=index, columns=columns, copy=False)
+    
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+# Worker-process state, set once per worker by _init_grid_worker
+_worker_shm = None
+_worker_data = None
+_worker_emas: Dict[tuple, tuple] = {}  # (window, fast, slow) -> EMA pair
+MAX_CACHED_EMAS = 256
+
+
+def _init_grid_worker(handle: Dict):
+    global _worker_shm, _worker_data
+    _worker_shm, _worker_data = SharedOHLCV.attach(handle)
+
+
+def run_window_combination(price_data, params: Dict, window: Optional[tuple], ema_cache: Dict) -> Dict:
+    """Backtest params on rows [start, stop) of price_data (all rows if window is None)"""
+    data = price_data if window is None else price_data.iloc[window[0]:window[1]]
+    
+    # Every combination with the same MACD periods reuses one EMA computation per window
+    key = (window, params['fast_period'], params['slow_period'])
+    emas = ema_cache.get(key)
+    if emas is None:
+        if len(ema_cache) >= MAX_CACHED_EMAS:
+            ema_cache.clear()
+        emas = ema_cache[key] = compute_emas(data, params['fast_period'], params['slow_period'])
+    return run_combination(data, params, emas=emas)
+
+
+def _run_grid_task(params: Dict, window: Optional[tuple] = None) -> Dict:
+    return run_window_combination(_worker_data, params, window, _worker_emas)
+
+
+def _params_key(params: Dict) -> str:
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def _result_key(result: Dict, params: Dict) -> str:
+    """Key of the combination a result came from (results carry their parameters)"""
+    return _params_key({name: result[name] for name in params})
+
+
+def _json_value(value):
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+class ParameterGrid:
+    """
+    Parallel parameter grid over one OHLCV dataset.
+    
+    The data goes into shared memory once and combinations fan out over a
+    process pool; results are yielded as they complete. A JSONL ledger records
+    every finished combination so an interrupted scan resumes where it stopped.
+    
+    With prune_margin set, combinations are grouped into regions (same MACD
+    periods - they share indicators). Regions are sampled round-robin, and once a
+    region has `prune_after` results whose best return trails the global best by
+    more than prune_margin percentage points, its remaining combinations are skipped.
+    """
+    
+    def __init__(self, price_data: pd.DataFrame, combinations: List[Dict], workers: Optional[int] = None,
+                 ledger_path=None, prune_margin: Optional[float] = None, prune_after: int = 3,
+                 region_keys=('fast_period', 'slow_period')):
+        self.price_data = price_data
+        self.combinations = combinations
+        self.workers = max(1, workers if workers is not None else (os.cpu_count() or 1))
+        self.ledger_path = Path(ledger_path) if ledger_path else None
+        self.prune_margin = prune_margin
+        self.prune_after = prune_after
+        self.region_keys = region_keys
+        
+        self.resumed = 0
+        self.pruned = 0
+        self._region_results: Dict[tuple, List[float]] = {}
+        self._best_return = float('-inf')
+    
+    def _region(self, params: Dict) -> tuple:
+        return tuple(params.get(key) for key in self.region_keys)
+    
+    def _schedule(self) -> List[Dict]:
+        """Round-robin over regions so each gets sampled before any region is exhausted"""
+        if self.prune_margin is None:
+            return list(self.combinations)
+        regions: Dict[tuple, List[Dict]] = {}
+        for params in self.combinations:
+            regions.setdefault(self._region(params), []).append(params)
+        order = []
+        for depth in range(max((len(group) for group in regions.values()), default=0)):
+            order.extend(group[depth] for group in regions.values() if depth < len(group))
+        return order
+    
+    def _record(self, result: Dict):
+        if result.get('return_pct') is None:
+            return
+        self._region_results.setdefault(self._region(result), []).append(result['return_pct'])
+        self._best_return = max(self._best_return, result['return_pct'])
+    
+    def _is_dominated(self, params: Dict) -> bool:
+        if self.prune_margin is None:
+            return False
+        returns = self._region_results.get(self._region(params), [])
+        return len(returns) >= self.prune_after and max(returns) < self._best_return - self.prune_margin
+    
+    def _load_ledger(self, fingerprint: str) -> Dict[str, Dict]:
+        """Finished results from a previous run on the same data"""
+        if self.ledger_path is None or not self.ledger_path.exists():
+            return {}
+        done = {}
+        with open(self.ledger_path) as f:
+            lines = f.read().splitlines()
+        try:
+            if json.loads(lines[0]).get('data_fingerprint') != fingerprint:
+                print(f"[SCAN] Ledger {self.ledger_path.name} is for different data, starting over")
+                return {}
+        except (IndexError, ValueError):
+            return {}
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn final line from an interrupted write
+            done[entry.pop('key')] = entry
+        return done
+    
+    def run(self) -> Iterator[Dict]:
+        """Yield each combination's result as soon as it is available"""
+        shared = SharedOHLCV(self.price_data)
+        ledger = None
+        try:
+            done = self._load_ledger(shared.fingerprint)
+            if self.ledger_path is not None:
+                self.ledger_path.parent.mkdir(parents=True, exist_ok=True)
+                ledger = open(self.ledger_path, 'a' if done else 'w')
+                if not done:
+                    ledger.write(json.dumps({'data_fingerprint': shared.fingerprint}) + '\n')
+                    ledger.flush()
+            
+            pending = []
+            for params in self._schedule():
+                key = _params_key(params)
+                if key in done:
+                    self.resumed += 1
+                    self._record(done[key])
+                    yield done[key]
+                else:
+                    pending.append(params)
+            
+            for params, result in self._execute(pending, shared):
+                if ledger is not None:
+                    ledger.write(json.dumps(dict(result, key=_params_key(params)), default=_json_value) + '\n')
+                    ledger.flush()
+                yield result
+        finally:
+            if ledger is not None:
+                ledger.close()
+            shared.close()
+    
+    def _execute(self, pending: List[Dict], shared: SharedOHLCV) -> Iterator[tuple]:
+        """Yield (params, result) pairs in completion order"""
+        if self.workers == 1:
+            for params in pending:
+                if self._is_dominated(params):
+                    self.pruned += 1
+                    continue
+                result = run_combination(self.price_data, params)
+                self._record(result)
+                yield params, result
+            return
+        
+        # Keep a bounded number of tasks in flight so pruning can still skip queued ones
+        context = get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                 initializer=_init_grid_worker, initargs=(shared.handle,)) as pool:
+            queue = iter(pending)
+            in_flight = set()
+            exhausted = False
+            while True:
+                while not exhausted and len(in_flight) < self.workers * 2:
+                    params = next(queue, None)
+                    if params is None:
+                        exhausted = True
+                    elif self._is_dominated(params):
+                        self.pruned += 1
+                    else:
+                        future = pool.submit(_run_grid_task, params)
+                        future.params = params
+                        in_flight.add(future)
+                if not in_flight:
+                    break
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    result = future.result()
+                    self._record(result)
+                    yield future.params, result
+
+
+def scan_macd_parameters(data_file_path, output_file=None, workers=None, resume=True, prune_margin=None):
     """
     Scan MACD parameter combinations and return results DataFrame
     
     Parameters:
     - data_file_path: Path to CSV data file
     - output_file: Optional path to save results CSV
+    - workers: Backtest processes (default: one per core; 1 runs in-process)
+    - resume: Continue from the ledger of an interrupted scan (<output_file>.ledger.jsonl)
+    - prune_margin: Skip MACD period regions trailing the best return by this many
+      percentage points after 3 samples (None scans the full grid)
     """
     print(f"[SCAN] Loading data from: {data_file_path}")
     price_data = load_data(data_file_path)
     print(f"[SCAN] Data loaded: {len(price_data)} rows")
     print(f"[SCAN] Date range: {price_data.index[0]} to {price_data.index[-1]}")
     
-    # Parameter combinations to test
-    macd_periods = [
-        (8, 21, 5),    # Shorter for intraday
-        (12, 26, 9),   # Traditional
-        (5, 13, 5),    # Very short
-        (15, 30, 10),  # Longer for 5m
-    ]
-    
-    entry_ranges = [
-        (-2.5, -0.8),   # Much wider
-        (-2.0, -1.0),   # Wider
-        (-1.5, -0.5),   # Current
-        (-1.0, -0.2),   # Narrower
-    ]
-    
-    exit_ranges = [
-        (-0.03, -0.01),     # Wider
-        (-0.025, -0.005),   # Current
-        (-0.02, -0.008),    # Narrower
-    ]
+    if output_file is None:
+        output_dir = Path(__file__).parent.parent / "data" / "rbi_v3"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_file = output_dir / "parameter_scan_results.csv"
+    ledger_path = Path(output_file).with_suffix('.ledger.jsonl')
+    if not resume and ledger_path.exists():
+        ledger_path.unlink()
+    
+    combinations = build_parameter_grid()
+    total_combinations = len(combinations)
+    grid = ParameterGrid(price_data, combinations, workers=workers, ledger_path=ledger_path, prune_margin=prune_margin)
+    
+    print(f"[SCAN] Testing {total_combinations} parameter combinations on {grid.workers} worker(s)...")
     
     results = []
-    total_combinations = len(macd_periods) * len(entry_ranges) * len(exit_ranges)
-    current = 0
+    started = time.perf_counter()
+    for result in grid.run():
+        results.append(result)
+        label = (f"fast={result['fast_period']}, slow={result['slow_period']}, "
+                 f"entry=({result['entry_min_mult']:.1f}, {result['entry_max_mult']:.1f}), "
+                 f"exit=({result['exit_min']:.4f}, {result['exit_max']:.4f})")
+        if 'error' in result:
+            print(f"[SCAN] [{len(results)}/{total_combinations}] {label} → ERROR: {result['error']}")
+        else:
+            print(f"[SCAN] [{len(results)}/{total_combinations}] {label} → Return: {result['return_pct']:.2f}%, "
+                  f"Trades: {result['trades']}, Sharpe: {result['sharpe']:.2f}")
     
-    print(f"[SCAN] Testing {total_combinations} parameter combinations...")
+    print(f"[SCAN] {len(results)} combinations in {time.perf_counter() - started:.1f}s "
+          f"({grid.resumed} from ledger, {grid.pruned} pruned)")
     
-    for fast, slow, signal in macd_periods:
-        for entry_min_mult, entry_max_mult in entry_ranges:
-            for exit_min, exit_max in exit_ranges:
-                current += 1
-                print(f"[SCAN] [{current}/{total_combinations}] Testing: fast={fast}, slow={slow}, entry=({entry_min_mult:.1f}, {entry_max_mult:.1f}), exit=({exit_min:.4f}, {exit_max:.4f})")
-                
-                try:
-                    # Create strategy with parameters
-                    strategy_class = type('MACDStrategy', (ParameterizedMACDStrategy,), {})
-                    
-                    # Run backtest
-                    bt = Backtest(
-                        price_data,
-                        strategy_class,
-                        cash=1000000,
-                        commission=0.002,
-                        exclusive_orders=True
-                    )
-                    
-                    stats = bt.run(
-                        fast_period=fast,
-                        slow_period=slow,
-                        entry_min_mult=entry_min_mult,
-                        entry_max_mult=entry_max_mult,
-                        exit_min=exit_min,
-                        exit_max=exit_max
-                    )
-                    
-                    # Extract key metrics
-                    result = {
-                        'fast_period': fast,
-                        'slow_period': slow,
-                        'signal_period': signal,  # Note: not used in current strategy but included for completeness
-                        'entry_min_mult': entry_min_mult,
-                        'entry_max_mult': entry_max_mult,
-                        'exit_min': exit_min,
-                        'exit_max': exit_max,
-                        'return_pct': stats['Return [%]'],
-                        'win_rate': stats['Win Rate [%]'] if not pd.isna(stats['Win Rate [%]']) else 0,
-                        'sharpe': stats['Sharpe Ratio'] if not pd.isna(stats['Sharpe Ratio']) else 0,
-                        'max_dd': stats['Max. Drawdown [%]'],
-                        'trades': stats['# Trades'],
-                        'profit_factor': stats['Profit Factor'] if not pd.isna(stats['Profit Factor']) else 0,
-                        'expectancy': stats['Expectancy [%]'] if not pd.isna(stats['Expectancy [%]']) else 0,
-                    }
-                    
-                    results.append(result)
-                    print(f"  → Return: {result['return_pct']:.2f}%, Trades: {result['trades']}, Sharpe: {result['sharpe']:.2f}")
-                    
-                except Exception as e:
-                    print(f"  → ERROR: {str(e)}")
-                    results.append({
-                        'fast_period': fast,
-                        'slow_period': slow,
-                        'signal_period': signal,
-                        'entry_min_mult': entry_min_mult,
-                        'entry_max_mult': entry_max_mult,
-                        'exit_min': exit_min,
-                        'exit_max': exit_max,
-                        'return_pct': None,
-                        'win_rate': None,
-                        'sharpe': None,
-                        'max_dd': None,
-                        'trades': 0,
-                        'profit_factor': None,
-                        'expectancy': None,
-                        'error': str(e)
-                    })
+    # Report in grid order regardless of completion order
+    order = {_params_key(params): position for position, params in enumerate(combinations)}
+    results.sort(key=lambda result: order[_result_key(result, combinations[0])])
     
     # Create DataFrame
     df_results = pd.DataFrame(results)
@@ -285,14 +576,13 @@ def scan_macd_parameters(data_file_path, output_file=None):
     valid_results = valid_results.sort_values('return_pct', ascending=False)
     
     # Save results
-    if output_file is None:
-        output_dir = Path(__file__).parent.parent / "data" / "rbi_v3"
-        output_dir.mkdir(parents=True, exist_ok=True)
-        output_file = output_dir / "parameter_scan_results.csv"
-    
     df_results.to_csv(output_file, index=False)
     print(f"[SCAN] Results saved to: {output_file}")
     
+    # Scan finished: the ledger is only needed to resume an interrupted run
+    if ledger_path.exists():
+        ledger_path.unlink()
+    
     # Print top 5 results
     print(f"\n[SCAN] Top 5 Parameter Combinations:")
     print("=" * 100)
@@ -305,24 +595,54 @@ def scan_macd_parameters(data_file_path, output_file=None):
     return df_results, valid_results
 
 
+def benchmark_scan(data_file_path, combinations=8, workers=None):
+    """Serial (one Backtest per combination in-process) vs the shared-memory process pool"""
+    import warnings
+    warnings.filterwarnings('ignore')
+    
+    price_data = load_data(data_file_path)
+    grid = build_parameter_grid()[:combinations]
+    workers = workers or os.cpu_count() or 1
+    
+    started = time.perf_counter()
+    serial = [run_combination(price_data.copy(), params) for params in grid]
+    serial_seconds = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    parallel = list(ParameterGrid(price_data, grid, workers=max(2, workers)).run())
+    parallel_seconds = time.perf_counter() - started
+    
+    matches = ({_result_key(r, grid[0]): r.get('return_pct') for r in serial}
+               == {_result_key(r, grid[0]): r.get('return_pct') for r in parallel})
+    
+    print(f"[BENCHMARK] {len(grid)} combinations on {len(price_data)} bars, {os.cpu_count()} core(s)")
+    print(f"[BENCHMARK] Serial:   {serial_seconds:.1f}s ({serial_seconds / len(grid):.2f}s per combination)")
+    print(f"[BENCHMARK] Parallel: {parallel_seconds:.1f}s on {max(2, workers)} workers "
+          f"({serial_seconds / parallel_seconds:.2f}x)")
+    print(f"[BENCHMARK] Results identical: {matches}")
+    return serial_seconds, parallel_seconds
+
+
 if __name__ == "__main__":
     # Default data file path
     default_data_file = Path(__file__).parent.parent / "data" / "rbi" / "BTC-USD-5m.csv"
     
-    if len(sys.argv) > 1:
-        data_file = sys.argv[1]
-    else:
-        data_file = str(default_data_file)
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    data_file = args[0] if args else str(default_data_file)
     
     if not os.path.exists(data_file):
         print(f"[ERROR] Data file not found: {data_file}")
-        print(f"[INFO] Usage: python macd_parameter_scanner.py [data_file_path]")
+        print(f"[INFO] Usage: python macd_parameter_scanner.py [data_file_path] [--benchmark] [--fresh]")
         sys.exit(1)
     
+    if '--benchmark' in sys.argv:
+        benchmark_scan(data_file)
+        sys.exit(0)
+    
     print("=" * 100)
     print("MACD Parameter Scanner")
     print("=" * 100)
     
-    results, valid_results = scan_macd_parameters(data_file)
+    results, valid_results = scan_macd_parameters(data_file, resume='--fresh' not in sys.argv)
     
     print(f"\n[SCAN] Complete! Scanned {len(results)} combinations, found {len(valid_results)} valid results.")
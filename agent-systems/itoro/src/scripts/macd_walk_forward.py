@@ -5,10 +5,15 @@ Implements rolling window optimization to test strategy robustness across differ
 
 import pandas as pd
 import numpy as np
-from backtesting import Backtest, Strategy
-import talib
 from pathlib import Path
 from datetime import datetime, timedelta
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+from typing import Dict, List, Optional
+import hashlib
+import inspect
+import itertools
+import time
 import sys
 import os
 import json
@@ -17,128 +22,141 @@ import json
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 # Import parameter scanner's strategy class
-from scripts.macd_parameter_scanner import ParameterizedMACDStrategy, load_data
+from scripts.macd_parameter_scanner import (
+    BACKTEST_SETTINGS, OHLCV_COLUMNS, ParameterizedMACDStrategy, SharedOHLCV,
+    _init_grid_worker, _run_grid_task, load_data, run_window_combination,
+)
 
 
-def optimize_parameters_on_window(train_data, param_grid=None):
-    """
-    Optimize MACD parameters on a training window
-    
-    Parameters:
-    - train_data: Training data DataFrame
-    - param_grid: Optional custom parameter grid, otherwise uses default
-    
-    Returns:
-    - Dictionary with best parameters and performance
-    """
+DEFAULT_PARAM_GRID = {
+    'fast_period': [8, 12, 15],
+    'slow_period': [21, 26, 30],
+    'entry_min_mult': [-2.0, -1.5, -1.0],
+    'entry_max_mult': [-1.0, -0.5, -0.2],
+    'exit_min': [-0.025, -0.02],
+    'exit_max': [-0.01, -0.005],
+}
+
+# Nesting order of the grid (outermost first) - also the tie-break order for best params
+PARAM_ORDER = ['fast_period', 'slow_period', 'entry_min_mult', 'entry_max_mult', 'exit_min', 'exit_max']
+
+# Only consider strategies with at least 5 trades
+MIN_TRAIN_TRADES = 5
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / "data" / "rbi_v3" / "walk_forward_cache"
+
+
+def expand_param_grid(param_grid=None) -> List[Dict]:
+    """Every combination of the grid, in nested-loop order"""
     if param_grid is None:
         # Default parameter grid (smaller than full scan for speed)
-        param_grid = {
-            'fast_period': [8, 12, 15],
-            'slow_period': [21, 26, 30],
-            'entry_min_mult': [-2.0, -1.5, -1.0],
-            'entry_max_mult': [-1.0, -0.5, -0.2],
-            'exit_min': [-0.025, -0.02],
-            'exit_max': [-0.01, -0.005],
-        }
-    
+        param_grid = DEFAULT_PARAM_GRID
+    return [dict(zip(PARAM_ORDER, values)) for values in itertools.product(*(param_grid[name] for name in PARAM_ORDER))]
+
+
+def select_best_parameters(combinations: List[Dict], results: List[Dict]):
+    """Highest training return among runs with enough trades; first in grid order wins ties"""
     best_params = None
     best_return = float('-inf')
     best_stats = None
     
-    total_combinations = (
-        len(param_grid['fast_period']) *
-        len(param_grid['slow_period']) *
-        len(param_grid['entry_min_mult']) *
-        len(param_grid['entry_max_mult']) *
-        len(param_grid['exit_min']) *
-        len(param_grid['exit_max'])
-    )
-    
-    current = 0
-    
-    for fast in param_grid['fast_period']:
-        for slow in param_grid['slow_period']:
-            for entry_min_mult in param_grid['entry_min_mult']:
-                for entry_max_mult in param_grid['entry_max_mult']:
-                    for exit_min in param_grid['exit_min']:
-                        for exit_max in param_grid['exit_max']:
-                            current += 1
-                            
-                            try:
-                                strategy_class = type('MACDStrategy', (ParameterizedMACDStrategy,), {})
-                                
-                                bt = Backtest(
-                                    train_data,
-                                    strategy_class,
-                                    cash=1000000,
-                                    commission=0.002,
-                                    exclusive_orders=True
-                                )
-                                
-                                stats = bt.run(
-                                    fast_period=fast,
-                                    slow_period=slow,
-                                    entry_min_mult=entry_min_mult,
-                                    entry_max_mult=entry_max_mult,
-                                    exit_min=exit_min,
-                                    exit_max=exit_max
-                                )
-                                
-                                # Only consider strategies with at least 5 trades
-                                if stats['# Trades'] >= 5:
-                                    return_pct = stats['Return [%]']
-                                    
-                                    if return_pct > best_return:
-                                        best_return = return_pct
-                                        best_params = {
-                                            'fast_period': fast,
-                                            'slow_period': slow,
-                                            'entry_min_mult': entry_min_mult,
-                                            'entry_max_mult': entry_max_mult,
-                                            'exit_min': exit_min,
-                                            'exit_max': exit_max,
-                                        }
-                                        best_stats = {
-                                            'return_pct': return_pct,
-                                            'trades': stats['# Trades'],
-                                            'win_rate': stats['Win Rate [%]'] if not pd.isna(stats['Win Rate [%]']) else 0,
-                                            'sharpe': stats['Sharpe Ratio'] if not pd.isna(stats['Sharpe Ratio']) else 0,
-                                            'max_dd': stats['Max. Drawdown [%]'],
-                                        }
-                                        
-                            except Exception as e:
-                                # Skip failed combinations
-                                continue
+    for params, result in zip(combinations, results):
+        if result.get('return_pct') is None:
+            # Skip failed combinations
+            continue
+        if result['trades'] >= MIN_TRAIN_TRADES:
+            return_pct = result['return_pct']
+            
+            if return_pct > best_return:
+                best_return = return_pct
+                best_params = dict(params)
+                best_stats = {
+                    'return_pct': return_pct,
+                    'trades': result['trades'],
+                    'win_rate': result['win_rate'],
+                    'sharpe': result['sharpe'],
+                    'max_dd': result['max_dd'],
+                }
     
     return best_params, best_stats
 
 
-def walk_forward_optimization(data, window_days=7, test_days=3, param_grid=None):
+def optimize_parameters_on_window(train_data, param_grid=None):
     """
-    Perform walk-forward optimization with rolling windows
+    Optimize MACD parameters on a training window
     
     Parameters:
-    - data: Full dataset DataFrame with datetime index
-    - window_days: Number of days for training window
-    - test_days: Number of days for testing window
-    - param_grid: Optional custom parameter grid
+    - train_data: Training data DataFrame
+    - param_grid: Optional custom parameter grid, otherwise uses default
     
     Returns:
-    - DataFrame with results for each window
+    - Dictionary with best parameters and performance
     """
-    results = []
+    combinations = expand_param_grid(param_grid)
+    ema_cache = {}
+    results = [run_window_combination(train_data, params, None, ema_cache) for params in combinations]
+    return select_best_parameters(combinations, results)
+
+
+class ResultCache:
+    """
+    Content-addressed store of backtest results on disk.
+    
+    A result's key hashes the exact bars it ran on, its parameters, the strategy
+    source and the backtest settings, so reruns over the same windows reuse results
+    and any change to data or strategy code simply misses. Failed runs are never
+    stored, so a transient error is retried on the next run.
+    """
+    
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._code_digest = hashlib.sha1(
+            (inspect.getsource(ParameterizedMACDStrategy) + json.dumps(BACKTEST_SETTINGS, sort_keys=True)).encode()
+        ).hexdigest()
+    
+    def key(self, window_digest: str, params: Dict) -> str:
+        payload = json.dumps([self._code_digest, window_digest, params], sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()
+    
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+    
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key)) as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if not isinstance(result, dict) or 'error' in result:  # written before errors were skipped
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+    
+    def put(self, key: str, result: Dict):
+        if 'error' in result:
+            return
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        temp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(result, f, default=lambda value: value.item() if hasattr(value, 'item') else str(value))
+        os.replace(temp_path, path)
+
+
+def plan_windows(data, window_days=7, test_days=3) -> List[Dict]:
+    """Rolling train/test windows as row ranges into data (same windows as date slicing)"""
+    windows = []
     start_date = data.index[0]
     end_date = data.index[-1]
     
     current_date = start_date
     window_num = 0
     
-    print(f"[WALK-FORWARD] Starting walk-forward optimization")
-    print(f"[WALK-FORWARD] Training window: {window_days} days, Testing window: {test_days} days")
-    print(f"[WALK-FORWARD] Data range: {start_date} to {end_date}")
-    print()
-    
     while current_date + timedelta(days=window_days + test_days) <= end_date:
         window_num += 1
         train_start = current_date
@@ -146,99 +164,233 @@ def walk_forward_optimization(data, window_days=7, test_days=3, param_grid=None)
         test_start = train_end
         test_end = test_start + timedelta(days=test_days)
         
-        # Extract windows
-        train_data = data[train_start:train_end].copy()
-        test_data = data[test_start:test_end].copy()
-        
-        if len(train_data) < 100 or len(test_data) < 20:
-            print(f"[WALK-FORWARD] Window {window_num}: Skipping (insufficient data)")
-            current_date += timedelta(days=test_days)
-            continue
-        
-        print(f"[WALK-FORWARD] Window {window_num}:")
-        print(f"  Training: {train_start.date()} to {train_end.date()} ({len(train_data)} bars)")
-        print(f"  Testing:  {test_start.date()} to {test_end.date()} ({len(test_data)} bars)")
-        
-        # Optimize on training data
-        print(f"  Optimizing parameters on training data...")
-        best_params, train_stats = optimize_parameters_on_window(train_data, param_grid)
-        
-        if best_params is None:
-            print(f"  → No valid parameters found, skipping window")
-            current_date += timedelta(days=test_days)
-            continue
-        
-        print(f"  → Best params: fast={best_params['fast_period']}, slow={best_params['slow_period']}, "
-              f"entry=({best_params['entry_min_mult']:.1f}, {best_params['entry_max_mult']:.1f}), "
-              f"exit=({best_params['exit_min']:.4f}, {best_params['exit_max']:.4f})")
-        print(f"  → Train return: {train_stats['return_pct']:.2f}%, Trades: {train_stats['trades']}")
-        
-        # Test on out-of-sample data
-        print(f"  Testing on out-of-sample data...")
-        try:
-            strategy_class = type('MACDStrategy', (ParameterizedMACDStrategy,), {})
-            
-            bt = Backtest(
-                test_data,
-                strategy_class,
-                cash=1000000,
-                commission=0.002,
-                exclusive_orders=True
-            )
-            
-            test_stats = bt.run(**best_params)
-            
-            result = {
-                'window_num': window_num,
-                'train_start': train_start,
-                'train_end': train_end,
-                'test_start': test_start,
-                'test_end': test_end,
-                'train_bars': len(train_data),
-                'test_bars': len(test_data),
-                'fast_period': best_params['fast_period'],
-                'slow_period': best_params['slow_period'],
-                'entry_min_mult': best_params['entry_min_mult'],
-                'entry_max_mult': best_params['entry_max_mult'],
-                'exit_min': best_params['exit_min'],
-                'exit_max': best_params['exit_max'],
-                'train_return': train_stats['return_pct'],
-                'train_trades': train_stats['trades'],
-                'train_sharpe': train_stats['sharpe'],
-                'test_return': test_stats['Return [%]'],
-                'test_trades': test_stats['# Trades'],
-                'test_sharpe': test_stats['Sharpe Ratio'] if not pd.isna(test_stats['Sharpe Ratio']) else 0,
-                'test_win_rate': test_stats['Win Rate [%]'] if not pd.isna(test_stats['Win Rate [%]']) else 0,
-                'test_max_dd': test_stats['Max. Drawdown [%]'],
-            }
-            
-            results.append(result)
-            
-            print(f"  → Test return: {result['test_return']:.2f}%, Trades: {result['test_trades']}, "
-                  f"Sharpe: {result['test_sharpe']:.2f}")
-            
-        except Exception as e:
-            print(f"  → ERROR testing: {str(e)}")
-            result = {
-                'window_num': window_num,
-                'train_start': train_start,
-                'train_end': train_end,
-                'test_start': test_start,
-                'test_end': test_end,
-                'error': str(e)
-            }
-            results.append(result)
+        # Label slices include both ends, like data[train_start:train_end]
+        train = data.index.slice_indexer(train_start, train_end)
+        test = data.index.slice_indexer(test_start, test_end)
         
-        print()
+        windows.append({
+            'window_num': window_num,
+            'train_start': train_start,
+            'train_end': train_end,
+            'test_start': test_start,
+            'test_end': test_end,
+            'train': (train.start, train.stop),
+            'test': (test.start, test.stop),
+            'skip': (train.stop - train.start) < 100 or (test.stop - test.start) < 20,
+        })
         
         # Slide window forward
         current_date += timedelta(days=test_days)
     
-    df_results = pd.DataFrame(results)
+    return windows
+
+
+class _InlineExecutor:
+    """Executor stand-in that runs tasks immediately in this process (workers=1)"""
+    
+    def __init__(self, data):
+        self.data = data
+        self.ema_cache = {}
+    
+    def submit(self, params, window):
+        future = Future()
+        future.set_result(run_window_combination(self.data, params, window, self.ema_cache))
+        return future
+
+
+def walk_forward_optimization(data, window_days=7, test_days=3, param_grid=None, workers=None,
+                              cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Perform walk-forward optimization with rolling windows
+    
+    Every (window, combination) training run goes into one process pool, so
+    windows and combinations run in parallel. A window's out-of-sample test is
+    queued as soon as its training runs finish. Workers read windows from one
+    shared-memory copy of the data and compute the EMA pair for each
+    (window, fast, slow) once.
+    
+    Parameters:
+    - data: Full dataset DataFrame with datetime index
+    - window_days: Number of days for training window
+    - test_days: Number of days for testing window
+    - param_grid: Optional custom parameter grid
+    - workers: Backtest processes (default: one per core; 1 runs in-process)
+    - cache_dir: Content-addressed result cache (None disables it)
+    
+    Returns:
+    - DataFrame with results for each window
+    """
+    workers = max(1, workers if workers is not None else (os.cpu_count() or 1))
+    combinations = expand_param_grid(param_grid)
+    windows = plan_windows(data, window_days, test_days)
+    cache = ResultCache(cache_dir) if cache_dir is not None else None
+    
+    print(f"[WALK-FORWARD] Starting walk-forward optimization")
+    print(f"[WALK-FORWARD] Training window: {window_days} days, Testing window: {test_days} days")
+    print(f"[WALK-FORWARD] Data range: {data.index[0]} to {data.index[-1]}")
+    print(f"[WALK-FORWARD] {len(combinations)} combinations per window on {workers} worker(s)")
+    print()
+    
+    for window in windows:
+        if window['skip']:
+            print(f"[WALK-FORWARD] Window {window['window_num']}: Skipping (insufficient data)")
+    windows = [window for window in windows if not window['skip']]
+    
+    shared = SharedOHLCV(data)
+    digests = _window_digests(data, windows)
+    if workers == 1:
+        executor = _InlineExecutor(data)
+        submit = executor.submit
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'),
+                                   initializer=_init_grid_worker, initargs=(shared.handle,))
+        submit = lambda params, rows: pool.submit(_run_grid_task, params, rows)
+    
+    results = []
+    train_results = {window['window_num']: [None] * len(combinations) for window in windows}
+    remaining = {window['window_num']: len(combinations) for window in windows}
+    tasks = {}  # future -> (window, combination index or 'test', cache key)
+    ready = []  # (window, combination index or 'test', result) found in the cache
+    
+    def schedule(window, slot, params, rows, digest):
+        key = cache.key(digest, params) if cache is not None else None
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            ready.append((window, slot, cached))
+        else:
+            tasks[submit(params, rows)] = (window, slot, key)
+    
+    def on_result(window, slot, result):
+        window_num = window['window_num']
+        if slot != 'test':
+            train_results[window_num][slot] = result
+            remaining[window_num] -= 1
+            if remaining[window_num] == 0:
+                best_params, train_stats = select_best_parameters(combinations, train_results[window_num])
+                window['best_params'], window['train_stats'] = best_params, train_stats
+                if best_params is None:
+                    _report_window(window, None)
+                else:
+                    schedule(window, 'test', best_params, window['test'], digests[window_num]['test'])
+            return
+        row = _window_result(window, result)
+        results.append(row)
+        _report_window(window, row)
+    
+    started = time.perf_counter()
+    try:
+        for window in windows:
+            for slot, params in enumerate(combinations):
+                schedule(window, slot, params, window['train'], digests[window['window_num']]['train'])
+        
+        while tasks or ready:
+            while ready:
+                on_result(*ready.pop(0))
+            if not tasks:
+                break
+            done, _ = wait(list(tasks), return_when=FIRST_COMPLETED)
+            for future in [future for future in tasks if future in done]:  # submission order
+                window, slot, key = tasks.pop(future)
+                result = future.result()
+                if cache is not None:
+                    cache.put(key, result)
+                on_result(window, slot, result)
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+        shared.close()
+    
+    elapsed = time.perf_counter() - started
+    cache_note = f", cache {cache.hits} hits / {cache.misses} misses" if cache is not None else ""
+    print(f"[WALK-FORWARD] {len(windows)} windows in {elapsed:.1f}s{cache_note}")
+    
+    df_results = pd.DataFrame(sorted(results, key=lambda row: row['window_num']))
     
     return df_results
 
 
+def _window_digests(data, windows) -> Dict[int, Dict[str, str]]:
+    """Content hash of each window's train and test bars"""
+    columns = [column for column in OHLCV_COLUMNS if column in data.columns]
+    values = np.ascontiguousarray(data[columns].to_numpy(dtype=np.float64))
+    index = np.ascontiguousarray(data.index.values).view(np.int64) if isinstance(data.index, pd.DatetimeIndex) \
+        else np.arange(len(data), dtype=np.int64)
+    
+    def digest(rows):
+        start, stop = rows
+        hasher = hashlib.sha1(json.dumps(columns).encode())
+        hasher.update(index[start:stop].tobytes())
+        hasher.update(values[start:stop].tobytes())
+        return hasher.hexdigest()
+    
+    return {window['window_num']: {'train': digest(window['train']), 'test': digest(window['test'])}
+            for window in windows}
+
+
+def _window_result(window: Dict, test_result: Dict) -> Dict:
+    """Results row for one window (error row if the out-of-sample run failed)"""
+    if 'error' in test_result:
+        return {
+            'window_num': window['window_num'],
+            'train_start': window['train_start'],
+            'train_end': window['train_end'],
+            'test_start': window['test_start'],
+            'test_end': window['test_end'],
+            'error': test_result['error']
+        }
+    
+    best_params, train_stats = window['best_params'], window['train_stats']
+    return {
+        'window_num': window['window_num'],
+        'train_start': window['train_start'],
+        'train_end': window['train_end'],
+        'test_start': window['test_start'],
+        'test_end': window['test_end'],
+        'train_bars': window['train'][1] - window['train'][0],
+        'test_bars': window['test'][1] - window['test'][0],
+        'fast_period': best_params['fast_period'],
+        'slow_period': best_params['slow_period'],
+        'entry_min_mult': best_params['entry_min_mult'],
+        'entry_max_mult': best_params['entry_max_mult'],
+        'exit_min': best_params['exit_min'],
+        'exit_max': best_params['exit_max'],
+        'train_return': train_stats['return_pct'],
+        'train_trades': train_stats['trades'],
+        'train_sharpe': train_stats['sharpe'],
+        'test_return': test_result['return_pct'],
+        'test_trades': test_result['trades'],
+        'test_sharpe': test_result['sharpe'],
+        'test_win_rate': test_result['win_rate'],
+        'test_max_dd': test_result['max_dd'],
+    }
+
+
+def _report_window(window: Dict, row: Optional[Dict]):
+    print(f"[WALK-FORWARD] Window {window['window_num']}:")
+    print(f"  Training: {window['train_start'].date()} to {window['train_end'].date()} "
+          f"({window['train'][1] - window['train'][0]} bars)")
+    print(f"  Testing:  {window['test_start'].date()} to {window['test_end'].date()} "
+          f"({window['test'][1] - window['test'][0]} bars)")
+    
+    best_params, train_stats = window['best_params'], window['train_stats']
+    if best_params is None:
+        print(f"  → No valid parameters found, skipping window")
+        print()
+        return
+    
+    print(f"  → Best params: fast={best_params['fast_period']}, slow={best_params['slow_period']}, "
+          f"entry=({best_params['entry_min_mult']:.1f}, {best_params['entry_max_mult']:.1f}), "
+          f"exit=({best_params['exit_min']:.4f}, {best_params['exit_max']:.4f})")
+    print(f"  → Train return: {train_stats['return_pct']:.2f}%, Trades: {train_stats['trades']}")
+    if 'error' in row:
+        print(f"  → ERROR testing: {row['error']}")
+    else:
+        print(f"  → Test return: {row['test_return']:.2f}%, Trades: {row['test_trades']}, "
+              f"Sharpe: {row['test_sharpe']:.2f}")
+    print()
+
+
 def analyze_walk_forward_results(df_results):
     """Analyze walk-forward results and calculate robustness metrics"""
     if len(df_results) == 0:
@@ -311,27 +463,67 @@ def analyze_walk_forward_results(df_results):
     }
 
 
+def benchmark_walk_forward(data, window_days=7, test_days=3, param_grid=None):
+    """Runtime by worker count (no cache), then a rerun served from the result cache"""
+    import contextlib
+    import io
+    import tempfile
+    import warnings
+    warnings.filterwarnings('ignore')
+
+    if param_grid is None:
+        # 16 combinations per window keeps the serial baseline to a few minutes
+        param_grid = dict(DEFAULT_PARAM_GRID, fast_period=[8, 12], slow_period=[21, 26],
+                          entry_min_mult=[-2.0, -1.0], entry_max_mult=[-1.0, -0.2], exit_min=[-0.025], exit_max=[-0.01])
+
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, cores})
+    print(f"[BENCHMARK] {len(expand_param_grid(param_grid))} combinations per window, {len(data)} bars, {cores} core(s)")
+
+    def timed(workers, cache_dir):
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = walk_forward_optimization(data, window_days, test_days, param_grid, workers=workers, cache_dir=cache_dir)
+        return time.perf_counter() - started, results
+
+    baseline, reference = timed(1, None)
+    print(f"[BENCHMARK] 1 worker:   {baseline:.1f}s")
+    for workers in worker_counts[1:]:
+        elapsed, results = timed(workers, None)
+        print(f"[BENCHMARK] {workers} workers: {elapsed:.1f}s ({baseline / elapsed:.2f}x, identical: {results.equals(reference)})")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cold, _ = timed(cores, cache_dir)
+        warm, results = timed(cores, cache_dir)
+    print(f"[BENCHMARK] Cached rerun: {warm:.2f}s vs {cold:.1f}s cold (identical: {results.equals(reference)})")
+
+
 if __name__ == "__main__":
     # Default data file path
     default_data_file = Path(__file__).parent.parent / "data" / "rbi" / "BTC-USD-5m.csv"
     
-    if len(sys.argv) > 1:
-        data_file = sys.argv[1]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if len(args) > 0:
+        data_file = args[0]
     else:
         data_file = str(default_data_file)
     
     if not os.path.exists(data_file):
         print(f"[ERROR] Data file not found: {data_file}")
-        print(f"[INFO] Usage: python macd_walk_forward.py [data_file_path] [window_days] [test_days]")
+        print(f"[INFO] Usage: python macd_walk_forward.py [data_file_path] [window_days] [test_days] [--no-cache] [--benchmark]")
         sys.exit(1)
     
     # Parse optional arguments
     window_days = 7
     test_days = 3
-    if len(sys.argv) > 2:
-        window_days = int(sys.argv[2])
-    if len(sys.argv) > 3:
-        test_days = int(sys.argv[3])
+    if len(args) > 1:
+        window_days = int(args[1])
+    if len(args) > 2:
+        test_days = int(args[2])
+    
+    if '--benchmark' in sys.argv:
+        benchmark_walk_forward(load_data(data_file), window_days, test_days)
+        sys.exit(0)
     
     print("=" * 100)
     print("MACD Walk-Forward Optimization")
@@ -345,7 +537,8 @@ if __name__ == "__main__":
     print()
     
     # Run walk-forward optimization
-    results = walk_forward_optimization(price_data, window_days=window_days, test_days=test_days)
+    results = walk_forward_optimization(price_data, window_days=window_days, test_days=test_days,
+                                        cache_dir=None if '--no-cache' in sys.argv else DEFAULT_CACHE_DIR)
     
     # Save results
     output_dir = Path(__file__).parent.parent / "data" / "rbi_v3"
@@ -0,0 +1,324 @@
+"""
+⏱️ Agent Scheduler for Anarcho Capital
+Deadline-ordered, dependency-aware execution of periodic agents on a shared worker pool
+Built with love by Anarcho Capital 🚀
+
+Agents are kept in a priority queue keyed by their next due time. A single
+dispatcher thread sleeps until the earliest deadline (or until a run finishes)
+instead of polling, then hands due agents to one bounded thread pool, so a slow
+whale or sentiment cycle no longer delays chart analysis or OI collection.
+
+An agent is held back while any agent it depends on is running or is itself
+due, so declared upstream agents (e.g. whale before copybot) always go first.
+Each agent has its own concurrency limit (default 1: a run that comes due while
+the previous one is still going waits for it and is counted as an overlap).
+Runs that exceed their max runtime are reported as timed out and rescheduled;
+the worker thread itself cannot be killed and is released when it returns.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_ERROR_DELAY_SEC = 3600  # Cap on the back-off after repeated failures
+
+
+@dataclass
+class ScheduledAgent:
+    """Schedule, limits and run metrics for one registered agent"""
+    name: str
+    run: Callable[[], bool]
+    interval: float
+    depends_on: List[str] = field(default_factory=list)
+    max_concurrency: int = 1
+    max_runtime: Optional[float] = None
+    max_retries: int = 3
+
+    next_due: Optional[float] = None
+    running: int = 0
+    error_count: int = 0
+    entry_seq: Optional[int] = None  # Live heap entry; older entries are ignored
+    overlapping: bool = False  # Current due run is waiting on a still-running previous run
+    awaiting_upstream: bool = False  # Current due run is waiting on a dependency
+    samples: Dict[str, int] = field(default_factory=lambda: {'duration': 0, 'lateness': 0})
+    metrics: Dict = field(default_factory=lambda: {
+        'runs': 0, 'successes': 0, 'failures': 0, 'timeouts': 0,
+        'overlaps': 0, 'dependency_waits': 0,
+        'last_duration_sec': None, 'avg_duration_sec': None, 'max_duration_sec': 0.0,
+        'last_lateness_sec': None, 'avg_lateness_sec': None, 'max_lateness_sec': 0.0,
+    })
+
+
+class AgentScheduler:
+    """
+    Run periodic agents by deadline on a shared, bounded worker pool.
+
+    Args:
+        max_workers: Threads shared by all agents
+        on_start: Called with the agent name when a run starts
+        on_finish: Called with (name, success, next_due) when a run ends or times out
+    """
+
+    def __init__(self, max_workers: int = 3, on_start: Callable[[str], None] = None,
+                 on_finish: Callable[[str, bool, float], None] = None):
+        self.max_workers = max_workers
+        self.on_start = on_start
+        self.on_finish = on_finish
+
+        self.agents: Dict[str, ScheduledAgent] = {}
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._runs: Dict[int, Dict] = {}  # run_id -> {'agent', 'started', 'deadline', 'timed_out'}
+        self._run_ids = itertools.count()
+        self._active = 0
+        self._peak_active = 0
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._dispatcher: Optional[threading.Thread] = None
+
+    # ==== Registration ====
+
+    def add_agent(self, name: str, run: Callable[[], bool], interval: float, first_run_at: float = None,
+                  depends_on: Iterable[str] = (), max_concurrency: int = 1, max_runtime: float = None,
+                  max_retries: int = 3) -> ScheduledAgent:
+        """
+        Register an agent.
+
+        Args:
+            run: Executes one cycle, returns True on success (exceptions count as failure)
+            interval: Seconds between the end of one run and the next due time
+            first_run_at: Epoch seconds of the first run (default: now)
+            depends_on: Agents that must not be running or due when this one starts
+        """
+        agent = ScheduledAgent(name=name, run=run, interval=interval, depends_on=list(depends_on),
+                               max_concurrency=max_concurrency, max_runtime=max_runtime,
+                               max_retries=max_retries)
+        with self._cond:
+            previous = self.agents.get(name)
+            self.agents[name] = agent
+            try:
+                self._check_dependencies()
+            except ValueError:
+                if previous is None:
+                    del self.agents[name]
+                else:
+                    self.agents[name] = previous
+                raise
+            self._schedule(agent, time.time() if first_run_at is None else first_run_at)
+        return agent
+
+    def _check_dependencies(self) -> None:
+        """Reject dependency cycles; unknown upstream names are only checked at start()"""
+        visiting, done = set(), set()
+
+        def visit(name, path):
+            if name in done or name not in self.agents:
+                return
+            if name in visiting:
+                raise ValueError(f"Agent dependency cycle: {' -> '.join(path + [name])}")
+            visiting.add(name)
+            for upstream in self.agents[name].depends_on:
+                visit(upstream, path + [name])
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.agents:
+            visit(name, [])
+
+    # ==== Lifecycle ====
+
+    def start(self) -> 'AgentScheduler':
+        with self._cond:
+            unknown = {dep for agent in self.agents.values() for dep in agent.depends_on} - set(self.agents)
+            if unknown:
+                raise ValueError(f"Unknown agent dependencies: {', '.join(sorted(unknown))}")
+            if self._dispatcher is not None:
+                return self
+            self._stopping = False
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='agent')
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name='AgentDispatcher', daemon=True)
+            self._dispatcher.start()
+        return self
+
+    def stop(self, timeout: float = 30.0) -> bool:
+        """Stop dispatching and wait up to `timeout` for running agents; True if all finished"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            finished = self._cond.wait_for(lambda: self._active == 0, timeout=timeout)
+        if self._dispatcher is not None:
+            self._dispatcher.join(timeout=1)
+            self._dispatcher = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        return finished
+
+    def run_now(self, name: str) -> None:
+        """Make an agent due immediately"""
+        with self._cond:
+            self._schedule(self.agents[name], time.time())
+            self._cond.notify_all()
+
+    # ==== Introspection ====
+
+    def running_agents(self) -> List[str]:
+        with self._cond:
+            return [name for name, agent in self.agents.items() if agent.running]
+
+    def get_metrics(self) -> Dict:
+        """Per-agent run duration, lateness and overlap metrics plus pool utilisation"""
+        with self._cond:
+            agents = {
+                name: {**agent.metrics, 'running': agent.running, 'error_count': agent.error_count,
+                       'next_due': agent.next_due}
+                for name, agent in self.agents.items()
+            }
+            return {'agents': agents,
+                    'pool': {'max_workers': self.max_workers, 'active': self._active,
+                             'peak_active': self._peak_active}}
+
+    # ==== Dispatch ====
+
+    def _schedule(self, agent: ScheduledAgent, due: float) -> None:
+        agent.next_due = due
+        agent.entry_seq = next(self._seq)
+        agent.overlapping = agent.awaiting_upstream = False
+        heapq.heappush(self._heap, (due, agent.entry_seq, agent.name))
+
+    def _blocked_by_dependency(self, agent: ScheduledAgent, now: float) -> bool:
+        for name in agent.depends_on:
+            upstream = self.agents[name]
+            if upstream.running or (upstream.next_due is not None and upstream.next_due <= now):
+                return True
+        return False
+
+    def _dispatch_loop(self) -> None:
+        with self._cond:
+            while not self._stopping:
+                now = time.time()
+                self._expire_runs(now)
+
+                waiting = []
+                while self._heap and self._heap[0][0] <= now:
+                    entry = heapq.heappop(self._heap)
+                    agent = self.agents.get(entry[2])
+                    if agent is None or agent.entry_seq != entry[1]:
+                        continue  # Superseded by run_now() or a reschedule
+                    if not self._try_dispatch(agent, entry[0], now):
+                        waiting.append(entry)
+                for entry in waiting:
+                    heapq.heappush(self._heap, entry)
+
+                # Sleep until the next future deadline or run deadline; finishes wake us early
+                wake_times = [due for due, _, _ in self._heap if due > now]
+                wake_times += [run['deadline'] for run in self._runs.values()
+                               if run['deadline'] is not None and not run['timed_out']]
+                self._cond.wait(timeout=max(0.0, min(wake_times) - now) if wake_times else None)
+
+    def _try_dispatch(self, agent: ScheduledAgent, due: float, now: float) -> bool:
+        if agent.running >= agent.max_concurrency:
+            if not agent.overlapping:
+                agent.overlapping = True
+                agent.metrics['overlaps'] += 1
+                logger.warning(f"⚠️ {agent.name} is due but its previous run is still going, waiting for it")
+            return False
+        if self._blocked_by_dependency(agent, now):
+            if not agent.awaiting_upstream:
+                agent.awaiting_upstream = True
+                agent.metrics['dependency_waits'] += 1
+            return False
+        if self._active >= self.max_workers:
+            return False
+
+        agent.running += 1
+        agent.next_due = None
+        agent.entry_seq = None
+        self._active += 1
+        self._peak_active = max(self._peak_active, self._active)
+        run_id = next(self._run_ids)
+        deadline = now + agent.max_runtime if agent.max_runtime else None
+        self._runs[run_id] = {'agent': agent.name, 'started': now, 'deadline': deadline, 'timed_out': False}
+        self._record(agent, 'lateness', now - due)
+        self._executor.submit(self._execute, agent, run_id)
+        return True
+
+    def _execute(self, agent: ScheduledAgent, run_id: int) -> None:
+        if self.on_start:
+            self._safe_hook(self.on_start, agent.name)
+        try:
+            success = bool(agent.run())
+        except Exception as e:
+            logger.error(f"❌ {agent.name} execution failed: {str(e)}", exc_info=True)
+            success = False
+
+        with self._cond:
+            run = self._runs.pop(run_id)
+            agent.running -= 1
+            self._active -= 1
+            if not run['timed_out']:
+                self._record(agent, 'duration', time.time() - run['started'])
+                next_due = self._complete(agent, success)
+            self._cond.notify_all()
+        if not run['timed_out'] and self.on_finish:
+            self._safe_hook(self.on_finish, agent.name, success, next_due)
+
+    def _expire_runs(self, now: float) -> None:
+        for run in self._runs.values():
+            if run['timed_out'] or run['deadline'] is None or now < run['deadline']:
+                continue
+            agent = self.agents[run['agent']]
+            run['timed_out'] = True
+            agent.metrics['timeouts'] += 1
+            self._record(agent, 'duration', now - run['started'])
+            logger.error(f"⏰ {agent.name} execution timed out after {agent.max_runtime/60:.1f} minutes")
+            next_due = self._complete(agent, False)
+            if self.on_finish:
+                # Hooks run outside the scheduler lock
+                threading.Thread(target=self._safe_hook, args=(self.on_finish, agent.name, False, next_due),
+                                 daemon=True).start()
+
+    def _complete(self, agent: ScheduledAgent, success: bool) -> float:
+        """Record the outcome and schedule the next run (caller holds the lock)"""
+        now = time.time()
+        agent.metrics['runs'] += 1
+        delay = agent.interval
+        if success:
+            agent.metrics['successes'] += 1
+            agent.error_count = 0
+        else:
+            agent.metrics['failures'] += 1
+            agent.error_count += 1
+            if agent.error_count >= agent.max_retries:
+                delay = min(agent.interval * 2, MAX_ERROR_DELAY_SEC)
+                logger.warning(f"⚠️ {agent.name} has failed {agent.error_count} times. "
+                               f"Delaying next run by {delay/60:.0f} minutes")
+        if agent.entry_seq is not None and agent.next_due <= now + delay:
+            return agent.next_due  # run_now() during the run already scheduled an earlier run
+        self._schedule(agent, now + delay)
+        return now + delay
+
+    @staticmethod
+    def _record(agent: ScheduledAgent, metric: str, value: float) -> None:
+        """Update last/avg/max of 'duration' or 'lateness' (running mean)"""
+        agent.samples[metric] += 1
+        metrics = agent.metrics
+        average = metrics[f'avg_{metric}_sec'] or 0.0
+        metrics[f'avg_{metric}_sec'] = average + (value - average) / agent.samples[metric]
+        metrics[f'last_{metric}_sec'] = value
+        metrics[f'max_{metric}_sec'] = max(metrics[f'max_{metric}_sec'], value)
+
+    @staticmethod
+    def _safe_hook(hook: Callable, *args) -> None:
+        try:
+            hook(*args)
+        except Exception as e:
+            logger.error(f"❌ Scheduler hook {getattr(hook, '__name__', hook)} failed: {str(e)}")
@@ -0,0 +1,262 @@
+"""
+📖 Hyperliquid Price Book for Anarcho Capital
+One allMids websocket subscription shared by every price lookup
+
+The book keeps the latest mid of every coin in a symbol-indexed dict, so
+get_price() is a dict lookup instead of a full allMids download. A background
+thread holds the websocket (reconnecting with backoff); when the stream is
+down or its data is older than the staleness bound, lookups fall back to a
+REST allMids snapshot. Snapshots are coalesced across callers and throttled,
+so pricing N positions costs at most one download.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+import requests
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+try:
+    from src.scripts.shared_services.logger import debug, info, warning, error
+except ImportError:
+    def debug(msg, **kwargs): print(f"[DEBUG] {msg}")
+    def info(msg, **kwargs): print(f"[INFO] {msg}")
+    def warning(msg, **kwargs): print(f"[WARN] {msg}")
+    def error(msg, **kwargs): print(f"[ERROR] {msg}")
+
+try:
+    from src.config import HYPERLIQUID_WEBSOCKET_URL
+except ImportError:
+    HYPERLIQUID_WEBSOCKET_URL = "wss://api.hyperliquid.xyz/ws"
+
+HYPERLIQUID_INFO_URL = 'https://api.hyperliquid.xyz/info'
+
+MAX_STALENESS_SEC = float(os.getenv("HYPERLIQUID_PRICE_MAX_STALENESS_SEC", "5"))  # Older mids trigger a REST snapshot
+REST_MIN_INTERVAL_SEC = 1.0  # At most one REST snapshot per interval, however many lookups miss
+REST_TIMEOUT_SEC = 10
+RECONNECT_DELAY_SEC = 1
+RECONNECT_MAX_DELAY_SEC = 60
+
+
+def _normalize_symbol(symbol: str) -> str:
+    return symbol.replace('PERP', '')
+
+
+class HyperliquidPriceBook:
+    """
+    Latest Hyperliquid mids, streamed from the allMids channel with REST fallback.
+
+    Args:
+        websocket_url: Hyperliquid websocket endpoint
+        rest_url: Hyperliquid info endpoint for allMids snapshots
+        max_staleness: Seconds after which streamed/snapshot mids are too old to serve
+        rest_min_interval: Minimum seconds between REST snapshots
+        stream: Subscribe to the websocket (False = REST snapshots only)
+    """
+
+    def __init__(self, websocket_url: str = None, rest_url: str = HYPERLIQUID_INFO_URL,
+                 max_staleness: float = MAX_STALENESS_SEC, rest_min_interval: float = REST_MIN_INTERVAL_SEC,
+                 stream: bool = True):
+        self.websocket_url = websocket_url or HYPERLIQUID_WEBSOCKET_URL
+        self.rest_url = rest_url
+        self.max_staleness = max_staleness
+        self.rest_min_interval = rest_min_interval
+        self.stream = stream and websockets is not None
+
+        # Replaced wholesale on every update, so readers never see a half-applied snapshot
+        self._mids: Dict[str, float] = {}
+        self._index: Dict[str, float] = {}
+        self._updated_at: Optional[float] = None
+        self._source: Optional[str] = None
+
+        self._rest_lock = threading.Lock()
+        self._last_rest_attempt = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self.connected = False
+        self.stats = {'ws_updates': 0, 'rest_snapshots': 0, 'rest_failures': 0, 'reconnects': 0, 'lookups': 0}
+
+        if stream and websockets is None:
+            warning("websockets not installed, Hyperliquid price book uses REST snapshots only")
+
+    # ==== Lifecycle ====
+
+    def start(self) -> 'HyperliquidPriceBook':
+        if self.stream and self._thread is None:
+            self._loop = asyncio.new_event_loop()
+            self._stop_event = asyncio.Event()
+            self._thread = threading.Thread(target=self._run_stream, name='hl-price-book', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        loop, stop_event = self._loop, self._stop_event
+        if loop is not None and stop_event is not None:
+            loop.call_soon_threadsafe(stop_event.set)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._loop = self._stop_event = None
+
+    # ==== Lookups ====
+
+    def age(self) -> float:
+        """Seconds since the book was last updated (inf if never)"""
+        return float('inf') if self._updated_at is None else time.monotonic() - self._updated_at
+
+    def get_price(self, symbol: str, max_age: float = None) -> Optional[float]:
+        """Latest mid for a coin ('BTC' or 'BTCPERP'), None if unknown or too stale"""
+        self.stats['lookups'] += 1
+        if not self._ensure_fresh(max_age):
+            return None
+        return self._index.get(_normalize_symbol(symbol))
+
+    def get_prices(self, symbols: Iterable[str], max_age: float = None) -> Dict[str, Optional[float]]:
+        """Mids for many coins from one consistent snapshot"""
+        symbols = list(symbols)
+        self.stats['lookups'] += len(symbols)
+        if not self._ensure_fresh(max_age):
+            return {symbol: None for symbol in symbols}
+        index = self._index
+        return {symbol: index.get(_normalize_symbol(symbol)) for symbol in symbols}
+
+    def snapshot(self, max_age: float = None) -> Optional[Dict[str, float]]:
+        """All mids keyed by coin as Hyperliquid names them, None if unavailable"""
+        if not self._ensure_fresh(max_age):
+            return None
+        return dict(self._mids)
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'connected': self.connected, 'source': self._source,
+                'age_sec': round(self.age(), 3), 'coins': len(self._mids)}
+
+    # ==== Updates ====
+
+    def _apply(self, mids: Dict, source: str) -> None:
+        parsed = {}
+        for coin, price in mids.items():
+            try:
+                parsed[coin] = float(price)
+            except (TypeError, ValueError):
+                continue
+        self._mids = parsed
+        self._index = {_normalize_symbol(coin): price for coin, price in parsed.items()}
+        self._updated_at = time.monotonic()
+        self._source = source
+
+    def _ensure_fresh(self, max_age: float = None) -> bool:
+        max_age = self.max_staleness if max_age is None else max_age
+        if self.age() <= max_age:
+            return True
+        self._refresh_from_rest(max_age)
+        if self.age() <= max_age:
+            return True
+        warning(f"Hyperliquid mids are {self.age():.1f}s old (limit {max_age}s), not serving prices")
+        return False
+
+    def _refresh_from_rest(self, max_age: float) -> None:
+        with self._rest_lock:
+            # Another caller may have refreshed while we waited for the lock
+            if self.age() <= max_age or time.monotonic() - self._last_rest_attempt < self.rest_min_interval:
+                return
+            requested_at = self._last_rest_attempt = time.monotonic()
+            try:
+                response = requests.post(self.rest_url, headers={'Content-Type': 'application/json'},
+                                         json={"type": "allMids"}, timeout=REST_TIMEOUT_SEC)
+                if response.status_code != 200:
+                    raise ValueError(f"status {response.status_code}: {response.text[:200]}")
+                self.stats['rest_snapshots'] += 1
+                # The stream may have delivered newer mids while the request was in flight
+                if self._updated_at is None or self._updated_at < requested_at:
+                    self._apply(response.json(), 'rest')
+            except Exception as e:
+                self.stats['rest_failures'] += 1
+                error(f"Hyperliquid allMids snapshot failed: {e}")
+
+    # ==== Websocket stream ====
+
+    def _run_stream(self) -> None:
+        try:
+            self._loop.run_until_complete(self._stream())
+        finally:
+            self._loop.close()
+
+    async def _stream(self) -> None:
+        reconnect_delay = RECONNECT_DELAY_SEC
+        while not self._stop_event.is_set():
+            try:
+                async with websockets.connect(self.websocket_url, ping_interval=20, ping_timeout=10,
+                                              close_timeout=5) as ws:
+                    await ws.send(json.dumps({"method": "subscribe", "subscription": {"type": "allMids"}}))
+                    self.connected = True
+                    reconnect_delay = RECONNECT_DELAY_SEC
+                    info("📖 Hyperliquid price book subscribed to allMids")
+                    await self._read(ws)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                warning(f"Hyperliquid price stream error: {e}")
+            finally:
+                self.connected = False
+
+            if self._stop_event.is_set():
+                break
+            self.stats['reconnects'] += 1
+            debug(f"Reconnecting Hyperliquid price stream in {reconnect_delay}s")
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=reconnect_delay)
+            except asyncio.TimeoutError:
+                pass
+            reconnect_delay = min(reconnect_delay * 2, RECONNECT_MAX_DELAY_SEC)
+
+    async def _read(self, ws) -> None:
+        stop_wait = asyncio.ensure_future(self._stop_event.wait())
+        try:
+            while True:
+                receive = asyncio.ensure_future(ws.recv())
+                done, _ = await asyncio.wait({receive, stop_wait}, return_when=asyncio.FIRST_COMPLETED)
+                if stop_wait in done:
+                    receive.cancel()
+                    return
+                message = json.loads(receive.result())
+                if message.get("channel") != "allMids":
+                    continue
+                mids = message.get("data", {}).get("mids")
+                if isinstance(mids, dict):
+                    self._apply(mids, 'ws')
+                    self.stats['ws_updates'] += 1
+        finally:
+            stop_wait.cancel()
+
+
+_price_book: Optional[HyperliquidPriceBook] = None
+_price_book_lock = threading.Lock()
+
+
+def get_price_book() -> HyperliquidPriceBook:
+    """Shared, started price book (streaming unless HYPERLIQUID_PRICE_STREAM=false)"""
+    global _price_book
+    if _price_book is None:
+        with _price_book_lock:
+            if _price_book is None:
+                stream = os.getenv("HYPERLIQUID_PRICE_STREAM", "true").lower() == "true"
+                _price_book = HyperliquidPriceBook(stream=stream).start()
+    return _price_book
+
+
+if __name__ == "__main__":
+    book = get_price_book()
+    for _ in range(10):
+        prices = book.get_prices(["BTC", "ETH", "SOL"])
+        print(prices, book.get_stats())
+        time.sleep(1)
+    book.stop()
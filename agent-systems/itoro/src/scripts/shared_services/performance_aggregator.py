@@ -0,0 +1,350 @@
+"""
+📈 Performance Aggregator for Anarcho Capital
+Running PnL, win/loss and streak totals updated once per execution
+Built with love by Anarcho Capital 🚀
+
+Each execution is folded into running sums (trades, PnL, wins/losses, trade
+size, largest win/loss, current streak) and into time-bucketed rolling sums
+for the 1h/24h/7d/30d windows, so reading the current performance costs the
+same for ten executions or ten thousand. A rolling window keeps a fixed
+number of buckets; buckets that fall out of the window are dropped on read,
+which makes a window boundary exact to within one bucket (1 minute for 1h).
+
+Executions are identified by their tracker id, so feeding the same row twice
+(warm-up overlapping the first catch-up) only counts it once.
+
+SnapshotLog is the append-only JSON-lines file that replaces rewriting a whole
+JSON document per snapshot: one line per record, torn trailing lines ignored
+on load, compacted to the newest records once it doubles past its limit.
+
+Benchmark:
+    python -m src.scripts.shared_services.performance_aggregator --benchmark
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+ROLLING_WINDOWS = {'1h': 3600, '24h': 86400, '7d': 7 * 86400, '30d': 30 * 86400}
+WINDOW_BUCKETS = 60
+
+
+def execution_time(execution: Dict[str, Any], default: Optional[float] = None) -> float:
+    """Epoch seconds of an execution (tracker rows store epoch floats, older records ISO strings)"""
+    value = execution.get('timestamp')
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            try:
+                return datetime.fromisoformat(value).timestamp()
+            except ValueError:
+                pass
+    return time.time() if default is None else default
+
+
+def execution_pnl(execution: Dict[str, Any]) -> float:
+    """Realized PnL of an execution, from the row or its metadata"""
+    pnl = execution.get('pnl_usd')
+    if pnl is None and isinstance(execution.get('metadata'), dict):
+        pnl = execution['metadata'].get('pnl_usd')
+    return float(pnl or 0.0)
+
+
+def execution_value(execution: Dict[str, Any]) -> float:
+    """USD size of an execution"""
+    value = execution.get('value_usd')
+    if value is None:
+        value = execution.get('usd_value')
+    return float(value or 0.0)
+
+
+# ============================================================================
+# ROLLING WINDOWS
+# ============================================================================
+
+class RollingSum:
+    """Sum and count of values over a trailing time window, kept in fixed-width buckets"""
+
+    def __init__(self, window_sec: float, buckets: int = WINDOW_BUCKETS):
+        self.window_sec = window_sec
+        self.bucket_sec = window_sec / buckets
+        self._buckets = deque()  # [bucket index, sum, count], oldest first
+        self.total = 0.0
+        self.count = 0
+
+    def add(self, timestamp: float, value: float):
+        index = int(timestamp // self.bucket_sec)
+        buckets = self._buckets
+        if not buckets or buckets[-1][0] < index:
+            buckets.append([index, value, 1])
+        elif buckets[-1][0] == index:
+            buckets[-1][1] += value
+            buckets[-1][2] += 1
+        else:
+            # Late arrival: find or insert its bucket, scanning back from the newest
+            position = len(buckets) - 1
+            while position >= 0 and buckets[position][0] > index:
+                position -= 1
+            if position >= 0 and buckets[position][0] == index:
+                buckets[position][1] += value
+                buckets[position][2] += 1
+            else:
+                buckets.insert(position + 1, [index, value, 1])
+        self.total += value
+        self.count += 1
+
+    def expire(self, now: float):
+        """Drop buckets that ended before the window start"""
+        cutoff = int((now - self.window_sec) // self.bucket_sec)
+        buckets = self._buckets
+        if not buckets or buckets[0][0] >= cutoff:
+            return
+        while buckets and buckets[0][0] < cutoff:
+            buckets.popleft()
+        # Re-sum the (bounded) remaining buckets rather than subtracting, so no drift builds up
+        self.total = math.fsum(bucket[1] for bucket in buckets)
+        self.count = sum(bucket[2] for bucket in buckets)
+
+
+# ============================================================================
+# AGGREGATOR
+# ============================================================================
+
+class PerformanceAggregator:
+    """Running performance totals, updated per execution and read in constant time"""
+
+    def __init__(self, windows: Dict[str, float] = None, buckets: int = WINDOW_BUCKETS):
+        self._lock = threading.Lock()
+        self.windows = {name: RollingSum(seconds, buckets)
+                        for name, seconds in (windows or ROLLING_WINDOWS).items()}
+        self.last_id = 0
+        self.total_trades = 0
+        self.total_pnl = 0.0
+        self.winning_trades = 0
+        self.losing_trades = 0
+        self.trade_value_sum = 0.0
+        self.largest_win = 0.0
+        self.largest_loss = 0.0
+        self.consecutive_wins = 0
+        self.consecutive_losses = 0
+
+    def record(self, pnl_usd: float, value_usd: float = 0.0, timestamp: Optional[float] = None):
+        """Fold one trade into the totals (trades must arrive oldest first for the streaks)"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            self._record(pnl_usd, value_usd, timestamp)
+
+    def record_execution(self, execution: Dict[str, Any]) -> bool:
+        """Fold in a tracker execution row; rows at or below the last seen id are skipped"""
+        execution_id = execution.get('id')
+        with self._lock:
+            if execution_id is not None:
+                if execution_id <= self.last_id:
+                    return False
+                self.last_id = execution_id
+            self._record(execution_pnl(execution), execution_value(execution), execution_time(execution))
+            return True
+
+    def record_executions(self, executions: Iterable[Dict[str, Any]]) -> int:
+        """Fold in tracker rows in id order; returns how many were new"""
+        ordered = sorted(executions, key=lambda e: e.get('id') or 0)
+        return sum(self.record_execution(execution) for execution in ordered)
+
+    def _record(self, pnl: float, value: float, timestamp: float):
+        self.total_trades += 1
+        self.total_pnl += pnl
+        self.trade_value_sum += value
+        if pnl > 0:
+            self.winning_trades += 1
+            self.largest_win = max(self.largest_win, pnl)
+            self.consecutive_wins += 1
+            self.consecutive_losses = 0
+        elif pnl < 0:
+            self.losing_trades += 1
+            self.largest_loss = min(self.largest_loss, pnl)
+            self.consecutive_losses += 1
+            self.consecutive_wins = 0
+        else:
+            self.consecutive_wins = self.consecutive_losses = 0
+        for window in self.windows.values():
+            window.add(timestamp, pnl)
+
+    def window_pnl(self, name: str, now: Optional[float] = None) -> float:
+        """PnL of the trades inside one rolling window"""
+        with self._lock:
+            window = self.windows[name]
+            window.expire(time.time() if now is None else now)
+            return window.total
+
+    def summary(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Current totals and rolling-window PnL"""
+        now = time.time() if now is None else now
+        with self._lock:
+            for window in self.windows.values():
+                window.expire(now)
+            trades = self.total_trades
+            return {
+                'total_trades': trades,
+                'total_pnl_usd': self.total_pnl,
+                'winning_trades': self.winning_trades,
+                'losing_trades': self.losing_trades,
+                'win_rate': self.winning_trades / trades if trades else 0.0,
+                'avg_trade_size_usd': self.trade_value_sum / trades if trades else 0.0,
+                'largest_win_usd': self.largest_win,
+                'largest_loss_usd': self.largest_loss,
+                'consecutive_wins': self.consecutive_wins,
+                'consecutive_losses': self.consecutive_losses,
+                'window_pnl_usd': {name: window.total for name, window in self.windows.items()},
+                'window_trades': {name: window.count for name, window in self.windows.items()},
+            }
+
+
+# ============================================================================
+# APPEND-ONLY SNAPSHOT LOG
+# ============================================================================
+
+class SnapshotLog:
+    """
+    JSON-lines log: appends one record per write, compacts once it doubles past `keep` lines.
+
+    With `key`, the log holds the latest state per key (e.g. per agent): load()
+    folds every line into the newest record per key, however long ago that key
+    was last written, and compaction rewrites just those records.
+    """
+
+    def __init__(self, path, keep: int = 1000, key: Optional[str] = None):
+        self.path = Path(path)
+        self.keep = keep
+        self.key = key
+        self.lines = 0
+        self.live = 0  # Records a compaction would keep
+        self._lock = threading.Lock()
+
+    def load(self) -> List[Dict[str, Any]]:
+        """The newest `keep` records, or the newest per key (a torn trailing line from a crash is skipped)"""
+        records = deque(maxlen=self.keep) if self.key is None else {}
+        lines = 0
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if self.key is None:
+                        records.append(record)
+                    else:
+                        key = record.get(self.key)
+                        records.pop(key, None)  # Keep keys in order of their last update
+                        records[key] = record
+        self.lines = lines
+        loaded = list(records) if self.key is None else list(records.values())
+        self.live = len(loaded)
+        return loaded
+
+    def append(self, record: Dict[str, Any]):
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+            self.lines += 1
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self.lines > 2 * max(self.keep, self.live)
+
+    def rewrite(self, records: List[Dict[str, Any]]):
+        """Replace the log with `records` (atomic rename, so readers never see a partial file)"""
+        with self._lock:
+            tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record) + '\n')
+            os.replace(tmp_path, self.path)
+            self.lines = self.live = len(records)
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def _synthetic_executions(n: int, now: float, seed: int = 7) -> List[Dict[str, Any]]:
+    import random
+    rng = random.Random(seed)
+    return [{
+        'id': i + 1,
+        'timestamp': now - (n - i) * 900.0,
+        'usd_value': rng.uniform(10, 500),
+        'metadata': {'pnl_usd': rng.gauss(0.5, 10.0)},
+    } for i in range(n)]
+
+
+def _benchmark(n_executions: int = 1000, reads: int = 200):
+    """Per-read cost: legacy recompute over the latest executions vs running aggregates"""
+    import tempfile
+    from datetime import timedelta
+
+    now = time.time()
+    executions = _synthetic_executions(n_executions, now)
+    newest_first = list(reversed(executions))
+
+    def legacy_read():
+        pnl = lambda e: e.get('metadata', {}).get('pnl_usd', 0)
+        periods = []
+        for hours in (24, 168, 720):
+            cutoff = datetime.now() - timedelta(hours=hours)
+            periods.append(sum(pnl(e) for e in newest_first
+                               if datetime.fromtimestamp(e['timestamp']) >= cutoff))
+        winning = [e for e in newest_first if pnl(e) > 0]
+        losing = [e for e in newest_first if pnl(e) < 0]
+        sizes = [e.get('usd_value', 0) for e in newest_first]
+        return (sum(pnl(e) for e in newest_first), len(winning), len(losing),
+                sum(sizes) / len(sizes), max(map(pnl, winning)), min(map(pnl, losing)), periods)
+
+    def timed(fn, count):
+        started = time.perf_counter()
+        for _ in range(count):
+            result = fn()
+        return (time.perf_counter() - started) / count * 1e6, result
+
+    legacy_us, legacy = timed(legacy_read, reads)
+
+    aggregator = PerformanceAggregator()
+    started = time.perf_counter()
+    aggregator.record_executions(executions)
+    warm_ms = (time.perf_counter() - started) * 1000
+    new_us, summary = timed(aggregator.summary, reads)
+    record_us, _ = timed(lambda: aggregator.record(1.0, 100.0), reads)
+
+    snapshot = {'timestamp': datetime.now().isoformat(), **{k: v for k, v in summary.items() if not isinstance(v, dict)}}
+    history = [snapshot] * 1000
+    path = Path(tempfile.mkdtemp(prefix='perf_bench_'))
+    rewrite_us, _ = timed(lambda: (path / 'snapshots.json').write_text(json.dumps(history, indent=2)), 50)
+    log = SnapshotLog(path / 'snapshots.jsonl')
+    append_us, _ = timed(lambda: log.append(snapshot), 50)
+
+    print(f"[BENCHMARK] {n_executions} executions, {reads} reads")
+    print(f"[BENCHMARK] legacy recompute per read: {legacy_us:,.1f} µs")
+    print(f"[BENCHMARK] aggregate read: {new_us:,.1f} µs (warm-up {warm_ms:,.1f} ms, {record_us:,.1f} µs per new execution)"
+          f" | totals match: {math.isclose(legacy[0], summary['total_pnl_usd'], abs_tol=1e-6)}")
+    print(f"[BENCHMARK] snapshot persistence: rewrite 1000-snapshot JSON {rewrite_us:,.0f} µs vs append one line {append_us:,.1f} µs")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Performance aggregator")
+    parser.add_argument('--benchmark', action='store_true', help='Compare recompute-per-read with running aggregates')
+    parser.add_argument('--executions', type=int, default=1000)
+    args = parser.parse_args()
+    if args.benchmark:
+        _benchmark(args.executions)
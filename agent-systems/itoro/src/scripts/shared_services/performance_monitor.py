@@ -6,11 +6,18 @@ Tracks PnL, agent performance, and system health for the Master Agent
 import os
 import json
 import time
+import threading
+from collections import deque
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 from pathlib import Path
 from src.scripts.shared_services.logger import info, warning, error, debug
+from src.scripts.shared_services.performance_aggregator import PerformanceAggregator, SnapshotLog
+
+SNAPSHOT_HISTORY_LIMIT = 1000  # Snapshots kept in memory and after log compaction
+WARM_UP_EXECUTIONS = 1000  # Latest executions folded into the aggregates on first read
+SYNC_BATCH_SIZE = 1000  # Executions read per catch-up query
 
 @dataclass
 class PerformanceSnapshot:
@@ -80,13 +87,21 @@ class PerformanceMonitor:
         self.data_dir = Path("src/data/master_agent")
         self.data_dir.mkdir(parents=True, exist_ok=True)
         
-        self.snapshots_file = self.data_dir / "performance_snapshots.json"
-        self.agent_perf_file = self.data_dir / "agent_performance.json"
+        # Append-only JSON-lines logs (the .json files are read once for migration)
+        self.snapshots_file = self.data_dir / "performance_snapshots.jsonl"
+        self.agent_perf_file = self.data_dir / "agent_performance.jsonl"
+        self.snapshot_log = SnapshotLog(self.snapshots_file, keep=SNAPSHOT_HISTORY_LIMIT)
+        self.agent_perf_log = SnapshotLog(self.agent_perf_file, keep=SNAPSHOT_HISTORY_LIMIT, key='agent_name')
         
         # Performance tracking
-        self.snapshots: List[PerformanceSnapshot] = []
+        self.snapshots = deque(maxlen=SNAPSHOT_HISTORY_LIMIT)
         self.agent_performance: Dict[str, AgentPerformance] = {}
         
+        # Running aggregates over executions, advanced by execution id on each read
+        self.aggregator = PerformanceAggregator()
+        self._aggregates_warm = False
+        self._sync_lock = threading.Lock()
+        
         # Goal tracking
         self.monthly_pnl_goal_percent = 30.0  # Default 30% monthly goal
         
@@ -122,40 +137,14 @@ class PerformanceMonitor:
             
             total_value = current_snapshot.total_value_usd
             
-            # Get execution history
-            all_executions = execution_tracker.get_executions(limit=1000)
+            # Fold executions logged since the last read into the running aggregates
+            self._sync_aggregates(execution_tracker)
+            stats = self.aggregator.summary()
             
-            # Calculate PnL for different timeframes
             now = datetime.now()
-            daily_pnl = self._calculate_pnl_for_period(all_executions, hours=24)
-            weekly_pnl = self._calculate_pnl_for_period(all_executions, hours=168)
-            monthly_pnl = self._calculate_pnl_for_period(all_executions, hours=720)
-            
-            # Calculate total PnL
-            total_pnl = sum([e.get('pnl_usd', 0) for e in all_executions])
-            
-            # Calculate win/loss stats
-            winning_trades = [e for e in all_executions if e.get('pnl_usd', 0) > 0]
-            losing_trades = [e for e in all_executions if e.get('pnl_usd', 0) < 0]
-            
-            total_trades = len(all_executions)
-            win_count = len(winning_trades)
-            loss_count = len(losing_trades)
-            win_rate = win_count / total_trades if total_trades > 0 else 0.0
-            
-            # Calculate consecutive wins/losses
-            consecutive_losses = self._calculate_consecutive_losses(all_executions)
-            consecutive_wins = self._calculate_consecutive_wins(all_executions)
-            
-            # Calculate average trade size
-            trade_sizes = [e.get('value_usd', 0) for e in all_executions]
-            avg_trade_size = sum(trade_sizes) / len(trade_sizes) if trade_sizes else 0.0
-            
-            # Get largest win/loss
-            win_amounts = [e.get('pnl_usd', 0) for e in winning_trades]
-            loss_amounts = [e.get('pnl_usd', 0) for e in losing_trades]
-            largest_win = max(win_amounts) if win_amounts else 0.0
-            largest_loss = min(loss_amounts) if loss_amounts else 0.0
+            daily_pnl = stats['window_pnl_usd']['24h']
+            weekly_pnl = stats['window_pnl_usd']['7d']
+            monthly_pnl = stats['window_pnl_usd']['30d']
             
             # Calculate drawdown
             initial_balance = getattr(config, 'PAPER_INITIAL_BALANCE', 1000.0)
@@ -165,27 +154,27 @@ class PerformanceMonitor:
             # Create snapshot
             snapshot = PerformanceSnapshot(
                 timestamp=now.isoformat(),
-                total_pnl_usd=total_pnl,
+                total_pnl_usd=stats['total_pnl_usd'],
                 daily_pnl_usd=daily_pnl,
                 weekly_pnl_usd=weekly_pnl,
                 monthly_pnl_usd=monthly_pnl,
                 total_value_usd=total_value,
                 portfolio_balance_usd=total_value,
-                win_rate=win_rate,
-                total_trades=total_trades,
-                winning_trades=win_count,
-                losing_trades=loss_count,
-                consecutive_losses=consecutive_losses,
-                consecutive_wins=consecutive_wins,
-                avg_trade_size_usd=avg_trade_size,
-                largest_win_usd=largest_win,
-                largest_loss_usd=largest_loss,
+                win_rate=stats['win_rate'],
+                total_trades=stats['total_trades'],
+                winning_trades=stats['winning_trades'],
+                losing_trades=stats['losing_trades'],
+                consecutive_losses=stats['consecutive_losses'],
+                consecutive_wins=stats['consecutive_wins'],
+                avg_trade_size_usd=stats['avg_trade_size_usd'],
+                largest_win_usd=stats['largest_win_usd'],
+                largest_loss_usd=stats['largest_loss_usd'],
                 drawdown_percent=drawdown_percent
             )
             
             # Save snapshot
             self.snapshots.append(snapshot)
-            self._save_snapshots()
+            self._save_snapshot(snapshot)
             
             return snapshot
         
@@ -193,42 +182,21 @@ class PerformanceMonitor:
             error(f"Error calculating performance: {e}")
             return None
     
-    def _calculate_pnl_for_period(self, executions: List[Dict], hours: int) -> float:
-        """Calculate PnL for a specific time period"""
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        
-        period_pnl = 0.0
-        for execution in executions:
-            timestamp_str = execution.get('timestamp')
-            if timestamp_str:
-                try:
-                    exec_time = datetime.fromisoformat(timestamp_str)
-                    if exec_time >= cutoff_time:
-                        period_pnl += execution.get('pnl_usd', 0)
-                except:
-                    continue
-        
-        return period_pnl
+    def _sync_aggregates(self, execution_tracker):
+        """Advance the aggregates past every execution logged since the last read (any process)"""
+        with self._sync_lock:
+            if not self._aggregates_warm:
+                self.aggregator.record_executions(execution_tracker.get_executions(limit=WARM_UP_EXECUTIONS))
+                self._aggregates_warm = True
+            while True:
+                new_executions = execution_tracker.get_executions_after(self.aggregator.last_id, limit=SYNC_BATCH_SIZE)
+                self.aggregator.record_executions(new_executions)
+                if len(new_executions) < SYNC_BATCH_SIZE:
+                    break
     
-    def _calculate_consecutive_losses(self, executions: List[Dict]) -> int:
-        """Calculate current consecutive losses"""
-        consecutive = 0
-        for execution in reversed(executions):
-            if execution.get('pnl_usd', 0) < 0:
-                consecutive += 1
-            else:
-                break
-        return consecutive
-    
-    def _calculate_consecutive_wins(self, executions: List[Dict]) -> int:
-        """Calculate current consecutive wins"""
-        consecutive = 0
-        for execution in reversed(executions):
-            if execution.get('pnl_usd', 0) > 0:
-                consecutive += 1
-            else:
-                break
-        return consecutive
+    def get_rolling_pnl(self) -> Dict[str, float]:
+        """PnL over the 1h/24h/7d/30d windows as of the last sync"""
+        return self.aggregator.summary()['window_pnl_usd']
     
     def get_goal_progress(self) -> Dict[str, Any]:
         """
@@ -321,7 +289,7 @@ class PerformanceMonitor:
             # Update last execution time
             perf.last_execution_time = datetime.now().isoformat()
             
-            self._save_agent_performance()
+            self._save_agent_performance(perf)
         
         except Exception as e:
             error(f"Error updating agent performance: {e}")
@@ -474,48 +442,52 @@ class PerformanceMonitor:
             error(f"Error generating system health summary: {e}")
             return None
     
+    def _load_log(self, log: SnapshotLog, legacy_file: Path) -> List[Dict[str, Any]]:
+        """Records from an append-only log, migrating the legacy JSON file on first run"""
+        if not log.path.exists() and legacy_file.exists():
+            with open(legacy_file, 'r') as f:
+                data = json.load(f)
+            records = data[-log.keep:] if isinstance(data, list) else list(data.values())
+            log.rewrite(records)
+            info(f"📊 Migrated {legacy_file.name} to {log.path.name}")
+        return log.load()
+    
     def _load_snapshots(self):
         """Load performance snapshots from disk"""
         try:
-            if self.snapshots_file.exists():
-                with open(self.snapshots_file, 'r') as f:
-                    data = json.load(f)
-                    # Only keep last 1000 snapshots
-                    self.snapshots = [PerformanceSnapshot(**item) for item in data[-1000:]]
+            records = self._load_log(self.snapshot_log, self.data_dir / "performance_snapshots.json")
+            self.snapshots.extend(PerformanceSnapshot(**item) for item in records)
         except Exception as e:
             error(f"Error loading snapshots: {e}")
-            self.snapshots = []
+            self.snapshots.clear()
     
-    def _save_snapshots(self):
-        """Save performance snapshots to disk"""
+    def _save_snapshot(self, snapshot: PerformanceSnapshot):
+        """Append one performance snapshot to disk"""
         try:
-            # Only save last 1000 snapshots
-            with open(self.snapshots_file, 'w') as f:
-                data = [asdict(snapshot) for snapshot in self.snapshots[-1000:]]
-                json.dump(data, f, indent=2)
+            self.snapshot_log.append(asdict(snapshot))
+            if self.snapshot_log.needs_compaction:
+                self.snapshot_log.rewrite([asdict(item) for item in self.snapshots])
         except Exception as e:
             error(f"Error saving snapshots: {e}")
     
     def _load_agent_performance(self):
-        """Load agent performance from disk"""
+        """Load agent performance from disk (the latest record per agent wins)"""
         try:
-            if self.agent_perf_file.exists():
-                with open(self.agent_perf_file, 'r') as f:
-                    data = json.load(f)
-                    self.agent_performance = {
-                        name: AgentPerformance(**perf_data) 
-                        for name, perf_data in data.items()
-                    }
+            records = self._load_log(self.agent_perf_log, self.data_dir / "agent_performance.json")
+            self.agent_performance = {
+                perf_data['agent_name']: AgentPerformance(**perf_data)
+                for perf_data in records
+            }
         except Exception as e:
             error(f"Error loading agent performance: {e}")
             self.agent_performance = {}
     
-    def _save_agent_performance(self):
-        """Save agent performance to disk"""
+    def _save_agent_performance(self, perf: AgentPerformance):
+        """Append an agent's updated performance to disk"""
         try:
-            with open(self.agent_perf_file, 'w') as f:
-                data = {name: asdict(perf) for name, perf in self.agent_performance.items()}
-                json.dump(data, f, indent=2)
+            self.agent_perf_log.append(asdict(perf))
+            if self.agent_perf_log.needs_compaction:
+                self.agent_perf_log.rewrite([asdict(item) for item in self.agent_performance.values()])
         except Exception as e:
             error(f"Error saving agent performance: {e}")
 
@@ -3,8 +3,12 @@ Hyperliquid 7d enrichment: winrate_7d and avg_holding_period_7d from user_fills.
 Uses public Info API (no private key). For use in whale agent futures path and standalone script.
 """
 
+import os
+import json
 import time
-from typing import Dict, Any, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 from datetime import datetime, timedelta
 
 try:
@@ -19,10 +23,10 @@ DEFAULT_AVG_HOLDING_PERIOD_7D = 86400.0  # 1 day in seconds
 HYPERLIQUID_INFO_URL = "https://api.hyperliquid.xyz/info"
 
 
-def _fetch_user_fills_by_time(address: str, start_time_ms: int, end_time_ms: int) -> list:
-    """Fetch user fills from Hyperliquid Info API (REST). Returns list of fill dicts."""
+def _fetch_user_fills_by_time(address: str, start_time_ms: int, end_time_ms: int) -> Optional[list]:
+    """Fetch user fills from Hyperliquid Info API (REST). Returns list of fill dicts, None on error."""
     if not requests:
-        return []
+        return None
     try:
         payload = {
             "type": "userFillsByTime",
@@ -35,7 +39,7 @@ def _fetch_user_fills_by_time(address: str, start_time_ms: int, end_time_ms: int
         data = resp.json()
         return data if isinstance(data, list) else []
     except Exception:
-        return []
+        return None
 
 
 def _is_open_dir(dir_str: str) -> bool:
@@ -90,12 +94,17 @@ def enrich_wallet_7d_from_hyperliquid(
     Returns:
         {"winrate_7d": float, "avg_holding_period_7d": float}. Uses defaults on failure or no data.
     """
+    return _enrich_wallet_7d(address, info_instance)[0]
+
+
+def _enrich_wallet_7d(address: str, info_instance: Any = None) -> Tuple[Dict[str, float], bool]:
+    """Returns (stats, fetched); fetched is False when fills could not be retrieved"""
     out = {
         "winrate_7d": DEFAULT_WINRATE_7D,
         "avg_holding_period_7d": DEFAULT_AVG_HOLDING_PERIOD_7D,
     }
     if not address or not str(address).startswith("0x"):
-        return out
+        return out, False
 
     now = datetime.utcnow()
     start = now - timedelta(days=7)
@@ -103,16 +112,21 @@ def enrich_wallet_7d_from_hyperliquid(
     end_ms = int(now.timestamp() * 1000)
 
     fills = []
+    fetched = False
     if info_instance is not None and hasattr(info_instance, "user_fills_by_time"):
         try:
             fills = info_instance.user_fills_by_time(address, start_ms, end_ms) or []
+            fetched = True
         except Exception:
             fills = []
     if not fills and requests:
-        fills = _fetch_user_fills_by_time(address, start_ms, end_ms)
+        rest_fills = _fetch_user_fills_by_time(address, start_ms, end_ms)
+        if rest_fills is not None:
+            fills = rest_fills
+            fetched = True
 
     if not fills:
-        return out
+        return out, fetched
 
     wins = 0
     closes = 0
@@ -162,4 +176,131 @@ def enrich_wallet_7d_from_hyperliquid(
     if hold_times_sec:
         out["avg_holding_period_7d"] = sum(hold_times_sec) / len(hold_times_sec)
 
-    return out
+    return out, True
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = max(rate, 1e-9)
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class EnrichmentCache:
+    """
+    On-disk cache of 7d enrichment results keyed by wallet and UTC day.
+    One JSON file per day; files from earlier days are removed when a new day starts.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._day = None
+        self._entries: Dict[str, Dict[str, float]] = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, day: str) -> str:
+        return os.path.join(self.cache_dir, f"enrichment_7d_{day}.json")
+
+    def _ensure_day(self) -> None:
+        day = datetime.utcnow().strftime("%Y-%m-%d")
+        if day == self._day:
+            return
+        self._day = day
+        self._entries = {}
+        path = self._path(day)
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        for name in os.listdir(self.cache_dir):
+            if name.startswith("enrichment_7d_") and name != os.path.basename(path):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def get_many(self, addresses: Iterable[str]) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            self._ensure_day()
+            return {a: self._entries[a] for a in addresses if a in self._entries}
+
+    def put_many(self, results: Dict[str, Dict[str, float]]) -> None:
+        if not results:
+            return
+        with self._lock:
+            self._ensure_day()
+            self._entries.update(results)
+            path = self._path(self._day)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, path)
+
+
+def enrich_wallets_7d(
+    addresses: List[str],
+    max_workers: int = 4,
+    rate_per_sec: float = 2.0,
+    cache: Optional[EnrichmentCache] = None,
+    enrich_fn=None,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Enrich many wallets concurrently.
+
+    Requests run on a bounded thread pool behind a shared token bucket, so the
+    request rate stays at `rate_per_sec` while slow responses overlap. Results
+    already cached for today are not refetched; only successful fetches are cached.
+
+    Returns:
+        {address: {"winrate_7d": float, "avg_holding_period_7d": float}} for every address.
+    """
+    addresses = list(dict.fromkeys(a for a in addresses if a))
+    results: Dict[str, Dict[str, float]] = cache.get_many(addresses) if cache else {}
+    pending = [a for a in addresses if a not in results]
+    if not pending:
+        return results
+
+    enrich_fn = enrich_fn or _enrich_wallet_7d
+    bucket = TokenBucket(rate_per_sec, capacity=max_workers)
+
+    def _run(address: str) -> Tuple[str, Dict[str, float], bool]:
+        bucket.acquire()
+        try:
+            stats, fetched = enrich_fn(address)
+        except Exception:
+            return address, {
+                "winrate_7d": DEFAULT_WINRATE_7D,
+                "avg_holding_period_7d": DEFAULT_AVG_HOLDING_PERIOD_7D,
+            }, False
+        return address, stats, fetched
+
+    fresh: Dict[str, Dict[str, float]] = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for address, stats, fetched in executor.map(_run, pending):
+            results[address] = stats
+            if fetched:
+                fresh[address] = stats
+
+    if cache:
+        cache.put_many(fresh)
+    return results
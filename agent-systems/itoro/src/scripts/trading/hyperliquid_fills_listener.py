@@ -3,19 +3,38 @@ Hyperliquid WebSocket listener: subscribe to userFills for tracked addresses,
 parse fill events, and POST to copybot at /webhook/hyperliquid.
 Run where the copybot runs (same machine). No second Render server.
 Run: python -m src.scripts.trading.hyperliquid_fills_listener
+
+The websocket reader only parses fills and drops them on a bounded queue; a
+separate forwarder task micro-batches queued fills into one POST over a pooled
+HTTP session and retries with jittered backoff, so a slow copybot never stalls
+websocket reads.
+
+Local testing:
+  --mock-copybot [PORT]  run a stand-in copybot endpoint that records POSTs
+  --self-test            push synthetic fills through the forwarder into a mock copybot
 """
 
+import asyncio
 import json
 import os
+import random
 import signal
 import sys
 import time
+from collections import deque
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 _project_root = Path(__file__).resolve().parents[2]
 if str(_project_root) not in sys.path:
     sys.path.insert(0, str(_project_root))
 
+try:
+    import aiohttp
+    from aiohttp import web
+except ImportError:
+    aiohttp = None
+    web = None
 try:
     import requests
 except ImportError:
@@ -42,6 +61,15 @@ except ImportError:
     COPYBOT_HYPERLIQUID_WEBHOOK_URL = "http://localhost:8080/webhook/hyperliquid"
     HYPERLIQUID_WEBSOCKET_URL = "wss://api.hyperliquid.xyz/ws"
 
+# Forwarding stage
+FORWARD_QUEUE_MAXSIZE = int(os.getenv("HYPERLIQUID_FORWARD_QUEUE_MAXSIZE", "1000"))
+FORWARD_MAX_BATCH = 50  # Fills per POST
+FORWARD_BATCH_WINDOW_SEC = 0.05  # How long to wait for more fills before sending a batch
+FORWARD_MAX_ATTEMPTS = 3
+FORWARD_TIMEOUT_SEC = 10
+FORWARD_BACKOFF_BASE_SEC = 0.5
+FORWARD_BACKOFF_MAX_SEC = 8.0
+
 _shutdown = False
 
 
@@ -74,52 +102,279 @@ def _fill_to_event(user: str, fill: dict) -> dict:
         size_usd = px * sz
     except (TypeError, ValueError):
         size_usd = 0
-    return {
+    event = {
         "wallet": user,
         "symbol": coin,
         "side": side,
         "size_usd": size_usd,
     }
+    if fill.get("time") is not None:
+        event["fill_time"] = fill.get("time")  # Exchange fill time (ms), for latency tracking
+    return event
 
 
-def _post_to_copybot(events: list):
-    """POST events to copybot with retry/backoff."""
-    if not events or not requests:
-        return False
-    payload = {"source": "hyperliquid", "events": events}
-    for attempt in range(3):
-        try:
-            r = requests.post(
-                COPYBOT_HYPERLIQUID_WEBHOOK_URL,
-                json=payload,
-                timeout=10,
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class FillForwarder:
+    """
+    Async forwarding stage between the websocket reader and copybot.
+
+    submit() never blocks: fills go on a bounded queue and, when the queue is
+    full, the oldest queued fill is dropped (and counted) rather than stalling
+    the reader. A single forwarder task sends batches in arrival order.
+    """
+
+    def __init__(self, url: str = None, queue_maxsize: int = FORWARD_QUEUE_MAXSIZE,
+                 max_batch: int = FORWARD_MAX_BATCH, batch_window: float = FORWARD_BATCH_WINDOW_SEC,
+                 max_attempts: int = FORWARD_MAX_ATTEMPTS, timeout: float = FORWARD_TIMEOUT_SEC):
+        self.url = url or COPYBOT_HYPERLIQUID_WEBHOOK_URL
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_maxsize)
+        self._session = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.forwarded = 0
+        self.failed = 0
+        self.dropped = 0
+        self.batches = 0
+        self.retries = 0
+        self._queue_latencies_ms: deque = deque(maxlen=1000)  # received -> forwarded
+        self._fill_latencies_ms: deque = deque(maxlen=1000)  # exchange fill time -> forwarded
+
+    def submit(self, events: List[Dict[str, Any]]) -> None:
+        """Queue events for forwarding (called from the websocket reader)"""
+        received = time.monotonic()
+        for event in events:
+            item = (event, received)
+            try:
+                self.queue.put_nowait(item)
+            except asyncio.QueueFull:
+                try:
+                    self.queue.get_nowait()
+                    self.queue.task_done()  # The discarded fill will never be processed
+                    self.dropped += 1
+                except asyncio.QueueEmpty:
+                    pass
+                self.queue.put_nowait(item)
+
+    async def start(self) -> None:
+        if aiohttp is not None:
+            connector = aiohttp.TCPConnector(limit=4, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
                 headers={"Content-Type": "application/json"},
             )
-            if r.status_code == 200:
-                return True
-            time.sleep(0.5 * (attempt + 1))
-        except Exception:
-            time.sleep(1.0 * (attempt + 1))
-    return False
+        elif requests is not None:
+            self._session = requests.Session()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, drain_timeout: float = 5.0) -> None:
+        """Flush what is queued (bounded by drain_timeout), then close the session"""
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self.queue.join(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._session is not None:
+            if aiohttp is not None and isinstance(self._session, aiohttp.ClientSession):
+                await self._session.close()
+            else:
+                self._session.close()
+            self._session = None
+
+    async def _next_batch(self) -> List[tuple]:
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        # Anything already queued rides along without waiting
+        while len(batch) < self.max_batch and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                ok = await self._send([event for event, _ in batch])
+                self._record(batch, ok)
+            except Exception as e:
+                self.failed += len(batch)
+                print("Forwarding error:", e)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _post(self, payload: dict) -> bool:
+        if aiohttp is not None and isinstance(self._session, aiohttp.ClientSession):
+            async with self._session.post(self.url, json=payload) as response:
+                await response.read()
+                return response.status == 200
+        if self._session is None:
+            return False
+        # No aiohttp: pooled requests session on a worker thread keeps the loop free
+        response = await asyncio.to_thread(self._session.post, self.url, json=payload, timeout=self.timeout)
+        return response.status_code == 200
+
+    async def _send(self, events: List[Dict[str, Any]]) -> bool:
+        """POST one batch, retrying with full-jitter exponential backoff"""
+        payload = {"source": "hyperliquid", "events": events}
+        for attempt in range(self.max_attempts):
+            try:
+                if await self._post(payload):
+                    return True
+            except Exception as e:
+                print(f"Copybot POST failed (attempt {attempt + 1}/{self.max_attempts}): {e}")
+            if attempt < self.max_attempts - 1:
+                self.retries += 1
+                backoff = min(FORWARD_BACKOFF_MAX_SEC, FORWARD_BACKOFF_BASE_SEC * (2 ** attempt))
+                await asyncio.sleep(random.uniform(0, backoff))
+        return False
+
+    def _record(self, batch: List[tuple], ok: bool) -> None:
+        if not ok:
+            self.failed += len(batch)
+            return
+        now_monotonic = time.monotonic()
+        now_ms = time.time() * 1000
+        self.forwarded += len(batch)
+        self.batches += 1
+        for event, received in batch:
+            self._queue_latencies_ms.append((now_monotonic - received) * 1000)
+            fill_time = event.get("fill_time")
+            if fill_time:
+                try:
+                    self._fill_latencies_ms.append(now_ms - float(fill_time))
+                except (TypeError, ValueError):
+                    pass
 
+    def get_stats(self) -> Dict[str, Any]:
+        """Forwarding counters and latency percentiles (ms)"""
+        queue_latencies = sorted(self._queue_latencies_ms)
+        fill_latencies = sorted(self._fill_latencies_ms)
+        return {
+            "forwarded": self.forwarded,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "retries": self.retries,
+            "queue_depth": self.queue.qsize(),
+            "avg_batch_size": self.forwarded / self.batches if self.batches else 0.0,
+            "receive_to_forward_ms": {
+                "p50": _percentile(queue_latencies, 50),
+                "p95": _percentile(queue_latencies, 95),
+                "max": queue_latencies[-1] if queue_latencies else 0.0,
+            },
+            "fill_to_forward_ms": {
+                "p50": _percentile(fill_latencies, 50),
+                "p95": _percentile(fill_latencies, 95),
+                "max": fill_latencies[-1] if fill_latencies else 0.0,
+            },
+        }
 
-async def _run_listener():
+
+class MockCopybot:
+    """
+    Local stand-in for the copybot /webhook/hyperliquid endpoint.
+    Records every payload; `delay` and `fail_rate` simulate a slow or flaky copybot.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8089, delay: float = 0.0, fail_rate: float = 0.0):
+        self.host = host
+        self.port = port
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.payloads: List[dict] = []
+        self._runner = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/webhook/hyperliquid"
+
+    @property
+    def events(self) -> List[dict]:
+        return [event for payload in self.payloads for event in payload.get("events", [])]
+
+    async def _handle(self, request):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail_rate and random.random() < self.fail_rate:
+            return web.json_response({"status": "error"}, status=500)
+        payload = await request.json()
+        self.payloads.append(payload)
+        return web.json_response({"status": "processed", "count": len(payload.get("events", []))})
+
+    async def start(self) -> None:
+        if web is None:
+            raise RuntimeError("aiohttp not installed. pip install aiohttp")
+        app = web.Application()
+        app.router.add_post("/webhook/hyperliquid", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def _run_listener(forwarder: FillForwarder = None, addresses: List[str] = None,
+                        websocket_url: str = None):
     global _shutdown
     if not websockets:
         print("websockets not installed. pip install websockets")
         return
-    addresses = _get_tracked_addresses()
+    addresses = addresses if addresses is not None else _get_tracked_addresses()
     if not addresses:
         print("No Hyperliquid addresses to track. Set HYPERLIQUID_WALLETS_TO_TRACK or ensure ranked_whales.json exists.")
         return
+    websocket_url = websocket_url or HYPERLIQUID_WEBSOCKET_URL
+    owns_forwarder = forwarder is None
+    if owns_forwarder:
+        forwarder = FillForwarder()
+        await forwarder.start()
     print(f"Tracking {len(addresses)} addresses: {[a[:10]+'...' for a in addresses]}")
-    print(f"POST target: {COPYBOT_HYPERLIQUID_WEBHOOK_URL}")
-    print("Connecting to", HYPERLIQUID_WEBSOCKET_URL)
+    print(f"POST target: {forwarder.url}")
+    print("Connecting to", websocket_url)
+
+    try:
+        await _read_fills(forwarder, addresses, websocket_url)
+    finally:
+        if owns_forwarder:
+            await forwarder.stop()
+            print("Forwarder stats:", forwarder.get_stats())
 
+
+async def _read_fills(forwarder: FillForwarder, addresses: List[str], websocket_url: str):
+    last_stats_log = time.monotonic()
     while not _shutdown:
         try:
             async with websockets.connect(
-                HYPERLIQUID_WEBSOCKET_URL,
+                websocket_url,
                 ping_interval=20,
                 ping_timeout=10,
                 close_timeout=5,
@@ -130,7 +385,10 @@ async def _run_listener():
                 print("Subscribed to userFills")
 
                 while not _shutdown:
-                    msg = await asyncio.wait_for(ws.recv(), timeout=30)
+                    try:
+                        msg = await asyncio.wait_for(ws.recv(), timeout=30)
+                    except asyncio.TimeoutError:
+                        continue  # Quiet wallets; pings keep the connection alive
                     data = json.loads(msg)
                     channel = data.get("channel")
                     if channel == "subscriptionResponse":
@@ -148,13 +406,55 @@ async def _run_listener():
                         if ev:
                             events.append(ev)
                     if events:
-                        _post_to_copybot(events)
+                        forwarder.submit(events)
+                    if time.monotonic() - last_stats_log > 300:
+                        last_stats_log = time.monotonic()
+                        print("Forwarder stats:", forwarder.get_stats())
         except asyncio.CancelledError:
             break
         except Exception as e:
             print("WebSocket error:", e)
             if not _shutdown:
-                time.sleep(5)
+                await asyncio.sleep(5)
+
+
+async def _run_mock_copybot(port: int):
+    mock = MockCopybot(port=port)
+    await mock.start()
+    print(f"Mock copybot listening on {mock.url} (Ctrl+C to stop)")
+    try:
+        while not _shutdown:
+            await asyncio.sleep(1)
+            if mock.payloads:
+                print(f"Received {len(mock.payloads)} POSTs, {len(mock.events)} events")
+    finally:
+        await mock.stop()
+
+
+async def _run_self_test(n_fills: int = 500, delay: float = 0.2) -> Dict[str, Any]:
+    """Push synthetic fills through the forwarder into a slow mock copybot"""
+    mock = MockCopybot(port=8089, delay=delay, fail_rate=0.05)
+    await mock.start()
+    forwarder = FillForwarder(url=mock.url)
+    await forwarder.start()
+
+    started = time.monotonic()
+    submit_times = []
+    for i in range(n_fills):
+        fill = {"coin": "BTC", "side": "A" if i % 2 else "B", "px": "65000", "sz": "0.01", "time": int(time.time() * 1000)}
+        t0 = time.perf_counter()
+        forwarder.submit([_fill_to_event(f"0x{i % 10:040x}", fill)])
+        submit_times.append((time.perf_counter() - t0) * 1000)
+        await asyncio.sleep(0.002)  # Reader keeps pace with the socket regardless of copybot speed
+    read_seconds = time.monotonic() - started
+
+    await forwarder.stop(drain_timeout=30)
+    await mock.stop()
+    stats = forwarder.get_stats()
+    stats["reader_seconds"] = read_seconds
+    stats["max_submit_ms"] = max(submit_times)
+    stats["received_by_mock"] = len(mock.events)
+    return stats
 
 
 def main():
@@ -164,9 +464,20 @@ def main():
         global _shutdown
         _shutdown = True
 
+    if "--self-test" in sys.argv:
+        stats = asyncio.run(_run_self_test())
+        print(json.dumps(stats, indent=2))
+        return 0 if stats["received_by_mock"] == stats["forwarded"] else 1
+
     signal.signal(signal.SIGINT, sig_handler)
     signal.signal(signal.SIGTERM, sig_handler)
 
+    if "--mock-copybot" in sys.argv:
+        index = sys.argv.index("--mock-copybot")
+        port = int(sys.argv[index + 1]) if len(sys.argv) > index + 1 else 8089
+        asyncio.run(_run_mock_copybot(port))
+        return 0
+
     asyncio.run(_run_listener())
     return 0
 
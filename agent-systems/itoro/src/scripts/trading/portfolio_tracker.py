@@ -39,6 +39,15 @@ try:
 except ImportError:
     CLOUD_DB_AVAILABLE = False
 
+# Cloud snapshot outbox import (write-behind replication)
+try:
+    from src.scripts.database.snapshot_outbox import (
+        get_snapshot_outbox, release_snapshot_outbox, make_idempotency_key, snapshot_to_history_row
+    )
+    SNAPSHOT_OUTBOX_AVAILABLE = True
+except ImportError:
+    SNAPSHOT_OUTBOX_AVAILABLE = False
+
 # Entry price tracker import
 try:
     from src.scripts.database.entry_price_tracker import get_entry_price_tracker
@@ -133,6 +142,15 @@ class PortfolioTracker:
         self.db_connection_pool = []  # Connection pool for better management
         self.db_lock = threading.Lock()  # Lock for database operations
         
+        # Cloud sync goes through a local outbox so cloud latency never blocks snapshots
+        self.cloud_outbox = None
+        if CLOUD_DB_AVAILABLE and SNAPSHOT_OUTBOX_AVAILABLE:
+            try:
+                outbox_path = os.path.splitext(self.db_path)[0] + '_cloud_outbox.db'
+                self.cloud_outbox = get_snapshot_outbox(outbox_path)
+            except Exception as e:
+                warning(f"⚠️ Cloud snapshot outbox unavailable, cloud sync disabled: {e}")
+        
         # In-memory cache
         self.current_snapshot: Optional[PortfolioSnapshot] = None
         self.recent_snapshots: List[PortfolioSnapshot] = []
@@ -1454,83 +1472,43 @@ class PortfolioTracker:
     
     
     def _save_snapshot_to_db(self, snapshot: PortfolioSnapshot):
-        """Save snapshot to local database first, then sync to cloud database"""
+        """Save snapshot to local database first, then queue it for cloud sync"""
         try:
             # PRIMARY: Save to local database first
             self._save_snapshot_to_local_db(snapshot)
             debug(f"✅ Portfolio snapshot saved to local database: ${snapshot.total_value_usd:.2f}")
             
-            # SECONDARY: Try to sync to cloud database
-            if CLOUD_DB_AVAILABLE:
-                try:
-                    db_manager = get_cloud_database_manager()
-                    if db_manager is None:
-                        warning("⚠️ Cloud database not configured (local data saved)")
-                        return
-                    
-                    # Check if we're using REST API fallback
-                    if hasattr(db_manager, '_test_connection') and hasattr(db_manager, 'save_paper_trading_portfolio'):
-                        # Using REST API fallback - use REST API method
-                        portfolio_data = {
-                            'total_value_usd': snapshot.total_value_usd,
-                            'usdc_balance': snapshot.usdc_balance,
-                            'sol_balance': snapshot.sol_balance,
-                            'sol_value_usd': snapshot.sol_value_usd,
-                            'positions_value_usd': snapshot.positions_value_usd,
-                            'position_count': snapshot.position_count,
-                            'metadata': {
-                                'position_count': snapshot.position_count,
-                                'positions': snapshot.positions,
-                                'timestamp': snapshot.timestamp.isoformat()
-                            }
-                        }
-                        
-                        success = db_manager.save_paper_trading_portfolio(portfolio_data)
-                        if success:
-                            debug(f"✅ Portfolio snapshot synced to cloud database via REST API: ${snapshot.total_value_usd:.2f}")
-                        else:
-                            raise Exception("REST API sync failed")
-                    else:
-                        # Using direct PostgreSQL - use execute_query
-                        query = '''
-                            INSERT INTO portfolio_history (
-                                total_value_usd, usdc_balance, sol_balance, sol_value_usd,
-                                positions_value_usd, change_detected, change_type, metadata
-                            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                        '''
-                        
-                        # Determine if change was detected
-                        change_detected = False
-                        change_type = None
-                        if hasattr(self, 'previous_snapshot') and self.previous_snapshot:
-                            if abs(snapshot.total_value_usd - self.previous_snapshot.total_value_usd) > 1.0:  # $1 threshold
-                                change_detected = True
-                                change_type = 'value_change'
-                        
-                        params = (
-                            snapshot.total_value_usd,  # total_value_usd
-                            snapshot.usdc_balance,  # usdc_balance
-                            snapshot.sol_balance,  # sol_balance
-                            snapshot.sol_value_usd,  # sol_value_usd
-                            snapshot.positions_value_usd,  # positions_value_usd
-                            change_detected,  # change_detected
-                            change_type,  # change_type
-                            json.dumps({
-                                'position_count': snapshot.position_count,
-                                'positions': snapshot.positions,
-                                'timestamp': snapshot.timestamp.isoformat()
-                            })  # metadata
-                        )
-                        
-                        db_manager.execute_query(query, params, fetch=False)
-                        debug(f"✅ Portfolio snapshot synced to cloud database via PostgreSQL: ${snapshot.total_value_usd:.2f}")
-                    
-                except Exception as cloud_error:
-                    warning(f"⚠️ Cloud database sync failed (local data saved): {cloud_error}")
+            # SECONDARY: Queue for cloud sync - the outbox flusher batches the INSERTs
+            if self.cloud_outbox is not None:
+                # Determine if change was detected
+                change_detected = False
+                change_type = None
+                if hasattr(self, 'previous_snapshot') and self.previous_snapshot:
+                    if abs(snapshot.total_value_usd - self.previous_snapshot.total_value_usd) > 1.0:  # $1 threshold
+                        change_detected = True
+                        change_type = 'value_change'
+                
+                row = snapshot_to_history_row(snapshot, change_detected, change_type)
+                key = make_idempotency_key(os.path.basename(self.db_path), snapshot.timestamp)
+                if self.cloud_outbox.enqueue(row, key):
+                    debug(f"📤 Portfolio snapshot queued for cloud sync: ${snapshot.total_value_usd:.2f}")
+                else:
+                    warning("⚠️ Could not queue snapshot for cloud sync (local data saved)")
             
         except Exception as e:
             error(f"Error saving snapshot: {str(e)}")
     
+    def get_cloud_replication_status(self) -> Dict[str, Any]:
+        """Cloud replication status (pending snapshots, lag, failures)"""
+        if self.cloud_outbox is None:
+            return {'enabled': False}
+        try:
+            status = self.cloud_outbox.get_stats()
+            status['enabled'] = True
+            return status
+        except Exception as e:
+            return {'enabled': True, 'error': str(e)}
+    
     def _save_snapshot_to_local_db(self, snapshot: PortfolioSnapshot):
         """Fallback method to save snapshot to local database"""
         max_retries = 3
@@ -2530,6 +2508,11 @@ class PortfolioTracker:
         except Exception as e:
             warning(f"Could not save final snapshot: {str(e)}")
         
+        # Give queued cloud snapshots a last chance to replicate (rest stay in the outbox)
+        if self.cloud_outbox is not None:
+            release_snapshot_outbox(self.cloud_outbox.db_path)
+            self.cloud_outbox = None
+        
         # Close all database connections
         self._close_all_db_connections()
         
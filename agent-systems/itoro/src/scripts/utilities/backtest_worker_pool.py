@@ -0,0 +1,531 @@
+"""
+🌙 Anarcho Capital's Backtest Worker Pool
+Warm backtest workers with data preloaded, plus a content-addressed result cache
+
+Each worker is a long-lived Python process (normally the conda env's interpreter)
+that imports pandas/numpy/backtesting once, preloads the RBI datasets and then
+executes generated backtest code sent over a local multiprocessing.connection
+channel. pandas.read_csv/read_parquet/read_json are served from an in-memory
+cache inside the worker, so strategies that load the same OHLCV/OI/funding/
+liquidation files skip the disk and parse entirely.
+
+Limits: every run has a wall-clock timeout (the worker is killed and replaced
+when it's exceeded) and, on POSIX, an address-space limit per worker. Workers
+are recycled after a number of runs so state leaked by generated code doesn't
+accumulate.
+
+Results are cached on disk by hash of code + dataset version + interpreter, so
+the debug/optimize loop re-executing identical code costs a file read.
+"""
+
+import builtins
+import functools
+import hashlib
+import io
+import json
+import os
+import queue
+import secrets
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from datetime import datetime
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_TIMEOUT = 300  # seconds per backtest
+DEFAULT_MEMORY_LIMIT_MB = 4096
+DEFAULT_MAX_TASKS_PER_WORKER = 25
+WORKER_STARTUP_TIMEOUT = 120  # conda env interpreters can be slow to import pandas/backtesting
+
+DATA_SUFFIXES = ('.csv', '.parquet', '.json')
+PRELOAD_MODULES = ('numpy', 'pandas', 'talib', 'backtesting')
+
+# Environment handed to worker processes
+ENV_ADDRESS = 'BACKTEST_POOL_ADDRESS'
+ENV_AUTHKEY = 'BACKTEST_POOL_AUTHKEY'
+ENV_WORKER_ID = 'BACKTEST_POOL_WORKER_ID'
+ENV_PRELOAD = 'BACKTEST_POOL_PRELOAD'
+ENV_MEMORY_LIMIT = 'BACKTEST_POOL_MEMORY_LIMIT_MB'
+
+
+def resolve_conda_python(conda_env: str) -> str:
+    """Path of the conda env's python, falling back to the current interpreter"""
+    conda = shutil.which('conda')
+    if conda:
+        try:
+            result = subprocess.run(
+                [conda, 'run', '-n', conda_env, 'python', '-c', 'import sys; print(sys.executable)'],
+                capture_output=True, text=True, timeout=120,
+            )
+            executable = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ''
+            if result.returncode == 0 and os.path.isfile(executable):
+                return executable
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+    print(f"[WARN] Conda env '{conda_env}' not found, backtest workers use {sys.executable}")
+    return sys.executable
+
+
+def data_files(paths: Iterable) -> List[Path]:
+    """Data files under the given files/directories (recursive), sorted"""
+    found = set()
+    for path in map(Path, paths):
+        if path.is_file():
+            found.add(path)
+        elif path.is_dir():
+            found.update(p for p in path.rglob('*') if p.suffix in DATA_SUFFIXES and p.is_file())
+    return sorted(found)
+
+
+def dataset_version(paths: Iterable) -> str:
+    """Fingerprint of the data files (name, size, mtime) the backtests can read"""
+    digest = hashlib.sha256()
+    for path in data_files(paths):
+        stat = path.stat()
+        digest.update(f"{path.resolve()}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+class BacktestResultCache:
+    """Execution results on disk, keyed by hash of code + dataset version + interpreter"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(code: str, data_version: str, python_executable: str) -> str:
+        digest = hashlib.sha256()
+        for part in (code, data_version, python_executable):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: Dict) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        os.replace(tmp_path, path)
+
+
+class _Worker:
+    def __init__(self, worker_id: int, process: subprocess.Popen):
+        self.worker_id = worker_id
+        self.process = process
+        self.conn = None
+        self.tasks = 0
+        self.info = {}
+
+
+class BacktestWorkerPool:
+    """
+    Pool of warm backtest worker processes.
+
+    Args:
+        python_executable: Interpreter for the workers (e.g. the conda env's python)
+        workers: Number of warm workers
+        timeout: Wall-clock seconds per backtest before the worker is killed
+        memory_limit_mb: Address-space limit per worker (POSIX only, None = unlimited)
+        max_tasks_per_worker: Runs before a worker is replaced by a fresh one
+        preload_files: Data files each worker loads before accepting work
+        dataset_paths: Files/directories whose contents version the result cache
+        cache_dir: Result cache directory (None disables caching)
+    """
+
+    def __init__(self, python_executable: Optional[str] = None, workers: int = 1,
+                 timeout: float = DEFAULT_TIMEOUT, memory_limit_mb: Optional[int] = DEFAULT_MEMORY_LIMIT_MB,
+                 max_tasks_per_worker: int = DEFAULT_MAX_TASKS_PER_WORKER,
+                 preload_files: Iterable = (), dataset_paths: Iterable = (), cache_dir=None):
+        self.python_executable = python_executable or sys.executable
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_tasks_per_worker = max(1, max_tasks_per_worker)
+        self.preload_files = [str(Path(p).resolve()) for p in preload_files if Path(p).is_file()]
+        self.dataset_paths = list(dataset_paths)
+        self.cache = BacktestResultCache(cache_dir) if cache_dir else None
+        self.stats = {'runs': 0, 'cached': 0, 'timeouts': 0, 'crashes': 0, 'workers_started': 0}
+
+        self._authkey = secrets.token_bytes(32)
+        self._listener = Listener(authkey=self._authkey)
+        self._ready = queue.Queue()
+        self._pending: Dict[int, _Worker] = {}
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._closed = False
+
+        threading.Thread(target=self._accept_loop, name='backtest-pool-accept', daemon=True).start()
+        for _ in range(self.workers):
+            self._start_worker()
+
+    # ==== Worker lifecycle ====
+
+    def _start_worker(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            worker_id = self._next_id
+            self._next_id += 1
+            env = dict(os.environ)
+            env.update({
+                ENV_ADDRESS: self._listener.address if isinstance(self._listener.address, str)
+                else json.dumps(self._listener.address),
+                ENV_AUTHKEY: self._authkey.hex(),
+                ENV_WORKER_ID: str(worker_id),
+                ENV_PRELOAD: os.pathsep.join(self.preload_files),
+                ENV_MEMORY_LIMIT: str(self.memory_limit_mb or ''),
+            })
+            process = subprocess.Popen([self.python_executable, os.path.abspath(__file__), '--serve'], env=env)
+            self._pending[worker_id] = _Worker(worker_id, process)
+            self.stats['workers_started'] += 1
+
+    def _accept_loop(self) -> None:
+        while True:
+            try:
+                conn = self._listener.accept()
+                status, worker_id, info = conn.recv()
+            except (OSError, EOFError):
+                if self._closed:
+                    return
+                continue
+            with self._lock:
+                worker = self._pending.pop(worker_id, None)
+            if worker is None or status != 'ready':
+                conn.close()
+                continue
+            worker.conn, worker.info = conn, info
+            self._ready.put(worker)
+
+    def _acquire(self) -> _Worker:
+        """Next ready worker, restarting workers that died during startup"""
+        deadline = time.monotonic() + WORKER_STARTUP_TIMEOUT
+        while True:
+            try:
+                return self._ready.get(timeout=0.5)
+            except queue.Empty:
+                pass
+            with self._lock:
+                dead = [w for w in self._pending.values() if w.process.poll() is not None]
+                for worker in dead:
+                    del self._pending[worker.worker_id]
+            for _ in dead:
+                self._start_worker()
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"No backtest worker became ready within {WORKER_STARTUP_TIMEOUT}s")
+
+    def _retire(self, worker: _Worker, replace: bool = True) -> None:
+        if worker.conn is not None:
+            try:
+                worker.conn.send(('stop',))
+            except (OSError, ValueError):
+                pass
+            worker.conn.close()
+        try:
+            worker.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            worker.process.kill()
+            worker.process.wait()
+        if replace:
+            self._start_worker()
+
+    def _kill(self, worker: _Worker) -> None:
+        worker.process.kill()
+        worker.process.wait()
+        if worker.conn is not None:
+            worker.conn.close()
+        self._start_worker()
+
+    # ==== Execution ====
+
+    def run_file(self, file_path) -> Dict:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            code = f.read()
+        return self.run_code(code, str(file_path))
+
+    def run_code(self, code: str, file_path: str = '<backtest>') -> Dict:
+        """
+        Execute backtest code in a warm worker.
+
+        Returns:
+            Dict shaped like a subprocess run: success, return_code, stdout, stderr,
+            execution_time, timestamp, plus cached (bool) and dispatch_time
+        """
+        started = time.perf_counter()
+        self.stats['runs'] += 1
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(code, dataset_version(self.dataset_paths), self.python_executable)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.stats['cached'] += 1
+                return {**cached, 'cached': True, 'dispatch_time': time.perf_counter() - started,
+                        'timestamp': datetime.now().isoformat()}
+
+        worker = self._acquire()
+        worker.conn.send(('run', code, file_path))
+        dispatch_time = time.perf_counter() - started
+
+        deterministic = True
+        try:
+            if worker.conn.poll(self.timeout):
+                output = worker.conn.recv()
+                worker.tasks += 1
+                if worker.tasks >= self.max_tasks_per_worker:
+                    self._retire(worker)
+                else:
+                    self._ready.put(worker)
+            else:
+                self.stats['timeouts'] += 1
+                deterministic = False
+                self._kill(worker)
+                output = _failure(f"Backtest timed out after {self.timeout}s", time.perf_counter() - started)
+        except (EOFError, OSError):
+            # Worker died mid-run (segfault, memory limit, os._exit in generated code)
+            self.stats['crashes'] += 1
+            deterministic = False
+            code_returned = worker.process.poll()
+            self._kill(worker)
+            output = _failure(f"Backtest worker exited unexpectedly (exit code {code_returned})",
+                              time.perf_counter() - started)
+
+        if cache_key is not None and deterministic:
+            self.cache.put(cache_key, output)
+        return {**output, 'cached': False, 'dispatch_time': dispatch_time}
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+        while True:
+            try:
+                self._retire(self._ready.get_nowait(), replace=False)
+            except queue.Empty:
+                break
+        for worker in pending:
+            worker.process.kill()
+            worker.process.wait()
+        self._listener.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _failure(message: str, execution_time: float) -> Dict:
+    return {
+        'success': False,
+        'return_code': -1,
+        'stdout': '',
+        'stderr': message,
+        'execution_time': execution_time,
+        'timestamp': datetime.now().isoformat(),
+    }
+
+
+# ==== Worker process ====
+
+_data_cache: Dict[tuple, object] = {}
+
+
+def _file_key(reader_name: str, path, args, kwargs) -> Optional[tuple]:
+    if not isinstance(path, (str, os.PathLike)):
+        return None
+    try:
+        stat = os.stat(path)
+        return (reader_name, os.path.normcase(os.path.abspath(path)), stat.st_size, stat.st_mtime_ns,
+                repr(args), repr(sorted(kwargs.items())))
+    except OSError:
+        return None
+
+
+def _cached_reader(reader):
+    """Wrap a pandas reader so repeated reads of an unchanged file return a copy from memory"""
+    @functools.wraps(reader)
+    def read(path, *args, **kwargs):
+        key = _file_key(reader.__name__, path, args, kwargs)
+        if key is None:
+            return reader(path, *args, **kwargs)
+        if key not in _data_cache:
+            _data_cache[key] = reader(path, *args, **kwargs)
+        return _data_cache[key].copy()
+    return read
+
+
+def _install_data_cache() -> None:
+    import pandas as pd
+    for name in ('read_csv', 'read_parquet', 'read_json'):
+        setattr(pd, name, _cached_reader(getattr(pd, name)))
+
+
+def _preload(files: List[str]) -> List[str]:
+    import pandas as pd
+    loaded = []
+    for file_path in files:
+        reader = {'.csv': pd.read_csv, '.parquet': pd.read_parquet, '.json': pd.read_json}.get(Path(file_path).suffix)
+        try:
+            reader(file_path)
+            loaded.append(file_path)
+        except Exception as e:
+            print(f"[WARN] Backtest worker could not preload {file_path}: {e}", file=sys.stderr)
+    return loaded
+
+
+def _apply_memory_limit(limit_mb: Optional[int]) -> None:
+    if not limit_mb:
+        return
+    try:
+        import resource
+    except ImportError:  # Windows
+        return
+    limit = limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def execute_code(code: str, file_path: str) -> Dict:
+    """Run backtest code as __main__ in a fresh namespace, capturing output like a subprocess"""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    namespace = {'__name__': '__main__', '__file__': file_path, '__builtins__': builtins}
+    script_dir = os.path.dirname(os.path.abspath(file_path))
+    saved_argv, saved_path = sys.argv, list(sys.path)
+    sys.argv = [file_path]
+    sys.path.insert(0, script_dir)
+
+    return_code = 0
+    start_time = datetime.now()
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            exec(compile(code, file_path, 'exec'), namespace)
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                return_code = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+                return_code = 1
+        except BaseException:
+            traceback.print_exc()
+            return_code = 1
+        finally:
+            sys.argv, sys.path[:] = saved_argv, saved_path
+            _close_figures()
+
+    return {
+        'success': return_code == 0,
+        'return_code': return_code,
+        'stdout': stdout.getvalue(),
+        'stderr': stderr.getvalue(),
+        'execution_time': (datetime.now() - start_time).total_seconds(),
+        'timestamp': datetime.now().isoformat(),
+    }
+
+
+def _close_figures() -> None:
+    plt = sys.modules.get('matplotlib.pyplot')
+    if plt is not None:
+        plt.close('all')
+
+
+def serve() -> None:
+    """Worker entry point: preload, connect to the pool and execute backtests until told to stop"""
+    _apply_memory_limit(int(os.environ[ENV_MEMORY_LIMIT]) if os.environ.get(ENV_MEMORY_LIMIT) else None)
+    for module in PRELOAD_MODULES:
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+    _install_data_cache()
+    preload = [p for p in os.environ.get(ENV_PRELOAD, '').split(os.pathsep) if p]
+    loaded = _preload(preload)
+
+    address = os.environ[ENV_ADDRESS]
+    if address.startswith('['):
+        address = tuple(json.loads(address))
+    conn = Client(address, authkey=bytes.fromhex(os.environ[ENV_AUTHKEY]))
+    conn.send(('ready', int(os.environ[ENV_WORKER_ID]), {'pid': os.getpid(), 'preloaded': loaded}))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message[0] == 'stop':
+            break
+        _, code, file_path = message
+        conn.send(execute_code(code, file_path))
+    conn.close()
+
+
+if __name__ == "__main__":
+    if '--serve' in sys.argv:
+        serve()
+        sys.exit(0)
+
+    # Benchmark: cold subprocess vs warm pool vs cache hit on a bundled dataset
+    import tempfile
+
+    data_file = Path(__file__).parent.parent.parent / "data" / "rbi" / "BTC-USD-15m.csv"
+    code = f"""
+import pandas as pd
+from backtesting import Backtest, Strategy
+
+data = pd.read_csv(r"{data_file}")
+data.columns = [c.strip().capitalize() for c in data.columns]
+data.index = pd.to_datetime(data.pop('Timestamp' if 'Timestamp' in data.columns else 'Datetime'))
+
+class Hold(Strategy):
+    def init(self):
+        pass
+    def next(self):
+        if not self.position:
+            self.buy()
+
+print(Backtest(data, Hold, cash=1_000_000, commission=.002, finalize_trades=True).run())
+"""
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, 'bench_BT.py')
+        with open(file_path, 'w') as f:
+            f.write(code)
+
+        started = time.perf_counter()
+        cold = subprocess.run([sys.executable, file_path], capture_output=True, text=True)
+        cold_seconds = time.perf_counter() - started
+
+        with BacktestWorkerPool(workers=1, preload_files=[data_file], dataset_paths=[data_file],
+                                cache_dir=os.path.join(tmp, 'cache')) as pool:
+            pool.run_file(file_path)  # first run imports the strategy's remaining modules
+            started = time.perf_counter()
+            warm = pool.run_code(code + "\n# variant\n", file_path)
+            warm_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            cached = pool.run_file(file_path)
+            cached_seconds = time.perf_counter() - started
+
+    print(f"🌙 Backtest worker pool benchmark ({data_file.name})")
+    print(f"[BENCHMARK] Cold subprocess: {cold_seconds:.2f}s (success={cold.returncode == 0})")
+    print(f"[BENCHMARK] Warm worker:     {warm_seconds:.2f}s (dispatch {warm['dispatch_time'] * 1000:.1f}ms, "
+          f"success={warm['success']})")
+    print(f"[BENCHMARK] Cache hit:       {cached_seconds * 1000:.1f}ms (cached={cached['cached']})")
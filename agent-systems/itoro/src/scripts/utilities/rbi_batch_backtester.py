@@ -7,6 +7,9 @@
 - Executes each backtest in conda env `tflow`, printing full stats to terminal
 - On errors, automatically runs package-fix and debug passes until success (or attempts exhausted)
 - Saves run outputs (stdout/stderr/metadata) as JSON and plain text next to the code
+- Optional signal screen (--screen-data CSV): strategies that expose generate_signals(data)
+  have their signals computed in a conda-env subprocess and vector-backtested on the returned
+  array; only candidates passing the screen get the full conda run
 
 Keep files under 800 lines. No moving files, only creating new ones. 🚀
 """
@@ -14,6 +17,7 @@ Keep files under 800 lines. No moving files, only creating new ones. 🚀
 from __future__ import annotations
 
 import os
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 import json
@@ -21,6 +25,10 @@ import json
 # Import prompts and helpers from RBI agent (do not modify RBI agent)
 from src.agents import rbi_agent
 from src.agents.backtest_runner import run_backtest_in_conda, save_results
+from src.scripts.utilities.backtest_worker_pool import resolve_conda_python
+from src.scripts.utilities.vector_backtester import (
+    DEFAULT_SCREEN_THRESHOLDS, compute_signals_isolated, load_ohlcv, passes_screen, vector_backtest,
+)
 
 
 # ==== CONFIG ====
@@ -38,6 +46,19 @@ CONDA_ENV_NAME = "tflow"
 # Max attempts: initial -> package-fix -> debug (loop)
 MAX_DEBUG_ATTEMPTS = 3
 
+# Signal screen: thresholds a candidate must meet before the full backtesting.py run
+SCREEN_THRESHOLDS = dict(DEFAULT_SCREEN_THRESHOLDS)
+SCREEN_COMMISSION = 0.002
+SCREEN_SLIPPAGE = 0.0
+
+SIGNAL_SCREEN_INSTRUCTIONS = """
+Also define a top-level function `generate_signals(data)` that takes the OHLCV DataFrame
+(columns Open, High, Low, Close, Volume) and returns a numpy array with one value per bar:
+1 = be long, -1 = be short, 0 = be flat, NaN = keep the current position (use NaN for warm-up bars).
+The signal on a bar is acted on at the next bar's open. Compute it with vectorized numpy/pandas/talib
+only, and keep the Strategy class consistent with it.
+"""
+
 
 def ensure_output_dir(research_dir: Path) -> Path:
     output_dir = research_dir / OUTPUT_SUBDIR_NAME
@@ -77,9 +98,11 @@ def derive_strategy_name(file_path: Path, content: str) -> str:
     return name
 
 
-def generate_backtest_code(strategy_text: str) -> str:
+def generate_backtest_code(strategy_text: str, signal_screen: bool = False) -> str:
     print("🤖🌙 MOON DEV: Generating backtest code via BACKTEST prompt... 🚀")
     content = f"Create a backtest for this strategy:\n\n{strategy_text}"
+    if signal_screen:
+        content += f"\n\n{SIGNAL_SCREEN_INSTRUCTIONS}"
 
     # Try primary config, then fallbacks if unavailable
     candidate_configs = [
@@ -209,7 +232,48 @@ def save_text_outputs(output_dir: Path, strategy_name: str, stdout: str, stderr:
     print(f"💾🌙 MOON DEV: Saved stdout/stderr to {stdout_file.name} / {stderr_file.name}")
 
 
-def run_one_strategy(research_dir: Path, file_path: Path, conda_env: str) -> None:
+@lru_cache(maxsize=None)
+def screen_interpreter(conda_env: str) -> str:
+    """Python of the conda env the generated code runs in (resolved once per batch)"""
+    return resolve_conda_python(conda_env)
+
+
+def screen_signals(code_path: Path, screen_data: Path, conda_env: str) -> dict | None:
+    """Vector-backtest the code's signals; None means no screen was possible (run the full backtest)"""
+    # generate_signals() runs in the conda env like the backtest itself; only the array comes back
+    try:
+        signals = compute_signals_isolated(code_path, screen_data, screen_interpreter(conda_env))
+    except Exception as e:
+        print(f"⚠️🌙 MOON DEV: Signal screen failed, falling back to full backtest: {e}")
+        return None
+    if signals is None:
+        print("ℹ️🌙 MOON DEV: No generate_signals() in code, skipping screen")
+        return None
+
+    try:
+        ohlcv = load_ohlcv(screen_data)
+        metrics = vector_backtest(
+            ohlcv["Open"], ohlcv["Close"], signals,
+            commission=SCREEN_COMMISSION, slippage=SCREEN_SLIPPAGE, index=ohlcv.index,
+        )
+    except Exception as e:
+        print(f"⚠️🌙 MOON DEV: Signal screen failed, falling back to full backtest: {e}")
+        return None
+
+    passed = passes_screen(metrics, SCREEN_THRESHOLDS)
+    print(
+        f"🧪🌙 MOON DEV: Screen {'PASSED' if passed else 'FAILED'} - return {metrics['return_pct']:.2f}%, "
+        f"sharpe {metrics['sharpe']:.2f}, max DD {metrics['max_drawdown_pct']:.2f}%, {metrics['trades']} trades"
+    )
+    return {
+        "passed": passed,
+        "data_file": str(screen_data),
+        "thresholds": SCREEN_THRESHOLDS,
+        "metrics": {k: (None if v != v else getattr(v, "item", lambda: v)()) for k, v in metrics.items()},  # NaN -> null
+    }
+
+
+def run_one_strategy(research_dir: Path, file_path: Path, conda_env: str, screen_data: Path | None = None) -> None:
     print("\n" + "=" * 80)
     print(f"🌙 MOON DEV RUN: Processing {file_path.name} 📜")
     print("=" * 80)
@@ -219,7 +283,7 @@ def run_one_strategy(research_dir: Path, file_path: Path, conda_env: str) -> Non
     strategy_name = derive_strategy_name(file_path, strategy_text)
 
     # 1) Generate backtest
-    code = generate_backtest_code(strategy_text)
+    code = generate_backtest_code(strategy_text, signal_screen=screen_data is not None)
 
     # 2) Package fix before first run (to ensure no backtesting.lib)
     code = package_fix_code(code)
@@ -227,6 +291,17 @@ def run_one_strategy(research_dir: Path, file_path: Path, conda_env: str) -> Non
     # 3) Write and execute
     code_path = write_code(output_dir, strategy_name, code)
 
+    # Cheap vectorized screen first; rejected candidates never reach the conda run
+    if screen_data is not None:
+        screen = screen_signals(code_path, screen_data, conda_env)
+        if screen is not None:
+            screen_file = output_dir / f"{strategy_name}_screen.json"
+            with open(screen_file, "w") as f:
+                json.dump(screen, f, indent=2)
+            if not screen["passed"]:
+                print(f"⏭️🌙 MOON DEV: Screen rejected {strategy_name}, skipping full backtest ({screen_file.name})")
+                return
+
     attempt = 0
     result = run_backtest_in_conda(str(code_path), conda_env)
 
@@ -274,8 +349,9 @@ def main():
     # Resolve research directory
     research_dir = DEFAULT_RESEARCH_DIR
     only_file: Path | None = None
+    screen_data: Path | None = None
 
-    # Simple CLI parsing: optional [research_dir] and/or --file /path/to/file.txt
+    # Simple CLI parsing: optional [research_dir], --file /path/to/file.txt, --screen-data /path/to/ohlcv.csv
     args = list(sys.argv[1:])
     i = 0
     while i < len(args):
@@ -283,6 +359,9 @@ def main():
         if arg == "--file" and i + 1 < len(args):
             only_file = Path(args[i + 1]).expanduser().resolve()
             i += 2
+        elif arg == "--screen-data" and i + 1 < len(args):
+            screen_data = Path(args[i + 1]).expanduser().resolve()
+            i += 2
         else:
             candidate = Path(arg).expanduser().resolve()
             if candidate.exists() and candidate.is_dir():
@@ -302,10 +381,15 @@ def main():
             print(f"❌🌙 MOON DEV: --file must be a file: {only_file}")
             return
     print(f"🔎🌙 MOON DEV: Found {len(txt_files)} strategies to process ✍️")
+    if screen_data is not None:
+        if not screen_data.is_file():
+            print(f"❌🌙 MOON DEV: --screen-data not found: {screen_data}")
+            return
+        print(f"🧪🌙 MOON DEV: Signal screen enabled on {screen_data.name} with {SCREEN_THRESHOLDS}")
 
     for idx, file_path in enumerate(txt_files, start=1):
         print(f"\n➡️🌙 MOON DEV: [{idx}/{len(txt_files)}] {file_path.name}")
-        run_one_strategy(research_dir, file_path, CONDA_ENV_NAME)
+        run_one_strategy(research_dir, file_path, CONDA_ENV_NAME, screen_data)
 
     print("\n🎉🌙 MOON DEV: Batch run complete. Check the GPT-5 folder for code and outputs. ✨🚀")
 
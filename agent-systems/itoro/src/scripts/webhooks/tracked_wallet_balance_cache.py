@@ -3,10 +3,10 @@ Tracked Wallet Balance Cache
 Stores and tracks token balances for tracked wallets to determine sell types
 """
 
-import sqlite3
 import os
 import time
-from typing import Dict, Tuple, Optional
+import sqlite3
+from typing import Dict, List, Tuple, Optional
 from datetime import datetime
 import threading
 
@@ -25,6 +25,8 @@ except ImportError:
     PARTIAL_SELL_MIN_THRESHOLD = 0.10  # Minimum 10% to be considered partial
     FULL_SELL_THRESHOLD = 0.95  # 95%+ considered full sell
 
+from src.scripts.database.sqlite_manager import get_sqlite_manager
+
 # Import logging
 try:
     from src.scripts.shared_services.logger import debug, info, warning, error
@@ -35,10 +37,38 @@ except ImportError:
     def warning(msg): print(f"WARNING: {msg}")
     def error(msg): print(f"ERROR: {msg}")
 
+# RETURNING needs SQLite 3.35+; older builds fall back to SELECT-then-upsert
+SQLITE_SUPPORTS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Upserts keep the pre-update balance in previous_balance so RETURNING hands it back.
+# In DO UPDATE SET every unqualified column refers to the existing row.
+_SET_BALANCE_SQL = """
+    INSERT INTO wallet_balances (wallet_address, token_address, balance, previous_balance, last_updated)
+    VALUES (:wallet, :token, :value, 0.0, :ts)
+    ON CONFLICT(wallet_address, token_address) DO UPDATE SET
+        previous_balance = balance,
+        balance = :value,
+        last_updated = :ts
+"""
+
+_APPLY_DELTA_SQL = """
+    INSERT INTO wallet_balances (wallet_address, token_address, balance, previous_balance, last_updated)
+    VALUES (:wallet, :token, MAX(0.0, :value), 0.0, :ts)
+    ON CONFLICT(wallet_address, token_address) DO UPDATE SET
+        previous_balance = balance,
+        balance = MAX(0.0, balance + :value),
+        last_updated = :ts
+"""
+
+_RETURNING_SQL = " RETURNING previous_balance, balance"
+
 class TrackedWalletBalanceCache:
     """
     SQLite-based cache to store tracked wallet token balances
     Tracks previous balance, current balance, and balance changes
+
+    Writes are single-statement upserts applied in batches (one transaction per
+    webhook transaction); reads are served from an in-memory mirror.
     """
     
     def __init__(self, db_path: str = None):
@@ -50,52 +80,70 @@ class TrackedWalletBalanceCache:
             db_path = os.path.join(data_dir, 'tracked_wallet_balances.db')
         
         self.db_path = db_path
-        self.lock = threading.RLock()
+        self.db = get_sqlite_manager(db_path)
+        
+        # Hot mirror of wallet_balances: (wallet, token) -> balance
+        self._mirror: Dict[Tuple[str, str], float] = {}
+        self._mirror_lock = threading.Lock()
+        
         self._init_database()
+        self._load_mirror()
     
     def _init_database(self):
         """Initialize the database with required tables"""
-        with self.lock:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("""
-                    CREATE TABLE IF NOT EXISTS wallet_balances (
-                        wallet_address TEXT NOT NULL,
-                        token_address TEXT NOT NULL,
-                        balance REAL NOT NULL,
-                        last_updated INTEGER NOT NULL,
-                        PRIMARY KEY (wallet_address, token_address)
-                    )
-                """)
+        with self.db.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS wallet_balances (
+                    wallet_address TEXT NOT NULL,
+                    token_address TEXT NOT NULL,
+                    balance REAL NOT NULL,
+                    previous_balance REAL DEFAULT 0.0,
+                    last_updated INTEGER NOT NULL,
+                    PRIMARY KEY (wallet_address, token_address)
+                )
+            """)
+            
+            # Migrate databases created before previous_balance existed
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(wallet_balances)").fetchall()]
+            if 'previous_balance' not in columns:
+                conn.execute("ALTER TABLE wallet_balances ADD COLUMN previous_balance REAL DEFAULT 0.0")
                 
-                conn.execute("""
-                    CREATE TABLE IF NOT EXISTS balance_history (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        wallet_address TEXT NOT NULL,
-                        token_address TEXT NOT NULL,
-                        previous_balance REAL,
-                        current_balance REAL NOT NULL,
-                        change_amount REAL NOT NULL,
-                        change_percentage REAL,
-                        sell_type TEXT,
-                        timestamp INTEGER NOT NULL
-                    )
-                """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS balance_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    wallet_address TEXT NOT NULL,
+                    token_address TEXT NOT NULL,
+                    previous_balance REAL,
+                    current_balance REAL NOT NULL,
+                    change_amount REAL NOT NULL,
+                    change_percentage REAL,
+                    sell_type TEXT,
+                    timestamp INTEGER NOT NULL
+                )
+            """)
                 
-                # Create indexes for better performance
-                conn.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_wallet_token 
-                    ON wallet_balances (wallet_address, token_address)
-                """)
+            # Create indexes for better performance
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_wallet_token 
+                ON wallet_balances (wallet_address, token_address)
+            """)
                 
-                conn.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_history_wallet_token 
-                    ON balance_history (wallet_address, token_address)
-                """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_history_wallet_token 
+                ON balance_history (wallet_address, token_address)
+            """)
                 
-                conn.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_history_timestamp 
-                    ON balance_history (timestamp)
-                """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_history_timestamp 
+                ON balance_history (timestamp)
+            """)
+    
+    def _load_mirror(self):
+        """Warm the in-memory mirror from wallet_balances"""
+        rows = self.db.fetchall("SELECT wallet_address, token_address, balance FROM wallet_balances")
+        with self._mirror_lock:
+            self._mirror = {(wallet, token): balance for wallet, token, balance in rows}
+        debug(f"Balance cache mirror loaded: {len(rows)} wallet/token balances")
     
     def get_previous_balance(self, wallet: str, token: str) -> float:
         """
@@ -108,14 +156,21 @@ class TrackedWalletBalanceCache:
         Returns:
             Previous balance or 0.0 if not found
         """
-        with self.lock:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute(
-                    "SELECT balance FROM wallet_balances WHERE wallet_address = ? AND token_address = ?",
-                    (wallet, token)
-                )
-                result = cursor.fetchone()
-                return result[0] if result else 0.0
+        key = (wallet, token)
+        with self._mirror_lock:
+            if key in self._mirror:
+                return self._mirror[key]
+        
+        # Mirror miss - the row may have been written by another process
+        result = self.db.fetchone(
+            "SELECT balance FROM wallet_balances WHERE wallet_address = ? AND token_address = ?",
+            (wallet, token)
+        )
+        if not result:
+            return 0.0
+        with self._mirror_lock:
+            self._mirror[key] = result[0]
+        return result[0]
     
     def update_balance(self, wallet: str, token: str, new_balance: float) -> Dict:
         """
@@ -137,43 +192,92 @@ class TrackedWalletBalanceCache:
                 'sell_percentage': float
             }
         """
-        with self.lock:
-            previous_balance = self.get_previous_balance(wallet, token)
-            change_amount = new_balance - previous_balance
-            change_percentage = self.calculate_sell_percentage(previous_balance, new_balance)
-            sell_type, sell_percentage = self.determine_sell_type(change_percentage)
+        return self.update_balances([(wallet, token, new_balance)])[0]
+    
+    def update_balances(self, updates: List[Tuple[str, str, float]]) -> List[Dict]:
+        """
+        Set absolute balances for many wallet/token pairs in one transaction
+        
+        Args:
+            updates: List of (wallet, token, new_balance)
             
-            timestamp = int(time.time())
+        Returns:
+            Change information (see update_balance) for each update, in order
+        """
+        return self._apply(_SET_BALANCE_SQL, updates)
+    
+    def apply_balance_deltas(self, deltas: List[Tuple[str, str, float]]) -> List[Dict]:
+        """
+        Apply signed balance changes (e.g. -amount_sold) in one transaction
+        
+        The new balance is computed inside the upsert (clamped at zero), so
+        several transfers of the same token in one webhook transaction chain
+        correctly without a read round-trip per transfer.
+        
+        Args:
+            deltas: List of (wallet, token, delta)
             
-            # Update current balance
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("""
-                    INSERT INTO wallet_balances (wallet_address, token_address, balance, last_updated)
-                    VALUES (?, ?, ?, ?)
-                    ON CONFLICT(wallet_address, token_address) DO UPDATE SET
-                        balance = excluded.balance,
-                        last_updated = excluded.last_updated
-                """, (wallet, token, new_balance, timestamp))
+        Returns:
+            Change information (see update_balance) for each delta, in order
+        """
+        return self._apply(_APPLY_DELTA_SQL, deltas)
+    
+    def _apply(self, upsert_sql: str, items: List[Tuple[str, str, float]]) -> List[Dict]:
+        if not items:
+            return []
+        
+        timestamp = int(time.time())
+        results = []
+        history_rows = []
+        
+        with self.db.transaction() as conn:
+            for wallet, token, value in items:
+                params = {'wallet': wallet, 'token': token, 'value': value, 'ts': timestamp}
+                if SQLITE_SUPPORTS_RETURNING:
+                    previous_balance, new_balance = conn.execute(upsert_sql + _RETURNING_SQL, params).fetchone()
+                else:
+                    conn.execute(upsert_sql, params)
+                    previous_balance, new_balance = conn.execute(
+                        "SELECT previous_balance, balance FROM wallet_balances WHERE wallet_address = ? AND token_address = ?",
+                        (wallet, token)
+                    ).fetchone()
                 
-                # Record in history
-                conn.execute("""
-                    INSERT INTO balance_history (
-                        wallet_address, token_address, previous_balance, current_balance,
-                        change_amount, change_percentage, sell_type, timestamp
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (wallet, token, previous_balance, new_balance, change_amount, 
-                      change_percentage, sell_type, timestamp))
-            
-            debug(f"Balance updated: {wallet[:8]}... {token[:8]}... {previous_balance:.6f} -> {new_balance:.6f} ({change_percentage:.1f}% change, {sell_type})")
+                info_dict = self._build_change_info(float(previous_balance or 0.0), float(new_balance))
+                results.append(info_dict)
+                history_rows.append((
+                    wallet, token, info_dict['previous_balance'], new_balance, info_dict['change_amount'],
+                    info_dict['change_percentage'], info_dict['sell_type'], timestamp
+                ))
             
-            return {
-                'previous_balance': previous_balance,
-                'current_balance': new_balance,
-                'change_amount': change_amount,
-                'change_percentage': change_percentage,
-                'sell_type': sell_type,
-                'sell_percentage': sell_percentage
-            }
+            # Record in history
+            conn.executemany("""
+                INSERT INTO balance_history (
+                    wallet_address, token_address, previous_balance, current_balance,
+                    change_amount, change_percentage, sell_type, timestamp
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, history_rows)
+        
+        # Publish to the mirror only after the transaction committed
+        with self._mirror_lock:
+            for (wallet, token, _), change in zip(items, results):
+                self._mirror[(wallet, token)] = change['current_balance']
+        
+        for (wallet, token, _), change in zip(items, results):
+            debug(f"Balance updated: {wallet[:8]}... {token[:8]}... {change['previous_balance']:.6f} -> {change['current_balance']:.6f} ({change['change_percentage']:.1f}% change, {change['sell_type']})")
+        
+        return results
+    
+    def _build_change_info(self, previous_balance: float, new_balance: float) -> Dict:
+        change_percentage = self.calculate_sell_percentage(previous_balance, new_balance)
+        sell_type, sell_percentage = self.determine_sell_type(change_percentage)
+        return {
+            'previous_balance': previous_balance,
+            'current_balance': new_balance,
+            'change_amount': new_balance - previous_balance,
+            'change_percentage': change_percentage,
+            'sell_type': sell_type,
+            'sell_percentage': sell_percentage
+        }
     
     def calculate_sell_percentage(self, previous_balance: float, current_balance: float) -> float:
         """
@@ -227,18 +331,17 @@ class TrackedWalletBalanceCache:
         Returns:
             List of history records
         """
-        with self.lock:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute("""
-                    SELECT previous_balance, current_balance, change_amount, 
-                           change_percentage, sell_type, timestamp
-                    FROM balance_history
-                    WHERE wallet_address = ? AND token_address = ?
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                """, (wallet, token, limit))
+        with self.db.read() as conn:
+            cursor = conn.execute("""
+                SELECT previous_balance, current_balance, change_amount, 
+                       change_percentage, sell_type, timestamp
+                FROM balance_history
+                WHERE wallet_address = ? AND token_address = ?
+                ORDER BY timestamp DESC
+                LIMIT ?
+            """, (wallet, token, limit))
                 
-                return cursor.fetchall()
+            return cursor.fetchall()
     
     def cleanup_old_history(self, days: int = 30):
         """
@@ -249,16 +352,15 @@ class TrackedWalletBalanceCache:
         """
         cutoff_timestamp = int(time.time()) - (days * 24 * 60 * 60)
         
-        with self.lock:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute(
-                    "DELETE FROM balance_history WHERE timestamp < ?",
-                    (cutoff_timestamp,)
-                )
-                deleted_count = cursor.rowcount
+        with self.db.transaction() as conn:
+            cursor = conn.execute(
+                "DELETE FROM balance_history WHERE timestamp < ?",
+                (cutoff_timestamp,)
+            )
+            deleted_count = cursor.rowcount
                 
-                if deleted_count > 0:
-                    info(f"Cleaned up {deleted_count} old balance history records")
+            if deleted_count > 0:
+                info(f"Cleaned up {deleted_count} old balance history records")
     
     def get_all_balances(self, wallet: str) -> Dict[str, float]:
         """
@@ -270,13 +372,8 @@ class TrackedWalletBalanceCache:
         Returns:
             Dictionary mapping token addresses to balances
         """
-        with self.lock:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute(
-                    "SELECT token_address, balance FROM wallet_balances WHERE wallet_address = ?",
-                    (wallet,)
-                )
-                return dict(cursor.fetchall())
+        with self._mirror_lock:
+            return {token: balance for (w, token), balance in self._mirror.items() if w == wallet}
     
     def clear_wallet_balances(self, wallet: str):
         """
@@ -285,17 +382,19 @@ class TrackedWalletBalanceCache:
         Args:
             wallet: Wallet address
         """
-        with self.lock:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute(
-                    "DELETE FROM wallet_balances WHERE wallet_address = ?",
-                    (wallet,)
-                )
-                conn.execute(
-                    "DELETE FROM balance_history WHERE wallet_address = ?",
-                    (wallet,)
-                )
-                info(f"Cleared all balances for wallet {wallet[:8]}...")
+        with self.db.transaction() as conn:
+            conn.execute(
+                "DELETE FROM wallet_balances WHERE wallet_address = ?",
+                (wallet,)
+            )
+            conn.execute(
+                "DELETE FROM balance_history WHERE wallet_address = ?",
+                (wallet,)
+            )
+        with self._mirror_lock:
+            for key in [key for key in self._mirror if key[0] == wallet]:
+                del self._mirror[key]
+        info(f"Cleared all balances for wallet {wallet[:8]}...")
 
 
 # Singleton instance
@@ -318,6 +318,7 @@ def parse_transaction(event: Dict) -> Optional[Dict]:
         # Parse token transfers - ONLY for tracked wallets
         tracked_accounts_found = 0
         accounts_added = 0
+        pending_sells = []
         
         logger.info(f"🔍 DEBUG: Starting to parse {len(token_transfers)} token transfers")
         logger.info(f"🔍 DEBUG: WALLETS_TO_TRACK: {WALLETS_TO_TRACK}")
@@ -350,32 +351,12 @@ def parse_transaction(event: Dict) -> Optional[Dict]:
                 if amount > 0:  # Only include if there's a transfer
                     logger.info(f"✅ Tracked account {tracked_accounts_found}: {tracked_account[:8]}... (token: {token_address[:8]}..., amount: {amount}, action: {action})")
                     
-                    # Get balance tracking information for sell type detection
+                    # Sell type is filled in after the loop, once all sells in this
+                    # transaction have been applied to the balance cache in one batch
                     previous_balance = 0.0
                     sell_type = 'full'
                     sell_percentage = 100.0
                     
-                    if action == 'sell':
-                        try:
-                            from src.scripts.webhooks.tracked_wallet_balance_cache import get_balance_cache
-                            balance_cache = get_balance_cache()
-                            
-                            # Get previous balance
-                            previous_balance = balance_cache.get_previous_balance(tracked_account, token_address)
-                            
-                            # Calculate new balance (previous - amount sold)
-                            new_balance = max(0.0, previous_balance - amount)
-                            
-                            # Update balance and get sell type information
-                            balance_info = balance_cache.update_balance(tracked_account, token_address, new_balance)
-                            sell_type = balance_info['sell_type']
-                            sell_percentage = balance_info['sell_percentage']
-                            
-                            logger.info(f"🔍 Balance tracking: {previous_balance:.6f} -> {new_balance:.6f} ({sell_type}, {sell_percentage:.1f}%)")
-                            
-                        except Exception as e:
-                            logger.warning(f"⚠️ Balance tracking failed: {e}, defaulting to full sell")
-                    
                     account_data = {
                         'wallet': tracked_account,
                         'token': token_address,
@@ -388,6 +369,9 @@ def parse_transaction(event: Dict) -> Optional[Dict]:
                         'sell_percentage': sell_percentage  # NEW: actual percentage
                     }
                     
+                    if action == 'sell':
+                        pending_sells.append(account_data)
+                    
                     logger.info(f"🔍 DEBUG: About to append account data: {account_data}")
                     parsed['accounts'].append(account_data)
                     accounts_added += 1
@@ -397,6 +381,24 @@ def parse_transaction(event: Dict) -> Optional[Dict]:
             else:
                 logger.info(f"🔍 DEBUG: No tracked accounts in this transfer")
         
+        # Apply all sells as balance deltas in a single transaction
+        if pending_sells:
+            try:
+                from src.scripts.webhooks.tracked_wallet_balance_cache import get_balance_cache
+                balance_cache = get_balance_cache()
+                
+                balance_changes = balance_cache.apply_balance_deltas(
+                    [(sell['wallet'], sell['token'], -sell['amount']) for sell in pending_sells]
+                )
+                for sell, balance_info in zip(pending_sells, balance_changes):
+                    sell['previous_balance'] = balance_info['previous_balance']
+                    sell['sell_type'] = balance_info['sell_type']
+                    sell['sell_percentage'] = balance_info['sell_percentage']
+                    logger.info(f"🔍 Balance tracking: {balance_info['previous_balance']:.6f} -> {balance_info['current_balance']:.6f} ({balance_info['sell_type']}, {balance_info['sell_percentage']:.1f}%)")
+                    
+            except Exception as e:
+                logger.warning(f"⚠️ Balance tracking failed: {e}, defaulting to full sell")
+        
         logger.info(f"🔍 DEBUG: Final parsing results:")
         logger.info(f"🔍 DEBUG: - Tracked accounts found: {tracked_accounts_found}")
         logger.info(f"🔍 DEBUG: - Accounts added to parsed: {accounts_added}")
@@ -0,0 +1,141 @@
+"""
+Tests: agents run by deadline on a shared pool, respect declared dependencies and per-agent limits, report metrics
+Run: python -m pytest src/tests/test_agent_scheduler.py
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.scripts.shared_services.agent_scheduler import AgentScheduler
+
+
+class Recorder:
+    """Agent cycles that log (event, agent, time) and optionally block"""
+
+    def __init__(self):
+        self.events = []
+        self.lock = threading.Lock()
+
+    def agent(self, name, duration=0.0, result=True):
+        def run():
+            with self.lock:
+                self.events.append(('start', name, time.time()))
+            time.sleep(duration)
+            with self.lock:
+                self.events.append(('end', name, time.time()))
+            return result
+        return run
+
+    def times(self, event, name):
+        return [t for e, n, t in self.events if e == event and n == name]
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def scheduler():
+    schedulers = []
+
+    def make(**kwargs):
+        scheduler = AgentScheduler(**kwargs)
+        schedulers.append(scheduler)
+        return scheduler
+    yield make
+    for scheduler in schedulers:
+        scheduler.stop(timeout=5)
+
+
+def test_slow_agent_does_not_delay_others(scheduler):
+    rec = Recorder()
+    sched = scheduler(max_workers=2)
+    now = time.time()
+    sched.add_agent('whale', rec.agent('whale', duration=1.0), interval=3600, first_run_at=now)
+    sched.add_agent('chart', rec.agent('chart'), interval=0.2, first_run_at=now + 0.05)
+    sched.start()
+
+    assert _wait_for(lambda: len(rec.times('end', 'chart')) >= 3, timeout=3)
+    # Chart cycles completed while the whale cycle was still running
+    assert rec.times('end', 'whale') == []
+    metrics = sched.get_metrics()
+    assert metrics['pool']['peak_active'] == 2
+    assert metrics['agents']['chart']['max_lateness_sec'] < 0.5
+
+
+def test_earliest_deadline_first_when_pool_is_full(scheduler):
+    rec = Recorder()
+    sched = scheduler(max_workers=1)
+    now = time.time()
+    sched.add_agent('blocker', rec.agent('blocker', duration=0.3), interval=3600, first_run_at=now)
+    sched.add_agent('late', rec.agent('late'), interval=3600, first_run_at=now + 0.2)
+    sched.add_agent('early', rec.agent('early'), interval=3600, first_run_at=now + 0.1)
+    sched.start()
+
+    assert _wait_for(lambda: rec.times('end', 'late'))
+    starts = [name for event, name, _ in rec.events if event == 'start']
+    assert starts == ['blocker', 'early', 'late']
+    assert sched.get_metrics()['agents']['early']['last_lateness_sec'] >= 0.15
+
+
+def test_dependent_agent_waits_for_upstream(scheduler):
+    rec = Recorder()
+    sched = scheduler(max_workers=3)
+    now = time.time()
+    # Both due, copybot's deadline is earlier, but it must still wait for whale's cycle
+    sched.add_agent('copybot', rec.agent('copybot'), interval=3600, first_run_at=now - 0.1, depends_on=['whale'])
+    sched.add_agent('whale', rec.agent('whale', duration=0.3), interval=3600, first_run_at=now - 0.05)
+    sched.start()
+
+    assert _wait_for(lambda: rec.times('end', 'copybot'))
+    assert rec.times('start', 'copybot')[0] >= rec.times('end', 'whale')[0]
+    assert sched.get_metrics()['agents']['copybot']['dependency_waits'] == 1
+
+
+def test_dependency_cycles_and_unknown_agents_are_rejected(scheduler):
+    sched = scheduler()
+    sched.add_agent('a', lambda: True, interval=60, depends_on=['b'])
+    with pytest.raises(ValueError, match="cycle"):
+        sched.add_agent('b', lambda: True, interval=60, depends_on=['a'])
+    assert set(sched.agents) == {'a'}
+
+    other = scheduler()
+    other.add_agent('copybot', lambda: True, interval=60, depends_on=['whale'])
+    with pytest.raises(ValueError, match="whale"):
+        other.start()
+
+
+def test_overlap_timeout_and_failure_backoff(scheduler):
+    release = threading.Event()
+    finished = []
+    sched = scheduler(max_workers=2, on_finish=lambda name, ok, due: finished.append((name, ok)))
+    sched.add_agent('stuck', lambda: release.wait(5), interval=0.05, max_runtime=0.2, max_retries=1)
+    sched.add_agent('flaky', lambda: 1 / 0, interval=0.05, max_retries=2)
+    sched.start()
+
+    assert _wait_for(lambda: ('stuck', False) in finished)
+    metrics = sched.get_metrics()['agents']
+    assert metrics['stuck']['timeouts'] == 1 and metrics['stuck']['running'] == 1
+    # Next stuck run is due but the timed-out one still holds its slot
+    assert _wait_for(lambda: sched.get_metrics()['agents']['stuck']['overlaps'] == 1)
+
+    assert _wait_for(lambda: sched.get_metrics()['agents']['flaky']['failures'] >= 2)
+    flaky = sched.get_metrics()['agents']['flaky']
+    assert flaky['successes'] == 0 and flaky['error_count'] >= 2
+    release.set()
+    assert _wait_for(lambda: sched.get_metrics()['agents']['stuck']['runs'] >= 2)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,76 @@
+"""
+Tests: warm backtest workers run code like a subprocess, enforce time limits and cache by code + data
+Run: python -m pytest src/tests/test_backtest_worker_pool.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.scripts.utilities.backtest_worker_pool import BacktestWorkerPool, dataset_version
+
+READ_DATA = """
+import pandas as pd
+data = pd.read_csv(r"{path}")
+data['close'] = 0  # mutating the returned frame must not leak into the next run
+print("rows", len(data), "first close", pd.read_csv(r"{path}")['close'].iloc[0])
+"""
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "prices.csv").write_text("timestamp,close\n2025-01-01,100\n2025-01-02,101\n")
+    return data
+
+
+def test_runs_code_and_reports_errors_like_a_subprocess(data_dir, tmp_path):
+    csv_path = data_dir / "prices.csv"
+    with BacktestWorkerPool(workers=1, preload_files=[csv_path]) as pool:
+        ok = pool.run_code(READ_DATA.format(path=csv_path), str(tmp_path / "ok_BT.py"))
+        again = pool.run_code(READ_DATA.format(path=csv_path), str(tmp_path / "ok_BT.py"))
+        failed = pool.run_code("print('before')\nraise ValueError('bad indicator')\n")
+        exited = pool.run_code("import sys\nsys.exit(3)\n")
+
+    assert ok['success'] and ok['return_code'] == 0
+    assert "rows 2 first close 100" in ok['stdout']
+    assert "rows 2 first close 100" in again['stdout']
+    assert not failed['success'] and failed['return_code'] == 1
+    assert failed['stdout'] == "before\n"
+    assert "ValueError: bad indicator" in failed['stderr']
+    assert exited['return_code'] == 3
+    assert pool.stats['workers_started'] == 1
+
+
+def test_timeout_kills_worker_and_pool_recovers():
+    with BacktestWorkerPool(workers=1, timeout=1) as pool:
+        slow = pool.run_code("import time\ntime.sleep(30)\n")
+        after = pool.run_code("print('still here')\n")
+
+    assert not slow['success'] and "timed out" in slow['stderr']
+    assert after['success'] and after['stdout'] == "still here\n"
+    assert pool.stats['timeouts'] == 1
+
+
+def test_results_cached_by_code_and_dataset_version(data_dir, tmp_path):
+    code = READ_DATA.format(path=data_dir / "prices.csv")
+    with BacktestWorkerPool(workers=1, dataset_paths=[data_dir], cache_dir=tmp_path / "cache") as pool:
+        first = pool.run_code(code)
+        second = pool.run_code(code)
+
+        version = dataset_version([data_dir])
+        (data_dir / "prices.csv").write_text("timestamp,close\n2025-01-01,200\n")
+        assert dataset_version([data_dir]) != version
+        changed = pool.run_code(code)
+
+    assert not first['cached'] and second['cached']
+    assert second['stdout'] == first['stdout']
+    assert not changed['cached'] and "rows 1 first close 200" in changed['stdout']
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
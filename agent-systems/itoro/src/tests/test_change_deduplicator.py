@@ -0,0 +1,59 @@
+"""
+Tests: change dedup by fingerprint and (wallet, token, type), per-source windows and lazy expiry
+Run: python -m pytest src/tests/test_change_deduplicator.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.scripts.data_processing import change_deduplicator as cd
+
+WALLET = "W" * 44
+TOKEN = "T" * 44
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(cd.time, "time", lambda: now[0])
+    return now
+
+
+def test_exact_and_similar_changes_within_source_windows(clock):
+    dedup = cd.ChangeDeduplicator()
+
+    assert not dedup.is_duplicate_change(WALLET, TOKEN, 'modified', 100.0, 10.0, 50.0, source='webhook')
+    assert dedup.is_duplicate_change(WALLET, TOKEN, 'modified', 100.0, 10.0, 50.0, source='webhook')
+    assert dedup.is_duplicate_change(WALLET, TOKEN, 'modified', 105.0, 10.5, 52.0, source='webhook')  # similar
+    assert not dedup.is_duplicate_change(WALLET, TOKEN, 'modified', 300.0, 30.0, 150.0, source='webhook')
+    assert not dedup.is_duplicate_change(WALLET, "X" * 44, 'modified', 100.0, 10.0, 50.0, source='webhook')
+
+    # 2 minutes later: outside the webhook exact window, inside the polling one
+    clock[0] += 120
+    assert dedup.is_duplicate_change(WALLET, TOKEN, 'modified', 100.0, 10.0, 50.0, source='polling')
+    stats = dedup.get_hit_rate_stats()
+    assert stats['webhook'] == {'checks': 5, 'exact_hits': 1, 'similar_hits': 1, 'hit_rate': 0.4}
+    assert stats['polling']['exact_hits'] == 1
+
+
+def test_records_expire_without_a_sweeper(clock):
+    dedup = cd.ChangeDeduplicator()
+    for i in range(50):
+        dedup.is_duplicate_change(WALLET, f"{i:044d}", 'new', 1.0 + i, 100.0, None, source='polling')
+    dedup.mark_change_processed(WALLET, TOKEN, 'new', 1.0, 100.0)
+    assert dedup.get_recent_changes_summary()['recent_changes_count'] == 50
+
+    clock[0] += dedup.retention_seconds + 1
+    assert dedup.get_recent_changes_summary()['recent_changes_count'] == 0
+    assert dedup.is_change_processed(WALLET, TOKEN, 'new', 1.0, 100.0)
+    clock[0] += cd.PROCESSED_RETENTION_SECONDS
+    assert not dedup.is_change_processed(WALLET, TOKEN, 'new', 1.0, 100.0)
+    assert not dedup._expiry_heap and not dedup._changes_by_key
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
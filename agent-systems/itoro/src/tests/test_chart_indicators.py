@@ -0,0 +1,102 @@
+"""
+Tests: chart indicators advance only on newly closed candles, match a full recompute, and charts reuse one figure
+Run: python -m pytest src/tests/test_chart_indicators.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.scripts.data_processing.chart_indicators import (
+    INDICATOR_COLUMNS, ChartIndicatorCache, _synthetic_candles, calculate_indicators,
+)
+
+INTERVAL_MS = 4 * 3_600_000
+
+
+def _window(candles, end, bars=120):
+    """Last `bars` candles up to `end`, with the final one still forming"""
+    frame = candles.iloc[max(0, end - bars):end].reset_index(drop=True)
+    now = frame['timestamp'].iloc[-1] + pd.Timedelta(hours=1)
+    return frame, now
+
+
+def test_incremental_updates_match_full_recompute():
+    candles = _synthetic_candles(300, seed=3)
+    cache = ChartIndicatorCache()
+    state_closes = []
+
+    for end in range(230, 240):
+        frame, now = _window(candles, end, bars=230)
+        out, last_closed = cache.update('SOL', '4h', frame, interval_ms=INTERVAL_MS, now=now)
+
+        expected = calculate_indicators(candles.iloc[:end].copy()).iloc[-len(frame):]
+        np.testing.assert_allclose(out[INDICATOR_COLUMNS].to_numpy(), expected[INDICATOR_COLUMNS].to_numpy(),
+                                   rtol=1e-9, atol=1e-9)
+        assert last_closed == frame['timestamp'].iloc[-2]
+        state_closes.append(cache._states[('SOL', '4h')].prev_close)
+
+    # Forming candles were evaluated but never committed
+    assert state_closes == candles['close'].iloc[228:238].tolist()
+    assert cache.stats['warm_ups'] == 1 and cache.stats['incremental_bars'] == 9
+
+
+def test_forming_candle_changes_do_not_touch_closed_state():
+    candles = _synthetic_candles(150, seed=5)
+    cache = ChartIndicatorCache()
+    frame, now = _window(candles, 150)
+    first, last_closed = cache.update('BTC', '4h', frame, interval_ms=INTERVAL_MS, now=now)
+
+    ticked = frame.copy()
+    ticked.loc[ticked.index[-1], ['close', 'high']] = ticked['close'].iloc[-1] * 1.05
+    second, still_closed = cache.update('BTC', '4h', ticked, interval_ms=INTERVAL_MS, now=now)
+
+    assert still_closed == last_closed
+    pd.testing.assert_frame_equal(first[INDICATOR_COLUMNS].iloc[:-1], second[INDICATOR_COLUMNS].iloc[:-1])
+    assert second['20EMA'].iloc[-1] > first['20EMA'].iloc[-1]
+    assert cache.stats == {'warm_ups': 1, 'incremental_bars': 0, 'unchanged': 1}
+
+
+def test_gaps_and_revised_candles_rebuild_state():
+    candles = _synthetic_candles(200, seed=7)
+    cache = ChartIndicatorCache()
+    cache.update('ETH', '4h', candles.iloc[:100])
+
+    # Window no longer overlaps the stored bars
+    cache.update('ETH', '4h', candles.iloc[150:200])
+    assert cache.stats['warm_ups'] == 2
+
+    # Last stored candle came back with a different close
+    revised = candles.iloc[100:200].copy()
+    revised.loc[revised.index[-1], 'close'] += 1.0
+    out, _ = cache.update('ETH', '4h', revised)
+    assert cache.stats['warm_ups'] == 3
+    expected = calculate_indicators(revised.copy())
+    np.testing.assert_allclose(out['MACD'].to_numpy(), expected['MACD'].to_numpy())
+
+
+def test_renderer_reuses_one_figure(tmp_path):
+    pytest.importorskip("mplfinance")
+    from src.scripts.data_processing.chart_indicators import ChartRenderer
+
+    renderer = ChartRenderer()
+    figure = renderer.fig
+    for seed in (1, 2):
+        df = calculate_indicators(_synthetic_candles(120, seed=seed))
+        df = df.set_index(pd.DatetimeIndex(df['timestamp']))
+        path = renderer.render(df, tmp_path / f"chart_{seed}.png", f"SYM{seed} 4h",
+                               [(df['20EMA'], {'color': 'blue'})], macd=(df['MACD'], df['MACD_Signal']), rsi=df['RSI'])
+        assert path.stat().st_size > 0
+
+    assert renderer.fig is figure and renderer.renders == 2
+    # Artists from the first chart were removed, not stacked under the second
+    assert len(renderer.axes['macd'].lines) == 2
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
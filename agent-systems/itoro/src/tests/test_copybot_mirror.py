@@ -0,0 +1,50 @@
+"""
+Tests: every genuine wallet change reaching execute_mirror_trades is mirrored, including repeats of a similar trade
+Run: python -m pytest src/tests/test_copybot_mirror.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+copybot_agent = pytest.importorskip("src.agents.copybot_agent")
+
+from src.scripts.data_processing.change_deduplicator import ChangeDeduplicator
+
+WALLET = "W" * 44
+MINT = "M" * 44
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    monkeypatch.setattr(copybot_agent.config, "COPYBOT_AUTO_BUY_NEW_TOKENS", True)
+    monkeypatch.setattr(copybot_agent.config, "COPYBOT_AUTO_SELL_REMOVED_TOKENS", True)
+    bot = copybot_agent.CopyBotAgent.__new__(copybot_agent.CopyBotAgent)  # no wallets, RPC or scheduler needed
+    bot.price_service = object()
+    bot.change_deduplicator = ChangeDeduplicator()  # as __init__ sets it up
+    bot.mirrored = []
+    bot._execute_mirror_buy = lambda wallet, mint, data, prices: bot.mirrored.append(('buy', mint, data['amount'])) or 'success'
+    bot._execute_mirror_sell = lambda wallet, mint, data, prices: bot.mirrored.append(('sell', mint, data['amount'])) or 'success'
+    return bot
+
+
+def _buy(amount):
+    return {WALLET: {'new': {f"ACCOUNT{'A' * 36}": {'mint': MINT, 'amount': amount, 'usd_value': amount * 0.5}},
+                     'removed': {}, 'modified': {}}}
+
+
+def test_similar_repeated_trades_are_all_mirrored(bot):
+    # The whale buys the same size twice a minute apart, then sells: each is a real trade
+    assert bot.execute_mirror_trades({WALLET: {}}, _buy(1000.0))
+    assert bot.execute_mirror_trades({WALLET: {}}, _buy(1020.0))
+    sell = {WALLET: {'new': {}, 'removed': {f"ACCOUNT{'A' * 36}": {'mint': MINT, 'amount': 1000.0}}, 'modified': {}}}
+    assert bot.execute_mirror_trades({WALLET: {}}, sell)
+
+    assert bot.mirrored == [('buy', MINT, 1000.0), ('buy', MINT, 1020.0), ('sell', MINT, 1000.0)]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,106 @@
+"""
+Tests: FillForwarder drops the oldest fills when full, batches and retries POSTs, and stop() returns once the queue drains
+Run: python -m pytest src/tests/test_fills_forwarder.py
+
+The copybot POST is replaced with an in-process fake; nothing touches the network.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.scripts.trading import hyperliquid_fills_listener as listener
+from src.scripts.trading.hyperliquid_fills_listener import FillForwarder
+
+
+class FakeCopybot:
+    def __init__(self, failures=0, delay=0.0):
+        self.payloads = []
+        self.failures = failures
+        self.delay = delay
+
+    async def post(self, payload):
+        await asyncio.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            return False
+        self.payloads.append(payload)
+        return True
+
+    @property
+    def symbols(self):
+        return [event["symbol"] for payload in self.payloads for event in payload["events"]]
+
+
+def _forwarder(copybot, monkeypatch, **kwargs):
+    monkeypatch.setattr(listener, "FORWARD_BACKOFF_BASE_SEC", 0.001)
+    forwarder = FillForwarder(url="http://copybot.invalid/webhook/hyperliquid", batch_window=0.01, **kwargs)
+    forwarder._post = copybot.post
+    return forwarder
+
+
+def _fills(n, start=0):
+    return [{"wallet": "0xabc", "symbol": f"COIN{i}", "side": "buy", "size_usd": 10.0} for i in range(start, start + n)]
+
+
+def test_overflow_drops_oldest_and_stop_does_not_wait_out_drain_timeout(monkeypatch):
+    copybot = FakeCopybot()
+
+    async def scenario():
+        forwarder = _forwarder(copybot, monkeypatch, queue_maxsize=3)
+        forwarder.submit(_fills(5))  # reader outpaces the forwarder before it starts
+        assert forwarder.dropped == 2 and forwarder.queue.qsize() == 3
+
+        await forwarder.start()
+        started = time.monotonic()
+        await forwarder.stop(drain_timeout=5.0)
+        return forwarder, time.monotonic() - started
+
+    forwarder, stop_seconds = asyncio.run(scenario())
+    assert copybot.symbols == ["COIN2", "COIN3", "COIN4"]
+    assert stop_seconds < 1.0
+    assert forwarder.get_stats()["forwarded"] == 3 and forwarder.queue.qsize() == 0
+
+
+def test_batches_in_order_and_retries_failed_posts(monkeypatch):
+    copybot = FakeCopybot(failures=1)
+
+    async def scenario():
+        forwarder = _forwarder(copybot, monkeypatch, max_batch=4)
+        await forwarder.start()
+        forwarder.submit(_fills(6))
+        await asyncio.sleep(0.05)
+        forwarder.submit(_fills(2, start=6))
+        await forwarder.stop(drain_timeout=5.0)
+        return forwarder
+
+    forwarder = asyncio.run(scenario())
+    assert copybot.symbols == [f"COIN{i}" for i in range(8)]
+    assert all(len(payload["events"]) <= 4 for payload in copybot.payloads)
+    stats = forwarder.get_stats()
+    assert stats["retries"] == 1 and stats["failed"] == 0 and stats["forwarded"] == 8
+
+
+def test_stop_gives_up_after_drain_timeout(monkeypatch):
+    copybot = FakeCopybot(delay=10.0)
+
+    async def scenario():
+        forwarder = _forwarder(copybot, monkeypatch)
+        await forwarder.start()
+        forwarder.submit(_fills(1))
+        await asyncio.sleep(0.02)
+        started = time.monotonic()
+        await forwarder.stop(drain_timeout=0.2)
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) < 1.0
+    assert copybot.payloads == []
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
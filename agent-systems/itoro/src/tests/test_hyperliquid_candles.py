@@ -0,0 +1,133 @@
+"""
+Tests: Hyperliquid candles are fetched in concurrent pages, cached per (coin, interval) and only the tail is refetched
+Run: python -m pytest src/tests/test_hyperliquid_candles.py
+
+Uses a local HTTP stand-in for the candleSnapshot endpoint; nothing touches the network.
+"""
+
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src import nice_funcs_hl as hl
+from src.scripts.data_processing.candle_store import CandleStore
+
+HOUR_MS = 3_600_000
+
+
+def _ms(naive_utc):
+    return int((naive_utc - datetime(1970, 1, 1)) / timedelta(milliseconds=1))
+
+
+def _candle(t):
+    price = 100 + (t // HOUR_MS) % 50
+    return {"t": t, "T": t + HOUR_MS - 1, "s": "BTC", "i": "1h",
+            "o": str(price), "h": str(price + 2), "l": str(price - 1), "c": str(price + 1), "v": "10.5", "n": 7}
+
+
+class LocalCandleServer:
+    """candleSnapshot stand-in: hourly candles inside the requested window, at most `limit` per response"""
+
+    def __init__(self):
+        self.requests = []
+        outer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                req = body["req"]
+                outer.requests.append((req["startTime"], req["endTime"]))
+                first = -(-req["startTime"] // HOUR_MS) * HOUR_MS
+                candles = [_candle(t) for t in range(first, req["endTime"] + 1, HOUR_MS)][:req["limit"]]
+                payload = json.dumps(candles).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/info"
+
+    def close(self):
+        self._server.shutdown()
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    server = LocalCandleServer()
+    monkeypatch.setattr(hl, "BASE_URL", server.url)
+    monkeypatch.setattr(hl, "_candle_store", CandleStore(tmp_path / "candles"))
+    monkeypatch.setattr(hl, "timestamp_offset", timedelta(0))
+    yield server
+    server.close()
+
+
+def test_long_range_is_fetched_in_pages_and_cached(server):
+    start, end = datetime(2025, 1, 1), datetime(2025, 3, 1)
+    candles = hl._get_ohlcv("BTC", "1h", start, end, batch_size=500)
+
+    expected_hours = int((end - start) / timedelta(hours=1)) + 1
+    assert len(candles) == expected_hours
+    assert candles['t'].is_monotonic_increasing and candles['t'].is_unique
+    assert len(server.requests) == -(-expected_hours // 500)
+
+    # Same range again: served from the cache
+    server.requests.clear()
+    again = hl._get_ohlcv("BTC", "1h", start, end, batch_size=500)
+    assert server.requests == []
+    assert again.equals(candles)
+
+
+def test_only_missing_head_and_tail_are_fetched(server):
+    start, end = datetime(2025, 2, 1), datetime(2025, 2, 10)
+    hl._get_ohlcv("BTC", "1h", start, end)
+
+    server.requests.clear()
+    later_end = end + timedelta(days=2)
+    extended = hl._get_ohlcv("BTC", "1h", start - timedelta(days=1), later_end)
+
+    head, tail = sorted(server.requests)
+    assert head == (_ms(start - timedelta(days=1)), _ms(start) - 1)
+    assert tail == (_ms(end), _ms(later_end))  # refetch last (forming) candle
+    assert len(extended) == 12 * 24 + 1
+    assert (extended['t'].diff().dropna() == HOUR_MS).all()
+
+
+def test_process_matches_legacy_per_candle_conversion(server, monkeypatch):
+    monkeypatch.setattr(hl, "timestamp_offset", timedelta(minutes=-20))
+    candles = hl._get_ohlcv("BTC", "1h", datetime(2025, 1, 1), datetime(2025, 1, 3))
+    df = hl._process_data_to_df(candles)
+
+    raw = [_candle(t) for t in range(_ms(datetime(2025, 1, 1)),
+                                     _ms(datetime(2025, 1, 3)) + 1, HOUR_MS)]
+    legacy_times = [hl.adjust_timestamp(datetime.utcfromtimestamp(c['t'] / 1000)) for c in raw]
+    assert list(df['timestamp']) == legacy_times
+    assert df['close'].tolist() == [float(c['c']) for c in raw]
+    assert list(df.columns) == ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+
+def test_repeated_get_data_is_a_cache_read(server):
+    first = hl.get_data(symbol="BTC", timeframe="1h", bars=48, add_indicators=False)
+    requests_after_first = len(server.requests)
+    second = hl.get_data(symbol="BTC", timeframe="1h", bars=48, add_indicators=False)
+
+    assert len(first) == 48
+    assert requests_after_first == 1
+    assert len(server.requests) == requests_after_first
+    assert second.equals(first)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,202 @@
+"""
+Tests: the Hyperliquid price book streams allMids, serves O(1) lookups and falls back to REST when stale
+Run: python -m pytest src/tests/test_hyperliquid_price_book.py
+
+Uses a local websocket stand-in for Hyperliquid's allMids channel and a local
+HTTP stand-in for the info endpoint; nothing touches the network.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+websockets = pytest.importorskip("websockets")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.scripts.shared_services.hyperliquid_price_book import HyperliquidPriceBook
+
+
+class LocalAllMidsServer:
+    """Websocket stand-in: acknowledges allMids subscriptions and broadcasts pushed mids"""
+
+    def __init__(self):
+        self.subscriptions = []
+        self._clients = set()
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}"
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(self._serve())
+        self.port = next(iter(self._server.sockets)).getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _serve(self):
+        return await websockets.serve(self._handle, "127.0.0.1", 0)
+
+    async def _handle(self, ws, *_):
+        async for raw in ws:
+            message = json.loads(raw)
+            self._clients.add(ws)
+            self.subscriptions.append(message)
+            await ws.send(json.dumps({"channel": "subscriptionResponse", "data": message}))
+
+    def push(self, mids):
+        payload = json.dumps({"channel": "allMids", "data": {"mids": mids}})
+
+        async def broadcast():
+            for ws in list(self._clients):
+                await ws.send(payload)
+        asyncio.run_coroutine_threadsafe(broadcast(), self._loop).result(5)
+
+    def disconnect_clients(self):
+        async def close():
+            for ws in list(self._clients):
+                await ws.close()
+            self._clients.clear()
+        asyncio.run_coroutine_threadsafe(close(), self._loop).result(5)
+
+    def close(self):
+        self.disconnect_clients()
+        self._server.close()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+
+
+class LocalInfoServer:
+    """HTTP stand-in for the info endpoint's allMids snapshot; counts requests"""
+
+    def __init__(self, mids):
+        self.mids = mids
+        self.requests = 0
+        outer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                assert body == {"type": "allMids"}
+                outer.requests += 1
+                payload = json.dumps(outer.mids).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/info"
+
+    def close(self):
+        self._server.shutdown()
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def ws_server():
+    server = LocalAllMidsServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def rest_server():
+    server = LocalInfoServer({"BTC": "60000.0", "ETH": "3000.0"})
+    yield server
+    server.close()
+
+
+def test_streamed_mids_serve_lookups_without_rest(ws_server, rest_server):
+    book = HyperliquidPriceBook(websocket_url=ws_server.url, rest_url=rest_server.url).start()
+    try:
+        assert _wait_for(lambda: ws_server.subscriptions)
+        assert ws_server.subscriptions[0] == {"method": "subscribe", "subscription": {"type": "allMids"}}
+
+        ws_server.push({"BTC": "65000.5", "ETH": "3500.25", "SOL": "150"})
+        assert _wait_for(lambda: book.get_stats()['ws_updates'] == 1)
+
+        assert book.get_price("BTC") == 65000.5
+        assert book.get_price("ETHPERP") == 3500.25
+        assert book.get_price("DOGE") is None
+        assert book.get_prices(["SOL", "BTC"]) == {"SOL": 150.0, "BTC": 65000.5}
+        assert book.snapshot()["ETH"] == 3500.25
+
+        ws_server.push({"BTC": "66000"})
+        assert _wait_for(lambda: book.get_price("BTC") == 66000.0)
+        assert rest_server.requests == 0
+    finally:
+        book.stop()
+
+
+def test_stale_stream_falls_back_to_one_rest_snapshot(ws_server, rest_server):
+    book = HyperliquidPriceBook(websocket_url=ws_server.url, rest_url=rest_server.url,
+                                max_staleness=0.2, rest_min_interval=0.5).start()
+    try:
+        assert _wait_for(lambda: ws_server.subscriptions)
+        ws_server.push({"BTC": "65000"})
+        assert _wait_for(lambda: book.get_price("BTC") == 65000.0)
+
+        # Stream goes quiet: pricing many positions costs a single snapshot
+        requests_before = rest_server.requests
+        time.sleep(0.6)  # past both max_staleness and rest_min_interval
+        prices = [book.get_price(symbol) for symbol in ["BTC", "ETH"] * 50]
+        assert prices[:2] == [60000.0, 3000.0]
+        assert rest_server.requests - requests_before == 1
+        assert book.get_stats()['source'] == 'rest'
+
+        # Stream recovers and takes over again
+        ws_server.push({"BTC": "67000"})
+        assert _wait_for(lambda: book.get_stats()['source'] == 'ws')
+        assert book.get_price("BTC") == 67000.0
+    finally:
+        book.stop()
+
+
+def test_reconnects_after_disconnect(ws_server):
+    book = HyperliquidPriceBook(websocket_url=ws_server.url, rest_url="http://127.0.0.1:9/info").start()
+    try:
+        assert _wait_for(lambda: len(ws_server.subscriptions) == 1)
+        ws_server.disconnect_clients()
+        assert _wait_for(lambda: len(ws_server.subscriptions) == 2)
+        ws_server.push({"BTC": "64000"})
+        assert _wait_for(lambda: book.get_price("BTC") == 64000.0)
+        assert book.get_stats()['reconnects'] >= 1
+    finally:
+        book.stop()
+
+
+def test_no_data_and_no_rest_returns_none():
+    book = HyperliquidPriceBook(rest_url="http://127.0.0.1:9/info", stream=False)
+    assert book.get_price("BTC") is None
+    assert book.snapshot() is None
+    assert book.get_stats()['rest_failures'] == 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
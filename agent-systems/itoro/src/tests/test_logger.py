@@ -0,0 +1,139 @@
+"""
+Tests: logger takes agent identity from context vars, writes on a background thread and rate limits
+repeated messages per call site without dropping distinct messages or errors
+Run: python -m pytest src/tests/test_logger.py
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.scripts.shared_services import logger as log
+
+
+class CaptureHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def captured(monkeypatch):
+    monkeypatch.setattr(log, "_DASHBOARD_MODE", False)
+    log._site_windows.clear()
+    handler = CaptureHandler()
+    log.logger.addHandler(handler)
+    yield handler.records
+    log.logger.removeHandler(handler)
+    log.flush_logs()
+
+
+def test_agent_context_replaces_stack_inspection(captured, monkeypatch):
+    with log.agent_context('copybot'):
+        monkeypatch.setattr(log, "_detect_context", lambda frame: pytest.fail("stack was inspected"))
+        log.info("Mirroring trade")
+        log.warning("Slow price check")
+    monkeypatch.undo()
+
+    log.info("No agent context here")
+
+    assert [r.color for r in captured] == ['yellow', 'yellow', 'white']
+    assert captured[0].console == "INFO: " and captured[0].console_msg == "Mirroring trade"
+    assert captured[0].pathname == __file__ and captured[0].funcName == "test_agent_context_replaces_stack_inspection"
+
+
+def test_context_is_per_thread(captured):
+    def agent_thread(name):
+        log.set_agent_context(name)
+        log.info(f"{name} cycle")
+
+    threads = [threading.Thread(target=agent_thread, args=(name,)) for name in ('risk', 'funding_agent')]
+    for thread in threads:
+        thread.start()
+        thread.join()
+    log.info("main thread")
+
+    colors = {r.console_msg: r.color for r in captured}
+    assert colors == {"risk cycle": 'red', "funding_agent cycle": 'green', "main thread": 'white'}
+
+
+def test_output_is_written_by_the_writer_thread(captured, monkeypatch):
+    printed = []
+    monkeypatch.setattr(log, "safe_console_print",
+                        lambda msg, prefix="", color=None: printed.append((msg, threading.current_thread().name)))
+    log.error("\033[91mOrder rejected\033[0m")
+    log.info("Quiet", file_only=True)
+    log.flush_logs()
+
+    assert printed == [("ERROR: Order rejected", printed[0][1])]
+    assert printed[0][1] != threading.current_thread().name
+    assert captured[1].console is None
+
+
+def test_repeated_messages_from_one_call_site_are_rate_limited(captured, monkeypatch):
+    monkeypatch.setattr(log, "LOG_RATE_LIMIT_PER_SITE", 5)
+    monkeypatch.setattr(log, "LOG_RATE_LIMIT_WINDOW_SEC", 0.2)
+    suppressed_before = log.get_log_stats()['suppressed']
+
+    def price_check(i):
+        log.info(f"Checking price for token {i}")
+
+    for i in range(50):
+        price_check(i)
+    log.info("Different call site")
+    assert len(captured) == 6
+
+    time.sleep(0.25)
+    price_check(50)
+    assert captured[-1].console_msg == "Checking price for token 50 (+45 similar messages suppressed)"
+    assert log.get_log_stats()['suppressed'] - suppressed_before == 45
+
+
+
+def test_distinct_messages_and_errors_from_one_loop_are_kept(captured, monkeypatch):
+    monkeypatch.setattr(log, "LOG_RATE_LIMIT_PER_SITE", 5)
+    tokens = [f"Token{chr(65 + i)}" for i in range(10)]
+
+    for token in tokens:
+        log.warning(f"Price fetch failed for {token}: no route")
+    for i in range(30):
+        log.error(f"Order {i} rejected")
+    log.critical("Kill switch engaged")
+
+    assert [r.console_msg for r in captured[:10]] == [f"Price fetch failed for {t}: no route" for t in tokens]
+    assert len(captured) == 10 + 30 + 1
+
+
+def test_queued_output_is_flushed_before_stdout_is_redirected(tmp_path, monkeypatch):
+    flushed_to = []
+    monkeypatch.setattr(log, "flush_logs", lambda: flushed_to.append(sys.stdout))
+    original = sys.stdout
+
+    streams = log.setup_file_logging(str(tmp_path / "agent.log"))
+    log.restore_logging(*streams)
+
+    assert flushed_to == [original, streams[2]]
+    assert sys.stdout is original
+
+
+def test_flush_logs_restarts_the_writer(captured, monkeypatch):
+    printed = []
+    monkeypatch.setattr(log, "safe_console_print", lambda msg, prefix="", color=None: printed.append(msg))
+    for i in range(3):
+        log.info(f"Cycle {i} done")
+        log.flush_logs()
+        assert printed[-1] == f"INFO: Cycle {i} done"
+    assert log._log_listener_running
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
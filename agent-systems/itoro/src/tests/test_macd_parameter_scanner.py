@@ -0,0 +1,102 @@
+"""
+Tests: the parallel MACD grid matches serial backtests, resumes from its ledger and prunes
+Run: python -m pytest src/tests/test_macd_parameter_scanner.py
+"""
+
+import os
+import sys
+import warnings
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("backtesting")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.scripts.macd_parameter_scanner import (
+    ParameterGrid, SharedOHLCV, build_parameter_grid, load_data, run_combination,
+)
+
+DATA_FILE = Path(__file__).parent.parent / "data" / "rbi" / "BTC-USD-5m.csv"
+
+warnings.filterwarnings('ignore', message='Some trades remain open')
+
+
+def _price_data(bars=1500):
+    return load_data(DATA_FILE).iloc[:bars]
+
+
+def _small_grid():
+    return build_parameter_grid(
+        macd_periods=[(8, 21, 5), (5, 13, 5)],
+        entry_ranges=[(-2.0, -1.0), (-1.0, -0.2)],
+        exit_ranges=[(-0.03, -0.01)],
+    )
+
+
+def _by_params(results, grid):
+    names = list(grid[0])
+    return {tuple(result[name] for name in names): result for result in results}
+
+
+def test_shared_ohlcv_round_trip():
+    price_data = _price_data()
+    shared = SharedOHLCV(price_data)
+    try:
+        shm, frame = SharedOHLCV.attach(shared.handle)
+        assert frame.equals(price_data[['Open', 'High', 'Low', 'Close', 'Volume']])
+        del frame
+        shm.close()
+    finally:
+        shared.close()
+
+
+def test_pool_matches_serial_backtests():
+    price_data = _price_data()
+    grid = _small_grid()
+    serial = [run_combination(price_data, params) for params in grid]
+    parallel = list(ParameterGrid(price_data, grid, workers=2).run())
+
+    assert len(parallel) == len(grid)
+    assert _by_params(parallel, grid) == _by_params(serial, grid)
+
+
+def test_interrupted_scan_resumes_from_ledger(tmp_path):
+    price_data = _price_data()
+    grid = _small_grid()
+    ledger = tmp_path / "scan.ledger.jsonl"
+
+    first = ParameterGrid(price_data, grid, workers=1, ledger_path=ledger)
+    run = first.run()
+    partial = [next(run), next(run)]
+    run.close()  # interrupted
+
+    second = ParameterGrid(price_data, grid, workers=1, ledger_path=ledger)
+    resumed = list(second.run())
+
+    assert second.resumed == 2
+    assert len(resumed) == len(grid)
+    expected = _by_params([run_combination(price_data, params) for params in grid], grid)
+    assert _by_params(resumed, grid) == expected
+    assert _by_params(partial, grid).items() <= expected.items()
+
+
+def test_dominated_regions_are_pruned():
+    price_data = _price_data()
+    grid = build_parameter_grid(
+        macd_periods=[(8, 21, 5), (5, 13, 5), (15, 30, 10)],
+        entry_ranges=[(-2.5, -0.8), (-2.0, -1.0), (-1.0, -0.2)],
+        exit_ranges=[(-0.03, -0.01)],
+    )
+    grid_runner = ParameterGrid(price_data, grid, workers=1, prune_margin=0.0, prune_after=1)
+    results = list(grid_runner.run())
+
+    assert grid_runner.pruned > 0
+    assert len(results) + grid_runner.pruned == len(grid)
+    # Every region is sampled before any is pruned
+    assert len({(r['fast_period'], r['slow_period']) for r in results}) == 3
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,99 @@
+"""
+Tests: parallel and cached walk-forward runs match the serial per-window optimization
+Run: python -m pytest src/tests/test_macd_walk_forward.py
+"""
+
+import os
+import sys
+import warnings
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("backtesting")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.scripts.macd_walk_forward import (
+    ResultCache, optimize_parameters_on_window, plan_windows, walk_forward_optimization,
+)
+from src.scripts.macd_parameter_scanner import load_data
+
+DATA_FILE = Path(__file__).parent.parent / "data" / "rbi" / "BTC-USD-5m.csv"
+
+PARAM_GRID = {
+    'fast_period': [8, 12],
+    'slow_period': [26],
+    'entry_min_mult': [-2.0, -1.0],
+    'entry_max_mult': [-1.0],
+    'exit_min': [-0.025],
+    'exit_max': [-0.01],
+}
+
+warnings.filterwarnings('ignore', message='Some trades remain open')
+
+
+def _price_data():
+    return load_data(DATA_FILE)
+
+
+def test_windows_match_date_slicing():
+    data = _price_data()
+    for window in plan_windows(data, window_days=7, test_days=3):
+        start, stop = window['train']
+        assert data.iloc[start:stop].equals(data[window['train_start']:window['train_end']])
+        start, stop = window['test']
+        assert data.iloc[start:stop].equals(data[window['test_start']:window['test_end']])
+
+
+def test_parallel_and_cached_runs_match_serial(tmp_path):
+    data = _price_data()
+    serial = walk_forward_optimization(data, 7, 3, PARAM_GRID, workers=1, cache_dir=None)
+
+    cold = walk_forward_optimization(data, 7, 3, PARAM_GRID, workers=2, cache_dir=tmp_path)
+    warm = walk_forward_optimization(data, 7, 3, PARAM_GRID, workers=2, cache_dir=tmp_path)
+
+    assert len(serial) > 0
+    assert cold.equals(serial)
+    assert warm.equals(serial)
+
+    # Each window's best params are what the standalone optimizer picks
+    for _, row in serial.iterrows():
+        best_params, _ = optimize_parameters_on_window(data[row['train_start']:row['train_end']], PARAM_GRID)
+        assert best_params['fast_period'] == row['fast_period']
+        assert best_params['entry_min_mult'] == row['entry_min_mult']
+
+
+def test_cache_key_depends_on_window_and_params(tmp_path):
+    cache = ResultCache(tmp_path)
+    key = cache.key('window-a', {'fast_period': 8})
+    assert key == ResultCache(tmp_path).key('window-a', {'fast_period': 8})
+    assert key != cache.key('window-b', {'fast_period': 8})
+    assert key != cache.key('window-a', {'fast_period': 12})
+
+    assert cache.get(key) is None
+    cache.put(key, {'return_pct': 1.5, 'trades': 7})
+    assert cache.get(key) == {'return_pct': 1.5, 'trades': 7}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_failed_runs_are_not_cached(tmp_path):
+    cache = ResultCache(tmp_path)
+    key = cache.key('window-a', {'fast_period': 8})
+
+    cache.put(key, {'error': 'worker crashed'})
+    assert cache.get(key) is None
+    assert not list(tmp_path.rglob('*.json'))
+
+    # Entries stored by older versions that cached failures are misses too
+    cache._path(key).parent.mkdir(exist_ok=True)
+    cache._path(key).write_text('{"error": "worker crashed"}')
+    assert cache.get(key) is None
+
+    cache.put(key, {'return_pct': 1.5, 'trades': 7})
+    assert cache.get(key) == {'return_pct': 1.5, 'trades': 7}
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
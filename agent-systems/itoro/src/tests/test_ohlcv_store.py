@@ -0,0 +1,131 @@
+"""
+Tests: stored OHLCV series fetch only the missing head/tail, extend indicators to match a full recompute, and stay bounded
+in memory and on disk
+Run: python -m pytest src/tests/test_ohlcv_store.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.scripts.data_processing.candle_store import CandleStore
+from src.scripts.data_processing.ohlcv_store import (
+    OHLCV_SOURCE, WARMUP_BARS, _synthetic_items, cached_ohlcv, compute_indicators, extend_indicators, items_to_frame,
+)
+
+INTERVAL = 900
+END = 1_700_000_000 // INTERVAL * INTERVAL
+DAY = 86400
+
+
+class FakeBirdeye:
+    def __init__(self, n_bars=2000, seed=0):
+        self.items = _synthetic_items(n_bars, INTERVAL, END, seed=seed)
+        self.calls = []
+
+    def fetch(self, time_from, time_to):
+        self.calls.append((time_from, time_to))
+        return items_to_frame([item for item in self.items if time_from <= item['unixTime'] <= time_to])
+
+
+def test_extended_indicators_match_full_recompute_and_pandas_ta_formulas():
+    bars = items_to_frame(_synthetic_items(300, INTERVAL, END, seed=4))
+    full = compute_indicators(bars)
+
+    stored = compute_indicators(bars.iloc[:250])
+    extended = extend_indicators(pd.concat([stored, bars.iloc[250:]], ignore_index=True), 250)
+    columns = ['MA20', 'MA40', 'RSI']
+    np.testing.assert_allclose(extended[columns].to_numpy(), full[columns].to_numpy(), rtol=1e-12, equal_nan=True)
+
+    # pandas_ta: sma = rolling mean, rsi = rma (ewm alpha=1/length, min_periods=length) of clipped changes
+    change = bars['Close'].diff()
+    gain = change.clip(lower=0).ewm(alpha=1 / 14, min_periods=14).mean()
+    loss = change.clip(upper=0).ewm(alpha=1 / 14, min_periods=14).mean()
+    np.testing.assert_allclose(full['RSI'], 100 * gain / (gain + loss.abs()), rtol=1e-12, equal_nan=True)
+    np.testing.assert_allclose(full['MA40'], bars['Close'].rolling(40).mean(), rtol=1e-12, equal_nan=True)
+
+
+def test_only_the_tail_is_fetched_once_the_series_is_stored(tmp_path):
+    store, api = CandleStore(tmp_path), FakeBirdeye()
+    now = END - 10 * INTERVAL
+    first = cached_ohlcv(store, 'TOKEN', '15m', now - 5 * DAY, now, api.fetch, max_age=60, now=now)
+    assert api.calls == [(now - 5 * DAY, now)]
+    assert list(first.columns[-3:]) == ['Price_above_MA20', 'Price_above_MA40', 'MA20_above_MA40']
+
+    # Within max_age: no request at all
+    cached_ohlcv(store, 'TOKEN', '15m', now - 5 * DAY + 30, now + 30, api.fetch, max_age=60, now=now + 30)
+    assert len(api.calls) == 1
+
+    # Two bars later: only from the last stored bar (which may have been forming) onwards
+    later = now + 2 * INTERVAL
+    df = cached_ohlcv(store, 'TOKEN', '15m', later - 5 * DAY, later, api.fetch, max_age=60, now=later)
+    assert api.calls[1] == (now, later)
+
+    expected = compute_indicators(items_to_frame([i for i in api.items if now - 5 * DAY <= i['unixTime'] <= later]))
+    expected = expected[expected['t'] >= later - 5 * DAY].reset_index(drop=True)
+    pd.testing.assert_series_equal(df['Close'], expected['Close'])
+    np.testing.assert_allclose(df[['MA20', 'RSI', 'MA40']], expected[['MA20', 'RSI', 'MA40']], rtol=1e-12)
+
+    # A fresh process reads the same series back from Parquet
+    stored, metadata = CandleStore(tmp_path).load(OHLCV_SOURCE, 'TOKEN', '15m')
+    assert stored['t'].iloc[-1] == later and metadata['history_start'] == now - 5 * DAY
+
+
+def test_longer_history_fetches_only_the_missing_head(tmp_path):
+    store, api = CandleStore(tmp_path), FakeBirdeye()
+    now = END - INTERVAL
+    cached_ohlcv(store, 'TOKEN', '15m', now - 3 * DAY, now, api.fetch, max_age=60, now=now)
+    df = cached_ohlcv(store, 'TOKEN', '15m', now - 10 * DAY, now, api.fetch, max_age=60, now=now)
+
+    assert api.calls == [(now - 3 * DAY, now), (now - 10 * DAY, now - 3 * DAY - 1)]
+    assert df['Datetime (UTC)'].is_unique and len(df) == 10 * DAY // INTERVAL + 1
+
+
+def test_short_windows_are_padded_and_memory_is_bounded(tmp_path):
+    store, api = CandleStore(tmp_path, max_memory_series=2), FakeBirdeye(n_bars=10)
+    df = cached_ohlcv(store, 'TOKEN', '15m', END - DAY, END, api.fetch, max_age=60, now=END)
+    assert len(df) == 40 and (df['Close'].iloc[:31] == df['Close'].iloc[30]).all()
+
+    # Failed fetch with nothing stored: caller falls back
+    assert cached_ohlcv(store, 'OTHER', '15m', END - DAY, END, lambda *_: None, max_age=60, now=END) is None
+
+    for name in ('A', 'B', 'C'):
+        store.save(OHLCV_SOURCE, name, '15m', items_to_frame(api.items), {})
+    assert [path.stem for path in store._memory] == ['B_15m', 'C_15m']
+
+
+
+def test_stored_series_is_trimmed_to_the_longest_lookback(tmp_path):
+    store, api = CandleStore(tmp_path), FakeBirdeye()
+    first = END - 15 * DAY
+    for day in range(12):
+        now = first + day * DAY
+        df = cached_ohlcv(store, 'TOKEN', '15m', now - 2 * DAY, now, api.fetch, max_age=60, now=now)
+
+    stored, metadata = CandleStore(tmp_path).load(OHLCV_SOURCE, 'TOKEN', '15m')
+    assert len(stored) == 2 * DAY // INTERVAL + 1 + WARMUP_BARS
+    assert metadata['history_start'] == stored['t'].iloc[0] and metadata['max_lookback'] == 2 * DAY
+
+    # Trimming keeps the stored indicator state, so values still match a recompute from the first fetch
+    full = compute_indicators(items_to_frame([i for i in api.items if first - 2 * DAY <= i['unixTime'] <= now]))
+    expected = full[full['t'] >= now - 2 * DAY].reset_index(drop=True)
+    np.testing.assert_allclose(df[['MA20', 'RSI', 'MA40']], expected[['MA20', 'RSI', 'MA40']], rtol=1e-12)
+
+    # A longer lookback fetches just the trimmed-away head and is kept from then on
+    calls = len(api.calls)
+    df = cached_ohlcv(store, 'TOKEN', '15m', now - 5 * DAY, now, api.fetch, max_age=60, now=now)
+    assert api.calls[calls:] == [(now - 5 * DAY, int(stored['t'].iloc[0]) - 1)]
+    assert len(df) == 5 * DAY // INTERVAL + 1
+    later = now + 2 * DAY
+    cached_ohlcv(store, 'TOKEN', '15m', later - 2 * DAY, later, api.fetch, max_age=60, now=later)
+    stored, _ = store.load(OHLCV_SOURCE, 'TOKEN', '15m')
+    assert stored['t'].iloc[0] == later - 5 * DAY - WARMUP_BARS * INTERVAL
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
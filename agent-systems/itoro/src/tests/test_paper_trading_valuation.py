@@ -0,0 +1,108 @@
+"""
+Tests: paper portfolio valuation prices every position in one batch, shares a snapshot across callers and trades write atomically
+Run: python -m pytest src/tests/test_paper_trading_valuation.py
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src import paper_trading as pt
+
+
+class FakePriceService:
+    def __init__(self, prices, delay=0.0):
+        self.prices = prices
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get_price(self, token_address):
+        pytest.fail("valuation looked up a single token")
+
+    def get_prices(self, token_addresses):
+        with self._lock:
+            self.calls.append(list(token_addresses))
+        time.sleep(self.delay)
+        return {address: self.prices.get(address) for address in token_addresses}
+
+
+@pytest.fixture
+def portfolio(tmp_path, monkeypatch):
+    monkeypatch.setattr(pt, "DB_PATH", str(tmp_path / "paper_trading.db"))
+    monkeypatch.setattr(pt, "_valuation_snapshot", None)
+    pt.init_paper_trading_db()
+
+    def hold(rows):
+        with pt._get_shared_db().transaction() as conn:
+            conn.executemany(
+                "INSERT INTO paper_portfolio (token_address, amount, last_price, last_update) VALUES (?, ?, ?, ?)",
+                [(address, amount, last_price, 0) for address, amount, last_price in rows]
+            )
+
+    def use_prices(prices, delay=0.0):
+        service = FakePriceService(prices, delay)
+        monkeypatch.setattr(pt, "get_optimized_price_service", lambda: service, raising=False)
+        return service
+
+    return hold, use_prices
+
+
+def test_one_batch_call_values_every_position(portfolio):
+    hold, use_prices = portfolio
+    hold([(pt.USDC_ADDRESS, 250.0, 1.0), ("LIVE", 4.0, 1.0), ("STALE", 3.0, 7.0),
+          ("UNPRICED", 5.0, 0.0), ("EMPTY", 0.0, 9.0)])
+    service = use_prices({"LIVE": 2.5, "STALE": None, "UNPRICED": None})
+
+    assert pt.get_portfolio_value() == pytest.approx(250.0 + 4.0 * 2.5 + 3.0 * 7.0)
+    assert service.calls == [["LIVE", "STALE", "UNPRICED"]]
+
+    last_prices = dict(pt._get_shared_db().fetchall("SELECT token_address, last_price FROM paper_portfolio"))
+    assert last_prices["LIVE"] == 2.5 and last_prices["STALE"] == 7.0
+
+
+def test_concurrent_callers_share_one_valuation(portfolio):
+    hold, use_prices = portfolio
+    hold([(pt.USDC_ADDRESS, 100.0, 1.0)] + [(f"TOKEN{i}", 1.0, 1.0) for i in range(200)])
+    service = use_prices({f"TOKEN{i}": 2.0 for i in range(200)}, delay=0.1)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        values = list(pool.map(lambda _: pt.get_portfolio_value(), range(8)))
+    assert values == [500.0] * 8 and len(service.calls) == 1
+
+    pt.get_portfolio_value()
+    assert len(service.calls) == 1
+    pt._invalidate_portfolio_value()
+    pt.get_portfolio_value()
+    pt.get_portfolio_value(max_age=0)
+    assert len(service.calls) == 3
+
+
+def test_trades_write_together_and_refresh_the_snapshot(portfolio):
+    hold, use_prices = portfolio
+    hold([(pt.SOL_ADDRESS, 10.0, 100.0)])
+    use_prices({pt.SOL_ADDRESS: 100.0, pt.STAKED_SOL_ADDRESS: 110.0})
+    assert pt.get_portfolio_value() == pytest.approx(1000.0)
+
+    # Rejected trades leave no trade row behind
+    assert pt.execute_paper_trade("NOT_HELD", "CLOSE", 5.0, 1.0, agent="risk", token_symbol="NH", token_name="Not Held") is False
+    assert pt._get_shared_db().fetchone("SELECT COUNT(*) FROM paper_trades")[0] == 0
+
+    assert pt.execute_paper_trade(pt.SOL_ADDRESS, "STAKE", 4.0, 100.0, agent="staking",
+                                  token_symbol="SOL", token_name="Solana") is True
+    balances = dict(pt._get_shared_db().fetchall("SELECT token_address, amount FROM paper_portfolio"))
+    assert balances == {pt.SOL_ADDRESS: 6.0, pt.STAKED_SOL_ADDRESS: 4.0}
+    assert pt._get_shared_db().fetchone("SELECT COUNT(*) FROM paper_trades")[0] == 1
+
+    # The valuation cached before the trade is not served
+    assert pt.get_portfolio_value() == pytest.approx(6.0 * 100.0 + 4.0 * 110.0)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
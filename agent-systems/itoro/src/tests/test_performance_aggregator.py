@@ -0,0 +1,125 @@
+"""
+Tests: performance aggregates match a full recompute, rolling windows expire by bucket and snapshots append to a log
+Run: python -m pytest src/tests/test_performance_aggregator.py
+"""
+
+import json
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.scripts.shared_services.performance_aggregator import PerformanceAggregator, RollingSum, SnapshotLog
+
+NOW = 1_700_000_000.0
+
+
+def _executions(n, seed=11):
+    rng = random.Random(seed)
+    return [{'id': i + 1, 'timestamp': NOW - (n - i) * 60.0, 'usd_value': round(rng.uniform(10, 500), 2),
+             'metadata': {'pnl_usd': rng.choice([0.0, round(rng.gauss(0, 10), 2)])}} for i in range(n)]
+
+
+def test_running_totals_match_full_recompute():
+    executions = _executions(500)
+    aggregator = PerformanceAggregator()
+    for start in range(0, 500, 37):
+        aggregator.record_executions(reversed(executions[start:start + 37]))  # tracker returns newest first
+    aggregator.record_executions(executions[:100])  # already seen
+
+    pnls = [e['metadata']['pnl_usd'] for e in executions]
+    newest_first = list(reversed(pnls))
+    streak = lambda won: next((i for i, p in enumerate(newest_first) if not won(p)), len(pnls))
+    summary = aggregator.summary(now=NOW)
+
+    assert summary['total_trades'] == 500 and aggregator.last_id == 500
+    assert summary['total_pnl_usd'] == pytest.approx(sum(pnls))
+    assert summary['winning_trades'] == sum(p > 0 for p in pnls)
+    assert summary['losing_trades'] == sum(p < 0 for p in pnls)
+    assert summary['avg_trade_size_usd'] == pytest.approx(sum(e['usd_value'] for e in executions) / 500)
+    assert summary['largest_win_usd'] == max(pnls) and summary['largest_loss_usd'] == min(pnls)
+    assert summary['consecutive_wins'] == streak(lambda p: p > 0)
+    assert summary['consecutive_losses'] == streak(lambda p: p < 0)
+    assert summary['window_pnl_usd']['1h'] == pytest.approx(sum(pnls[-60:]))
+
+
+def test_rolling_windows_drop_expired_buckets_and_take_late_trades():
+    window = RollingSum(3600, buckets=60)
+    window.add(NOW - 3000, 5.0)
+    window.add(NOW - 30, 2.0)
+    window.add(NOW - 1800, 1.0)  # arrives after a newer trade
+    window.expire(NOW)
+    assert (window.total, window.count) == (8.0, 3)
+
+    window.expire(NOW + 700)  # oldest trade is now more than one bucket outside the window
+    assert (window.total, window.count) == (3.0, 2)
+    window.expire(NOW + 7200)
+    assert (window.total, window.count) == (0.0, 0)
+
+    aggregator = PerformanceAggregator()
+    aggregator.record(10.0, timestamp=NOW - 2 * 86400)
+    aggregator.record(-4.0, timestamp=NOW - 600)
+    assert aggregator.window_pnl('1h', now=NOW) == -4.0
+    assert aggregator.window_pnl('24h', now=NOW) == -4.0
+    assert aggregator.window_pnl('7d', now=NOW) == 6.0
+
+
+def test_executions_from_another_tracker_are_picked_up_by_id(tmp_path):
+    from src.scripts.database.execution_tracker import ExecutionTracker
+
+    db_path = str(tmp_path / "executions.db")
+    writer, reader = ExecutionTracker(db_path), ExecutionTracker(db_path)
+    for pnl in (3.0, -1.0):
+        writer.log_execution("copybot", "wallet", "SELL", usd_value=50.0, status="SUCCESS", metadata={'pnl_usd': pnl})
+
+    aggregator = PerformanceAggregator()
+    aggregator.record_executions(reader.get_executions(limit=1000))
+    writer.log_execution("risk", "wallet", "SELL", usd_value=20.0, status="SUCCESS", metadata={'pnl_usd': -2.0})
+
+    new_rows = reader.get_executions_after(aggregator.last_id)
+    assert [row['metadata']['pnl_usd'] for row in new_rows] == [-2.0]
+    aggregator.record_executions(new_rows)
+    summary = aggregator.summary()
+    assert summary['total_pnl_usd'] == 0.0 and summary['consecutive_losses'] == 2
+    assert summary['avg_trade_size_usd'] == 40.0
+
+
+def test_snapshot_log_appends_and_compacts(tmp_path):
+    log = SnapshotLog(tmp_path / "snapshots.jsonl", keep=3)
+    for i in range(6):
+        log.append({'n': i})
+    with open(log.path, 'a') as f:
+        f.write('{"n": 6, "tor')  # crash mid-write
+
+    reloaded = SnapshotLog(log.path, keep=3)
+    assert reloaded.load() == [{'n': 3}, {'n': 4}, {'n': 5}]
+    assert reloaded.needs_compaction
+
+    reloaded.rewrite(reloaded.load())
+    assert [json.loads(line) for line in log.path.read_text().splitlines()] == [{'n': 3}, {'n': 4}, {'n': 5}]
+    assert not reloaded.needs_compaction
+
+
+
+def test_keyed_log_keeps_agents_that_stopped_updating(tmp_path):
+    log = SnapshotLog(tmp_path / "agent_performance.jsonl", keep=1000, key='agent_name')
+    log.append({'agent_name': 'A', 'trades': 1})
+    for i in range(1500):
+        log.append({'agent_name': 'B', 'trades': i})
+
+    reloaded = SnapshotLog(log.path, keep=1000, key='agent_name')
+    assert reloaded.load() == [{'agent_name': 'A', 'trades': 1}, {'agent_name': 'B', 'trades': 1499}]
+    assert not reloaded.needs_compaction
+
+    for i in range(600):
+        reloaded.append({'agent_name': 'B', 'trades': 1500 + i})
+    assert reloaded.needs_compaction
+    reloaded.rewrite(SnapshotLog(log.path, keep=1000, key='agent_name').load())
+    assert [json.loads(line)['agent_name'] for line in log.path.read_text().splitlines()] == ['A', 'B']
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
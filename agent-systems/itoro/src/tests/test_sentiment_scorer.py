@@ -0,0 +1,89 @@
+"""
+Tests: sentiment scorer batches texts by length, only runs the model on unseen texts and persists scores
+Run: python -m pytest src/tests/test_sentiment_scorer.py
+
+A word-count backend stands in for BERT so the batching and caching run without the model download.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.scripts.data_processing.sentiment_scorer import ScoreCache, SentimentScorer, length_buckets
+
+
+class WordBackend:
+    """One token per word; score is +1 per 'moon', -1 per 'rug', averaged"""
+
+    variant = "words:test"
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts):
+        return [text.split() for text in texts]
+
+    def predict(self, encoded):
+        self.batches.append([len(ids) for ids in encoded])
+        return [(ids.count('moon') - ids.count('rug')) / len(ids) for ids in encoded]
+
+    @property
+    def scored(self):
+        return sum(len(batch) for batch in self.batches)
+
+
+def test_length_buckets_group_similar_lengths_within_limits():
+    lengths = [3, 40, 4, 38, 5, 3, 39, 120, 2]
+    batches = length_buckets(lengths, max_batch_size=3, max_batch_tokens=100)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    for batch in batches:
+        longest = max(lengths[i] for i in batch)
+        assert len(batch) <= 3
+        assert len(batch) * longest <= 100 or len(batch) == 1
+    assert [lengths[i] for i in batches[0]] == [2, 3, 3]
+    assert [lengths[i] for i in batches[-1]] == [120]  # oversized text gets a batch of its own
+
+    padded = sum(len(b) * max(lengths[i] for i in b) for b in batches)
+    fixed = sum(len(lengths[i:i + 3]) * max(lengths[i:i + 3]) for i in range(0, len(lengths), 3))
+    assert padded < fixed
+
+
+def test_only_new_texts_reach_the_model(tmp_path):
+    backend = WordBackend()
+    scorer = SentimentScorer(backend, ScoreCache(str(tmp_path / "cache.db")), max_batch_size=4)
+
+    first = ["sol to the moon", "rug pull again", "sol to the moon", "quiet day"]
+    assert scorer.score(first) == [0.25, -1 / 3, 0.25, 0.0]
+    assert backend.scored == 3  # duplicate within a cycle scored once
+
+    second = ["rug pull again", "moon moon", "quiet day"]
+    assert scorer.score(second) == [-1 / 3, 1.0, 0.0]
+    assert backend.scored == 4
+
+    stats = scorer.get_stats()
+    assert stats['texts'] == 7 and stats['cache_hits'] == 3 and stats['scored'] == 4
+
+
+def test_scores_persist_across_processes(tmp_path):
+    db = str(tmp_path / "cache.db")
+    texts = [f"tweet {i} {'moon ' * (i % 5)}" for i in range(600)]
+    expected = SentimentScorer(WordBackend(), ScoreCache(db)).score(texts)
+
+    backend = WordBackend()
+    restarted = SentimentScorer(backend, ScoreCache(db))
+    assert restarted.score(texts) == pytest.approx(expected)
+    assert backend.batches == []
+
+    # Same text under another model variant is not a hit
+    other = WordBackend()
+    other.variant = "words:other"
+    SentimentScorer(other, ScoreCache(db)).score(texts[:1])
+    assert other.scored == 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
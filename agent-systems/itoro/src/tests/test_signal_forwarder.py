@@ -0,0 +1,257 @@
+"""
+Tests: signals are forwarded in batched authenticated POSTs off the caller's thread, spooled and retried on failure,
+and endpoints that take one signal per POST still receive every signal; whale rankings keep one message per wallet
+Run: python -m pytest src/tests/test_signal_forwarder.py
+
+Uses a local HTTP stand-in for the commerce ingest endpoint; nothing touches the network.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.integration import signal_forwarder
+from src.integration.signal_forwarder import SignalForwarder
+
+
+class LocalIngestServer:
+    """Ingest stand-in: records batches, can be slowed down or made to fail"""
+
+    def __init__(self, accepts_envelope=True):
+        self.batches = []
+        self.api_keys = []
+        self.status = 200
+        self.delay = 0.0
+        self.accepts_envelope = accepts_envelope
+        self.invalid_ids = set()  # Signals answered with 422 in single-payload mode
+        self.connections = set()
+        outer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                time.sleep(outer.delay)
+                outer.connections.add(self.client_address)
+                outer.api_keys.append(self.headers.get('X-API-Key'))
+                status = outer.status
+                if status == 200 and "signals" in body:
+                    status = 200 if outer.accepts_envelope else 422
+                elif status == 200:
+                    status = 422 if body["signal_id"] in outer.invalid_ids else 200
+                if status == 200:
+                    outer.batches.append(body["signals"] if "signals" in body else [body])
+                payload = b'{"status": "accepted"}'
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/api/signals/ingest"
+
+    @property
+    def delivered(self):
+        return [signal["signal_id"] for batch in self.batches for signal in batch]
+
+    def close(self):
+        self._server.shutdown()
+
+
+@pytest.fixture
+def server():
+    server = LocalIngestServer()
+    yield server
+    server.close()
+
+
+def _payload(i):
+    return {"signal_id": f"sig-{i}", "symbol": "SOL", "action": "BUY", "confidence": 0.8}
+
+
+def test_slow_endpoint_does_not_block_submit_and_signals_are_batched(server, tmp_path):
+    server.delay = 0.2
+    forwarder = SignalForwarder(server.url, "secret", spool_dir=tmp_path, max_batch_size=50).start()
+    try:
+        started = time.perf_counter()
+        for i in range(120):
+            forwarder.submit(_payload(i))
+        submit_time = time.perf_counter() - started
+
+        assert submit_time < 0.1
+        assert forwarder.flush(timeout=10)
+    finally:
+        forwarder.stop()
+
+    assert server.delivered == [f"sig-{i}" for i in range(120)]
+    assert len(server.batches) <= 4
+    assert set(server.api_keys) == {"secret"}
+    assert len(server.connections) == 1  # one keep-alive connection for every batch
+    stats = forwarder.get_stats()
+    assert stats['delivered'] == 120 and stats['lag_sec'] == 0.0
+
+
+def test_failed_batches_are_spooled_and_retried_with_backoff(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(signal_forwarder, "RETRY_DELAY_SEC", 0.2)
+    server.status = 503
+    forwarder = SignalForwarder(server.url, "secret", spool_dir=tmp_path, max_batch_wait=0.05).start()
+    try:
+        for i in range(5):
+            forwarder.submit(_payload(i))
+        assert not forwarder.flush(timeout=0.5)
+
+        stats = forwarder.get_stats()
+        assert stats['spooled_pending'] == 5 and stats['delivered'] == 0
+        assert stats['lag_sec'] >= 0.4
+        assert server.batches == []
+
+        server.status = 200
+        assert forwarder.flush(timeout=10)
+    finally:
+        forwarder.stop()
+
+    assert server.delivered == [f"sig-{i}" for i in range(5)]
+    assert forwarder.stats['retries'] >= 1
+    assert list(tmp_path.glob("*.json")) == []
+
+
+def test_spool_survives_restart(server, tmp_path):
+    unreachable = SignalForwarder("http://127.0.0.1:9/ingest", "secret", spool_dir=tmp_path)
+    for i in range(3):
+        unreachable.submit(_payload(i))
+    unreachable.stop()  # never started: queued signals go to the spool
+    assert unreachable.get_stats()['spooled_pending'] == 3
+
+    forwarder = SignalForwarder(server.url, "secret", spool_dir=tmp_path).start()
+    try:
+        assert forwarder.flush(timeout=10)
+    finally:
+        forwarder.stop()
+    assert server.delivered == ["sig-0", "sig-1", "sig-2"]
+
+
+def test_permanent_rejection_is_dropped_not_retried(server, tmp_path):
+    server.status = 422
+    forwarder = SignalForwarder(server.url, "secret", spool_dir=tmp_path, max_batch_wait=0.05).start()
+    try:
+        forwarder.submit(_payload(0))
+        assert forwarder.flush(timeout=5)
+    finally:
+        forwarder.stop()
+    assert forwarder.stats['rejected'] == 1
+    assert forwarder.stats['spooled'] == 0
+
+
+def test_auth_and_routing_errors_are_retried_not_dropped(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(signal_forwarder, "RETRY_DELAY_SEC", 0.1)
+    server.status = 401
+    forwarder = SignalForwarder(server.url, "secret", spool_dir=tmp_path, max_batch_wait=0.05).start()
+    try:
+        forwarder.submit(_payload(0))
+        assert not forwarder.flush(timeout=0.3)
+        server.status = 200
+        assert forwarder.flush(timeout=5)
+    finally:
+        forwarder.stop()
+    assert server.delivered == ["sig-0"]
+    assert forwarder.stats['rejected'] == 0
+
+
+def test_single_payload_endpoint_gets_every_signal_one_per_post(tmp_path):
+    server = LocalIngestServer(accepts_envelope=False)
+    server.invalid_ids = {"sig-3"}
+    forwarder = SignalForwarder(server.url, "secret", spool_dir=tmp_path, max_batch_wait=0.05).start()
+    try:
+        for i in range(5):
+            forwarder.submit(_payload(i))
+        assert forwarder.flush(timeout=5)
+        posts_after_fallback = len(server.api_keys)
+
+        for i in range(5, 8):
+            forwarder.submit(_payload(i))
+        assert forwarder.flush(timeout=5)
+    finally:
+        forwarder.stop()
+        server.close()
+
+    assert server.delivered == [f"sig-{i}" for i in range(8) if i != 3]
+    assert all(len(batch) == 1 for batch in server.batches)
+    stats = forwarder.get_stats()
+    assert stats['rejected'] == 1 and stats['envelope_fallbacks'] == 1
+    # Once single POSTs work the envelope is not tried again
+    assert len(server.api_keys) - posts_after_fallback == 3
+
+
+def test_partial_single_delivery_spools_only_the_rest(tmp_path, monkeypatch):
+    monkeypatch.setattr(signal_forwarder, "RETRY_DELAY_SEC", 0.1)
+    server = LocalIngestServer()
+    forwarder = SignalForwarder(server.url, "secret", spool_dir=tmp_path, batch_mode="single")
+    calls = []
+    post = forwarder._post
+
+    def flaky_post(body, count):
+        calls.append(body["signal_id"])
+        if len(calls) in (3, 5):  # Once on the first send, once while replaying the spool
+            return 503, "busy"
+        return post(body, count)
+
+    forwarder._post = flaky_post
+    try:
+        for i in range(4):
+            forwarder.submit(_payload(i))
+        forwarder.start()
+        assert forwarder.flush(timeout=5)
+    finally:
+        forwarder.stop()
+        server.close()
+
+    assert server.delivered == ["sig-0", "sig-1", "sig-2", "sig-3"]
+    assert calls == ["sig-0", "sig-1", "sig-2", "sig-2", "sig-3", "sig-3"]
+    assert list(tmp_path.glob("*.json")) == []
+
+
+def test_unknown_batch_mode_is_refused(tmp_path):
+    with pytest.raises(ValueError):
+        SignalForwarder("http://127.0.0.1:9/ingest", "secret", spool_dir=tmp_path, batch_mode="bulk")
+
+
+def test_whale_rankings_keep_per_wallet_messages(monkeypatch):
+    core_bridge = pytest.importorskip("src.integration.core_bridge")
+    published = []
+
+    class Bus:
+        def publish_signal(self, signal, topic):
+            published.append((topic, signal))
+
+    class Wallet:
+        def __init__(self, address, score):
+            self.address = address
+            self.score = score
+            self.rank = 1
+            self.last_active = "2026-10-01T00:00:00"
+
+    monkeypatch.setattr(core_bridge, "get_global_event_bus", lambda: Bus())
+    core_bridge.publish_whale_rankings([Wallet("wallet-a", 0.9), Wallet("wallet-b", 0.7)])
+
+    per_wallet = [signal for topic, signal in published if topic == core_bridge.WHALE_RANKINGS_TOPIC]
+    snapshots = [signal for topic, signal in published if topic == core_bridge.WHALE_RANKINGS_SNAPSHOT_TOPIC]
+    assert [signal.symbol for signal in per_wallet] == ["wallet-a", "wallet-b"]
+    assert [signal.confidence for signal in per_wallet] == [0.9, 0.7]
+    assert len(snapshots) == 1 and snapshots[0].raw_payload["count"] == 2
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,165 @@
+"""
+Tests: snapshot outbox dedups enqueues, keeps rows through failed flushes, survives local errors and restarts for later owners,
+and the REST backend never duplicates history rows when retrying without the idempotency index
+Run: python -m pytest src/tests/test_snapshot_outbox.py
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.scripts.database import snapshot_outbox as so
+
+
+class FakeCloud:
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+
+    def send(self, rows):
+        if self.fail:
+            raise ConnectionError("cloud unreachable")
+        self.batches.append([row['idempotency_key'] for row in rows])
+        return len(rows)
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_enqueue_dedups_and_flush_batches_in_order(tmp_path):
+    cloud = FakeCloud()
+    outbox = so.SnapshotOutbox(str(tmp_path / "outbox.db"), batch_size=2, send_batch=cloud.send)
+    stamp = datetime(2026, 1, 1, 12, 0, 0)
+    keys = [so.make_idempotency_key('tracker', stamp.replace(minute=i)) for i in range(3)]
+
+    for key in keys + keys[:1]:  # re-enqueue of the first snapshot
+        assert outbox.enqueue({'total_value_usd': 1.0}, key)
+    assert outbox.get_pending_count() == 3 and outbox.total_enqueued == 3
+
+    assert outbox.flush() == 3
+    assert cloud.batches == [keys[:2], keys[2:]]
+    assert outbox.get_stats()['pending'] == 0 and outbox.get_replication_lag() == 0.0
+
+
+def test_failed_flush_keeps_rows_and_backs_off(tmp_path):
+    cloud = FakeCloud()
+    outbox = so.SnapshotOutbox(str(tmp_path / "outbox.db"), flush_interval=1.0, send_batch=cloud.send)
+    outbox.enqueue({'total_value_usd': 1.0}, 'a')
+    cloud.fail = True
+
+    assert outbox.flush() == 0
+    assert outbox.flush() == 0
+    stats = outbox.get_stats()
+    assert stats['pending'] == 1 and stats['failed_batches'] == 2 and stats['retry_backoff_seconds'] == 2.0
+
+    cloud.fail = False
+    assert outbox.flush() == 1 and cloud.batches == [['a']]
+    assert outbox.get_stats()['retry_backoff_seconds'] == 0.0
+
+
+def test_flusher_survives_local_outbox_errors(tmp_path, monkeypatch):
+    cloud = FakeCloud()
+    outbox = so.SnapshotOutbox(str(tmp_path / "outbox.db"), flush_interval=0.05, max_backoff=0.05,
+                               send_batch=cloud.send)
+    read_batch = outbox._read_batch
+    failures = []
+
+    def flaky_read():
+        if len(failures) < 2:
+            failures.append(1)
+            raise RuntimeError("database is locked")
+        return read_batch()
+
+    monkeypatch.setattr(outbox, '_read_batch', flaky_read)
+    outbox.start()
+    try:
+        outbox.enqueue({'total_value_usd': 1.0}, 'a')
+        assert _wait_for(lambda: cloud.batches == [['a']])
+        assert outbox._flusher_thread.is_alive() and len(failures) == 2
+    finally:
+        outbox.stop()
+
+
+def test_shared_outbox_keeps_flushing_until_last_owner_releases(tmp_path, monkeypatch):
+    monkeypatch.setattr(so, '_snapshot_outboxes', {})
+    monkeypatch.setattr(so, '_snapshot_outbox_users', {})
+    path = str(tmp_path / "outbox.db")
+
+    first, second = so.get_snapshot_outbox(path), so.get_snapshot_outbox(path)
+    assert first is second
+    so.release_snapshot_outbox(path)
+    assert first._flusher_thread.is_alive()
+
+    so.release_snapshot_outbox(path)
+    assert not first._flusher_thread.is_alive()
+
+    # A tracker created later in the same process gets a running flusher again
+    third = so.get_snapshot_outbox(path)
+    try:
+        assert third is first and third._flusher_thread.is_alive()
+    finally:
+        so.release_snapshot_outbox(path)
+
+
+def test_rest_backend_inserts_rows_singly_without_migration_and_feeds_paper_portfolio(monkeypatch):
+    from src.scripts.database import cloud_database_rest as rest
+
+    class Response:
+        def __init__(self, status_code, body=None):
+            self.status_code, self.ok, self._body = status_code, status_code < 300, body or {}
+
+        def json(self):
+            return self._body
+
+    posts = []
+    stored = set()
+
+    def post(url, headers=None, data=None, timeout=None):
+        path = url.rsplit('/', 1)[-1]
+        posts.append((path, headers['Prefer'], data))
+        if 'on_conflict' in url:
+            return Response(400, {'code': '42P10'})  # no unique index for on_conflict
+        if path == 'portfolio_history' and '"total_value_usd": 6.0' in data:
+            return Response(503)  # second row of the batch fails
+        if path == 'portfolio_history':
+            stored.update(row['timestamp'] for row in json.loads(data))
+        return Response(201)
+
+    def get(url, headers=None, params=None, timeout=None):
+        return Response(200, [{'id': 1}] if params['timestamp'][3:] in stored else [])
+
+    monkeypatch.setenv('SUPABASE_URL', 'https://example.supabase.co')
+    monkeypatch.setenv('SUPABASE_SERVICE_ROLE', 'key')
+    monkeypatch.setattr(rest.requests, 'post', post)
+    monkeypatch.setattr(rest.requests, 'get', get)
+    manager = rest.RestDatabaseManager()
+    rows = [{'timestamp': f'2026-01-01T00:0{i}:00+00:00', 'total_value_usd': 5.0 + i, 'metadata': {},
+             'idempotency_key': f'k{i}'} for i in range(2)]
+
+    with pytest.raises(RuntimeError):
+        manager.save_portfolio_history_batch(rows)
+    assert [path for path, _, _ in posts] == [
+        'portfolio_history?on_conflict=idempotency_key', 'portfolio_history', 'portfolio_history']
+    assert 'idempotency_key' not in posts[1][2] and len(json.loads(posts[1][2])) == 1
+
+    # The retry skips the row that made it in and only sends the failed one again
+    posts.clear()
+    rows[1]['total_value_usd'] = 7.0
+    assert manager.save_portfolio_history_batch(rows) == 2
+    assert [path for path, _, _ in posts] == ['portfolio_history', 'paper_trading_portfolio']
+    assert '"total_value_usd": 7.0' in posts[0][2] and '"total_value_usd": 5.0' in posts[1][2]
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
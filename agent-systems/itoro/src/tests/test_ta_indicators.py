@@ -0,0 +1,136 @@
+"""
+Tests: streaming indicators match the batch TechnicalAnalysis functions exactly
+Run: python -m pytest src/tests/test_ta_indicators.py
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.ta_indicators import (
+    ta, SMA, EMA, RSI, MACD, BollingerBands, ATR, IndicatorEngine,
+)
+
+
+def _price_paths(n_paths=12, seed=3):
+    """Random walks plus the awkward cases: flat runs, rounded prices, negatives"""
+    rng = np.random.default_rng(seed)
+    paths = []
+    for i in range(n_paths):
+        n = int(rng.integers(40, 160))
+        prices = (100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))).tolist()
+        if i % 3 == 0:
+            prices[10:45] = [5.0] * 35
+        if i % 4 == 0:
+            prices = [round(p, 2) for p in prices]
+        if i == 5:
+            prices = [p - 100 for p in prices]
+        paths.append(prices)
+    return paths
+
+
+def test_streaming_matches_batch_every_bar():
+    for prices in _price_paths():
+        sma, ema, rsi, macd, bbands = SMA(20), EMA(20), RSI(14), MACD(), BollingerBands()
+        for i, price in enumerate(prices):
+            history = prices[:i + 1]
+            assert sma.update(price) == ta.sma(history, 20)
+            assert ema.update(price) == ta.ema(history, 20)
+            assert rsi.update(price) == ta.rsi(history, 14)
+
+            macd_value = macd.update(price)
+            expected = ta.macd(history)
+            assert macd_value == (None if expected.empty else tuple(expected.iloc[-1]))
+
+            bb_value = bbands.update(price)
+            expected = ta.bbands(history)
+            assert bb_value == (None if expected.empty else tuple(expected.iloc[-1]))
+
+
+def test_wilder_rsi_matches_reference():
+    for prices in _price_paths(n_paths=4):
+        length = 14
+        rsi = RSI(length, wilder=True)
+        values = [rsi.update(p) for p in prices]
+
+        deltas = [b - a for a, b in zip(prices, prices[1:])]
+        gains = [d if d > 0 else 0 for d in deltas]
+        losses = [-d if d < 0 else 0 for d in deltas]
+        avg_gain = sum(gains[:length]) / length
+        avg_loss = sum(losses[:length]) / length
+        for i in range(length, len(deltas) + 1):
+            if i > length:
+                avg_gain = (avg_gain * (length - 1) + gains[i - 1]) / length
+                avg_loss = (avg_loss * (length - 1) + losses[i - 1]) / length
+            expected = 100 if avg_loss == 0 else 100 - (100 / (1 + avg_gain / avg_loss))
+            assert values[i] == expected
+        assert all(v is None for v in values[:length])
+
+
+def test_atr_matches_reference():
+    rng = np.random.default_rng(11)
+    close = (100 * np.exp(np.cumsum(rng.normal(0, 0.02, 120)))).tolist()
+    high = [c * (1 + abs(x)) for c, x in zip(close, rng.normal(0, 0.01, 120))]
+    low = [c * (1 - abs(x)) for c, x in zip(close, rng.normal(0, 0.01, 120))]
+
+    length = 14
+    true_ranges = [high[0] - low[0]] + [
+        max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+        for i in range(1, len(close))
+    ]
+    expected = [None] * (length - 1)
+    value = sum(true_ranges[:length]) / length
+    expected.append(value)
+    for tr in true_ranges[length:]:
+        value = (value * (length - 1) + tr) / length
+        expected.append(value)
+
+    atr = ATR(length)
+    assert [atr.update(h, l, c) for h, l, c in zip(high, low, close)] == expected
+
+    batch = ta.atr(high, low, close, length)
+    assert batch.iloc[:length - 1].isna().all()
+    assert batch.iloc[length - 1:].tolist() == expected[length - 1:]
+
+
+def test_engine_warm_up_then_update_matches_batch():
+    prices = _price_paths(n_paths=1, seed=9)[0]
+    highs = [p * 1.01 for p in prices]
+    lows = [p * 0.99 for p in prices]
+
+    engine = IndicatorEngine()
+    engine.warm_up("SOL", "1h", np.array(prices[:-5]), np.array(highs[:-5]), np.array(lows[:-5]))
+    for price, high, low in zip(prices[-5:], highs[-5:], lows[-5:]):
+        values = engine.update("SOL", "1h", price, high, low)
+
+    assert values["sma_20"] == ta.sma(prices, 20)
+    assert values["sma_50"] == ta.sma(prices, 50)
+    assert values["ema_20"] == ta.ema(prices, 20)
+    assert values["rsi"] == ta.rsi(prices, 14)
+    assert (values["macd"], values["macd_hist"], values["macd_signal"]) == tuple(ta.macd(prices).iloc[-1])
+    assert (values["bb_lower"], values["bb_mid"], values["bb_upper"]) == tuple(ta.bbands(prices).iloc[-1])
+    assert values["atr"] == ta.atr(highs, lows, prices).iloc[-1]
+
+    # Any split between warm-up history and live bars gives the same values
+    for split in (1, 13, 14, 15, 20, 26, 27, 50, len(prices) - 1):
+        engine.warm_up("BONK", "15m", prices[:split], highs[:split], lows[:split])
+        for price, high, low in zip(prices[split:], highs[split:], lows[split:]):
+            split_values = engine.update("BONK", "15m", price, high, low)
+        assert split_values == values
+
+    # State is per (symbol, timeframe)
+    assert engine.get("SOL", "4h") is None
+    engine.update("SOL", "4h", prices[0])
+    assert engine.get("SOL", "4h")["sma_20"] is None
+    assert len(engine) == 3
+
+
+if __name__ == "__main__":
+    test_streaming_matches_batch_every_bar()
+    test_wilder_rsi_matches_reference()
+    test_atr_matches_reference()
+    test_engine_warm_up_then_update_matches_batch()
+    print("All streaming indicator tests passed")
@@ -0,0 +1,102 @@
+"""
+Tests: only mint-account decimals are long-cached, Birdeye decimals expire quickly and one lookup reads each mint once
+Run: python -m pytest src/tests/test_token_metadata_service.py
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.scripts.data_processing import token_metadata_service as tms
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setenv("BIRDEYE_API_KEY", "key")
+    monkeypatch.setattr(tms, "USE_PARALLEL_PROCESSING", False)
+    rpc_calls = []
+    mint_accounts = {"MINT_READ": 6}
+
+    def build():
+        svc = tms.TokenMetadataService(db_path=str(tmp_path / "token_metadata.db"))
+        svc._fetch_birdeye_metadata = lambda mint: (
+            {"symbol": mint[:4], "name": mint, "decimals": 9, "logo": ""} if mint != "NOWHERE" else None
+        )
+
+        def rpc(mints):
+            rpc_calls.append(list(mints))
+            return {mint: mint_accounts[mint] for mint in mints if mint in mint_accounts}
+
+        svc._fetch_decimals_rpc_batch = rpc
+        return svc
+
+    return build, rpc_calls
+
+
+def test_mint_account_decimals_override_birdeye_default(service):
+    build, rpc_calls = service
+    svc = build()
+    metadata = svc.get_metadata_batch(["MINT_READ", "BIRDEYE_ONLY"])
+
+    assert rpc_calls == [["MINT_READ", "BIRDEYE_ONLY"]]
+    assert metadata["MINT_READ"]["decimals"] == 6
+    assert svc.decimals_cache["MINT_READ"][2] is True
+    assert svc.decimals_cache["MINT_READ"][1] > time.time() + 300 * 86400
+
+    # Birdeye's value is served briefly but not treated as authoritative
+    decimals, expiry, verified = svc.decimals_cache["BIRDEYE_ONLY"]
+    assert (decimals, verified) == (9, False) and expiry <= time.time() + tms.UNVERIFIED_DECIMALS_SECONDS
+
+    # A restart keeps the distinction
+    restarted = build()
+    assert restarted.decimals_cache["MINT_READ"][2] is True
+    assert restarted.decimals_cache["BIRDEYE_ONLY"][2] is False
+    assert restarted.store.get_decimals("MINT_READ") == 6
+
+
+def test_unresolvable_mint_is_read_over_rpc_once(service):
+    build, rpc_calls = service
+    svc = build()
+
+    assert svc.get_token_decimals("NOWHERE") == 9
+    assert rpc_calls == [["NOWHERE"]]
+    svc.get_metadata("NOWHERE")
+    svc.get_metadata_batch(["NOWHERE"])
+    assert rpc_calls == [["NOWHERE"]]
+
+
+def test_unverified_decimals_never_replace_a_mint_read(service):
+    build, _ = service
+    svc = build()
+    svc.get_decimals_batch(["MINT_READ"])
+    svc._cache_decimals({"MINT_READ": 9}, verified=False)
+
+    assert svc.get_token_decimals("MINT_READ") == 6
+    assert build().store.get_decimals("MINT_READ") == 6
+
+
+def test_decimals_from_older_stores_are_reverified(tmp_path):
+    import sqlite3
+
+    db_path = str(tmp_path / "old_metadata.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        CREATE TABLE token_metadata (token_mint TEXT PRIMARY KEY, metadata TEXT, expiry_time INTEGER DEFAULT 0,
+                                     decimals INTEGER, decimals_expiry_time INTEGER DEFAULT 0, update_time INTEGER)
+    ''')
+    conn.execute("INSERT INTO token_metadata VALUES ('OLD', NULL, 0, 9, ?, 0)", (int(time.time()) + 300 * 86400,))
+    conn.commit()
+    conn.close()
+
+    rows = tms.TokenMetadataStore(db_path).load_valid()
+    (mint, _, _, decimals, decimals_expiry, verified), = rows
+    assert (mint, decimals, verified) == ('OLD', 9, False)
+    assert decimals_expiry <= time.time() + tms.UNVERIFIED_DECIMALS_SECONDS
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,123 @@
+"""
+Tests: the vectorized screening backtester matches backtesting.py on the reference strategies,
+and generated generate_signals() code runs outside the screening process
+Run: python -m pytest src/tests/test_vector_backtester.py
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("backtesting")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.scripts.utilities.vector_backtester import (
+    REFERENCE_STRATEGIES, compute_signals_isolated, cross_check, load_ohlcv, screen_candidates,
+    signals_to_positions, sma_cross_signals, vector_backtest,
+)
+
+DATA_FILE = Path(__file__).parent.parent / "data" / "rbi" / "ETH-USD-1h.csv"
+
+# Large cash makes backtesting.py's whole-unit position sizing negligible
+CASH = 1e11
+
+
+def test_signals_become_next_bar_positions():
+    signals = np.array([np.nan, np.nan, 1, np.nan, -1, 0, np.nan])
+    # Bar 2 is the last warm-up bar for backtesting.py (first next() call is at bar 3)
+    assert signals_to_positions(signals).tolist() == [0, 0, 0, 0, 1, -1, 0]
+    assert signals_to_positions(np.full(4, np.nan)).tolist() == [0, 0, 0, 0]
+
+
+def test_matches_backtesting_py_on_reference_strategies():
+    ohlcv = load_ohlcv(DATA_FILE)
+    comparison = cross_check(ohlcv, commission=0.002, slippage=0.0005, cash=CASH)
+    assert len(comparison) == len(REFERENCE_STRATEGIES) * 7
+
+    for _, row in comparison.iterrows():
+        if row['metric'] in ('trades', 'win_rate', 'exposure_pct'):
+            assert row['vectorized'] == pytest.approx(row['backtesting_py'], abs=1e-9), row.to_dict()
+        else:
+            assert row['vectorized'] == pytest.approx(row['backtesting_py'], rel=1e-3), row.to_dict()
+
+
+def test_open_position_is_marked_to_last_close():
+    opens = np.array([100.0, 100.0, 110.0, 120.0])
+    closes = np.array([100.0, 105.0, 115.0, 130.0])
+    result = vector_backtest(opens, closes, [0, 1, 1, 1], commission=0.0, cash=1000, return_equity=True)
+
+    # Long from bar 2's open at 110, still open at the end
+    assert result['equity'].tolist() == pytest.approx([1000, 1000, 1000 * 115 / 110, 1000 * 130 / 110])
+    assert result['trades'] == 0
+    assert np.isnan(result['win_rate'])
+
+
+def test_screen_flags_candidates_against_thresholds():
+    ohlcv = load_ohlcv(DATA_FILE)
+    candidates = {
+        'fast': sma_cross_signals(ohlcv, 10, 30),
+        'slow': sma_cross_signals(ohlcv, 20, 100),
+        'idle': np.zeros(len(ohlcv)),
+    }
+    screened = screen_candidates(ohlcv, candidates, thresholds={'min_trades': 5})
+    passed = dict(zip(screened['candidate'], screened['passed']))
+
+    assert passed == {'fast': False, 'slow': True, 'idle': False}
+    assert screened['return_pct'].is_monotonic_decreasing
+
+
+GENERATED_CODE = """
+import os
+import numpy as np
+from backtesting import Strategy
+
+def _sma(values, period):
+    out = np.full(len(values), np.nan)
+    out[period - 1:] = np.convolve(values, np.ones(period) / period, mode='valid')
+    return out
+
+def generate_signals(data):
+    with open({pid_file!r}, 'w') as f:
+        f.write(str(os.getpid()))
+    close = data['Close'].to_numpy(dtype=float)
+    fast, slow = _sma(close, 10), _sma(close, 30)
+    return np.where(np.isnan(slow), np.nan, np.sign(fast - slow))
+
+class Strat(Strategy):
+    def init(self):
+        pass
+
+    def next(self):
+        pass
+
+raise SystemExit("module-level backtest code must not run during the screen")
+"""
+
+
+def test_generated_signals_are_computed_in_a_separate_process(tmp_path):
+    pid_file = tmp_path / "pid.txt"
+    code_path = tmp_path / "Strat_BT.py"
+    code_path.write_text(GENERATED_CODE.format(pid_file=str(pid_file)))
+
+    signals = compute_signals_isolated(code_path, DATA_FILE)
+    np.testing.assert_array_equal(signals, sma_cross_signals(load_ohlcv(DATA_FILE), 10, 30))
+    assert int(pid_file.read_text()) != os.getpid()
+
+    code_path.write_text("print('no signals here')\n")
+    assert compute_signals_isolated(code_path, DATA_FILE) is None
+
+    code_path.write_text("def generate_signals(data):\n    return [1.0, 0.0]\n")
+    with pytest.raises(RuntimeError, match="2 values"):
+        compute_signals_isolated(code_path, DATA_FILE)
+
+    code_path.write_text("import time\ndef generate_signals(data):\n    time.sleep(30)\n")
+    with pytest.raises(RuntimeError, match="timed out"):
+        compute_signals_isolated(code_path, DATA_FILE, timeout=2)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,74 @@
+"""
+Tests: columnar wallet scoring matches the per-row _calculate_wallet_score and skips only malformed wallets
+Run: python -m pytest src/tests/test_whale_scoring.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+whale_agent = pytest.importorskip("src.agents.whale_agent")
+
+
+@pytest.fixture
+def agent():
+    return whale_agent.WhaleAgent.__new__(whale_agent.WhaleAgent)  # scoring needs no Apify client or scheduler
+
+
+def _wallets(n=400, seed=3):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "wallet_address": [f"wallet_{i:04d}" for i in range(n)],
+        "pnl_30d": rng.normal(20, 40, n),
+        "pnl_7d": rng.normal(5, 20, n),
+        "pnl_1d": rng.normal(0, 8, n),
+        "realized_profit_30d": rng.lognormal(11, 1.2, n),
+        "winrate_7d": rng.uniform(0, 1, n),
+        "txs_30d": rng.integers(0, 12000, n),
+        "token_active": rng.integers(0, 1200, n),
+        "avg_holding_period_7d": rng.uniform(0, 30 * 86400, n),
+        "is_blue_verified": rng.random(n) < 0.1,
+    })
+    df["risk"] = [{"token_active": int(t)} if i % 5 == 0 else None for i, t in enumerate(df["token_active"])]
+    return df.astype(object)
+
+
+def _legacy_scores(agent, df):
+    return np.array([agent._calculate_wallet_score(row.to_dict()) for _, row in df.iterrows()])
+
+
+def test_scores_match_per_row_reference(agent):
+    df = _wallets()
+    frame = agent._build_wallet_frame(df)
+    np.testing.assert_allclose(agent._score_wallet_frame(frame).to_numpy(), _legacy_scores(agent, df), atol=1e-12)
+    assert not frame["malformed"].any()
+
+
+def test_malformed_rows_are_skipped_not_the_whole_frame(agent):
+    df = _wallets()
+    qualifying = df.index[_legacy_scores(agent, df) > 0][:6]
+    df.loc[qualifying[0], "winrate_7d"] = "n/a"
+    df.loc[qualifying[1], "txs_30d"] = "lots"
+    df.loc[qualifying[2], "avg_holding_period_7d"] = None  # missing, not malformed
+    df.loc[qualifying[3], "pnl_1d"] = "--"  # pnl_1d was always parsed leniently
+    df.at[qualifying[4], "risk"] = {"token_active": "many"}
+
+    legacy = _legacy_scores(agent, df)
+    frame = agent._build_wallet_frame(df)
+    np.testing.assert_allclose(agent._score_wallet_frame(frame).to_numpy(), legacy, atol=1e-12)
+    assert frame["malformed"].sum() == 3
+
+    wallets = agent._process_wallet_data(df)
+    order = sorted((i for i in range(len(df)) if legacy[i] > 0), key=lambda i: (-legacy[i], i))
+    assert [w.address for w in wallets] == [df["wallet_address"].iloc[i] for i in order]
+    assert [w.rank for w in wallets] == list(range(1, len(wallets) + 1))
+    assert df["wallet_address"].iloc[qualifying[0]] not in {w.address for w in wallets}
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-q']))